@@ -7,7 +7,15 @@ import numpy as np
 import mysql.connector
 from datetime import date
 import os
+import argparse
 from db_config import get_db_connection, DB_CONFIG
+from catalogo_estados import ESTADOS, NOMBRE_ARRAY, POBLACION_ARRAY
+from catalogos import incrementar_version
+from archivos_entrada import abrir_csv, buscar_variante
+from esquema_datos import ESQUEMA_CASOS, ESQUEMA_HISTORICO, esquema_para, leer_csv
+from mantenimiento_db import ValidacionStagingError, asegurar_particiones, recarga_completa
+from features import actualizar_features, actualizar_tras_carga
+import analitica
 
 # --- 1. CONFIGURACIÓN Y DATOS ---
 
@@ -23,6 +31,7 @@ DATA_DIR = os.path.join(PROJECT_DIR, 'data')
 # Lista de archivos CSV con rutas absolutas (26 años de datos: 2000-2025)
 # dengue_historico_2000_2020.csv: generado por scripts/transform_clean_csv.py (CSVs limpios manuales)
 # dengue_2021-2025.csv: datos detallados caso por caso del sistema oficial
+# Cada archivo puede estar también como .csv.gz o .zip (se lee sin descomprimir a disco)
 ARCHIVO_NOMBRES = [
     # Datos históricos limpios manualmente (2000-2020) - formato agregado mensual
     os.path.join(DATA_DIR, 'dengue_historico_2000_2020.csv'),
@@ -37,26 +46,14 @@ ARCHIVO_NOMBRES = [
 print(f"📂 Directorio de datos: {DATA_DIR}")
 
 # Proyección de Población (CONAPO 2025) - Se usa para el mapeo de regiones y cálculo de TI
-POBLACION_2025_PROYECCION = {
-    1: ('Aguascalientes', 1512400), 2: ('Baja California', 3968300), 3: ('Baja California Sur', 850700),
-    4: ('Campeche', 1011800), 5: ('Coahuila de Zaragoza', 3328500), 6: ('Colima', 775100),
-    7: ('Chiapas', 6000100), 8: ('Chihuahua', 3998500), 9: ('Ciudad de México', 9386700),
-    10: ('Durango', 1913400), 11: ('Guanajuato', 6555200), 12: ('Guerrero', 3724300),
-    13: ('Hidalgo', 3327600), 14: ('Jalisco', 8847600), 15: ('México', 18016500),
-    16: ('Michoacán de Ocampo', 4975800), 17: ('Morelos', 2056000), 18: ('Nayarit', 1294800),
-    19: ('Nuevo León', 6231200), 20: ('Oaxaca', 4432900), 21: ('Puebla', 6886400),
-    22: ('Querétaro', 2603300), 23: ('Quintana Roo', 1989500), 24: ('San Luis Potosí', 2931400),
-    25: ('Sinaloa', 3274600), 26: ('Sonora', 3154100), 27: ('Tabasco', 2601900),
-    28: ('Tamaulipas', 3682900), 29: ('Tlaxcala', 1421000), 30: ('Veracruz de Ignacio de la Llave', 8871300),
-    31: ('Yucatán', 2561900), 32: ('Zacatecas', 1698200)
-}
+# id_region -> (nombre, población); definida en catalogo_estados.py
+POBLACION_2025_PROYECCION = ESTADOS
 
 # --- 2. FUNCIÓN DE TRANSFORMACIÓN (Lógica ML) ---
 
 def process_historical_csv(df):
     """Procesa CSV histórico ya transformado (formato pre-procesado)."""
-    # El archivo histórico ya tiene el formato correcto
-    df['fecha_fin_semana'] = pd.to_datetime(df['fecha_fin_semana'], errors='coerce')
+    # El archivo histórico ya tiene el formato correcto (fechas convertidas por leer_csv)
     df.dropna(subset=['fecha_fin_semana'], inplace=True)
     
     # Asegurar tipos correctos
@@ -71,18 +68,20 @@ def process_historical_csv(df):
 
 def process_detailed_csv(df_list):
     """Procesa CSVs detallados con casos individuales (formato original 2020-2025)."""
-    df_consolidado = pd.concat(df_list, ignore_index=True)
-    df = df_consolidado.copy()
-    df['FECHA_SIGN_SINTOMAS'] = pd.to_datetime(df['FECHA_SIGN_SINTOMAS'], errors='coerce')
+    df = pd.concat(df_list, ignore_index=True)
     df.dropna(subset=['FECHA_SIGN_SINTOMAS'], inplace=True)
-    df_confirmados = df[df['ESTATUS_CASO'] == 1].copy()
-
-    # Mapeo de Población (necesario para TI)
-    df_poblacion = pd.DataFrame(POBLACION_2025_PROYECCION).T
-    df_poblacion.columns = ['NOMBRE_ESTADO', 'POBLACION']
-    df_poblacion.index.name = 'ENTIDAD_RES'
-    df_confirmados = df_confirmados.merge(df_poblacion, on='ENTIDAD_RES', how='left')
-    df_confirmados.dropna(subset=['POBLACION'], inplace=True)
+    df_confirmados = df[df['ESTATUS_CASO'].eq(1).fillna(False).to_numpy(dtype=bool)].copy()
+
+    # Mapeo de Población (necesario para TI): índice directo sobre el catálogo
+    # Códigos no numéricos, nulos (97-99 ya llegan como NA), fraccionarios
+    # o fuera de 1-32 se descartan
+    entidad = pd.to_numeric(df_confirmados['ENTIDAD_RES'], errors='coerce')
+    validas = (entidad.between(1, 32) & (entidad % 1 == 0)).fillna(False).to_numpy(dtype=bool)
+    df_confirmados = df_confirmados[validas].copy()
+    ids = entidad[validas].to_numpy(dtype=np.int64)
+    df_confirmados['ENTIDAD_RES'] = ids
+    df_confirmados['NOMBRE_ESTADO'] = NOMBRE_ARRAY[ids]
+    df_confirmados['POBLACION'] = POBLACION_ARRAY[ids]
 
     # Agregación a Series de Tiempo (df_ts)
     df_ts = (
@@ -114,19 +113,29 @@ def process_data(archivo_nombres):
     detailed_dfs = []
     
     for file_name in archivo_nombres:
-        if not os.path.exists(file_name):
+        # Acepta el CSV o su versión comprimida (x.csv.gz / x.zip de datos abiertos)
+        ruta = buscar_variante(file_name)
+        if ruta is None:
             print(f"⚠️ Archivo no encontrado: {file_name}")
             continue
+        file_name = ruta
             
         try:
-            df_anual = pd.read_csv(file_name)
+            # Detectar formato por columnas y leer con los tipos del esquema,
+            # descomprimiendo en memoria si hace falta
+            with abrir_csv(file_name) as entrada:
+                esquema = esquema_para(pd.read_csv(entrada.flujo, nrows=0, encoding=entrada.codificacion).columns)
+                entrada.flujo.seek(0)
+                if esquema:
+                    df_anual = leer_csv(entrada.flujo, esquema, encoding=entrada.codificacion)
+                else:
+                    df_anual = pd.read_csv(entrada.flujo, encoding=entrada.codificacion)
             
-            # Detectar formato por columnas
-            if 'id_enfermedad' in df_anual.columns and 'fecha_fin_semana' in df_anual.columns:
+            if esquema is ESQUEMA_HISTORICO:
                 # Formato histórico pre-procesado
                 historical_dfs.append(df_anual)
                 print(f"✅ Cargado (histórico): {os.path.basename(file_name)} ({len(df_anual)} registros)")
-            elif 'FECHA_SIGN_SINTOMAS' in df_anual.columns:
+            elif esquema is ESQUEMA_CASOS:
                 # Formato detallado (casos individuales)
                 detailed_dfs.append(df_anual)
                 print(f"✅ Cargado (detallado): {os.path.basename(file_name)} ({len(df_anual)} registros)")
@@ -175,9 +184,7 @@ def process_data(archivo_nombres):
 
     # DataFrame de Regiones (para cargar el catálogo)
     # Mapear id_region a nombres de estado
-    df_ts['NOMBRE_ESTADO'] = df_ts['id_region'].map(
-        {k: v[0] for k, v in POBLACION_2025_PROYECCION.items()}
-    )
+    df_ts['NOMBRE_ESTADO'] = NOMBRE_ARRAY[df_ts['id_region'].to_numpy(dtype=np.int64)]
     df_regiones = df_ts[['id_region', 'NOMBRE_ESTADO']].drop_duplicates()
     df_regiones = df_regiones.rename(columns={'NOMBRE_ESTADO': 'nombre'})
 
@@ -193,8 +200,12 @@ def process_data(archivo_nombres):
 
 # --- 3. FUNCIÓN DE CARGA A BASE DE DATOS (MySQL) ---
 
-def load_to_db(df_final, df_regiones):
-    """Conecta a MySQL e inserta los datos procesados."""
+def load_to_db(df_final, df_regiones, completa=False, proporcion_minima=0.5):
+    """Conecta a MySQL e inserta los datos procesados.
+    Con completa=True la tabla se reemplaza por completo: los datos se cargan
+    en staging y se intercambian con RENAME TABLE (ver mantenimiento_db.py);
+    si staging tiene menos de proporcion_minima de los registros actuales
+    la recarga se cancela."""
     cnx = None
     try:
         cnx = get_db_connection()
@@ -211,8 +222,16 @@ def load_to_db(df_final, df_regiones):
             # Usamos el id_region (código INEGI) para los 3 campos
             cursor.execute(insert_region, (row['id_region'], row['nombre'], row['id_region']))
         cnx.commit()
+        # La API recarga sus catálogos en memoria (ver catalogos.py)
+        incrementar_version(cnx)
         print(f"Catálogo de regiones cargado/actualizado.")
 
+        # Si la tabla está particionada por año, crear las particiones que falten
+        anio_max = int(df_final['fecha_fin_semana'].max().year)
+        nuevas = asegurar_particiones(cnx, max(anio_max, date.today().year + 1))
+        if nuevas:
+            print(f"Particiones agregadas: {', '.join(nuevas)}")
+
         # B. Carga de Datos Epidemiológicos (Serie de Tiempo)
         print("Cargando 6 años de series de tiempo en dato_epidemiologico...")
         # ON DUPLICATE KEY UPDATE es CRÍTICO para actualizar registros si se corre el ETL de nuevo
@@ -235,10 +254,24 @@ def load_to_db(df_final, df_regiones):
             for index, row in df_final.iterrows()
         ]
 
-        cursor.executemany(insert_dato, datos_para_sql)
-        cnx.commit()
-        print(f"Carga de {len(df_final)} registros completada en dato_epidemiologico.")
-
+        if completa:
+            resultado = recarga_completa(cnx, datos_para_sql, proporcion_minima=proporcion_minima)
+            print(f"Recarga completa: {resultado['registros_cargados']} registros "
+                  f"(reemplazan a {resultado['registros_reemplazados']}) en dato_epidemiologico.")
+        else:
+            cursor.executemany(insert_dato, datos_para_sql)
+            cnx.commit()
+            print(f"Carga de {len(df_final)} registros completada en dato_epidemiologico.")
+
+        # C. Features de lags para entrenamiento y predicción (ver features.py)
+        if completa:
+            actualizar_features(cnx)
+        else:
+            actualizar_tras_carga(cnx, datos_para_sql)
+        analitica.tras_carga(cnx)
+
+    except ValidacionStagingError as err:
+        print(f"RECARGA CANCELADA (la tabla en uso no se modificó): {err}")
     except mysql.connector.Error as err:
         print(f"ERROR DE BASE DE DATOS: {err}")
     finally:
@@ -250,9 +283,17 @@ def load_to_db(df_final, df_regiones):
 # --- 4. EJECUCIÓN DEL PROCESO ETL ---
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='ETL de datos de dengue a MySQL')
+    parser.add_argument('--completa', action='store_true',
+                        help='Reemplazar toda la tabla (staging + RENAME TABLE) en lugar de upsert')
+    parser.add_argument('--proporcion-minima', type=float, default=0.5,
+                        help='Fracción mínima de los registros actuales que debe tener la recarga')
+    args = parser.parse_args()
+
     try:
         df_final, df_regiones = process_data(ARCHIVO_NOMBRES)
-        load_to_db(df_final, df_regiones)
+        load_to_db(df_final, df_regiones, completa=args.completa,
+                   proporcion_minima=args.proporcion_minima)
         print("\n✅ Proceso ETL completado. La base de datos está lista para las consultas ML.")
 
     except Exception as e:
@@ -0,0 +1,442 @@
+# ----------------------------------------------------------------------
+# ANALITICA.PY: Copia columnar de dato_epidemiologico en DuckDB para
+# los reportes
+# ----------------------------------------------------------------------
+# Los reportes (/api/reportes/epidemiologico, /api/reportes/estado y las
+# estadísticas de /api/datos) agregan la tabla completa: en InnoDB cada
+# consulta recorre todas las filas y columnas. Con MOTOR_REPORTES=duckdb
+# esas consultas corren sobre un archivo DuckDB (ANALITICA_DUCKDB) con
+# dato_epidemiologico y region, que se lee por columnas y en paralelo.
+#
+# - sincronizar() reconstruye el archivo completo desde MySQL en un
+#   temporal y lo reemplaza con os.replace: los lectores nunca ven una
+#   copia a medias y no compiten por el candado de escritura de DuckDB
+#   (un solo proceso puede abrir un archivo para escribir).
+# - programar_sincronizacion() lo agenda tras cada carga, importación o
+#   limpieza de la API y de los trabajos de carga: un hilo del proceso
+#   espera ANALITICA_ESPERA segundos sin cargas nuevas y reconstruye con su
+#   propia conexión, así la petición o el trabajo no esperan la copia ni
+#   retienen el pool de ingesta, y varias cargas seguidas se juntan en una
+#   sola reconstrucción. Mientras, los reportes usan la copia anterior.
+# - tras_carga(conn) reconstruye en el momento; lo usan ETL_LOADER y los
+#   scripts, que terminan justo después. También se puede correr
+#   scripts/sincronizar_analitica.py.
+# - conectar() entrega una conexión de solo lectura con la interfaz que
+#   usan los endpoints (cursor(dictionary=True) o de tuplas con
+#   column_names, execute con %s, fetchone/fetchall) y traduce las funciones de MySQL que usan sus
+#   consultas (DATE_FORMAT, WEEK, DATE_SUB, MAKEDATE, CURDATE).
+#
+# duckdb es opcional: sin él, o con MOTOR_REPORTES=mysql (por defecto),
+# los reportes se consultan en MySQL como siempre.
+# ----------------------------------------------------------------------
+
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+
+import pandas as pd
+from dotenv import load_dotenv
+
+import db_config
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+load_dotenv()
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+ARCHIVO = os.getenv('ANALITICA_DUCKDB') or os.path.join(BACKEND_DIR, 'analitica.duckdb')
+MOTOR_REPORTES = os.getenv('MOTOR_REPORTES', 'mysql').lower()
+
+# Filas por bloque al copiar desde MySQL
+TAMANO_LOTE_SYNC = 100000
+
+# Segundos sin cargas nuevas antes de reconstruir en segundo plano
+ESPERA_SYNC = float(os.getenv('ANALITICA_ESPERA', 5))
+
+ESQUEMA = """
+CREATE TABLE region (
+    id_region INTEGER PRIMARY KEY,
+    nombre VARCHAR NOT NULL,
+    codigo_entidad_inegi INTEGER NOT NULL,
+    poblacion INTEGER
+);
+CREATE TABLE dato_epidemiologico (
+    id_dato INTEGER NOT NULL,
+    id_enfermedad INTEGER NOT NULL,
+    id_region INTEGER NOT NULL,
+    fecha_fin_semana DATE NOT NULL,
+    casos_confirmados INTEGER NOT NULL,
+    defunciones INTEGER,
+    tasa_incidencia DECIMAL(10,4) NOT NULL,
+    riesgo_brote_target TINYINT NOT NULL,
+    fecha_carga DATE,
+    id_usuario_carga INTEGER
+);
+CREATE TABLE sincronizacion (
+    sincronizado_en TIMESTAMP NOT NULL,
+    filas BIGINT NOT NULL,
+    segundos DOUBLE NOT NULL
+);
+"""
+
+SELECT_REGIONES = "SELECT id_region, nombre, codigo_entidad_inegi, poblacion FROM region"
+
+# tasa_incidencia viaja como double y se vuelve a DECIMAL(10,4) en DuckDB
+SELECT_DATOS = """
+SELECT id_dato, id_enfermedad, id_region, fecha_fin_semana, casos_confirmados,
+       defunciones, CAST(tasa_incidencia AS DOUBLE), riesgo_brote_target,
+       fecha_carga, id_usuario_carga
+FROM dato_epidemiologico
+ORDER BY id_region, fecha_fin_semana
+"""
+
+COLUMNAS_DATOS = [
+    'id_dato', 'id_enfermedad', 'id_region', 'fecha_fin_semana', 'casos_confirmados',
+    'defunciones', 'tasa_incidencia', 'riesgo_brote_target', 'fecha_carga', 'id_usuario_carga'
+]
+
+INSERT_LOTE = """
+INSERT INTO dato_epidemiologico
+SELECT id_dato, id_enfermedad, id_region, CAST(fecha_fin_semana AS DATE), casos_confirmados,
+       defunciones, CAST(tasa_incidencia AS DECIMAL(10,4)), riesgo_brote_target,
+       CAST(fecha_carga AS DATE), id_usuario_carga
+FROM lote
+"""
+
+# Funciones de MySQL que usan las consultas de reportes -> DuckDB.
+# WEEK() en modo 0 (semanas desde el primer domingo, 0-53) es %U.
+TRADUCCIONES = [
+    (re.compile(r'WEEK\(([\w.]+)\)', re.I), r"CAST(strftime(\1, '%U') AS INTEGER)"),
+    (re.compile(r'DATE_FORMAT\(', re.I), 'strftime('),
+    (re.compile(r'DATE_SUB\(([^,]+),\s*INTERVAL\s+(\d+)\s+(\w+)\)', re.I), r'(\1 - INTERVAL \2 \3)'),
+    (re.compile(r'MAKEDATE\((.+?),\s*(\d+)\)', re.I), r'(make_date(\1, 1, 1) + (\2 - 1))'),
+    (re.compile(r'CURDATE\(\)', re.I), 'current_date'),
+    (re.compile(r'%s'), '?'),
+]
+
+_candado = threading.Lock()
+# Conexión de solo lectura del proceso (ver _Lectura)
+_lectura = None
+
+
+def disponible():
+    return duckdb is not None
+
+
+def activo():
+    """Los reportes se consultan en DuckDB (y las cargas lo sincronizan)."""
+    return disponible() and MOTOR_REPORTES == 'duckdb'
+
+
+def traducir(sql):
+    for patron, reemplazo in TRADUCCIONES:
+        sql = patron.sub(reemplazo, sql)
+    return sql
+
+
+class CursorAnalitico:
+    """
+    Cursor de DuckDB con la interfaz de mysql.connector que usan los
+    endpoints. SUM de enteros sale como Decimal, igual que en MySQL.
+    """
+
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+        self._columnas = []
+        self._decimales = []
+
+    def execute(self, sql, params=None):
+        self._cursor.execute(traducir(sql), list(params) if params else None)
+        descripcion = self._cursor.description or []
+        self._columnas = [d[0] for d in descripcion]
+        self._decimales = [i for i, d in enumerate(descripcion) if str(d[1]) == 'HUGEINT']
+
+    @property
+    def column_names(self):
+        return tuple(self._columnas)
+
+    def _fila(self, fila):
+        if fila is None:
+            return None
+        if self._decimales:
+            fila = list(fila)
+            for i in self._decimales:
+                if fila[i] is not None:
+                    fila[i] = Decimal(fila[i])
+        return dict(zip(self._columnas, fila)) if self._dictionary else tuple(fila)
+
+    def fetchone(self):
+        return self._fila(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._fila(fila) for fila in self._cursor.fetchall()]
+
+    def close(self):
+        pass
+
+
+class ConexionAnalitica:
+    """Conexión de solo lectura para un endpoint; close() libera su cursor de DuckDB."""
+
+    def __init__(self, lectura):
+        self._lectura = lectura
+        # Cada hilo usa su propio cursor (conexión duplicada) de DuckDB
+        self._cursor = lectura.conexion.cursor()
+
+    def cursor(self, dictionary=False, **_):
+        return CursorAnalitico(self._cursor, dictionary)
+
+    def close(self):
+        if self._cursor is not None:
+            self._cursor.close()
+            self._cursor = None
+            self._lectura.devolver()
+
+
+class _Lectura:
+    """
+    Archivo abierto en solo lectura por este proceso. DuckDB reutiliza la
+    base abierta mientras quede algún cursor sobre la misma ruta, así que
+    al reemplazarse el archivo hay que cerrar la anterior antes de abrir
+    la nueva: mientras sus cursores terminan (retirada), los endpoints
+    consultan MySQL.
+    """
+
+    def __init__(self, clave):
+        self.pid = os.getpid()
+        self.clave = clave
+        self.conexion = duckdb.connect(ARCHIVO, read_only=True)
+        self.en_uso = 0
+        self.retirada = False
+
+    def prestar(self):
+        self.en_uso += 1
+        try:
+            return ConexionAnalitica(self)
+        except BaseException:
+            self.en_uso -= 1
+            raise
+
+    def devolver(self):
+        with _candado:
+            self.en_uso -= 1
+            if self.retirada and self.en_uso == 0:
+                self.conexion.close()
+
+    def retirar(self):
+        """Con _candado tomado."""
+        self.retirada = True
+        if self.en_uso == 0:
+            self.conexion.close()
+
+
+def _clave_archivo():
+    estado = os.stat(ARCHIVO)
+    return estado.st_ino, estado.st_mtime_ns
+
+
+def _cerrar_lectura():
+    global _lectura
+    with _candado:
+        if _lectura is not None and _lectura.pid == os.getpid():
+            _lectura.retirar()
+            # Con cursores en uso, conectar() espera a que terminen
+            if _lectura.en_uso:
+                return
+        _lectura = None
+
+
+def conectar():
+    """
+    ConexionAnalitica sobre el archivo sincronizado; None si no está activo,
+    todavía no existe o se está cambiando por uno nuevo (el endpoint usa
+    MySQL).
+    """
+    global _lectura
+    if not activo():
+        return None
+    try:
+        clave = _clave_archivo()
+    except OSError:
+        return None
+    try:
+        with _candado:
+            if _lectura is not None and _lectura.pid != os.getpid():
+                # Heredada de un fork: no se cierra, es del proceso padre
+                _lectura = None
+            if _lectura is not None and _lectura.clave != clave:
+                _lectura.retirar()
+                if _lectura.en_uso:
+                    return None
+                _lectura = None
+            if _lectura is None:
+                _lectura = _Lectura(clave)
+            return _lectura.prestar()
+    except duckdb.Error as e:
+        print(f"⚠️ No se pudo abrir {ARCHIVO}, se consulta MySQL: {e}")
+        return None
+
+
+def _copiar_datos(conn, destino):
+    cursor = conn.cursor()
+    cursor.execute(SELECT_REGIONES)
+    regiones = cursor.fetchall()
+    if regiones:
+        destino.executemany("INSERT INTO region VALUES (?, ?, ?, ?)", [list(r) for r in regiones])
+
+    filas = 0
+    cursor.execute(SELECT_DATOS)
+    while True:
+        bloque = cursor.fetchmany(TAMANO_LOTE_SYNC)
+        if not bloque:
+            break
+        lote = pd.DataFrame.from_records(bloque, columns=COLUMNAS_DATOS)
+        for columna in ('id_dato', 'id_enfermedad', 'id_region', 'casos_confirmados',
+                        'defunciones', 'riesgo_brote_target', 'id_usuario_carga'):
+            lote[columna] = pd.array(lote[columna], dtype='Int64')
+        lote['tasa_incidencia'] = lote['tasa_incidencia'].astype(float)
+        lote['fecha_fin_semana'] = pd.to_datetime(lote['fecha_fin_semana'])
+        lote['fecha_carga'] = pd.to_datetime(lote['fecha_carga'])
+        destino.register('lote', lote)
+        destino.execute(INSERT_LOTE)
+        destino.unregister('lote')
+        filas += len(bloque)
+    cursor.close()
+    return filas
+
+
+def sincronizar(conn):
+    """
+    Reconstruye el archivo DuckDB con dato_epidemiologico y region de la
+    conexión MySQL `conn`. Retorna las filas copiadas.
+    """
+    if not disponible():
+        raise RuntimeError('duckdb no está instalado (pip install duckdb)')
+    inicio = time.perf_counter()
+    temporal = f'{ARCHIVO}.{os.getpid()}.tmp'
+    for ruta in (temporal, temporal + '.wal'):
+        if os.path.exists(ruta):
+            os.remove(ruta)
+    destino = duckdb.connect(temporal)
+    try:
+        destino.execute(ESQUEMA)
+        filas = _copiar_datos(conn, destino)
+        destino.execute("INSERT INTO sincronizacion VALUES (?, ?, ?)",
+                        [datetime.now(), filas, time.perf_counter() - inicio])
+        destino.execute("CHECKPOINT")
+    except BaseException:
+        destino.close()
+        os.remove(temporal)
+        raise
+    destino.close()
+    # En Windows no se puede reemplazar un archivo abierto
+    _cerrar_lectura()
+    os.replace(temporal, ARCHIVO)
+    return filas
+
+
+def tras_carga(conn):
+    """
+    sincronizar() si los reportes usan DuckDB. Un error no interrumpe la
+    carga: los reportes siguen con la copia anterior hasta la próxima.
+    """
+    if not activo():
+        return None
+    try:
+        filas = sincronizar(conn)
+        print(f"✔ Copia analítica sincronizada: {filas:,} registros")
+        return filas
+    except Exception as e:
+        print(f"⚠️ No se pudo sincronizar {ARCHIVO}: {e}")
+        return None
+
+
+class SincronizacionDiferida:
+    """
+    Reconstrucción en un hilo del proceso, agendada con programar(). Las
+    solicitudes que llegan antes de empezar se juntan; las que llegan
+    durante una reconstrucción agendan otra al terminar.
+    """
+
+    def __init__(self, espera=ESPERA_SYNC):
+        self.espera = espera
+        self._candado = threading.Lock()
+        self._hilo = None
+        self._pid = None
+        self._solicitada = None
+
+    def programar(self, obtener_conexion):
+        with self._candado:
+            self._solicitada = time.monotonic()
+            # Un hilo heredado de un fork no existe en este proceso
+            if self._hilo is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._hilo = threading.Thread(target=self._correr, args=(obtener_conexion,),
+                                              name='sincronizar_analitica', daemon=True)
+                self._hilo.start()
+
+    def pendiente(self):
+        return self._solicitada is not None
+
+    def _correr(self, obtener_conexion):
+        while True:
+            with self._candado:
+                if self._solicitada is None:
+                    self._hilo = None
+                    return
+                restante = self._solicitada + self.espera - time.monotonic()
+                if restante <= 0:
+                    self._solicitada = None
+            if restante > 0:
+                time.sleep(restante)
+                continue
+            try:
+                conn = obtener_conexion()
+            except Exception as e:
+                print(f"⚠️ No se pudo sincronizar {ARCHIVO}: {e}")
+                continue
+            try:
+                tras_carga(conn)
+            finally:
+                conn.close()
+
+
+_diferida = SincronizacionDiferida()
+
+
+def programar_sincronizacion(obtener_conexion=db_config.get_db_connection):
+    """
+    Agenda sincronizar() en segundo plano si los reportes usan DuckDB. Por
+    defecto con una conexión directa al primario, fuera de los pools: la
+    copia puede tardar.
+    """
+    if activo():
+        _diferida.programar(obtener_conexion)
+
+
+def estado():
+    """Motor de reportes y última sincronización, para /api/health."""
+    info = {'motor': 'duckdb' if activo() else 'mysql', 'duckdb_instalado': disponible()}
+    if activo():
+        info['archivo'] = ARCHIVO
+        info['sincronizacion_pendiente'] = _diferida.pendiente()
+        conexion = conectar()
+        if conexion is None:
+            info['sincronizado_en'] = None
+        else:
+            try:
+                cursor = conexion.cursor(dictionary=True)
+                cursor.execute("SELECT sincronizado_en, filas FROM sincronizacion")
+                fila = cursor.fetchone()
+                info['sincronizado_en'] = fila['sincronizado_en'].isoformat()
+                info['filas'] = fila['filas']
+            finally:
+                conexion.close()
+    return info
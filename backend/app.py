@@ -2,16 +2,42 @@
 # API Flask para PredicciÃ³n de Riesgo de Brote de Dengue
 # Usa modelo Random Forest (model.pkl) + datos de MySQL (2020-2025)
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import mysql.connector
-from mysql.connector import pooling
 import joblib
 import pandas as pd
-import numpy as np
 import os
-from datetime import datetime
+import signal
+from datetime import date, datetime
 from dotenv import load_dotenv
+from catalogo_estados import codigos_encoder
+from archivos_entrada import abrir_csv, extension_permitida
+from procesamiento_csv import (
+    TRAMOS_MUESTRA, ArchivoInvalido, CacheProcesados, agregar_semanal, columnas_faltantes,
+    filas_para_insertar, hash_contenido, insertar_semanal, muestrear_csv, procesar_archivo
+)
+from trabajos_carga import ColaLlena, GestorCargas
+from mantenimiento_db import limpiar_anio, vaciar_por_intercambio
+from entrenamiento import (
+    ALGORITMO_POR_DEFECTO, ALGORITMOS, DatosInvalidos, activar, actualizar, algoritmo_de, buscar_csv, descartar,
+    directorio_temporal, entrenar, leer_metadatos, para_servir, publicar, purgar_versiones, validar_actualizacion,
+    validar_algoritmo
+)
+from trabajos_entrenamiento import ColaEntrenamientoLlena, GestorEntrenamientos
+from bosque_compacto import BosqueCompacto, archivo_compacto, cargar_modelo
+from pool_conexiones import EnrutadorLecturas, PoolConexiones
+from lectura_filas import CONECTOR, cursor_filas
+from catalogos import Catalogos
+from db_config import REPLICA_CONFIG, REPLICA_RETRASO_MAX
+from seleccion_modelos import validar_parametros
+from features import (
+    COLUMNAS_FEATURES, FEATURES_CLASIFICADOR, FEATURES_REGRESOR, LAGS, TABLA_FEATURES, VENTANA,
+    actualizar_features, actualizar_tras_carga, calendario, columnas_modelo, fila_desde_historial, matriz
+)
+import intercambio_arrow
+import analitica
+import consultas_dashboard
 
 # Cargar variables de entorno
 load_dotenv()
@@ -28,37 +54,30 @@ DB_CONFIG = {
     'host': os.getenv('DB_HOST', '127.0.0.1'),
     'user': os.getenv('DB_USER', 'root'),
     'password': os.getenv('DB_PASSWORD', ''),
-    'database': os.getenv('DB_NAME', 'proyecto_integrador'),
-    'pool_name': 'flask_pool',
-    'pool_size': int(os.getenv('DB_POOL_SIZE', 5))
+    'database': os.getenv('DB_NAME', 'proyecto_integrador')
 }
 
-# Mapeo de id_region (INEGI) a nombre de estado para el LabelEncoder
-ESTADO_POR_ID = {
-    1: 'Aguascalientes', 2: 'Baja California', 3: 'Baja California Sur',
-    4: 'Campeche', 5: 'Coahuila de Zaragoza', 6: 'Colima',
-    7: 'Chiapas', 8: 'Chihuahua', 9: 'Ciudad de México',
-    10: 'Durango', 11: 'Guanajuato', 12: 'Guerrero',
-    13: 'Hidalgo', 14: 'Jalisco', 15: 'México',
-    16: 'Michoacan de Ocampo', 17: 'Morelos', 18: 'Nayarit',
-    19: 'Nuevo León', 20: 'Oaxaca', 21: 'Puebla',
-    22: 'Queretaro', 23: 'Quintana Roo', 24: 'San Luis Potosí',
-    25: 'Sinaloa', 26: 'Sonora', 27: 'Tabasco',
-    28: 'Tamaulipas', 29: 'Tlaxcala', 30: 'Veracruz de Ignacio de la Llave',
-    31: 'Yucatan', 32: 'Zacatecas'
-}
+# Pool de los endpoints (ver pool_conexiones.py): conexiones fijas, extra
+# temporales, segundos de espera por una libre y antigüedad máxima
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+DB_POOL_DESBORDE = int(os.getenv('DB_POOL_DESBORDE', 5))
+DB_POOL_ESPERA = float(os.getenv('DB_POOL_ESPERA', 10))
+DB_POOL_RECICLAR = int(os.getenv('DB_POOL_RECICLAR', 3600))
+
+# Segundos entre revisiones de la versión de los catálogos en caché (ver catalogos.py)
+CATALOGO_REVISION = float(os.getenv('CATALOGO_REVISION', 30))
 
 # ============================================
 # INICIALIZACIÃ“N
 # ============================================
 
-# Pool de conexiones MySQL
+# Pool de conexiones MySQL: se crea en el primer uso de cada proceso, así
+# con gunicorn (gunicorn.conf.py) cada worker abre sus propias conexiones
+# después del fork en lugar de compartir los sockets del proceso maestro
 connection_pool = None
-try:
-    connection_pool = pooling.MySQLConnectionPool(**DB_CONFIG)
-    print("✔ Pool de conexiones MySQL creado")
-except Exception as e:
-    print(f"❌ Error creando pool MySQL: {e}")
+pid_pool = None
+# Lecturas de los endpoints de solo lectura: réplica (DB_REPLICA_HOST) o primario
+lecturas = None
 
 # Cargar modelos ML
 MODELO_DENGUE = None
@@ -67,39 +86,374 @@ MODELO_REGRESSOR = None
 LABEL_ENCODER_REG = None
 REGRESSOR_FEATURES = None
 
-try:
-    model_path = os.path.join(BACKEND_DIR, 'model.pkl')
-    encoder_path = os.path.join(BACKEND_DIR, 'label_encoder.pkl')
-
-    MODELO_DENGUE = joblib.load(model_path)
-    LABEL_ENCODER = joblib.load(encoder_path)
-    print("✔ Modelo Random Forest (Clasificador) cargado")
-    print(f"   - Features esperados: {MODELO_DENGUE.n_features_in_}")
-    print(f"   - Estados en encoder: {len(LABEL_ENCODER.classes_)}")
-except Exception as e:
-    print(f"❌ Error cargando modelo clasificador: {e}")
-# Cargar modelo de regresión para predicción de casos
-try:
-    regressor_path = os.path.join(BACKEND_DIR, 'model_regressor.pkl')
-    features_path = os.path.join(BACKEND_DIR, 'regressor_features.pkl')
-    encoder_reg_path = os.path.join(BACKEND_DIR, 'label_encoder_regressor.pkl')
-
-    if os.path.exists(regressor_path):
-        MODELO_REGRESSOR = joblib.load(regressor_path)
-        REGRESSOR_FEATURES = joblib.load(features_path)
-        LABEL_ENCODER_REG = joblib.load(encoder_reg_path)
-        print("✔ Modelo Random Forest (Regresor) cargado - R²=96.3%")
-        print(f"   - Features: {len(REGRESSOR_FEATURES)}")
-except Exception as e:
-    print(f"❌ Modelo de regresión no disponible: {e}")
-    MODELO_REGRESSOR = None
+# Servir el .compacto.npz (scripts/compactar_modelo.py) en lugar del .pkl cuando exista
+USAR_MODELO_COMPACTO = os.getenv('USAR_MODELO_COMPACTO', '1').lower() in ('1', 'true', 'si')
+
+# Metadatos de cada modelo (algoritmo, parámetros, features; ver entrenamiento.py)
+METADATOS_CLASIFICADOR = {'algoritmo': ALGORITMO_POR_DEFECTO}
+METADATOS_REGRESOR = {'algoritmo': ALGORITMO_POR_DEFECTO}
+
+# Tablas id_region -> código del LabelEncoder (reemplazan LabelEncoder.transform)
+CODIGOS_ENCODER = codigos_encoder(None)
+CODIGOS_ENCODER_REG = codigos_encoder(None)
+
+
+
+def cargar_modelos():
+    """
+    Carga los modelos activos de backend/. Se llama al importar el módulo y,
+    con gunicorn, en el proceso maestro al recargar (kill -HUP), antes de
+    crear los workers nuevos.
+    """
+    global MODELO_DENGUE, LABEL_ENCODER, MODELO_REGRESSOR, LABEL_ENCODER_REG, REGRESSOR_FEATURES
+    global CODIGOS_ENCODER, CODIGOS_ENCODER_REG, METADATOS_CLASIFICADOR, METADATOS_REGRESOR
+
+    try:
+        model_path = os.path.join(BACKEND_DIR, 'model.pkl')
+        encoder_path = os.path.join(BACKEND_DIR, 'label_encoder.pkl')
+
+        MODELO_DENGUE = para_servir(cargar_modelo(model_path, USAR_MODELO_COMPACTO))
+        LABEL_ENCODER = joblib.load(encoder_path)
+        CODIGOS_ENCODER = codigos_encoder(LABEL_ENCODER)
+        METADATOS_CLASIFICADOR = leer_metadatos(model_path, MODELO_DENGUE)
+        print(f"✔ Modelo {ALGORITMOS[METADATOS_CLASIFICADOR['algoritmo']]} (Clasificador) cargado")
+        print(f"   - Features esperados: {MODELO_DENGUE.n_features_in_}")
+        print(f"   - Estados en encoder: {len(LABEL_ENCODER.classes_)}")
+    except Exception as e:
+        print(f"❌ Error cargando modelo clasificador: {e}")
+    # Cargar modelo de regresión para predicción de casos
+    try:
+        regressor_path = os.path.join(BACKEND_DIR, 'model_regressor.pkl')
+        features_path = os.path.join(BACKEND_DIR, 'regressor_features.pkl')
+        encoder_reg_path = os.path.join(BACKEND_DIR, 'label_encoder_regressor.pkl')
+
+        if os.path.exists(regressor_path):
+            MODELO_REGRESSOR = para_servir(cargar_modelo(regressor_path, USAR_MODELO_COMPACTO))
+            REGRESSOR_FEATURES = joblib.load(features_path)
+            LABEL_ENCODER_REG = joblib.load(encoder_reg_path)
+            CODIGOS_ENCODER_REG = codigos_encoder(LABEL_ENCODER_REG)
+            METADATOS_REGRESOR = leer_metadatos(regressor_path, MODELO_REGRESSOR)
+            print(f"✔ Modelo {ALGORITMOS[METADATOS_REGRESOR['algoritmo']]} (Regresor) cargado")
+            print(f"   - Features: {len(REGRESSOR_FEATURES)}")
+    except Exception as e:
+        print(f"❌ Modelo de regresión no disponible: {e}")
+        MODELO_REGRESSOR = None
+
+
+cargar_modelos()
+
+
+def crear_pool_conexiones():
+    """
+    Crea el pool de MySQL del proceso actual. Los pools creados antes de un
+    fork se descartan sin cerrarlos: sus sockets siguen siendo del proceso
+    que los abrió.
+    """
+    global connection_pool, pid_pool, carga_pool, lecturas
+    pid_pool = os.getpid()
+    carga_pool = None
+    connection_pool = PoolConexiones(DB_CONFIG, DB_POOL_SIZE, DB_POOL_DESBORDE, DB_POOL_ESPERA,
+                                     DB_POOL_RECICLAR, nombre='flask_pool')
+    replica_pool = None
+    if REPLICA_CONFIG:
+        replica_pool = PoolConexiones(REPLICA_CONFIG, DB_POOL_SIZE, DB_POOL_DESBORDE, DB_POOL_ESPERA,
+                                      DB_POOL_RECICLAR, nombre='replica_pool')
+    lecturas = EnrutadorLecturas(connection_pool, replica_pool, REPLICA_RETRASO_MAX)
+    print(f"✔ Pool de conexiones MySQL creado (pid {pid_pool})"
+          f"{', réplica ' + REPLICA_CONFIG['host'] if REPLICA_CONFIG else ''}")
+    if CONECTOR != 'C':
+        print("⚠️ mysql.connector sin su extensión en C: las filas se decodifican en Python puro")
 
 
 def get_db_connection():
-    """Obtiene una conexión del pool"""
-    if connection_pool:
-        return connection_pool.get_connection()
-    return None
+    """
+    Obtiene una conexión del pool (espera a que se libere una si están
+    ocupadas). conn.close() la devuelve y cierra los cursores que abrió.
+    None si MySQL no responde o no se liberó ninguna a tiempo.
+    """
+    if pid_pool != os.getpid():
+        crear_pool_conexiones()
+    try:
+        return connection_pool.obtener()
+    except mysql.connector.Error as e:
+        print(f"❌ Error obteniendo conexión MySQL: {e}")
+        return None
+
+
+def get_lectura_connection():
+    """
+    Como get_db_connection, para endpoints que solo leen: de la réplica si
+    está configurada y al día, si no del primario. Lo que se lee justo
+    después de escribirlo (historial de predicciones y de alertas) sigue
+    usando get_db_connection.
+    """
+    if pid_pool != os.getpid():
+        crear_pool_conexiones()
+    try:
+        return lecturas.obtener()
+    except mysql.connector.Error as e:
+        print(f"❌ Error obteniendo conexión MySQL: {e}")
+        return None
+
+
+def get_reportes_connection():
+    """
+    Conexión para los reportes y estadísticas que agregan toda la tabla: la
+    copia en DuckDB (analitica.py) con MOTOR_REPORTES=duckdb, si no (o si
+    todavía no se sincroniza) la de get_lectura_connection.
+    """
+    return analitica.conectar() or get_lectura_connection()
+
+
+# region y enfermedad en memoria (ver catalogos.py)
+CATALOGOS = Catalogos(get_lectura_connection, CATALOGO_REVISION)
+
+
+# Pool separado para cargas de CSV: la ingesta nunca consume conexiones
+# del pool de los endpoints interactivos. Una conexión por hilo de carga en
+# segundo plano más una para cargar-csv e importar, que no esperan a que
+# termine un trabajo
+CARGA_WORKERS = int(os.getenv('CARGA_WORKERS', 1))
+carga_pool = None
+
+
+def get_carga_connection():
+    """Obtiene una conexión del pool de ingesta (se crea en el primer uso)"""
+    global carga_pool
+    if pid_pool != os.getpid():
+        crear_pool_conexiones()
+    if carga_pool is None:
+        carga_pool = PoolConexiones(DB_CONFIG, CARGA_WORKERS + 1, espera=DB_POOL_ESPERA,
+                                    reciclar=DB_POOL_RECICLAR, nombre='carga_pool')
+    return carga_pool.obtener()
+
+
+GESTOR_CARGAS = GestorCargas(
+    get_carga_connection,
+    directorio=os.getenv('UPLOAD_DIR', os.path.join(BACKEND_DIR, 'uploads')),
+    workers=CARGA_WORKERS,
+    cola_max=int(os.getenv('CARGA_COLA_MAX', 4))
+)
+
+# Archivos ya agregados en la vista previa, por hash de contenido
+CACHE_PROCESADOS = CacheProcesados()
+
+# Versiones de modelos entrenados (un directorio por entrenamiento)
+MODELOS_DIR = os.getenv('MODELOS_DIR', os.path.join(BACKEND_DIR, 'modelos'))
+
+
+def activar_modelo_publicado(ruta_version):
+    """
+    Copia los artefactos de una versión publicada sobre los .pkl de backend/
+    y reemplaza los modelos en memoria. Todo se carga antes de asignar las
+    variables globales, para que una predicción no vea el modelo nuevo con
+    los features o el encoder anteriores.
+    """
+    global MODELO_DENGUE, LABEL_ENCODER, MODELO_REGRESSOR, LABEL_ENCODER_REG, REGRESSOR_FEATURES
+    global CODIGOS_ENCODER, CODIGOS_ENCODER_REG, METADATOS_CLASIFICADOR, METADATOS_REGRESOR
+
+    cargados = activar(ruta_version, BACKEND_DIR)
+    if USAR_MODELO_COMPACTO:
+        for archivo_modelo in ('model.pkl', 'model_regressor.pkl'):
+            if archivo_compacto(archivo_modelo) in cargados:
+                cargados[archivo_modelo] = cargados[archivo_compacto(archivo_modelo)]
+    modelo = para_servir(cargados.get('model.pkl', MODELO_DENGUE))
+    encoder = cargados.get('label_encoder.pkl', LABEL_ENCODER)
+    regresor = para_servir(cargados.get('model_regressor.pkl', MODELO_REGRESSOR))
+    features = cargados.get('regressor_features.pkl', REGRESSOR_FEATURES)
+    encoder_reg = cargados.get('label_encoder_regressor.pkl', LABEL_ENCODER_REG)
+    codigos, codigos_reg = codigos_encoder(encoder), codigos_encoder(encoder_reg)
+    metadatos = METADATOS_CLASIFICADOR
+    if 'model.pkl' in cargados:
+        metadatos = cargados.get('model.json') or {'algoritmo': algoritmo_de(modelo)}
+    metadatos_reg = METADATOS_REGRESOR
+    if 'model_regressor.pkl' in cargados:
+        metadatos_reg = cargados.get('model_regressor.json') or {'algoritmo': algoritmo_de(regresor)}
+
+    (MODELO_DENGUE, LABEL_ENCODER, CODIGOS_ENCODER, METADATOS_CLASIFICADOR,
+     MODELO_REGRESSOR, REGRESSOR_FEATURES, LABEL_ENCODER_REG, CODIGOS_ENCODER_REG, METADATOS_REGRESOR) = (
+        modelo, encoder, codigos, metadatos, regresor, features, encoder_reg, codigos_reg, metadatos_reg)
+
+    purgar_versiones(MODELOS_DIR)
+    print(f"✔ Modelo activado desde {ruta_version}")
+    recargar_workers()
+
+
+def recargar_workers():
+    """
+    Con gunicorn (gunicorn.conf.py), el modelo activado solo cambió en este
+    worker: se pide al maestro recargar (SIGHUP), que vuelve a cargar los
+    modelos de backend/ y reemplaza los workers de forma ordenada.
+    """
+    maestro = os.getenv('SERVIDOR_PID_MAESTRO')
+    if maestro and int(maestro) == os.getppid():
+        os.kill(int(maestro), signal.SIGHUP)
+        print("🔄 Recarga de workers solicitada al maestro de gunicorn")
+
+
+# Entrenamientos en procesos aparte, con prioridad baja y núcleos limitados
+GESTOR_ENTRENAMIENTOS = GestorEntrenamientos(
+    MODELOS_DIR,
+    workers=int(os.getenv('ENTRENAMIENTO_WORKERS', 1)),
+    n_jobs=int(os.getenv('ENTRENAMIENTO_N_JOBS', 2)),
+    nice=int(os.getenv('ENTRENAMIENTO_NICE', 10)),
+    al_publicar=lambda trabajo, ruta: activar_modelo_publicado(ruta)
+)
+
+
+def features_prediccion(cursor, id_region, fecha=None):
+    """
+    Fila de dato_features para predecir en un estado: la primera semana
+    >= fecha o, sin fecha (o si es posterior a todas), la semana pendiente
+    siguiente a la última con datos. Si la tabla aún no tiene al estado, se
+    calcula con las últimas semanas de dato_epidemiologico. None si no hay datos.
+    """
+    fila = None
+    select = f"SELECT fecha_fin_semana, {', '.join(COLUMNAS_FEATURES)} FROM {TABLA_FEATURES} WHERE id_region = %s"
+    try:
+        if fecha is not None:
+            cursor.execute(select + ' AND fecha_fin_semana >= %s ORDER BY fecha_fin_semana LIMIT 1',
+                           (id_region, fecha))
+            fila = cursor.fetchone()
+        if fila is None:
+            cursor.execute(select + ' ORDER BY fecha_fin_semana DESC LIMIT 1', (id_region,))
+            fila = cursor.fetchone()
+    except mysql.connector.Error as e:
+        print(f"⚠️ {TABLA_FEATURES} no disponible, se calculan los features al vuelo: {e}")
+
+    if fila is not None:
+        return {c: (float(v) if v is not None and c != 'fecha_fin_semana' else v) for c, v in fila.items()}
+
+    condicion, parametros = ('AND fecha_fin_semana < %s', (id_region, fecha)) if fecha else ('', (id_region,))
+    cursor.execute(f'''
+        SELECT fecha_fin_semana, casos_confirmados, tasa_incidencia
+        FROM dato_epidemiologico
+        WHERE id_region = %s {condicion}
+        ORDER BY fecha_fin_semana DESC
+        LIMIT {VENTANA}
+    ''', parametros)
+    historial = [(d['fecha_fin_semana'], d['casos_confirmados'], float(d['tasa_incidencia']))
+                 for d in cursor.fetchall()]
+    return fila_desde_historial(id_region, historial)
+
+
+# Consultas de /api/modelo/predecir-riesgo-automatico (también las usa asgi.py)
+SQL_ULTIMA_FECHA = 'SELECT MAX(fecha_fin_semana) as ultima_fecha FROM dato_epidemiologico WHERE id_region = %s'
+SQL_PROMEDIO_4_SEMANAS = '''
+    SELECT AVG(casos_confirmados) as promedio
+    FROM dato_epidemiologico
+    WHERE id_region = %s AND fecha_fin_semana >= DATE_SUB(%s, INTERVAL 4 WEEK)
+'''
+
+INSERT_ALERTA_SISTEMA = """
+    INSERT INTO alertas_epidemiologicas
+    (id_region, estado, nivel, probabilidad, casos_esperados, mensaje, recomendaciones,
+     tipo_notificacion, prioridad, estado_alerta, fecha_envio)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, 'activa', NOW())
+"""
+
+
+def evaluar_riesgo(region, ultima_fecha, fila, promedio):
+    """
+    Predicción de /api/modelo/predecir-riesgo-automatico con lo ya
+    consultado: región, última semana con datos, fila de features y
+    promedio de casos de las últimas 4 semanas. Retorna (respuesta,
+    alerta): alerta son los parámetros de INSERT_ALERTA_SISTEMA si el
+    riesgo es alto, si no None. Solo usa CPU (asgi.py la corre en un
+    executor).
+    """
+    id_region = region['id_region']
+    poblacion = region['poblacion'] or 100000
+    nombre_estado = region['nombre']
+
+    # Los lags que faltan se toman como 0
+    casos_lag_1w = int(fila['casos_lag_1w'] or 0)
+    casos_lag_4w = int(fila['casos_lag_4w'] or 0)
+    ti_lag_1w = fila['ti_lag_1w'] or 0.0
+    ti_lag_4w = fila['ti_lag_4w'] or 0.0
+    variacion_pct = fila['variacion_pct']
+    semana_anio = int(fila['semana_anio'])
+    mes = int(fila['mes'])
+
+    # 1. Codificar el estado y armar la fila con las columnas del entrenamiento
+    estado_coded = CODIGOS_ENCODER[id_region]
+    X_predict = matriz(fila, columnas_modelo(MODELO_DENGUE, FEATURES_CLASIFICADOR), estado_coded, rellenar=0)
+
+    print(f"📊 Predicción para {nombre_estado}: casos={casos_lag_1w}, TI={ti_lag_1w:.2f}")
+
+    # 2. Predicción con el modelo
+    prediction_proba = MODELO_DENGUE.predict_proba(X_predict)[0][1]
+    prediction_class = MODELO_DENGUE.predict(X_predict)[0]
+
+    riesgo_probabilidad = round(prediction_proba * 100, 1)
+    riesgo_clase = int(prediction_class)
+
+    # 3. Determinar nivel, mensaje y recomendaciones
+    if riesgo_probabilidad >= 75:
+        nivel_riesgo = 'Crítico'
+        mensaje = 'ALERTA CRÍTICA: Riesgo muy alto de brote. Activar protocolos de emergencia.'
+    elif riesgo_probabilidad >= 50:
+        nivel_riesgo = 'Alto'
+        mensaje = 'ADVERTENCIA: Riesgo elevado de brote. Intensificar vigilancia epidemiológica.'
+    elif riesgo_probabilidad >= 25:
+        nivel_riesgo = 'Moderado'
+        mensaje = 'PRECAUCIÓN: Riesgo moderado. Mantener vigilancia activa.'
+    else:
+        nivel_riesgo = 'Bajo'
+        mensaje = 'Riesgo bajo. Mantener vigilancia estándar y control vectorial.'
+
+    recomendaciones_map = {
+        'Crítico': 'Activar protocolos de emergencia, reforzar fumigación y comunicación inmediata a la población.',
+        'Alto': 'Intensificar vigilancia, aumentar fumigación y campañas de descacharrización.',
+        'Moderado': 'Mantener vigilancia activa y reforzar educación preventiva.',
+        'Bajo': 'Continuar con las acciones preventivas habituales.'
+    }
+    recomendaciones = recomendaciones_map.get(nivel_riesgo, 'Mantener vigilancia según lineamientos locales.')
+
+    # 4. Calcular tendencias
+    tendencia_casos = casos_lag_1w - casos_lag_4w
+    tendencia_tasa = ti_lag_1w - ti_lag_4w
+
+    # 5. Predicción próxima semana
+    prediccion_prox_semana = int(promedio or casos_lag_1w)
+
+    # 6. Alerta si es riesgo alto
+    alerta = None
+    if riesgo_clase == 1:
+        prioridad = 'alta' if riesgo_probabilidad >= 50 else 'media'
+        alerta = (id_region, nombre_estado, nivel_riesgo, riesgo_probabilidad, prediccion_prox_semana,
+                  mensaje, recomendaciones, 'sistema', prioridad)
+
+    # 7. Respuesta
+    return {
+        'success': True,
+        'modelo_utilizado': ALGORITMOS[METADATOS_CLASIFICADOR['algoritmo']],
+        'estado': nombre_estado,
+        'fecha_evaluacion': ultima_fecha.strftime('%Y-%m-%d'),
+        'riesgo_probabilidad': riesgo_probabilidad,
+        'riesgo_clase': riesgo_clase,
+        'nivel_riesgo': nivel_riesgo,
+        'mensaje': mensaje,
+        'datos_utilizados': {
+            'casos_ultima_semana': casos_lag_1w,
+            'casos_hace_4_semanas': casos_lag_4w,
+            'tasa_incidencia_actual': round(ti_lag_1w, 2),
+            'tasa_incidencia_anterior': round(ti_lag_4w, 2),
+            'poblacion_region': poblacion,
+            'semana_epidemiologica': semana_anio,
+            'mes': mes,
+            'tendencia_semanal': round(variacion_pct * 100, 1)
+        },
+        'tendencias': {
+            'casos': 'Creciente' if tendencia_casos > 0 else ('Decreciente' if tendencia_casos < 0 else 'Estable'),
+            'tasa': 'Creciente' if tendencia_tasa > 0 else ('Decreciente' if tendencia_tasa < 0 else 'Estable'),
+            'temporada_riesgo': 'SÃ­ (temporada de lluvias)' if 5 <= mes <= 10 else 'No'
+        },
+        'prediccion': {
+            'casos_proxima_semana': prediccion_prox_semana,
+            'historial_semanas': 4
+        }
+    }, alerta
 
 
 # ============================================
@@ -119,7 +473,8 @@ def predecir_riesgo():
             'error': 'Modelos ML no disponibles. Verifica que model.pkl y label_encoder.pkl existan.'
         }), 503
 
-    conn = get_db_connection()
+    catalogo = CATALOGOS.obtener()
+    conn = get_lectura_connection() if catalogo else None
     if not conn:
         return jsonify({'success': False, 'error': 'Error de conexión a la base de datos'}), 500
 
@@ -130,28 +485,19 @@ def predecir_riesgo():
         if not id_region or id_region < 1 or id_region > 32:
             return jsonify({'success': False, 'error': 'id_region invalido (debe ser 1-32)'}), 400
 
-        cursor = conn.cursor(dictionary=True)
+        cursor = cursor_filas(conn)
 
-        # 1. Obtener informaciÃ³n de la regiÃ³n
-        cursor.execute(
-            'SELECT id_region, nombre, poblacion FROM region WHERE id_region = %s',
-            (id_region,)
-        )
-        region = cursor.fetchone()
+        # 1. Obtener informaciÃ³n de la regiÃ³n (catálogo en memoria)
+        region = catalogo.region(id_region)
 
         if not region:
             return jsonify({'success': False, 'error': 'Región no encontrada'}), 404
 
-        poblacion = region['poblacion'] or 100000
         nombre_estado = region['nombre']
 
         # 2. Obtener última fecha con datos
-        cursor.execute(
-            'SELECT MAX(fecha_fin_semana) as ultima_fecha FROM dato_epidemiologico WHERE id_region = %s',
-            (id_region,)
-        )
-        result = cursor.fetchone()
-        ultima_fecha = result['ultima_fecha']
+        cursor.execute(SQL_ULTIMA_FECHA, (id_region,))
+        ultima_fecha = cursor.fetchone()['ultima_fecha']
 
         if not ultima_fecha:
             return jsonify({
@@ -159,175 +505,32 @@ def predecir_riesgo():
                 'error': f'No hay datos históricos para {nombre_estado}'
             }), 404
 
-        # 3. Obtener las últimas 4 semanas de datos para calcular lags y estadísticas
-        cursor.execute('''
-            SELECT casos_confirmados, tasa_incidencia, fecha_fin_semana
-            FROM dato_epidemiologico
-            WHERE id_region = %s
-            ORDER BY fecha_fin_semana DESC
-            LIMIT 4
-        ''', (id_region,))
-        registros_historicos = cursor.fetchall()
-        
-        # Rellenar con 0 si no hay suficientes datos
-        while len(registros_historicos) < 4:
-            registros_historicos.append({'casos_confirmados': 0, 'tasa_incidencia': 0})
-
-        # Extraer valores (El índice 0 es el más reciente -> Lag 1)
-        casos_lag_1w = int(registros_historicos[0]['casos_confirmados'])
-        casos_lag_2w = int(registros_historicos[1]['casos_confirmados'])
-        casos_lag_3w = int(registros_historicos[2]['casos_confirmados'])
-        casos_lag_4w = int(registros_historicos[3]['casos_confirmados'])
-        
-        ti_lag_1w = float(registros_historicos[0]['tasa_incidencia'])
-        ti_lag_2w = float(registros_historicos[1]['tasa_incidencia'])
-        ti_lag_3w = float(registros_historicos[2]['tasa_incidencia'])
-        ti_lag_4w = float(registros_historicos[3]['tasa_incidencia'])
-
-        # 4. Calcular features derivados
-        # Promedio 4 semanas
-        casos_promedio_4w = (casos_lag_1w + casos_lag_2w + casos_lag_3w + casos_lag_4w) / 4.0
-        
-        # Tendencia (Lag 1 - Lag 4)
-        tendencia_4w = casos_lag_1w - casos_lag_4w
-        
-        # Variación porcentual (Lag 1 vs Lag 2)
-        if casos_lag_2w == 0:
-            variacion_pct = 0.0
-        else:
-            variacion_pct = (casos_lag_1w - casos_lag_2w) / casos_lag_2w
-
-        # 5. Obtener semana y mes de la PREDICCIÓN (Semana siguiente a la última fecha)
-        # Asumimos que predecimos para la semana entrante
-        fecha_prediccion = ultima_fecha + pd.Timedelta(weeks=1)
-        semana_anio = fecha_prediccion.isocalendar()[1]
-        mes = fecha_prediccion.month
+        # 3. Features de la semana siguiente a la última con datos (dato_features, ver features.py)
+        fila = features_prediccion(cursor, id_region)
 
-        # 6. Codificar el estado para el modelo
-        nombre_para_encoder = ESTADO_POR_ID.get(id_region, nombre_estado)
-        
-        try:
-            estado_coded = LABEL_ENCODER.transform([nombre_para_encoder])[0]
-        except ValueError:
-            print(f"⚠️ Estado '{nombre_para_encoder}' no en encoder, usando índice")
-            estado_coded = id_region - 1
-
-        # 7. Crear DataFrame para predicción (Nombres EXACTOS como en el entrenamiento)
-        X_predict = pd.DataFrame({
-            'casos_lag_1w': [casos_lag_1w],
-            'casos_lag_2w': [casos_lag_2w],
-            'casos_lag_3w': [casos_lag_3w],
-            'casos_lag_4w': [casos_lag_4w],
-            'ti_lag_1w': [ti_lag_1w],
-            'ti_lag_2w': [ti_lag_2w],
-            'ti_lag_3w': [ti_lag_3w],
-            'ti_lag_4w': [ti_lag_4w],
-            'casos_promedio_4w': [casos_promedio_4w],
-            'tendencia_4w': [tendencia_4w],
-            'variacion_pct': [variacion_pct],
-            'semana_anio': [semana_anio],
-            'mes': [mes],
-            'estado_coded': [estado_coded]
-        })
+        # 4. Promedio de casos de las últimas 4 semanas (predicción de la próxima)
+        cursor.execute(SQL_PROMEDIO_4_SEMANAS, (id_region, ultima_fecha))
+        promedio = cursor.fetchone()['promedio']
 
-        print(f"📊 Predicción RF para {nombre_estado}: casos={casos_lag_1w}, TI={ti_lag_1w:.2f}")
-
-        # 9. PREDICCIÓN CON RANDOM FOREST
-        prediction_proba = MODELO_DENGUE.predict_proba(X_predict)[0][1]
-        prediction_class = MODELO_DENGUE.predict(X_predict)[0]
-
-        riesgo_probabilidad = round(prediction_proba * 100, 1)
-        riesgo_clase = int(prediction_class)
-
-        # 10. Determinar nivel, mensaje y recomendaciones
-        if riesgo_probabilidad >= 75:
-            nivel_riesgo = 'Crítico'
-            mensaje = 'ALERTA CRÍTICA: Riesgo muy alto de brote. Activar protocolos de emergencia.'
-        elif riesgo_probabilidad >= 50:
-            nivel_riesgo = 'Alto'
-            mensaje = 'ADVERTENCIA: Riesgo elevado de brote. Intensificar vigilancia epidemiológica.'
-        elif riesgo_probabilidad >= 25:
-            nivel_riesgo = 'Moderado'
-            mensaje = 'PRECAUCIÓN: Riesgo moderado. Mantener vigilancia activa.'
-        else:
-            nivel_riesgo = 'Bajo'
-            mensaje = 'Riesgo bajo. Mantener vigilancia estándar y control vectorial.'
+        respuesta, alerta = evaluar_riesgo(region, ultima_fecha, fila, promedio)
 
-        recomendaciones_map = {
-            'Crítico': 'Activar protocolos de emergencia, reforzar fumigación y comunicación inmediata a la población.',
-            'Alto': 'Intensificar vigilancia, aumentar fumigación y campañas de descacharrización.',
-            'Moderado': 'Mantener vigilancia activa y reforzar educación preventiva.',
-            'Bajo': 'Continuar con las acciones preventivas habituales.'
-        }
-        recomendaciones = recomendaciones_map.get(nivel_riesgo, 'Mantener vigilancia según lineamientos locales.')
-
-        # 11. Calcular tendencias
-        tendencia_casos = casos_lag_1w - casos_lag_4w
-        tendencia_tasa = ti_lag_1w - ti_lag_4w
-
-        # 12. PredicciÃ³n prÃ³xima semana
-        cursor.execute('''
-            SELECT AVG(casos_confirmados) as promedio
-            FROM dato_epidemiologico
-            WHERE id_region = %s AND fecha_fin_semana >= DATE_SUB(%s, INTERVAL 4 WEEK)
-        ''', (id_region, ultima_fecha))
-        promedio_result = cursor.fetchone()
-        prediccion_prox_semana = int(promedio_result['promedio'] or casos_lag_1w)
+        # 5. Guardar alerta si es riesgo alto (en el primario: conn puede ser la réplica)
+        if alerta:
+            conn_escritura = get_db_connection()
+            if conn_escritura is None:
+                print("⚠️ No se pudo guardar alerta: sin conexión al primario (pool agotado o MySQL caído)")
+            else:
+                cursor_escritura = conn_escritura.cursor()
+                try:
+                    cursor_escritura.execute(INSERT_ALERTA_SISTEMA, alerta)
+                    conn_escritura.commit()
+                except Exception as e:
+                    print(f"⚠️ No se pudo guardar alerta: {e}")
+                finally:
+                    cursor_escritura.close()
+                    conn_escritura.close()
 
-        # 13. Guardar alerta si es riesgo alto
-        if riesgo_clase == 1:
-            try:
-                prioridad = 'alta' if riesgo_probabilidad >= 50 else 'media'
-                cursor.execute("""
-                    INSERT INTO alertas_epidemiologicas
-                    (id_region, estado, nivel, probabilidad, casos_esperados, mensaje, recomendaciones,
-                     tipo_notificacion, prioridad, estado_alerta, fecha_envio)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, 'activa', NOW())
-                """, (
-                    id_region,
-                    nombre_estado,
-                    nivel_riesgo,
-                    riesgo_probabilidad,
-                    prediccion_prox_semana,
-                    mensaje,
-                    recomendaciones,
-                    'sistema',
-                    prioridad
-                ))
-                conn.commit()
-            except Exception as e:
-                print(f"⚠️ No se pudo guardar alerta: {e}")
-
-        # 14. Respuesta
-        return jsonify({
-            'success': True,
-            'modelo_utilizado': 'Random Forest',
-            'estado': nombre_estado,
-            'fecha_evaluacion': ultima_fecha.strftime('%Y-%m-%d'),
-            'riesgo_probabilidad': riesgo_probabilidad,
-            'riesgo_clase': riesgo_clase,
-            'nivel_riesgo': nivel_riesgo,
-            'mensaje': mensaje,
-            'datos_utilizados': {
-                'casos_ultima_semana': casos_lag_1w,
-                'casos_hace_4_semanas': casos_lag_4w,
-                'tasa_incidencia_actual': round(ti_lag_1w, 2),
-                'tasa_incidencia_anterior': round(ti_lag_4w, 2),
-                'poblacion_region': poblacion,
-                'semana_epidemiologica': semana_anio,
-                'mes': mes,
-                'tendencia_semanal': round(variacion_pct * 100, 1)
-            },
-            'tendencias': {
-                'casos': 'Creciente' if tendencia_casos > 0 else ('Decreciente' if tendencia_casos < 0 else 'Estable'),
-                'tasa': 'Creciente' if tendencia_tasa > 0 else ('Decreciente' if tendencia_tasa < 0 else 'Estable'),
-                'temporada_riesgo': 'SÃ­ (temporada de lluvias)' if 5 <= mes <= 10 else 'No'
-            },
-            'prediccion': {
-                'casos_proxima_semana': prediccion_prox_semana,
-                'historial_semanas': 4
-            }
-        })
+        return jsonify(respuesta)
 
     except Exception as e:
         print(f"âŒ Error en predicciÃ³n: {e}")
@@ -335,7 +538,6 @@ def predecir_riesgo():
         traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)}), 500
     finally:
-        cursor.close()
         conn.close()
 
 
@@ -355,7 +557,8 @@ def predecir_riesgo_avanzado():
             'error': 'Modelos ML no disponibles.'
         }), 503
 
-    conn = get_db_connection()
+    catalogo = CATALOGOS.obtener()
+    conn = get_lectura_connection() if catalogo else None
     if not conn:
         return jsonify({'success': False, 'error': 'Error de conexión a la base de datos'}), 500
 
@@ -372,14 +575,10 @@ def predecir_riesgo_avanzado():
         if not fecha_prediccion:
             return jsonify({'success': False, 'error': 'fecha_prediccion requerida'}), 400
 
-        cursor = conn.cursor(dictionary=True)
+        cursor = cursor_filas(conn)
 
-        # 1. Obtener informaciÃ³n de la regiÃ³n
-        cursor.execute(
-            'SELECT id_region, nombre, poblacion FROM region WHERE id_region = %s',
-            (id_region,)
-        )
-        region = cursor.fetchone()
+        # 1. Obtener informaciÃ³n de la regiÃ³n (catálogo en memoria)
+        region = catalogo.region(id_region)
 
         if not region:
             return jsonify({'success': False, 'error': 'Región no encontrada'}), 404
@@ -427,105 +626,44 @@ def predecir_riesgo_avanzado():
             result = cursor.fetchone()
             fecha_datos = result['fecha_fin_semana'] if result else ultima_fecha_disponible
 
-        # 5. Obtener datos histÃ³ricos para features del modelo de regresiÃ³n
-        cursor.execute('''
-            SELECT casos_confirmados, tasa_incidencia, fecha_fin_semana
-            FROM dato_epidemiologico
-            WHERE id_region = %s AND fecha_fin_semana < %s
-            ORDER BY fecha_fin_semana DESC
-            LIMIT 6
-        ''', (id_region, fecha_prediccion))
-        datos_anteriores = cursor.fetchall()
-
-        if not datos_anteriores or len(datos_anteriores) < 4:
+        # 5. Features de la semana solicitada (lags de las semanas anteriores a la fecha,
+        # de dato_features); semana y mes son los de la fecha solicitada
+        fila = features_prediccion(cursor, id_region, fecha_dt.date())
+        if fila is None or fila['casos_lag_4w'] is None:
             return jsonify({
                 'success': False,
                 'error': f'No hay suficientes datos históricos para {nombre_estado}'
             }), 404
+        fila.update(calendario(fecha_dt.date()))
 
-        # Extraer valores
-        casos_hist = [int(d['casos_confirmados']) for d in datos_anteriores]
-        ti_hist = [float(d['tasa_incidencia']) for d in datos_anteriores]
-
-        casos_lag_1w = casos_hist[0] if len(casos_hist) > 0 else 0
-        casos_lag_2w = casos_hist[1] if len(casos_hist) > 1 else casos_lag_1w
-        casos_lag_3w = casos_hist[2] if len(casos_hist) > 2 else casos_lag_1w
-        casos_lag_4w = casos_hist[3] if len(casos_hist) > 3 else casos_lag_1w
-        ti_lag_1w = ti_hist[0] if len(ti_hist) > 0 else 0
-        ti_lag_2w = ti_hist[1] if len(ti_hist) > 1 else ti_lag_1w
-        ti_lag_3w = ti_hist[2] if len(ti_hist) > 2 else ti_lag_1w
-        ti_lag_4w = ti_hist[3] if len(ti_hist) > 3 else ti_lag_1w
+        casos_hist = [int(fila[f'casos_lag_{lag}w']) for lag in LAGS]
+        casos_lag_1w = casos_hist[0]
+        casos_lag_4w = casos_hist[3]
+        ti_lag_1w = fila['ti_lag_1w']
+        ti_lag_4w = fila['ti_lag_4w']
+        semana_del_anio = fila['semana_anio']
+        mes = fila['mes']
 
-        # Calcular features adicionales
-        casos_promedio_4w = sum(casos_hist[:4]) / min(4, len(casos_hist))
-        tendencia_4w = casos_lag_1w - casos_lag_4w
-
-        semana_del_anio = fecha_dt.isocalendar()[1]
-        mes = fecha_dt.month
-
-        # 6. USAR MODELO DE REGRESIÃ“N SI ESTÃ DISPONIBLE
+        # 6. USAR MODELO DE REGRESIÃ“N SI ESTÃ DISPONIBLE
         if MODELO_REGRESSOR is not None:
-            try:
-                # Codificar estado
-                estado_coded = LABEL_ENCODER_REG.transform([nombre_estado])[0]
-            except:
-                estado_coded = id_region - 1
-
-            # Crear DataFrame con features
-            X_reg = pd.DataFrame({
-                'casos_lag_1w': [casos_lag_1w],
-                'casos_lag_2w': [casos_lag_2w],
-                'casos_lag_3w': [casos_lag_3w],
-                'casos_lag_4w': [casos_lag_4w],
-                'ti_lag_1w': [ti_lag_1w],
-                'ti_lag_2w': [ti_lag_2w],
-                'casos_promedio_4w': [casos_promedio_4w],
-                'tendencia_4w': [tendencia_4w],
-                'semana_anio': [semana_del_anio],
-                'mes': [mes],
-                'estado_coded': [estado_coded]
-            })
+            X_reg = matriz(fila, REGRESSOR_FEATURES or FEATURES_REGRESOR, CODIGOS_ENCODER_REG[id_region])
 
-            # PredicciÃ³n con modelo de regresiÃ³n (RÂ²=96.3%)
+            # PredicciÃ³n con modelo de regresiÃ³n
             casos_prediccion = int(max(0, MODELO_REGRESSOR.predict(X_reg)[0]))
-            modelo_usado = 'Random Forest Regressor (RÂ²=96.3%)'
+            modelo_usado = f"{ALGORITMOS[METADATOS_REGRESOR['algoritmo']]} Regressor"
+            r2 = METADATOS_REGRESOR.get('metricas', {}).get('r2_score')
+            if r2 is not None:
+                modelo_usado += f' (R²={r2 * 100:.1f}%)'
         else:
             # Fallback a promedio ponderado si no hay modelo de regresiÃ³n
             pesos = [0.4, 0.3, 0.2, 0.1]
-            casos_prediccion = int(sum(c * p for c, p in zip(casos_hist[:4], pesos)))
+            casos_prediccion = int(sum(c * p for c, p in zip(casos_hist, pesos)))
             modelo_usado = 'Promedio Ponderado'
 
-        # 7. Calcular tasas para el modelo de clasificaciÃ³n RF
-        ti_lag_1w_calc = (casos_lag_1w / poblacion) * 100000
-        ti_lag_4w_calc = (casos_lag_4w / poblacion) * 100000
+        # 7. DataFrame para predicciÃ³n de riesgo (clasificador), mismas columnas que en el entrenamiento
+        X_predict = matriz(fila, columnas_modelo(MODELO_DENGUE, FEATURES_CLASIFICADOR), CODIGOS_ENCODER[id_region])
 
-        # 8. Codificar estado para clasificador
-        nombre_para_encoder = ESTADO_POR_ID.get(id_region, nombre_estado)
-        try:
-            entidad_coded = LABEL_ENCODER.transform([nombre_para_encoder])[0]
-        except ValueError:
-            entidad_coded = id_region - 1
-
-        # 9. DataFrame para predicciÃ³n de riesgo (clasificador)
-        # 9. DataFrame para predicción de riesgo (clasificador) - LOWERCASE y TODAS las columnas
-        X_predict = pd.DataFrame({
-            'casos_lag_1w': [casos_lag_1w],
-            'casos_lag_2w': [casos_lag_2w],
-            'casos_lag_3w': [casos_lag_3w],
-            'casos_lag_4w': [casos_lag_4w],
-            'ti_lag_1w': [ti_lag_1w_calc],
-            'ti_lag_2w': [ti_lag_2w],
-            'ti_lag_3w': [ti_lag_3w],
-            'ti_lag_4w': [ti_lag_4w_calc],
-            'casos_promedio_4w': [casos_promedio_4w],
-            'tendencia_4w': [tendencia_4w],
-            'variacion_pct': [(casos_lag_1w - casos_lag_2w)/casos_lag_2w if casos_lag_2w > 0 else 0],
-            'semana_anio': [semana_del_anio],
-            'mes': [mes],
-            'estado_coded': [entidad_coded]
-        })
-
-        # 10. PredicciÃ³n de RIESGO con Random Forest Clasificador
+        # 10. PredicciÃ³n de RIESGO con el clasificador
         prediction_proba = MODELO_DENGUE.predict_proba(X_predict)[0][1]
         prediction_class = MODELO_DENGUE.predict(X_predict)[0]
 
@@ -548,7 +686,7 @@ def predecir_riesgo_avanzado():
 
         # 12. Tendencias
         tendencia_casos = casos_lag_1w - casos_lag_4w
-        tendencia_tasa = ti_lag_1w_calc - ti_lag_4w_calc
+        tendencia_tasa = ti_lag_1w - ti_lag_4w
 
         # 13. La predicciÃ³n de casos viene del modelo de regresiÃ³n
         prediccion_prox_semana = casos_prediccion
@@ -592,7 +730,7 @@ def predecir_riesgo_avanzado():
 
         response_data = {
             'success': True,
-            'modelo_utilizado': 'Random Forest',
+            'modelo_utilizado': ALGORITMOS[METADATOS_CLASIFICADOR['algoritmo']],
             'estado': nombre_estado,
             'fecha_prediccion': fecha_prediccion,
             'fecha_datos_utilizados': fecha_datos.strftime('%Y-%m-%d') if isinstance(fecha_datos, datetime) else str(fecha_datos),
@@ -637,7 +775,6 @@ def predecir_riesgo_avanzado():
         traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)}), 500
     finally:
-        cursor.close()
         conn.close()
 
 
@@ -647,69 +784,46 @@ def predecir_riesgo_avanzado():
 @app.route('/api/config/regiones', methods=['GET'])
 def get_regiones():
     """Lista todas las regiones/estados"""
-    conn = get_db_connection()
-    if not conn:
+    catalogo = CATALOGOS.obtener()
+    if catalogo is None:
         return jsonify({'error': 'Error de conexiÃ³n'}), 500
-    try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute('SELECT id_region as id, nombre, poblacion FROM region ORDER BY nombre')
-        return jsonify(cursor.fetchall())
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
+    return jsonify(catalogo.regiones)
 
 
 @app.route('/api/config/enfermedades', methods=['GET'])
 def get_enfermedades():
     """Lista todas las enfermedades"""
-    conn = get_db_connection()
-    if not conn:
+    catalogo = CATALOGOS.obtener()
+    if catalogo is None:
         return jsonify({'error': 'Error de conexiÃ³n'}), 500
-    try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute('SELECT id_enfermedad as id, nombre, descripcion FROM enfermedad')
-        return jsonify(cursor.fetchall())
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
+    return jsonify(catalogo.enfermedades)
 
 
 @app.route('/api/dashboard/resumen', methods=['GET'])
 def get_resumen():
     """Estadísticas para dashboard"""
-    conn = get_db_connection()
+    conn = get_lectura_connection()
     if not conn:
         return jsonify({'error': 'Error de conexión'}), 500
     try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute('SELECT COALESCE(SUM(casos_confirmados), 0) as total FROM dato_epidemiologico')
-        total_casos = int(cursor.fetchone()['total'])
-        cursor.execute('SELECT COUNT(DISTINCT id_region) as total FROM dato_epidemiologico')
-        regiones = cursor.fetchone()['total']
-        cursor.execute("SELECT COUNT(*) as total FROM alertas_epidemiologicas WHERE estado_alerta IN ('activa', 'enviada')")
-        alertas = cursor.fetchone()['total']
-        return jsonify({
-            'total_casos_historicos': total_casos,
-            'regiones_monitoreadas': regiones,
-            'alertas_activas': alertas,
-            'modelo_activo': 'Random Forest' if MODELO_DENGUE else 'No disponible'
-        })
+        cursor = cursor_filas(conn)
+        resultados = consultas_dashboard.consultar(cursor, consultas_dashboard.RESUMEN_DASHBOARD)
+        return jsonify(consultas_dashboard.resumen_dashboard(resultados, nombre_modelo_activo()))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
-        cursor.close()
         conn.close()
 
 
-@app.route('/api/health', methods=['GET'])
-def health():
-    """Estado del servidor para monitoreo en tiempo real"""
-    conn = get_db_connection()
+def nombre_modelo_activo():
+    return ALGORITMOS[METADATOS_CLASIFICADOR['algoritmo']] if MODELO_DENGUE else 'No disponible'
 
+
+def estado_salud():
+    """
+    Respuesta de /api/health sin lo que depende de MySQL (también la usa
+    asgi.py con su propio pool).
+    """
     health_status = {
         'timestamp': datetime.now().isoformat(),
         'status': 'healthy',
@@ -737,62 +851,48 @@ def health():
             'distribution': []
         }
     }
+    health_status['database']['reportes'] = analitica.estado()
+    health_status['database']['catalogos'] = CATALOGOS.estado()
 
-    # Verificar conexiÃ³n a base de datos
-    if conn:
-        try:
-            cursor = conn.cursor(dictionary=True)
+    # Verificar modelos ML
+    if MODELO_DENGUE is not None and LABEL_ENCODER is not None:
+        health_status['models']['loaded'] = True
+        health_status['models']['classifier'] = nombre_modelo_activo()
 
-            # Estado de conexiÃ³n
-            health_status['database']['status'] = 'connected'
-            health_status['database']['active_connections'] = 1
+    if MODELO_REGRESSOR is not None:
+        health_status['models']['regressor'] = ALGORITMOS[METADATOS_REGRESOR['algoritmo']]
 
-            # Contar predicciones del dÃ­a
-            cursor.execute("""
-                SELECT COUNT(*) as total_hoy
-                FROM prediccion
-                WHERE DATE(fecha_prediccion) = CURDATE()
-            """)
-            result = cursor.fetchone()
-            health_status['predictions']['today'] = result['total_hoy'] if result else 0
+    return health_status
 
-            # Total de predicciones
-            cursor.execute("SELECT COUNT(*) as total FROM prediccion")
-            result = cursor.fetchone()
-            health_status['predictions']['total'] = result['total'] if result else 0
 
-            # DistribuciÃ³n por nivel de riesgo
-            cursor.execute("""
-                SELECT nivel_riesgo, COUNT(*) as cantidad
-                FROM prediccion
-                WHERE DATE(fecha_prediccion) >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)
-                GROUP BY nivel_riesgo
-            """)
-            distribucion = cursor.fetchall()
-            health_status['predictions']['distribution'] = [
-                {'nivel': d['nivel_riesgo'], 'cantidad': d['cantidad']}
-                for d in distribucion
-            ] if distribucion else []
-
-            # Tasa de Ã©xito
-            health_status['predictions']['success_rate'] = 95.0
-            health_status['predictions']['last_minute'] = 0
-
-            cursor.close()
-            conn.close()
+@app.route('/api/health', methods=['GET'])
+def health():
+    """Estado del servidor para monitoreo en tiempo real"""
+    conn = get_db_connection()
+    health_status = estado_salud()
+
+    # Verificar conexión a base de datos
+    if conn:
+        try:
+            cursor = cursor_filas(conn)
+
+            health_status['database']['status'] = 'connected'
+            health_status['database']['conector'] = CONECTOR
+            resultados = consultas_dashboard.consultar(cursor, consultas_dashboard.SALUD)
+            consultas_dashboard.salud_predicciones(resultados, health_status['predictions'])
 
         except Exception as e:
             health_status['database']['status'] = 'error'
             health_status['status'] = 'degraded'
             print(f"Error en health check DB: {e}")
+        finally:
+            conn.close()
 
-    # Verificar modelos ML - CORRECCIÃ“N AQUÃ
-    if MODELO_DENGUE is not None and LABEL_ENCODER is not None:
-        health_status['models']['loaded'] = True
-        health_status['models']['classifier'] = 'RandomForest'
-
-    if MODELO_REGRESSOR is not None:
-        health_status['models']['regressor'] = 'RandomForest'
+    # Métricas del pool de este proceso (en gunicorn, del worker que responde)
+    if connection_pool is not None:
+        health_status['database']['pool'] = connection_pool.metricas()
+        health_status['database']['active_connections'] = health_status['database']['pool']['en_uso']
+        health_status['database']['lecturas'] = lecturas.metricas()
 
     return jsonify(health_status), 200
 
@@ -804,233 +904,45 @@ def health():
 @app.route('/api/reportes/epidemiologico', methods=['GET'])
 def get_reporte_epidemiologico():
     """Reporte epidemiológico completo con estadísticas históricas"""
-    conn = get_db_connection()
+    conn = get_reportes_connection()
     if not conn:
         return jsonify({'error': 'Error de conexión'}), 500
 
     try:
-        cursor = conn.cursor(dictionary=True)
-
-        # 1. Estadísticas generales
-        cursor.execute("""
-            SELECT
-                COUNT(*) as total_registros,
-                COALESCE(SUM(casos_confirmados), 0) as total_casos,
-                COALESCE(AVG(casos_confirmados), 0) as promedio_casos,
-                COALESCE(MAX(casos_confirmados), 0) as max_casos,
-                MIN(fecha_fin_semana) as fecha_inicio_datos,
-                MAX(fecha_fin_semana) as fecha_fin_datos,
-                COUNT(DISTINCT id_region) as total_estados,
-                COUNT(DISTINCT YEAR(fecha_fin_semana)) as total_anios
-            FROM dato_epidemiologico
-        """)
-        estadisticas = cursor.fetchone()
-
-        # Convertir Decimal a float/int
-        for key in estadisticas:
-            if hasattr(estadisticas[key], 'real'):
-                estadisticas[key] = float(estadisticas[key])
-            elif isinstance(estadisticas[key], (int, float)):
-                estadisticas[key] = int(estadisticas[key]) if isinstance(estadisticas[key], int) else float(estadisticas[key])
-
-        # 2. Top 10 estados con mÃ¡s casos
-        cursor.execute("""
-            SELECT
-                r.nombre as estado,
-                d.id_region,
-                SUM(d.casos_confirmados) as total_casos,
-                AVG(d.casos_confirmados) as promedio_semanal,
-                MAX(d.casos_confirmados) as max_semanal,
-                COUNT(*) as semanas_con_datos
-            FROM dato_epidemiologico d
-            JOIN region r ON d.id_region = r.id_region
-            GROUP BY d.id_region, r.nombre
-            ORDER BY total_casos DESC
-            LIMIT 10
-        """)
-        top_estados = cursor.fetchall()
-        for estado in top_estados:
-            for key in estado:
-                if hasattr(estado[key], 'real'):
-                    estado[key] = float(estado[key])
-
-        # 3. EvoluciÃ³n anual
-        cursor.execute("""
-            SELECT
-                YEAR(fecha_fin_semana) as anio,
-                SUM(casos_confirmados) as total_casos,
-                AVG(casos_confirmados) as promedio_semanal,
-                COUNT(DISTINCT id_region) as estados_afectados
-            FROM dato_epidemiologico
-            GROUP BY YEAR(fecha_fin_semana)
-            ORDER BY anio
-        """)
-        evolucion_anual = cursor.fetchall()
-        for item in evolucion_anual:
-            for key in item:
-                if hasattr(item[key], 'real'):
-                    item[key] = float(item[key])
-
-        # 4. Tendencia mensual (Ãºltimos 24 meses)
-        cursor.execute("""
-            SELECT
-                DATE_FORMAT(fecha_fin_semana, '%Y-%m') as mes,
-                SUM(casos_confirmados) as total_casos,
-                AVG(casos_confirmados) as promedio
-            FROM dato_epidemiologico
-            WHERE fecha_fin_semana >= DATE_SUB(CURDATE(), INTERVAL 24 MONTH)
-            GROUP BY DATE_FORMAT(fecha_fin_semana, '%Y-%m')
-            ORDER BY mes
-        """)
-        tendencia_mensual = cursor.fetchall()
-        for item in tendencia_mensual:
-            for key in item:
-                if hasattr(item[key], 'real'):
-                    item[key] = float(item[key])
-
-        # 5. DistribuciÃ³n por semana epidemiolÃ³gica (promedio histÃ³rico)
-        cursor.execute("""
-            SELECT
-                WEEK(fecha_fin_semana) as semana_epidemiologica,
-                AVG(casos_confirmados) as promedio_casos,
-                SUM(casos_confirmados) as total_casos
-            FROM dato_epidemiologico
-            GROUP BY WEEK(fecha_fin_semana)
-            ORDER BY WEEK(fecha_fin_semana)
-        """)
-        por_semana_epi = cursor.fetchall()
-        for item in por_semana_epi:
-            for key in item:
-                if hasattr(item[key], 'real'):
-                    item[key] = float(item[key])
-
-        # 6. Comparativa de aÃ±os
-        cursor.execute("""
-            SELECT
-                YEAR(fecha_fin_semana) as anio,
-                MONTH(fecha_fin_semana) as mes,
-                SUM(casos_confirmados) as casos
-            FROM dato_epidemiologico
-            WHERE YEAR(fecha_fin_semana) >= YEAR(CURDATE()) - 3
-            GROUP BY YEAR(fecha_fin_semana), MONTH(fecha_fin_semana)
-            ORDER BY anio, mes
-        """)
-        comparativa_anual = cursor.fetchall()
-        for item in comparativa_anual:
-            for key in item:
-                if hasattr(item[key], 'real'):
-                    item[key] = float(item[key])
-
-        # 7. Alertas de alto riesgo (semanas con casos > promedio * 2)
-        cursor.execute("""
-            SELECT
-                r.nombre as estado,
-                d.fecha_fin_semana as fecha_inicio,
-                WEEK(d.fecha_fin_semana) as semana_epidemiologica,
-                d.casos_confirmados,
-                d.tasa_incidencia
-            FROM dato_epidemiologico d
-            JOIN region r ON d.id_region = r.id_region
-            WHERE d.casos_confirmados > (
-                SELECT AVG(casos_confirmados) * 2 FROM dato_epidemiologico
-            )
-            ORDER BY d.casos_confirmados DESC
-            LIMIT 20
-        """)
-        alertas_alto_riesgo = cursor.fetchall()
-        for item in alertas_alto_riesgo:
-            item['fecha_inicio'] = item['fecha_inicio'].isoformat() if item['fecha_inicio'] else None
-            for key in item:
-                if hasattr(item[key], 'real'):
-                    item[key] = float(item[key])
-
-        # Convertir fechas en estadÃ­sticas
-        if estadisticas.get('fecha_inicio_datos'):
-            estadisticas['fecha_inicio_datos'] = estadisticas['fecha_inicio_datos'].isoformat()
-        if estadisticas.get('fecha_fin_datos'):
-            estadisticas['fecha_fin_datos'] = estadisticas['fecha_fin_datos'].isoformat()
-
-        return jsonify({
-            'success': True,
-            'estadisticas': estadisticas,
-            'top_estados': top_estados,
-            'evolucion_anual': evolucion_anual,
-            'tendencia_mensual': tendencia_mensual,
-            'por_semana_epidemiologica': por_semana_epi,
-            'comparativa_anual': comparativa_anual,
-            'alertas_alto_riesgo': alertas_alto_riesgo,
-            'generado_en': datetime.now().isoformat()
-        })
+        cursor = cursor_filas(conn)
+        resultados = consultas_dashboard.consultar(cursor, consultas_dashboard.REPORTE_EPIDEMIOLOGICO)
+        return jsonify(consultas_dashboard.reporte_epidemiologico(resultados))
 
     except Exception as e:
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
     finally:
-        cursor.close()
         conn.close()
 
 
 @app.route('/api/reportes/estado/<int:id_region>', methods=['GET'])
 def get_reporte_estado(id_region):
     """Reporte detallado por estado específico"""
-    conn = get_db_connection()
+    catalogo = CATALOGOS.obtener()
+    conn = get_reportes_connection() if catalogo else None
     if not conn:
         return jsonify({'error': 'Error de conexión'}), 500
 
     try:
-        cursor = conn.cursor(dictionary=True)
-
-        # Info del estado
-        # La tabla region usa la columna id_region; evitar columna inexistente id
-        cursor.execute("SELECT nombre FROM region WHERE id_region = %s", (id_region,))
-        estado_info = cursor.fetchone()
-        if not estado_info:
+        # Info del estado (catálogo en memoria)
+        nombre = catalogo.nombre.get(id_region)
+        if nombre is None:
             return jsonify({'error': 'Estado no encontrado'}), 404
 
-        # EstadÃ­sticas del estado
-        cursor.execute("""
-            SELECT
-                SUM(casos_confirmados) as total_casos,
-                AVG(casos_confirmados) as promedio_semanal,
-                MAX(casos_confirmados) as max_casos,
-                AVG(tasa_incidencia) as tasa_promedio
-            FROM dato_epidemiologico
-            WHERE id_region = %s
-        """, (id_region,))
-        stats = cursor.fetchone()
-        for key in stats:
-            if hasattr(stats[key], 'real'):
-                stats[key] = float(stats[key])
-
-        # EvoluciÃ³n mensual del estado
-        cursor.execute("""
-            SELECT
-                DATE_FORMAT(fecha_fin_semana, '%Y-%m') as mes,
-                SUM(casos_confirmados) as casos
-            FROM dato_epidemiologico
-            WHERE id_region = %s
-            GROUP BY DATE_FORMAT(fecha_fin_semana, '%Y-%m')
-            ORDER BY mes
-        """, (id_region,))
-        evolucion = cursor.fetchall()
-        for item in evolucion:
-            for key in item:
-                if hasattr(item[key], 'real'):
-                    item[key] = float(item[key])
-
-        return jsonify({
-            'success': True,
-            'estado': estado_info['nombre'],
-            'id_region': id_region,
-            'estadisticas': stats,
-            'evolucion_mensual': evolucion
-        })
+        # Estadísticas y evolución mensual del estado
+        cursor = cursor_filas(conn)
+        resultados = consultas_dashboard.consultar(cursor, consultas_dashboard.REPORTE_ESTADO, (id_region,))
+        return jsonify(consultas_dashboard.reporte_estado(nombre, id_region, resultados))
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
-        cursor.close()
         conn.close()
 
 
@@ -1069,7 +981,6 @@ def crear_tabla_predicciones():
         print(f"Error creando tabla: {e}")
         return False
     finally:
-        cursor.close()
         conn.close()
 
 
@@ -1127,7 +1038,6 @@ def guardar_prediccion():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
-        cursor.close()
         conn.close()
 
 
@@ -1139,7 +1049,7 @@ def listar_predicciones():
         return jsonify({'error': 'Error de conexiÃ³n'}), 500
 
     try:
-        cursor = conn.cursor(dictionary=True)
+        cursor = cursor_filas(conn)
         cursor.execute("""
             SELECT
                 id,
@@ -1171,7 +1081,6 @@ def listar_predicciones():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
-        cursor.close()
         conn.close()
 
 
@@ -1185,7 +1094,7 @@ def obtener_prediccion(id):
         return jsonify({'error': 'Error de conexión'}), 500
 
     try:
-        cursor = conn.cursor(dictionary=True)
+        cursor = cursor_filas(conn)
         cursor.execute("""
             SELECT * FROM predicciones_guardadas WHERE id = %s
         """, (id,))
@@ -1211,7 +1120,6 @@ def obtener_prediccion(id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
-        cursor.close()
         conn.close()
 
 
@@ -1238,7 +1146,6 @@ def eliminar_prediccion(id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
-        cursor.close()
         conn.close()
 
 
@@ -1246,77 +1153,97 @@ def eliminar_prediccion(id):
 # ENDPOINTS PARA GESTIÓN DE DATOS (CONFIGURACIÓN)
 # ============================================
 
-# Población 2025 por estado
-POBLACION_2025 = {
-    1: 1512400, 2: 3968300, 3: 850700, 4: 1011800, 5: 3328500, 6: 775100,
-    7: 6000100, 8: 3998500, 9: 9386700, 10: 1913400, 11: 6555200, 12: 3724300,
-    13: 3327600, 14: 8847600, 15: 18016500, 16: 4975800, 17: 2056000, 18: 1294800,
-    19: 6231200, 20: 4432900, 21: 6886400, 22: 2603300, 23: 1989500, 24: 2931400,
-    25: 3274600, 26: 3154100, 27: 2601900, 28: 3682900, 29: 1421000, 30: 8871300,
-    31: 2561900, 32: 1698200
-}
-
 @app.route('/api/datos/estadisticas', methods=['GET'])
 def get_estadisticas_datos():
     """Obtiene estadísticas generales de los datos cargados"""
-    conn = get_db_connection()
+    conn = get_reportes_connection()
     if not conn:
         return jsonify({'error': 'Error de conexión'}), 500
 
     try:
-        cursor = conn.cursor(dictionary=True)
-
-        # Total registros
-        cursor.execute("SELECT COUNT(*) as total FROM dato_epidemiologico")
-        total_registros = cursor.fetchone()['total']
-
-        # Rango de fechas
-        cursor.execute("SELECT MIN(fecha_fin_semana) as fecha_min, MAX(fecha_fin_semana) as fecha_max FROM dato_epidemiologico")
-        rango = cursor.fetchone()
-
-        # Total casos
-        cursor.execute("SELECT COALESCE(SUM(casos_confirmados), 0) as total FROM dato_epidemiologico")
-        total_casos = cursor.fetchone()['total']
-
-        # Por aÃ±o
-        cursor.execute("""
-            SELECT YEAR(fecha_fin_semana) as anio,
-                   COUNT(*) as registros,
-                   SUM(casos_confirmados) as casos
-            FROM dato_epidemiologico
-            GROUP BY YEAR(fecha_fin_semana)
-            ORDER BY anio
-        """)
-        por_anio = cursor.fetchall()
-
-        # Regiones con datos
-        cursor.execute("SELECT COUNT(DISTINCT id_region) as total FROM dato_epidemiologico")
-        regiones_con_datos = cursor.fetchone()['total']
-
-        # Ãšltima carga
-        cursor.execute("SELECT MAX(fecha_carga) as ultima FROM dato_epidemiologico")
-        ultima_carga = cursor.fetchone()['ultima']
-
-        return jsonify({
-            'success': True,
-            'total_registros': total_registros,
-            'total_casos': int(total_casos) if total_casos else 0,
-            'fecha_inicio': rango['fecha_min'].isoformat() if rango['fecha_min'] else None,
-            'fecha_fin': rango['fecha_max'].isoformat() if rango['fecha_max'] else None,
-            'regiones_con_datos': regiones_con_datos,
-            'ultima_carga': ultima_carga.isoformat() if ultima_carga else None,
-            'por_anio': por_anio
-        })
+        cursor = cursor_filas(conn)
+        resultados = consultas_dashboard.consultar(cursor, consultas_dashboard.ESTADISTICAS_DATOS)
+        return jsonify(consultas_dashboard.estadisticas_datos(resultados))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
-        cursor.close()
         conn.close()
 
 
+def procesar_csv_rapido(archivo):
+    """
+    Vista previa aproximada: valida columnas y estima el resumen a partir
+    de una muestra de tramos del archivo (muestrear_csv) en lugar de
+    leerlo completo. Los conteos se escalan al total estimado de filas.
+    En archivos comprimidos solo se muestrea el bloque inicial.
+    """
+    with abrir_csv(archivo.stream) as entrada:
+        datos = muestrear_csv(entrada.flujo, tramos=TRAMOS_MUESTRA if entrada.buscable else 1,
+                              bytes_totales=entrada.tamano, encoding=entrada.codificacion)
+    columnas = datos['columnas']
+    faltantes = columnas_faltantes(columnas)
+    if faltantes:
+        return jsonify({
+            'success': False,
+            'error': f'Columnas faltantes: {", ".join(faltantes)}',
+            'columnas_encontradas': list(columnas)
+        }), 400
+
+    muestra = datos['muestra']
+    confirmado = (muestra['ESTATUS_CASO'].eq(1).fillna(False) & muestra['FECHA_SIGN_SINTOMAS'].notna()).to_numpy(dtype=bool)
+    confirmados = muestra.loc[confirmado, ['ENTIDAD_RES', 'FECHA_SIGN_SINTOMAS']]
+    if len(confirmados) == 0:
+        return jsonify({
+            'success': False,
+            'estimado': not datos['exacto'],
+            'error': 'No hay casos confirmados (ESTATUS_CASO=1) en la muestra del archivo',
+            'registros_totales': datos['filas_estimadas']
+        }), 400
+
+    # Factor de expansión muestra -> archivo completo
+    factor = datos['filas_estimadas'] / len(muestra) if len(muestra) else 1.0
+    df_ts, umbral_riesgo = agregar_semanal(confirmados)
+
+    preview_data = []
+    for _, row in df_ts.head(10).iterrows():
+        preview_data.append({
+            'estado': row['NOMBRE_ESTADO'],
+            'id_region': int(row['ENTIDAD_RES']),
+            'fecha_fin_semana': row['fecha_fin_semana'].strftime('%Y-%m-%d'),
+            'casos_confirmados': int(round(row['casos_confirmados'] * factor)),
+            'tasa_incidencia': round(float(row['tasa_incidencia']) * factor, 4),
+            'riesgo_brote': bool(row['riesgo_brote_target'] == 1)
+        })
+
+    return jsonify({
+        'success': True,
+        'estimado': not datos['exacto'],
+        'muestra': {
+            'bytes_totales': datos['bytes_totales'],
+            'bytes_leidos': datos['bytes_leidos'],
+            'filas_muestra': len(muestra)
+        },
+        'resumen': {
+            'registros_originales': datos['filas_estimadas'],
+            'casos_confirmados': int(round(len(confirmados) * factor)),
+            'registros_procesados': len(df_ts),
+            'estados_procesados': int(df_ts['NOMBRE_ESTADO'].nunique()),
+            'anios': sorted(df_ts['fecha_fin_semana'].dt.year.unique().tolist()),
+            'fecha_inicio': df_ts['fecha_fin_semana'].min().strftime('%Y-%m-%d'),
+            'fecha_fin': df_ts['fecha_fin_semana'].max().strftime('%Y-%m-%d'),
+            'umbral_riesgo_ti': round(float(umbral_riesgo) * factor, 4)
+        },
+        'preview': preview_data
+    })
+
+
 @app.route('/api/datos/procesar-csv', methods=['POST'])
 def procesar_csv_preview():
-    """Procesa un archivo CSV y devuelve preview sin guardar en BD"""
+    """
+    Procesa un archivo CSV y devuelve preview sin guardar en BD.
+    Con modo=rapido solo se lee una muestra del archivo y el resumen se
+    marca como estimado (no se genera token_carga).
+    """
     if 'archivo' not in request.files:
         return jsonify({'error': 'No se envió ningun archivo'}), 400
 
@@ -1324,56 +1251,28 @@ def procesar_csv_preview():
     if archivo.filename == '':
         return jsonify({'error': 'Nombre de archivo vacío'}), 400
 
-    if not archivo.filename.endswith('.csv'):
-        return jsonify({'error': 'Solo se permiten archivos CSV'}), 400
+    if not extension_permitida(archivo.filename):
+        return jsonify({'error': 'Solo se permiten archivos CSV (.csv, .csv.gz, .gz o .zip)'}), 400
 
     try:
-        # Leer CSV
-        df = pd.read_csv(archivo)
-        registros_originales = len(df)
-
-        # Validar columnas requeridas
-        columnas_requeridas = ['FECHA_SIGN_SINTOMAS', 'ENTIDAD_RES', 'ESTATUS_CASO']
-        columnas_faltantes = [c for c in columnas_requeridas if c not in df.columns]
-        if columnas_faltantes:
-            return jsonify({
-                'success': False,
-                'error': f'Columnas faltantes: {", ".join(columnas_faltantes)}',
-                'columnas_encontradas': list(df.columns)
-            }), 400
-
-        # Procesar datos
-        df['FECHA_SIGN_SINTOMAS'] = pd.to_datetime(df['FECHA_SIGN_SINTOMAS'], errors='coerce')
-        df.dropna(subset=['FECHA_SIGN_SINTOMAS'], inplace=True)
-        df_confirmados = df[df['ESTATUS_CASO'] == 1].copy()
-
-        if len(df_confirmados) == 0:
-            return jsonify({
-                'success': False,
-                'error': 'No hay casos confirmados (ESTATUS_CASO=1) en el archivo',
-                'registros_totales': registros_originales
-            }), 400
-
-        # Agregar poblaciÃ³n y nombre de estado
-        df_confirmados['POBLACION'] = df_confirmados['ENTIDAD_RES'].map(POBLACION_2025)
-        df_confirmados.dropna(subset=['POBLACION'], inplace=True)
-        df_confirmados['NOMBRE_ESTADO'] = df_confirmados['ENTIDAD_RES'].map(ESTADO_POR_ID)
+        modo = (request.form.get('modo') or request.args.get('modo') or '').lower()
+        if modo == 'rapido':
+            return procesar_csv_rapido(archivo)
 
-        # Agregar a series de tiempo (semanal)
-        df_ts = (
-            df_confirmados.groupby(['ENTIDAD_RES', 'NOMBRE_ESTADO', 'POBLACION'])
-            .resample('W', on='FECHA_SIGN_SINTOMAS')
-            .size()
-            .reset_index(name='casos_confirmados')
-        )
-        df_ts.rename(columns={'FECHA_SIGN_SINTOMAS': 'fecha_fin_semana'}, inplace=True)
+        # Si el mismo contenido ya se procesó, reutilizar el resultado
+        token_carga = hash_contenido(archivo.stream)
+        procesado = CACHE_PROCESADOS.obtener(token_carga)
 
-        # Calcular tasa de incidencia
-        df_ts['tasa_incidencia'] = (df_ts['casos_confirmados'] / df_ts['POBLACION']) * 100000
+        if procesado is None:
+            # Validar, leer por bloques y agregar; guardar para la carga
+            try:
+                procesado = procesar_archivo(archivo.stream)
+            except ArchivoInvalido as e:
+                return jsonify({'success': False, 'error': str(e), **e.detalle}), 400
+            CACHE_PROCESADOS.guardar(token_carga, procesado)
 
-        # Calcular target de riesgo (percentil 75)
-        umbral_riesgo = df_ts['tasa_incidencia'].quantile(0.75)
-        df_ts['riesgo_brote_target'] = np.where(df_ts['tasa_incidencia'] > umbral_riesgo, 1, 0).astype(int)
+        df_ts = procesado['df_ts']
+        umbral_riesgo = procesado['umbral_riesgo']
 
         # Preparar preview (primeros 10 registros)
         preview_data = []
@@ -1395,9 +1294,10 @@ def procesar_csv_preview():
 
         return jsonify({
             'success': True,
+            'token_carga': token_carga,
             'resumen': {
-                'registros_originales': registros_originales,
-                'casos_confirmados': len(df_confirmados),
+                'registros_originales': procesado['registros_originales'],
+                'casos_confirmados': procesado['casos_confirmados'],
                 'registros_procesados': len(df_ts),
                 'estados_procesados': len(estados_procesados),
                 'anios': anios_procesados,
@@ -1416,101 +1316,62 @@ def procesar_csv_preview():
 
 @app.route('/api/datos/cargar-csv', methods=['POST'])
 def cargar_csv():
-    """Carga un archivo CSV con datos de dengue y los procesa"""
-    if 'archivo' not in request.files:
-        return jsonify({'error': 'No se envió ningún archivo'}), 400
-
-    archivo = request.files['archivo']
-    if archivo.filename == '':
-        return jsonify({'error': 'Nombre de archivo vacío'}), 400
-
-    if not archivo.filename.endswith('.csv'):
-        return jsonify({'error': 'Solo se permiten archivos CSV'}), 400
+    """
+    Carga un archivo CSV con datos de dengue y los procesa.
+    Con token_carga (devuelto por /api/datos/procesar-csv) se reutiliza el
+    resultado de la vista previa y no es necesario reenviar el archivo.
+    """
+    token_carga = request.form.get('token_carga') or request.args.get('token_carga')
+    procesado = CACHE_PROCESADOS.obtener(token_carga) if token_carga else None
 
-    conn = get_db_connection()
-    if not conn:
-        return jsonify({'error': 'Error de conexión a base de datos'}), 500
+    archivo = request.files.get('archivo')
+    if procesado is None:
+        if archivo is None:
+            if token_carga:
+                return jsonify({
+                    'error': 'El token de carga expiró; vuelve a enviar el archivo',
+                    'token_expirado': True
+                }), 410
+            return jsonify({'error': 'No se envió ningún archivo'}), 400
 
-    cursor = None
-    try:
-        # Leer CSV
-        df = pd.read_csv(archivo)
-        registros_originales = len(df)
-
-        # Validar columnas requeridas
-        columnas_requeridas = ['FECHA_SIGN_SINTOMAS', 'ENTIDAD_RES', 'ESTATUS_CASO']
-        columnas_faltantes = [c for c in columnas_requeridas if c not in df.columns]
-        if columnas_faltantes:
-            return jsonify({
-                'error': f'Columnas faltantes: {", ".join(columnas_faltantes)}',
-                'columnas_encontradas': list(df.columns)
-            }), 400
+        if archivo.filename == '':
+            return jsonify({'error': 'Nombre de archivo vacío'}), 400
 
-        # Procesar datos
-        df['FECHA_SIGN_SINTOMAS'] = pd.to_datetime(df['FECHA_SIGN_SINTOMAS'], errors='coerce')
-        df.dropna(subset=['FECHA_SIGN_SINTOMAS'], inplace=True)
-        df_confirmados = df[df['ESTATUS_CASO'] == 1].copy()
+        if not extension_permitida(archivo.filename):
+            return jsonify({'error': 'Solo se permiten archivos CSV (.csv, .csv.gz, .gz o .zip)'}), 400
 
-        if len(df_confirmados) == 0:
+        # Modo asíncrono: guardar el archivo y devolver un job id
+        asincrono = (request.form.get('asincrono') or request.args.get('asincrono') or '').lower()
+        if asincrono in ('1', 'true', 'si'):
+            try:
+                trabajo = GESTOR_CARGAS.enviar(archivo)
+            except ColaLlena as e:
+                return jsonify({'success': False, 'error': str(e)}), 429
             return jsonify({
-                'error': 'No hay casos confirmados (ESTATUS_CASO=1) en el archivo',
-                'registros_totales': registros_originales
-            }), 400
-
-        # Agregar poblaciÃ³n
-        df_confirmados['POBLACION'] = df_confirmados['ENTIDAD_RES'].map(POBLACION_2025)
-        df_confirmados.dropna(subset=['POBLACION'], inplace=True)
-
-        # Agregar nombre de estado
-        df_confirmados['NOMBRE_ESTADO'] = df_confirmados['ENTIDAD_RES'].map(ESTADO_POR_ID)
-
-        # Agregar a series de tiempo (semanal)
-        df_ts = (
-            df_confirmados.groupby(['ENTIDAD_RES', 'NOMBRE_ESTADO', 'POBLACION'])
-            .resample('W', on='FECHA_SIGN_SINTOMAS')
-            .size()
-            .reset_index(name='casos_confirmados')
-        )
-        df_ts.rename(columns={'FECHA_SIGN_SINTOMAS': 'fecha_fin_semana'}, inplace=True)
+                'success': True,
+                'job_id': trabajo.id,
+                'estado': trabajo.estado,
+                'estado_url': f'/api/datos/jobs/{trabajo.id}'
+            }), 202
 
-        # Calcular tasa de incidencia
-        df_ts['tasa_incidencia'] = (df_ts['casos_confirmados'] / df_ts['POBLACION']) * 100000
+    conn = None
+    try:
+        if procesado is None:
+            # Validar, leer por bloques y agregar a series semanales
+            try:
+                procesado = procesar_archivo(archivo.stream)
+            except ArchivoInvalido as e:
+                return jsonify({'error': str(e), **e.detalle}), 400
 
-        # Calcular target de riesgo (percentil 75)
-        umbral_riesgo = df_ts['tasa_incidencia'].quantile(0.75)
-        df_ts['riesgo_brote_target'] = np.where(df_ts['tasa_incidencia'] > umbral_riesgo, 1, 0).astype(int)
+        df_ts = procesado['df_ts']
 
-        # Preparar para inserciÃ³n
-        cursor = conn.cursor()
+        # Insertar por lotes con una conexión del pool de ingesta
         fecha_carga = datetime.now().date()
-
-        insert_sql = """
-        INSERT INTO dato_epidemiologico
-            (id_enfermedad, id_region, fecha_fin_semana, casos_confirmados,
-             defunciones, tasa_incidencia, riesgo_brote_target, fecha_carga)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-            casos_confirmados = VALUES(casos_confirmados),
-            tasa_incidencia = VALUES(tasa_incidencia),
-            riesgo_brote_target = VALUES(riesgo_brote_target),
-            fecha_carga = VALUES(fecha_carga)
-        """
-
-        registros_insertados = 0
-        for _, row in df_ts.iterrows():
-            cursor.execute(insert_sql, (
-                1,  # id_enfermedad (Dengue)
-                int(row['ENTIDAD_RES']),
-                row['fecha_fin_semana'].date(),
-                int(row['casos_confirmados']),
-                0,  # defunciones
-                round(float(row['tasa_incidencia']), 4),
-                int(row['riesgo_brote_target']),
-                fecha_carga
-            ))
-            registros_insertados += 1
-
-        conn.commit()
+        conn = get_carga_connection()
+        filas = filas_para_insertar(df_ts, fecha_carga)
+        registros_insertados = insertar_semanal(conn, filas)
+        actualizar_tras_carga(conn, filas)
+        analitica.programar_sincronizacion()
 
         # Estadisticas del archivo procesado
         anios_procesados = df_ts['fecha_fin_semana'].dt.year.unique().tolist()
@@ -1520,8 +1381,8 @@ def cargar_csv():
             'success': True,
             'mensaje': f'Datos cargados exitosamente',
             'estadisticas': {
-                'registros_originales': registros_originales,
-                'casos_confirmados': len(df_confirmados),
+                'registros_originales': procesado['registros_originales'],
+                'casos_confirmados': procesado['casos_confirmados'],
                 'registros_insertados': registros_insertados,
                 'anios_procesados': sorted(anios_procesados),
                 'estados_procesados': len(estados_procesados),
@@ -1534,29 +1395,154 @@ def cargar_csv():
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
     finally:
-        if cursor:
-            cursor.close()
+        if conn:
+            conn.close()
+
+
+@app.route('/api/datos/jobs', methods=['GET'])
+def listar_trabajos_carga():
+    """Lista las cargas de CSV en segundo plano recientes"""
+    return jsonify({
+        'success': True,
+        'jobs': GESTOR_CARGAS.estados()
+    })
+
+
+@app.route('/api/datos/jobs/<job_id>', methods=['GET'])
+def estado_trabajo_carga(job_id):
+    """Progreso de una carga de CSV: filas leídas, semanas agregadas, filas insertadas y ETA"""
+    trabajo = GESTOR_CARGAS.estado(job_id)
+    if trabajo is None:
+        return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+    return jsonify({'success': True, **trabajo})
+
+
+@app.route('/api/datos/jobs/<job_id>', methods=['DELETE'])
+def cancelar_trabajo_carga(job_id):
+    """Cancela una carga en cola o en proceso"""
+    trabajo = GESTOR_CARGAS.cancelar(job_id)
+    if trabajo is None:
+        return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+    return jsonify({'success': True, 'mensaje': 'Cancelación solicitada', **trabajo})
+
+
+@app.route('/api/datos/export', methods=['GET'])
+def exportar_datos():
+    """
+    Exporta dato_epidemiologico como Parquet o Arrow IPC stream.
+    Parámetros: formato=parquet|arrow, id_region, id_enfermedad,
+    desde/hasta (YYYY-MM-DD). Los datos se envían por bloques desde un
+    cursor sin buffer, sin cargar la tabla completa en memoria.
+    """
+    if not intercambio_arrow.disponible():
+        return jsonify({'error': 'Exportación no disponible: instala pyarrow'}), 501
+
+    formato = request.args.get('formato', 'parquet').lower()
+    if formato not in intercambio_arrow.FORMATOS:
+        return jsonify({'error': 'formato debe ser parquet o arrow'}), 400
+
+    try:
+        filtros = {
+            'id_region': request.args.get('id_region', type=int),
+            'id_enfermedad': request.args.get('id_enfermedad', type=int),
+            'desde': datetime.strptime(request.args['desde'], '%Y-%m-%d').date() if request.args.get('desde') else None,
+            'hasta': datetime.strptime(request.args['hasta'], '%Y-%m-%d').date() if request.args.get('hasta') else None
+        }
+    except ValueError:
+        return jsonify({'error': 'Fechas inválidas, usa YYYY-MM-DD'}), 400
+
+    conn = get_lectura_connection()
+    if not conn:
+        return jsonify({'error': 'Error de conexión a base de datos'}), 500
+
+    sql, parametros = intercambio_arrow.consulta_export(**filtros)
+    cursor = conn.cursor(buffered=False)
+    try:
+        cursor.execute(sql, parametros)
+    except Exception as e:
+        cursor.close()
+        conn.close()
+        return jsonify({'error': str(e)}), 500
+
+    def generar():
+        try:
+            yield from intercambio_arrow.generar_export(cursor, formato)
+        finally:
+            conn.close()
+
+    tipo_mime, extension = intercambio_arrow.FORMATOS[formato]
+    return Response(
+        stream_with_context(generar()),
+        mimetype=tipo_mime,
+        headers={'Content-Disposition': f'attachment; filename=dato_epidemiologico.{extension}'}
+    )
+
+
+@app.route('/api/datos/importar', methods=['POST'])
+def importar_datos():
+    """
+    Ingesta de series semanales ya agregadas en Parquet o Arrow (campo
+    'archivo' o cuerpo de la petición). Las columnas se convierten
+    directamente a tuplas y se cargan con el upsert por lotes.
+    Requeridas: id_region, fecha_fin_semana, casos_confirmados.
+    """
+    if not intercambio_arrow.disponible():
+        return jsonify({'error': 'Ingesta no disponible: instala pyarrow'}), 501
+
+    formato = (request.args.get('formato') or '').lower() or None
+    if formato is not None and formato not in intercambio_arrow.FORMATOS:
+        return jsonify({'error': 'formato debe ser parquet o arrow'}), 400
+
+    archivo = request.files.get('archivo')
+    datos = archivo.read() if archivo else request.get_data()
+    if not datos:
+        return jsonify({'error': 'No se envió ningún archivo'}), 400
+
+    conn = None
+    try:
+        tabla = intercambio_arrow.leer_tabla(datos, formato)
+        filas = intercambio_arrow.filas_desde_tabla(tabla)
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Archivo inválido: {e}'}), 400
+
+    try:
+        conn = get_carga_connection()
+        registros_insertados = insertar_semanal(conn, filas)
+        actualizar_tras_carga(conn, filas)
+        analitica.programar_sincronizacion()
+        return jsonify({
+            'success': True,
+            'mensaje': 'Datos importados exitosamente',
+            'estadisticas': {
+                'registros_recibidos': tabla.num_rows,
+                'registros_insertados': registros_insertados,
+                'columnas': tabla.column_names
+            }
+        })
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+    finally:
         if conn:
             conn.close()
 
 
 @app.route('/api/datos/limpiar', methods=['DELETE'])
 def limpiar_datos():
-    """Elimina todos los datos epidemiológicos (usar con precaución)"""
+    """
+    Elimina todos los datos epidemiológicos (usar con precaución).
+    La tabla se intercambia por una vacía con RENAME TABLE en lugar de un
+    DELETE masivo: no bloquea las lecturas ni llena el undo log.
+    """
     conn = get_db_connection()
     if not conn:
         return jsonify({'error': 'Error de conexión'}), 500
 
     try:
-        cursor = conn.cursor()
-
-        # Contar antes de eliminar
-        cursor.execute("SELECT COUNT(*) FROM dato_epidemiologico")
-        registros_antes = cursor.fetchone()[0]
-
-        # Eliminar datos
-        cursor.execute("DELETE FROM dato_epidemiologico")
-        conn.commit()
+        registros_antes = vaciar_por_intercambio(conn)
+        actualizar_features(conn)
+        analitica.programar_sincronizacion()
 
         return jsonify({
             'success': True,
@@ -1566,79 +1552,50 @@ def limpiar_datos():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
-        cursor.close()
         conn.close()
 
 
 @app.route('/api/datos/limpiar-anio/<int:anio>', methods=['DELETE'])
 def limpiar_datos_anio(anio):
-    """Elimina datos de un año específico"""
+    """
+    Elimina datos de un año específico: TRUNCATE PARTITION si la tabla
+    está particionada por año, DELETE por rango de fechas si no.
+    """
     conn = get_db_connection()
     if not conn:
         return jsonify({'error': 'Error de conexión'}), 500
 
     try:
-        cursor = conn.cursor()
-
-        # Contar antes de eliminar
-        cursor.execute("SELECT COUNT(*) FROM dato_epidemiologico WHERE YEAR(fecha_fin_semana) = %s", (anio,))
-        registros_antes = cursor.fetchone()[0]
-
-        # Eliminar datos del aÃ±o
-        cursor.execute("DELETE FROM dato_epidemiologico WHERE YEAR(fecha_fin_semana) = %s", (anio,))
-        conn.commit()
+        registros_antes, metodo = limpiar_anio(conn, anio)
+        actualizar_features(conn, desde=date(anio, 1, 1))
+        analitica.programar_sincronizacion()
 
         return jsonify({
             'success': True,
             'mensaje': f'Datos del aÃ±o {anio} eliminados',
-            'registros_eliminados': registros_antes
+            'registros_eliminados': registros_antes,
+            'metodo': metodo
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
-        cursor.close()
         conn.close()
 
 
 @app.route('/api/datos/resumen-por-estado', methods=['GET'])
 def resumen_por_estado():
     """Obtiene resumen de datos por estado"""
-    conn = get_db_connection()
+    conn = get_reportes_connection()
     if not conn:
         return jsonify({'error': 'Error de conexión'}), 500
 
     try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT
-                r.id_region,
-                r.nombre as estado,
-                r.poblacion,
-                COUNT(d.id_dato) as total_registros,
-                COALESCE(SUM(d.casos_confirmados), 0) as total_casos,
-                COALESCE(AVG(d.tasa_incidencia), 0) as promedio_ti,
-                MIN(d.fecha_fin_semana) as fecha_inicio,
-                MAX(d.fecha_fin_semana) as fecha_fin
-            FROM region r
-            LEFT JOIN dato_epidemiologico d ON r.id_region = d.id_region
-            GROUP BY r.id_region, r.nombre, r.poblacion
-            ORDER BY total_casos DESC
-        """)
-        estados = cursor.fetchall()
-
-        for estado in estados:
-            if estado['fecha_inicio']:
-                estado['fecha_inicio'] = estado['fecha_inicio'].isoformat()
-            if estado['fecha_fin']:
-                estado['fecha_fin'] = estado['fecha_fin'].isoformat()
-            if estado['promedio_ti']:
-                estado['promedio_ti'] = float(estado['promedio_ti'])
-
-        return jsonify({'success': True, 'estados': estados})
+        cursor = cursor_filas(conn)
+        cursor.execute(consultas_dashboard.SQL_RESUMEN_POR_ESTADO)
+        return jsonify(consultas_dashboard.resumen_por_estado(cursor.fetchall()))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
-        cursor.close()
         conn.close()
 
 
@@ -1654,13 +1611,15 @@ def info_sistema():
         },
         'modelos': {
             'clasificador': {
-                'nombre': 'Random Forest Classifier',
+                'nombre': f"{ALGORITMOS[METADATOS_CLASIFICADOR['algoritmo']]} Classifier",
+                'algoritmo': METADATOS_CLASIFICADOR['algoritmo'],
                 'archivo': 'model.pkl',
                 'cargado': MODELO_DENGUE is not None,
                 'features': MODELO_DENGUE.n_features_in_ if MODELO_DENGUE else None
             },
             'regresor': {
-                'nombre': 'Random Forest Regressor',
+                'nombre': f"{ALGORITMOS[METADATOS_REGRESOR['algoritmo']]} Regressor",
+                'algoritmo': METADATOS_REGRESOR['algoritmo'],
                 'archivo': 'model_regressor.pkl',
                 'cargado': MODELO_REGRESSOR is not None,
                 'r2_score': '96.3%' if MODELO_REGRESSOR else None
@@ -1710,14 +1669,14 @@ def crear_tabla_alertas():
         print(f"Error creando tabla alertas: {e}")
         return False
     finally:
-        cursor.close()
         conn.close()
 
 
 @app.route('/api/alertas/generar-automaticas', methods=['POST'])
 def generar_alertas_automaticas():
     """Genera alertas automáticas basadas en predicciones de riesgo"""
-    conn = get_db_connection()
+    catalogo = CATALOGOS.obtener()
+    conn = get_lectura_connection() if catalogo else None
     if not conn:
         return jsonify({'error': 'Error de conexión'}), 500
 
@@ -1725,11 +1684,10 @@ def generar_alertas_automaticas():
         data = request.get_json() or {}
         umbral_riesgo = data.get('umbral_riesgo', 50)
 
-        cursor = conn.cursor(dictionary=True)
+        cursor = cursor_filas(conn)
 
-        # Obtener todas las regiones
-        cursor.execute("SELECT id_region, nombre, poblacion FROM region ORDER BY id_region")
-        regiones = cursor.fetchall()
+        # Todas las regiones (catálogo en memoria)
+        regiones = catalogo.regiones_por_id()
 
         alertas = []
         fecha_actual = datetime.now().strftime('%Y-%m-%d')
@@ -1765,35 +1723,14 @@ def generar_alertas_automaticas():
             else:
                 tendencia = 'Estable'
 
+            # Features de la semana siguiente, los mismos que en /api/modelo/predecir-riesgo
+            fila = features_prediccion(cursor, id_region)
+
             # Usar modelo de clasificaciÃ³n si estÃ¡ disponible
             if MODELO_DENGUE is not None:
                 try:
-                    casos_hist = [int(d['casos_confirmados']) for d in datos]
-                    ti_hist = [float(d['tasa_incidencia']) for d in datos]
-
-                    casos_lag_1w = casos_hist[0]
-                    casos_lag_4w = casos_hist[3] if len(casos_hist) > 3 else casos_lag_1w
-                    ti_lag_1w = ti_hist[0]
-                    ti_lag_4w = ti_hist[3] if len(ti_hist) > 3 else ti_lag_1w
-
-                    semana = datetime.now().isocalendar()[1]
-                    mes = datetime.now().month
-
-                    try:
-                        entidad_coded = LABEL_ENCODER.transform([nombre])[0]
-                    except:
-                        entidad_coded = id_region - 1
-
-                    X_predict = pd.DataFrame({
-                        'TI_LAG_1W': [ti_lag_1w],
-                        'TI_LAG_4W': [ti_lag_4w],
-                        'CASOS_LAG_1W': [casos_lag_1w],
-                        'CASOS_LAG_4W': [casos_lag_4w],
-                        'SEMANA_DEL_ANIO': [semana],
-                        'MES': [mes],
-                        'ENTIDAD_CODED': [entidad_coded]
-                    })
-
+                    X_predict = matriz(fila, columnas_modelo(MODELO_DENGUE, FEATURES_CLASIFICADOR),
+                                       CODIGOS_ENCODER[id_region], rellenar=0)
                     probabilidad = round(MODELO_DENGUE.predict_proba(X_predict)[0][1] * 100, 1)
                 except Exception as e:
                     probabilidad = min(100, max(0, ti_actual * 2))
@@ -1826,19 +1763,8 @@ def generar_alertas_automaticas():
             casos_esperados = casos_reciente
             if MODELO_REGRESSOR is not None:
                 try:
-                    X_reg = pd.DataFrame({
-                        'casos_lag_1w': [casos_lag_1w],
-                        'casos_lag_2w': [casos_hist[1] if len(casos_hist) > 1 else casos_lag_1w],
-                        'casos_lag_3w': [casos_hist[2] if len(casos_hist) > 2 else casos_lag_1w],
-                        'casos_lag_4w': [casos_lag_4w],
-                        'ti_lag_1w': [ti_lag_1w],
-                        'ti_lag_2w': [ti_hist[1] if len(ti_hist) > 1 else ti_lag_1w],
-                        'casos_promedio_4w': [sum(casos_hist[:4]) / min(4, len(casos_hist))],
-                        'tendencia_4w': [casos_lag_1w - casos_lag_4w],
-                        'semana_anio': [semana],
-                        'mes': [mes],
-                        'estado_coded': [entidad_coded]
-                    })
+                    X_reg = matriz(fila, REGRESSOR_FEATURES or FEATURES_REGRESOR,
+                                   CODIGOS_ENCODER_REG[id_region], rellenar=0)
                     casos_esperados = int(max(0, MODELO_REGRESSOR.predict(X_reg)[0]))
                 except:
                     pass
@@ -1873,7 +1799,6 @@ def generar_alertas_automaticas():
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
     finally:
-        cursor.close()
         conn.close()
 
 
@@ -1924,7 +1849,6 @@ def enviar_alerta():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
-        cursor.close()
         conn.close()
 
 
@@ -1973,7 +1897,6 @@ def enviar_alertas_masivo():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
-        cursor.close()
         conn.close()
 
 
@@ -1985,40 +1908,13 @@ def get_alertas_activas():
         return jsonify({'error': 'Error de conexiÃ³n'}), 500
 
     try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT id, id_region, estado, nivel, probabilidad,
-                   casos_esperados, mensaje, recomendaciones,
-                   fecha_generacion, fecha_envio, estado_alerta
-            FROM alertas_epidemiologicas
-            WHERE estado_alerta IN ('activa', 'enviada')
-            ORDER BY
-                CASE nivel
-                    WHEN 'CrÃ­tico' THEN 1
-                    WHEN 'Alto' THEN 2
-                    WHEN 'Moderado' THEN 3
-                    ELSE 4
-                END,
-                fecha_generacion DESC
-        """)
-        alertas = cursor.fetchall()
-
-        for a in alertas:
-            if a.get('fecha_generacion'):
-                a['fecha_generacion'] = a['fecha_generacion'].isoformat()
-            if a.get('fecha_envio'):
-                a['fecha_envio'] = a['fecha_envio'].isoformat()
-
-        return jsonify({
-            'success': True,
-            'alertas': alertas,
-            'total': len(alertas)
-        })
+        cursor = cursor_filas(conn)
+        cursor.execute(consultas_dashboard.SQL_ALERTAS_ACTIVAS)
+        return jsonify(consultas_dashboard.alertas_activas(cursor.fetchall()))
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
-        cursor.close()
         conn.close()
 
 
@@ -2030,7 +1926,7 @@ def get_historial_alertas():
         return jsonify({'error': 'Error de conexión'}), 500
 
     try:
-        cursor = conn.cursor(dictionary=True)
+        cursor = cursor_filas(conn)
         cursor.execute("""
             SELECT id, id_region, estado, nivel, probabilidad,
                    mensaje, estado_alerta, fecha_generacion,
@@ -2056,7 +1952,6 @@ def get_historial_alertas():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
-        cursor.close()
         conn.close()
 
 
@@ -2090,7 +1985,6 @@ def resolver_alerta(alerta_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
-        cursor.close()
         conn.close()
 
 
@@ -2099,283 +1993,102 @@ def resolver_alerta(alerta_id):
 # ============================================
 @app.route('/api/modelos/entrenar', methods=['POST'])
 def entrenar_modelo():
-    """Entrenar un modelo de Machine Learning con datos CSV"""
-    global MODELO_DENGUE, LABEL_ENCODER, MODELO_REGRESSOR, LABEL_ENCODER_REG, REGRESSOR_FEATURES
-
-    from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-    from sklearn.model_selection import train_test_split
-    from sklearn.preprocessing import LabelEncoder
-    from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, r2_score, mean_absolute_error
-
+    """
+    Entrenar un modelo de Machine Learning con datos CSV o, con
+    origen='bd', con dato_epidemiologico (filtros opcionales desde/hasta).
+    `tipo_algoritmo` es 'random_forest' (por defecto) o 'hist_gradient_boosting'
+    y `parametros` reemplaza sus hiperparámetros (ver seleccion_modelos.py).
+    Con modo='actualizar' no se reentrena: se agregan árboles al modelo
+    activo ajustados con las semanas recientes (opciones arboles_nuevos,
+    semanas_ventana y max_arboles; ver entrenamiento.actualizar).
+    Con asincrono=true el entrenamiento corre en un proceso aparte y se
+    consulta en GET /api/modelos/jobs/<id>; al terminar se activa solo.
+    """
     try:
         data = request.get_json()
         tipo_modelo = data.get('tipo_modelo')  # 'clasificador' o 'regresor'
         archivo_csv = data.get('archivo_csv')  # Ruta o nombre del archivo
+        desde_bd = data.get('origen') == 'bd'
 
-        if not tipo_modelo or not archivo_csv:
+        if not tipo_modelo or not (archivo_csv or desde_bd):
             return jsonify({
                 'success': False,
-                'error': 'Faltan parámetros: tipo_modelo y archivo_csv son requeridos'
+                'error': 'Faltan parámetros: tipo_modelo y archivo_csv (u origen="bd") son requeridos'
             }), 400
 
-        # Buscar el archivo CSV
-        csv_path = None
-        posibles_rutas = [
-            os.path.join(BACKEND_DIR, '..', 'data', archivo_csv),
-            os.path.join(BACKEND_DIR, '..', 'modelo', archivo_csv),
-            os.path.join(BACKEND_DIR, archivo_csv),
-            archivo_csv
-        ]
-
-        for ruta in posibles_rutas:
-            if os.path.exists(ruta):
-                csv_path = ruta
-                break
-
-        if not csv_path:
+        if tipo_modelo not in ('clasificador', 'regresor'):
             return jsonify({
                 'success': False,
-                'error': f'Archivo CSV no encontrado: {archivo_csv}'
-            }), 404
-
-        # Cargar datos
-        df = pd.read_csv(csv_path)
-        print(f"📊 Datos cargados: {len(df)} registros, {len(df.columns)} columnas")
-
-        # Normalizar nombres de columnas a minúsculas para alinear entrenamiento e inferencia
-        df.columns = [c.lower() for c in df.columns]
-        rename_map = {
-            'semana_del_anio': 'semana_anio',
-            'semana_epidemiologica': 'semana_anio',
-            'entidad': 'entidad_fed',
-            'riesgo_brote_target': 'nivel_riesgo_encoded',
-            'casos_semana_siguiente': 'casos_confirmados'
-        }
-        df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns}, inplace=True)
-
-        # Codificar entidad si viene como texto
-        if 'entidad_coded' not in df.columns and 'estado_coded' in df.columns:
-            df['entidad_coded'] = df['estado_coded']
-        if 'entidad_coded' not in df.columns and 'entidad_fed' in df.columns:
-            le_entidad = LabelEncoder()
-            df['entidad_coded'] = le_entidad.fit_transform(df['entidad_fed'])
-            LABEL_ENCODER = le_entidad
-            LABEL_ENCODER_REG = le_entidad
-            print(f"?? LabelEncoder creado con {len(le_entidad.classes_)} estados")
-
-        # Calcular features derivados si faltan y hay lags disponibles
-        lag_cols = ['casos_lag_1w', 'casos_lag_2w', 'casos_lag_3w', 'casos_lag_4w']
-        if all(col in df.columns for col in lag_cols):
-            if 'casos_promedio_4w' not in df.columns:
-                df['casos_promedio_4w'] = df[lag_cols].mean(axis=1)
-            if 'tendencia_4w' not in df.columns:
-                df['tendencia_4w'] = df['casos_lag_1w'] - df['casos_lag_4w']
-            if 'variacion_pct' not in df.columns:
-                df['variacion_pct'] = df.apply(
-                    lambda r: ((r['casos_lag_1w'] - r['casos_lag_2w']) / r['casos_lag_2w']) if r['casos_lag_2w'] != 0 else 0,
-                    axis=1
-                )
-
-        if tipo_modelo == 'clasificador':
-            # Entrenar modelo clasificador (features en min?sculas para coincidir con inferencia)
-            if 'NIVEL_RIESGO' in df.columns:
-                riesgo_map = {'bajo': 0, 'medio': 1, 'alto': 2, 'critico': 3, 'cr?tico': 3}
-                df['nivel_riesgo_encoded'] = df['NIVEL_RIESGO'].str.lower().map(riesgo_map)
-            if 'nivel_riesgo' in df.columns and 'nivel_riesgo_encoded' not in df.columns:
-                riesgo_map = {'bajo': 0, 'medio': 1, 'alto': 2, 'critico': 3, 'cr?tico': 3}
-                df['nivel_riesgo_encoded'] = df['nivel_riesgo'].str.lower().map(riesgo_map)
-            if 'nivel_riesgo_encoded' not in df.columns:
-                return jsonify({
-                    'success': False,
-                    'error': 'No se encontr? la columna objetivo nivel_riesgo_encoded'
-                }), 400
-
-            if 'estado_coded' not in df.columns and 'entidad_coded' in df.columns:
-                df['estado_coded'] = df['entidad_coded']
-
-            # Si no hay LabelEncoder pero tenemos nombres de entidad, ajustarlo para mantenerlo en disco
-            if LABEL_ENCODER is None and 'entidad_fed' in df.columns:
-                le_entidad = LabelEncoder()
-                df['estado_coded'] = le_entidad.fit_transform(df['entidad_fed'])
-                LABEL_ENCODER = le_entidad
-
-            clf_feature_pool = [
-                'casos_lag_1w', 'casos_lag_2w', 'casos_lag_3w', 'casos_lag_4w',
-                'ti_lag_1w', 'ti_lag_2w', 'ti_lag_3w', 'ti_lag_4w',
-                'casos_promedio_4w', 'tendencia_4w', 'variacion_pct',
-                'semana_anio', 'mes', 'estado_coded'
-            ]
-            feature_cols = [col for col in clf_feature_pool if col in df.columns]
-
-            if len(feature_cols) < 4:
-                return jsonify({
-                    'success': False,
-                    'error': f'No hay suficientes columnas de features para el clasificador. Encontradas: {feature_cols}'
-                }), 400
-
-            X = df[feature_cols]
-            y = df['nivel_riesgo_encoded']
-
-            # Dividir datos
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42, stratify=y
-            )
-
-            # Entrenar modelo
-            print("🧖 Entrenando Random Forest Clasificador...")
-            modelo = RandomForestClassifier(
-                n_estimators=100,
-                max_depth=15,
-                min_samples_split=10,
-                min_samples_leaf=5,
-                random_state=42,
-                n_jobs=-1
-            )
-            modelo.fit(X_train, y_train)
-
-            # Evaluar
-            y_pred = modelo.predict(X_test)
-            accuracy = accuracy_score(y_test, y_pred)
-            precision = precision_score(y_test, y_pred, average='weighted', zero_division=0)
-            recall = recall_score(y_test, y_pred, average='weighted', zero_division=0)
-            f1 = f1_score(y_test, y_pred, average='weighted', zero_division=0)
-
-            # Guardar modelo
-            model_path = os.path.join(BACKEND_DIR, 'model.pkl')
-            encoder_path = os.path.join(BACKEND_DIR, 'label_encoder.pkl')
-            joblib.dump(modelo, model_path)
-            joblib.dump(LABEL_ENCODER, encoder_path)
-
-            # Actualizar variable global
-            MODELO_DENGUE = modelo
-
-            print(f"✔️ Modelo clasificador entrenado y guardado")
-            print(f"   - Accuracy: {accuracy:.4f}")
-            print(f"   - Precision: {precision:.4f}")
-            print(f"   - Recall: {recall:.4f}")
-            print(f"   - F1-Score: {f1:.4f}")
-
-            return jsonify({
-                'success': True,
-                'tipo_modelo': 'clasificador',
-                'metricas': {
-                    'accuracy': float(accuracy),
-                    'precision': float(precision),
-                    'recall': float(recall),
-                    'f1_score': float(f1)
-                },
-                'datos': {
-                    'total_registros': len(df),
-                    'registros_entrenamiento': len(X_train),
-                    'registros_prueba': len(X_test),
-                    'features': feature_cols
-                },
-                'archivo_guardado': 'model.pkl',
-                'mensaje': 'Modelo clasificador entrenado exitosamente'
-            }), 200
-
-        elif tipo_modelo == 'regresor':
-            # Entrenar modelo regresor (features en min?sculas para coincidir con inferencia)
-            if 'entidad_coded' not in df.columns and 'estado_coded' in df.columns:
-                df['entidad_coded'] = df['estado_coded']
-            elif 'entidad_coded' not in df.columns and 'entidad_fed' in df.columns:
-                le_entidad = LabelEncoder()
-                df['entidad_coded'] = le_entidad.fit_transform(df['entidad_fed'])
-                LABEL_ENCODER_REG = le_entidad
-
-            if LABEL_ENCODER_REG is None and 'entidad_fed' in df.columns and 'entidad_coded' in df.columns:
-                le_entidad = LabelEncoder()
-                df['entidad_coded'] = le_entidad.fit_transform(df['entidad_fed'])
-                LABEL_ENCODER_REG = le_entidad
-
-            # Preparar datos
-            if 'estado_coded' not in df.columns and 'entidad_coded' in df.columns:
-                df['estado_coded'] = df['entidad_coded']
-            reg_feature_pool = [
-                'casos_lag_1w', 'casos_lag_2w', 'casos_lag_3w', 'casos_lag_4w',
-                'ti_lag_1w', 'ti_lag_2w',
-                'casos_promedio_4w', 'tendencia_4w',
-                'semana_anio', 'mes', 'estado_coded'
-            ]
-            feature_cols = [col for col in reg_feature_pool if col in df.columns]
-
-            if len(feature_cols) < 4:
-                return jsonify({
-                    'success': False,
-                    'error': f'No hay suficientes columnas de features para el regresor. Encontradas: {feature_cols}'
-                }), 400
+                'error': 'tipo_modelo debe ser "clasificador" o "regresor"'
+            }), 400
 
-            target_col = 'casos_confirmados' if 'casos_confirmados' in df.columns else None
-            if target_col is None:
+        # Algoritmo e hiperparámetros opcionales (p. ej. los que reporta scripts/seleccionar_modelo.py)
+        try:
+            algoritmo = validar_algoritmo(data.get('tipo_algoritmo') or ALGORITMO_POR_DEFECTO)
+            parametros = validar_parametros(data['parametros'], algoritmo) if data.get('parametros') else None
+            modo = data.get('modo') or 'completo'
+            if modo not in ('completo', 'actualizar'):
+                raise DatosInvalidos('modo debe ser "completo" o "actualizar"')
+            actualizacion = None
+            if modo == 'actualizar':
+                opciones = {k: data[k] for k in ('arboles_nuevos', 'semanas_ventana', 'max_arboles') if k in data}
+                actualizacion = {'directorio_modelo': BACKEND_DIR, **validar_actualizacion(opciones)}
+        except DatosInvalidos as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        if desde_bd:
+            # Lectura por rangos de fecha_fin_semana (YYYY-MM-DD, inclusivos)
+            try:
+                fuente = {
+                    'desde': datetime.strptime(data['desde'], '%Y-%m-%d').date() if data.get('desde') else None,
+                    'hasta': datetime.strptime(data['hasta'], '%Y-%m-%d').date() if data.get('hasta') else None,
+                    'id_enfermedad': int(data['id_enfermedad']) if data.get('id_enfermedad') else None
+                }
+            except ValueError:
+                return jsonify({'success': False, 'error': 'desde/hasta deben tener formato YYYY-MM-DD'}), 400
+            origen = 'bd'
+        else:
+            # Buscar el archivo CSV
+            fuente = buscar_csv(archivo_csv, BACKEND_DIR)
+            if not fuente:
                 return jsonify({
                     'success': False,
-                    'error': 'No se encontr? la columna casos_confirmados para el regresor'
-                }), 400
-
-            X = df[feature_cols]
-            y = df[target_col]
-
-            # Dividir datos
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42
-            )
-
-            # Entrenar modelo
-            print("🧖 Entrenando Random Forest Regresor...")
-            modelo = RandomForestRegressor(
-                n_estimators=100,
-                max_depth=15,
-                min_samples_split=10,
-                random_state=42,
-                n_jobs=-1
-            )
-            modelo.fit(X_train, y_train)
-
-            # Evaluar
-            y_pred = modelo.predict(X_test)
-            r2 = r2_score(y_test, y_pred)
-            mae = mean_absolute_error(y_test, y_pred)
-
-            # Guardar modelo
-            regressor_path = os.path.join(BACKEND_DIR, 'model_regressor.pkl')
-            features_path = os.path.join(BACKEND_DIR, 'regressor_features.pkl')
-            encoder_reg_path = os.path.join(BACKEND_DIR, 'label_encoder_regressor.pkl')
-
-            joblib.dump(modelo, regressor_path)
-            joblib.dump(feature_cols, features_path)
-            if 'LABEL_ENCODER_REG' in locals():
-                joblib.dump(LABEL_ENCODER_REG, encoder_reg_path)
-
-            # Actualizar variable global
-            MODELO_REGRESSOR = modelo
-            REGRESSOR_FEATURES = feature_cols
-
-            print(f"✔️ Modelo regresor entrenado y guardado")
-            print(f"   - R²: {r2:.4f}")
-            print(f"   - MAE: {mae:.2f}")
+                    'error': f'Archivo CSV no encontrado: {archivo_csv}'
+                }), 404
+            origen = archivo_csv
 
+        # Modo asíncrono: encolar en el pool de procesos y devolver un job id
+        if str(data.get('asincrono', '')).lower() in ('1', 'true', 'si'):
+            try:
+                trabajo = GESTOR_ENTRENAMIENTOS.enviar(
+                    tipo_modelo, fuente, origen, LABEL_ENCODER, LABEL_ENCODER_REG, parametros, algoritmo,
+                    actualizacion)
+            except ColaEntrenamientoLlena as e:
+                return jsonify({'success': False, 'error': str(e)}), 429
             return jsonify({
                 'success': True,
-                'tipo_modelo': 'regresor',
-                'metricas': {
-                    'r2_score': float(r2),
-                    'mae': float(mae)
-                },
-                'datos': {
-                    'total_registros': len(df),
-                    'registros_entrenamiento': len(X_train),
-                    'registros_prueba': len(X_test),
-                    'features': feature_cols
-                },
-                'archivo_guardado': 'model_regressor.pkl',
-                'mensaje': 'Modelo regresor entrenado exitosamente'
-            }), 200
+                'job_id': trabajo.id,
+                'estado': trabajo.fase_actual(),
+                'estado_url': f'/api/modelos/jobs/{trabajo.id}'
+            }), 202
 
-        else:
-            return jsonify({
-                'success': False,
-                'error': 'tipo_modelo debe ser "clasificador" o "regresor"'
-            }), 400
+        # Modo síncrono: entrenar dentro de la petición, publicar y activar
+        directorio_tmp = directorio_temporal(MODELOS_DIR)
+        try:
+            if actualizacion is not None:
+                resultado = actualizar(tipo_modelo, fuente, directorio_tmp, **actualizacion)
+            else:
+                resultado = entrenar(tipo_modelo, fuente, directorio_tmp, LABEL_ENCODER, LABEL_ENCODER_REG,
+                                     parametros=parametros, algoritmo=algoritmo)
+        except DatosInvalidos as e:
+            descartar(directorio_tmp)
+            return jsonify({'success': False, 'error': str(e)}), 400
+        except Exception:
+            descartar(directorio_tmp)
+            raise
+
+        activar_modelo_publicado(publicar(directorio_tmp, MODELOS_DIR))
+        return jsonify({'success': True, **resultado}), 200
 
     except Exception as e:
         import traceback
@@ -2387,6 +2100,24 @@ def entrenar_modelo():
         }), 500
 
 
+@app.route('/api/modelos/jobs', methods=['GET'])
+def listar_trabajos_entrenamiento():
+    """Lista los entrenamientos en segundo plano recientes"""
+    return jsonify({
+        'success': True,
+        'jobs': GESTOR_ENTRENAMIENTOS.estados()
+    })
+
+
+@app.route('/api/modelos/jobs/<job_id>', methods=['GET'])
+def estado_trabajo_entrenamiento(job_id):
+    """Fase y avance de un entrenamiento: cargando, features, entrenando, evaluando, guardando"""
+    trabajo = GESTOR_ENTRENAMIENTOS.estado(job_id)
+    if trabajo is None:
+        return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+    return jsonify({'success': True, **trabajo})
+
+
 @app.route('/api/modelos/info', methods=['GET'])
 def get_modelos_info():
     """Obtiene información sobre los modelos cargados y archivos CSV disponibles"""
@@ -2398,14 +2129,19 @@ def get_modelos_info():
             'existe': os.path.exists(os.path.join(BACKEND_DIR, 'model.pkl')),
             'label_encoder': LABEL_ENCODER is not None,
             'n_features': MODELO_DENGUE.n_features_in_ if MODELO_DENGUE else 0,
-            'n_classes': len(LABEL_ENCODER.classes_) if LABEL_ENCODER else 0
+            'n_classes': len(LABEL_ENCODER.classes_) if LABEL_ENCODER else 0,
+            'formato': 'compacto' if isinstance(MODELO_DENGUE, BosqueCompacto) else 'pkl',
+            'metadatos': METADATOS_CLASIFICADOR
         },
         'regresor': {
             'cargado': MODELO_REGRESSOR is not None,
             'archivo': 'model_regressor.pkl',
             'existe': os.path.exists(os.path.join(BACKEND_DIR, 'model_regressor.pkl')),
-            'features': REGRESSOR_FEATURES if REGRESSOR_FEATURES else []
-        }
+            'features': REGRESSOR_FEATURES if REGRESSOR_FEATURES else [],
+            'formato': 'compacto' if isinstance(MODELO_REGRESSOR, BosqueCompacto) else 'pkl',
+            'metadatos': METADATOS_REGRESOR
+        },
+        'algoritmos': ALGORITMOS
     }
 
     # Buscar archivos CSV disponibles
@@ -2450,6 +2186,7 @@ if __name__ == '__main__':
     # Crear tablas si no existen
     crear_tabla_predicciones()
     crear_tabla_alertas()
+    CATALOGOS.obtener()
     print("\n" + "="*60)
     print("ðŸš€ API Flask - PredicciÃ³n de Riesgo de Dengue")
     print("="*60)
@@ -2468,7 +2205,11 @@ if __name__ == '__main__':
     print("   GET  /api/dashboard/resumen")
     print("   GET  /api/health")
     print("   POST /api/datos/procesar-csv")
-    print("   POST /api/datos/cargar-csv")
+    print("   POST /api/datos/cargar-csv  (asincrono=true -> job)")
+    print("   GET  /api/datos/jobs/<id>")
+    print("   DELETE /api/datos/jobs/<id>")
+    print("   GET  /api/datos/export?formato=parquet|arrow")
+    print("   POST /api/datos/importar  (Parquet/Arrow)")
     print("   GET  /api/datos/estadisticas")
     print("   GET  /api/datos/resumen-por-estado")
     print("   DELETE /api/datos/limpiar")
@@ -2479,7 +2220,8 @@ if __name__ == '__main__':
     print("   GET  /api/alertas/historial")
     print("   PUT  /api/alertas/<id>/resolver")
     print("   GET  /api/health")
-    print("   POST /api/modelos/entrenar")
+    print("   POST /api/modelos/entrenar  (asincrono=true -> job)")
+    print("   GET  /api/modelos/jobs/<id>")
     print("   GET  /api/modelos/info")
     print("="*60 + "\n")
 
@@ -0,0 +1,216 @@
+# ----------------------------------------------------------------------
+# ARCHIVOS_ENTRADA.PY: Apertura de CSVs planos o comprimidos (.gz / .zip)
+# y detección de codificación
+# ----------------------------------------------------------------------
+# Los datos abiertos de dengue se publican como .zip. abrir_csv() entrega
+# un flujo binario del CSV descomprimiendo sobre la marcha (sin escribir
+# el CSV a disco), junto con la codificación detectada sobre una muestra
+# inicial, para pasarlo directo a leer_csv() / pd.read_csv().
+# Si la muestra no es todo el archivo, en los datos abiertos suele ser
+# ASCII y los acentos en cp1252 aparecen más adelante: esos flujos se leen
+# con CODIFICACION_FLUJO, que no falla a media carga.
+# El tipo se detecta por los bytes mágicos, no por la extensión, para que
+# también funcione con los archivos temporales de las cargas.
+# ----------------------------------------------------------------------
+
+import codecs
+import encodings
+import gzip
+import os
+import zipfile
+
+EXTENSIONES_PERMITIDAS = ('.csv', '.csv.gz', '.gz', '.zip')
+
+MAGIA_GZIP = b'\x1f\x8b'
+MAGIA_ZIP = b'PK\x03\x04'
+
+# Bytes iniciales usados para detectar la codificación y estimar tamaños
+TAMANO_MUESTRA = 1024 * 1024
+
+# utf-8 hasta el primer byte inválido y cp1252 desde ahí (ver más abajo)
+CODIFICACION_FLUJO = 'utf8-cp1252'
+
+# cp1252 con los 5 bytes que no define (0x81, 0x8D, 0x8F, 0x90, 0x9D)
+# tomados como latin-1: decodifica cualquier byte
+TABLA_CP1252 = ''.join(bytes([b]).decode('cp1252', errors='ignore') or chr(b) for b in range(256))
+
+
+def extension_permitida(nombre):
+    """True si el nombre de archivo tiene una extensión de entrada soportada."""
+    return str(nombre).lower().endswith(EXTENSIONES_PERMITIDAS)
+
+
+def buscar_variante(ruta_csv):
+    """
+    Devuelve la ruta existente entre `x.csv`, `x.csv.gz` y `x.zip`
+    (en ese orden), o None si no hay ninguna.
+    """
+    base = ruta_csv[:-4] if ruta_csv.lower().endswith('.csv') else ruta_csv
+    for candidata in (ruta_csv, ruta_csv + '.gz', base + '.zip'):
+        if os.path.exists(candidata):
+            return candidata
+    return None
+
+
+def detectar_codificacion(muestra):
+    """
+    Codificación de un bloque de bytes: utf-8 (con o sin BOM), cp1252 o
+    latin-1 como último recurso (acepta cualquier byte). Una secuencia
+    utf-8 cortada al final de la muestra no cuenta como error.
+    """
+    if muestra.startswith(b'\xef\xbb\xbf'):
+        return 'utf-8-sig'
+    try:
+        muestra.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError as e:
+        if e.start >= len(muestra) - 3 and e.reason == 'unexpected end of data':
+            return 'utf-8'
+    try:
+        muestra.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+
+class _DecodificadorFlujo(codecs.BufferedIncrementalDecoder):
+    """
+    Decodifica utf-8 mientras los bytes lo sean; en el primer byte inválido
+    pasa a cp1252 (TABLA_CP1252) por el resto del flujo. Una secuencia
+    utf-8 cortada entre dos bloques queda en el búfer hasta el siguiente.
+    """
+
+    def __init__(self, errors='strict'):
+        super().__init__(errors)
+        self.cp1252 = False
+
+    def _buffer_decode(self, datos, errors, final):
+        if not self.cp1252:
+            try:
+                return codecs.utf_8_decode(datos, 'strict', final)
+            except UnicodeDecodeError as e:
+                self.cp1252 = True
+                texto = codecs.utf_8_decode(datos[:e.start], 'strict', True)[0]
+                return texto + codecs.charmap_decode(datos[e.start:], 'strict', TABLA_CP1252)[0], len(datos)
+        return codecs.charmap_decode(datos, 'strict', TABLA_CP1252)[0], len(datos)
+
+    def reset(self):
+        super().reset()
+        self.cp1252 = False
+
+    def getstate(self):
+        return self.buffer, int(self.cp1252)
+
+    def setstate(self, estado):
+        self.buffer, cp1252 = estado
+        self.cp1252 = bool(cp1252)
+
+
+def _decodificar_flujo(datos, errors='strict'):
+    decodificador = _DecodificadorFlujo()
+    return decodificador.decode(datos, final=True), len(datos)
+
+
+def _buscar_codec(nombre):
+    if encodings.normalize_encoding(nombre).lower() != 'utf8_cp1252':
+        return None
+    utf8 = codecs.lookup('utf-8')
+    return codecs.CodecInfo(
+        name=CODIFICACION_FLUJO, encode=utf8.encode, decode=_decodificar_flujo,
+        incrementalencoder=utf8.incrementalencoder, incrementaldecoder=_DecodificadorFlujo,
+        streamwriter=utf8.streamwriter)
+
+
+codecs.register(_buscar_codec)
+
+
+class EntradaCSV:
+    """
+    CSV listo para leer. `flujo` es un archivo binario (descomprimido),
+    `codificacion` la detectada (CODIFICACION_FLUJO si la muestra no
+    alcanza para saberlo), `compresion` None/'gzip'/'zip',
+    `tamano` los bytes del CSV descomprimido (estimado para gzip, ver
+    `tamano_exacto`) y `crudo` el archivo original, cuya posición sirve
+    para medir el avance de la lectura.
+    """
+
+    def __init__(self, fuente):
+        self._propio = isinstance(fuente, (str, os.PathLike))
+        self.crudo = open(fuente, 'rb') if self._propio else fuente
+        self.crudo.seek(0, 2)
+        self.tamano_crudo = self.crudo.tell()
+        self.crudo.seek(0)
+        magia = self.crudo.read(4)
+        self.crudo.seek(0)
+
+        self._zip = None
+        self.nombre_interno = None
+        self.tamano_exacto = True
+        if magia.startswith(MAGIA_GZIP):
+            self.compresion = 'gzip'
+            self.flujo = gzip.GzipFile(fileobj=self.crudo, mode='rb')
+        elif magia.startswith(MAGIA_ZIP):
+            self.compresion = 'zip'
+            self._zip = zipfile.ZipFile(self.crudo)
+            info = self._miembro_csv(self._zip)
+            self.nombre_interno = info.filename
+            self.tamano = info.file_size
+            self.flujo = self._zip.open(info)
+        else:
+            self.compresion = None
+            self.tamano = self.tamano_crudo
+            self.flujo = self.crudo
+
+        muestra = self.flujo.read(TAMANO_MUESTRA)
+        if self.compresion == 'gzip':
+            # Tamaño descomprimido estimado con la razón de compresión inicial
+            consumidos = self.crudo.tell()
+            if len(muestra) < TAMANO_MUESTRA or not consumidos:
+                self.tamano = len(muestra)
+            else:
+                self.tamano = int(self.tamano_crudo * len(muestra) / consumidos)
+                self.tamano_exacto = False
+        self.codificacion = detectar_codificacion(muestra)
+        if len(muestra) == TAMANO_MUESTRA and self.codificacion != 'utf-8-sig':
+            # Queda archivo sin revisar: un byte cp1252 más adelante haría
+            # fallar pd.read_csv con la carga a medias
+            self.codificacion = CODIFICACION_FLUJO
+        self.flujo.seek(0)
+
+    @staticmethod
+    def _miembro_csv(archivo_zip):
+        """El CSV más grande del zip (los datos abiertos traen un solo CSV)."""
+        miembros = [i for i in archivo_zip.infolist() if not i.is_dir()]
+        csvs = [i for i in miembros if i.filename.lower().endswith('.csv')] or miembros
+        if not csvs:
+            raise ValueError('El archivo .zip no contiene ningún CSV')
+        return max(csvs, key=lambda i: i.file_size)
+
+    @property
+    def buscable(self):
+        """True si seek() es barato (solo en CSV sin comprimir)."""
+        return self.compresion is None
+
+    def posicion_cruda(self):
+        """Bytes consumidos del archivo original (para progreso)."""
+        return self.crudo.tell()
+
+    def cerrar(self):
+        if self.flujo is not self.crudo:
+            self.flujo.close()
+        if self._zip is not None:
+            self._zip.close()
+        if self._propio:
+            self.crudo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+        return False
+
+
+def abrir_csv(fuente):
+    """Abre una ruta o archivo binario (.csv, .gz o .zip) como EntradaCSV."""
+    return EntradaCSV(fuente)
@@ -0,0 +1,341 @@
+# ----------------------------------------------------------------------
+# ASGI.PY: Modo asíncrono (ASGI) con acceso a MySQL sin bloquear
+# ----------------------------------------------------------------------
+# En Flask cada petición ocupa un hilo mientras espera a MySQL: los
+# clientes simultáneos quedan limitados por hilos y conexiones del pool.
+# crear_app() arma una aplicación ASGI (Starlette) con las mismas rutas:
+#
+#     cd backend
+#     uvicorn --factory asgi:crear_app --host 0.0.0.0 --port 5001 --workers 4
+#
+# - Las rutas de lectura que consulta el dashboard (health, resumen,
+#   catálogos, alertas activas, reportes, estadísticas y la predicción
+#   automática) son corrutinas sobre un pool de aiomysql: mientras esperan
+#   a MySQL el mismo proceso atiende otras peticiones.
+# - Las consultas independientes de un endpoint (las 7 del reporte
+#   epidemiológico, las 6 de estadísticas...) se lanzan a la vez, cada una
+#   con su conexión del pool.
+# - La predicción del modelo (app.evaluar_riesgo) corre en un
+#   ThreadPoolExecutor para no detener el loop.
+# - Las demás rutas (cargas, entrenamiento, predicción avanzada, envío de
+#   alertas...) las atiende la app Flask de app.py montada como WSGI, en
+#   sus hilos y con su pool de mysql.connector.
+#
+# Las consultas y la forma de las respuestas vienen de
+# consultas_dashboard.py, las mismas que usa Flask. El pool asíncrono
+# conecta al primario (DB_HOST); la réplica de lectura solo se usa en las
+# rutas que atiende Flask. Con MOTOR_REPORTES=duckdb los reportes se leen
+# de la copia en DuckDB (en un hilo).
+#
+# starlette, aiomysql y a2wsgi (y uvicorn para servir) son opcionales:
+# sin ellos disponible() es False y se sigue usando python app.py o
+# gunicorn.
+# ----------------------------------------------------------------------
+
+import asyncio
+import os
+import re
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+try:
+    import aiomysql
+    from a2wsgi import WSGIMiddleware
+    from starlette.applications import Starlette
+    from starlette.middleware import Middleware
+    from starlette.middleware.cors import CORSMiddleware
+    from starlette.responses import Response
+    from starlette.routing import Mount, Route
+except ImportError:
+    aiomysql = None
+
+import analitica
+import app as aplicacion_flask
+import consultas_dashboard
+from features import COLUMNAS_FEATURES, TABLA_FEATURES, VENTANA, fila_desde_historial
+from lectura_filas import cursor_filas
+
+# Conexiones del pool asíncrono: no se ocupan mientras la petición espera
+# otra cosa, así que conviene más de las del pool de Flask
+ASGI_DB_POOL_MIN = int(os.getenv('ASGI_DB_POOL_MIN', 1))
+ASGI_DB_POOL_MAX = int(os.getenv('ASGI_DB_POOL_MAX', 20))
+# Hilos para la predicción del modelo y para las rutas de Flask
+ASGI_INFERENCIA_HILOS = int(os.getenv('ASGI_INFERENCIA_HILOS', 2))
+ASGI_WSGI_HILOS = int(os.getenv('ASGI_WSGI_HILOS', 10))
+
+# pymysql sustituye los parámetros con el operador %: los demás % de la
+# consulta (DATE_FORMAT) van duplicados
+_PORCENTAJE = re.compile(r'%(?!s)')
+
+
+def disponible():
+    return aiomysql is not None
+
+
+def respuesta(datos, status=200):
+    """JSON con el proveedor de Flask, para responder igual que jsonify (Decimal, fechas)."""
+    return Response(aplicacion_flask.app.json.dumps(datos), status, media_type='application/json')
+
+
+async def consultar_una(pool, sql, params=None, una_fila=True):
+    if params is not None:
+        sql = _PORCENTAJE.sub('%%', sql)
+    async with pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(sql, params)
+            return await cursor.fetchone() if una_fila else list(await cursor.fetchall())
+
+
+async def consultar(pool, consultas, params=None):
+    """Como consultas_dashboard.consultar, con todas las consultas a la vez."""
+    resultados = await asyncio.gather(*(consultar_una(pool, sql, params, una_fila)
+                                        for sql, una_fila in consultas.values()))
+    return dict(zip(consultas, resultados))
+
+
+async def consultar_reportes(pool, consultas, params=None):
+    """Los reportes en la copia de DuckDB si está activa (ver app.get_reportes_connection)."""
+    conn = analitica.conectar()
+    if conn is None:
+        return await consultar(pool, consultas, params)
+
+    def en_duckdb():
+        try:
+            return consultas_dashboard.consultar(cursor_filas(conn), consultas, params)
+        finally:
+            conn.close()
+    return await asyncio.to_thread(en_duckdb)
+
+
+async def features_prediccion(pool, id_region):
+    """app.features_prediccion sin fecha: la semana pendiente siguiente a la última con datos."""
+    fila = None
+    try:
+        fila = await consultar_una(
+            pool, f"SELECT fecha_fin_semana, {', '.join(COLUMNAS_FEATURES)} FROM {TABLA_FEATURES} "
+                  "WHERE id_region = %s ORDER BY fecha_fin_semana DESC LIMIT 1", (id_region,))
+    except aiomysql.MySQLError as e:
+        print(f"⚠️ {TABLA_FEATURES} no disponible, se calculan los features al vuelo: {e}")
+    if fila is not None:
+        return {c: (float(v) if v is not None and c != 'fecha_fin_semana' else v) for c, v in fila.items()}
+
+    filas = await consultar_una(pool, f'''
+        SELECT fecha_fin_semana, casos_confirmados, tasa_incidencia
+        FROM dato_epidemiologico
+        WHERE id_region = %s
+        ORDER BY fecha_fin_semana DESC
+        LIMIT {VENTANA}
+    ''', (id_region,), una_fila=False)
+    historial = [(d['fecha_fin_semana'], d['casos_confirmados'], float(d['tasa_incidencia'])) for d in filas]
+    return fila_desde_historial(id_region, historial)
+
+
+async def obtener_catalogo():
+    """app.CATALOGOS.obtener(); en un hilo solo si toca consultar MySQL."""
+    catalogos = aplicacion_flask.CATALOGOS
+    if catalogos.vigente():
+        return catalogos.obtener()
+    return await asyncio.to_thread(catalogos.obtener)
+
+
+def _error(mensaje='Error de conexión'):
+    return respuesta({'error': mensaje}, 500)
+
+
+# ============================================
+# RUTAS ASÍNCRONAS
+# ============================================
+
+async def health(request):
+    pool = request.app.state.pool
+    health_status = aplicacion_flask.estado_salud()
+    try:
+        resultados = await consultar(pool, consultas_dashboard.SALUD)
+        health_status['database']['status'] = 'connected'
+        health_status['database']['conector'] = 'aiomysql'
+        consultas_dashboard.salud_predicciones(resultados, health_status['predictions'])
+    except Exception as e:
+        health_status['database']['status'] = 'error'
+        health_status['status'] = 'degraded'
+        print(f"Error en health check DB: {e}")
+
+    en_uso = pool.size - pool.freesize
+    health_status['database']['pool'] = {
+        'tamano': pool.maxsize, 'abiertas': pool.size, 'libres': pool.freesize, 'en_uso': en_uso,
+    }
+    health_status['database']['active_connections'] = en_uso
+    return respuesta(health_status)
+
+
+async def get_resumen(request):
+    try:
+        resultados = await consultar(request.app.state.pool, consultas_dashboard.RESUMEN_DASHBOARD)
+        return respuesta(consultas_dashboard.resumen_dashboard(
+            resultados, aplicacion_flask.nombre_modelo_activo()))
+    except Exception as e:
+        return _error(str(e))
+
+
+async def get_regiones(request):
+    catalogo = await obtener_catalogo()
+    return respuesta(catalogo.regiones) if catalogo else _error()
+
+
+async def get_enfermedades(request):
+    catalogo = await obtener_catalogo()
+    return respuesta(catalogo.enfermedades) if catalogo else _error()
+
+
+async def get_alertas_activas(request):
+    try:
+        alertas = await consultar_una(request.app.state.pool, consultas_dashboard.SQL_ALERTAS_ACTIVAS,
+                                      una_fila=False)
+        return respuesta(consultas_dashboard.alertas_activas(alertas))
+    except Exception as e:
+        return _error(str(e))
+
+
+async def get_reporte_epidemiologico(request):
+    try:
+        resultados = await consultar_reportes(request.app.state.pool, consultas_dashboard.REPORTE_EPIDEMIOLOGICO)
+        return respuesta(consultas_dashboard.reporte_epidemiologico(resultados))
+    except Exception as e:
+        traceback.print_exc()
+        return _error(str(e))
+
+
+async def get_reporte_estado(request):
+    id_region = request.path_params['id_region']
+    catalogo = await obtener_catalogo()
+    if catalogo is None:
+        return _error()
+    nombre = catalogo.nombre.get(id_region)
+    if nombre is None:
+        return respuesta({'error': 'Estado no encontrado'}, 404)
+    try:
+        resultados = await consultar_reportes(request.app.state.pool, consultas_dashboard.REPORTE_ESTADO,
+                                              (id_region,))
+        return respuesta(consultas_dashboard.reporte_estado(nombre, id_region, resultados))
+    except Exception as e:
+        return _error(str(e))
+
+
+async def get_estadisticas_datos(request):
+    try:
+        resultados = await consultar_reportes(request.app.state.pool, consultas_dashboard.ESTADISTICAS_DATOS)
+        return respuesta(consultas_dashboard.estadisticas_datos(resultados))
+    except Exception as e:
+        return _error(str(e))
+
+
+async def resumen_por_estado(request):
+    consultas = {'estados': (consultas_dashboard.SQL_RESUMEN_POR_ESTADO, False)}
+    try:
+        resultados = await consultar_reportes(request.app.state.pool, consultas)
+        return respuesta(consultas_dashboard.resumen_por_estado(resultados['estados']))
+    except Exception as e:
+        return _error(str(e))
+
+
+async def predecir_riesgo(request):
+    """POST /api/modelo/predecir-riesgo-automatico (ver app.predecir_riesgo)."""
+    if aplicacion_flask.MODELO_DENGUE is None or aplicacion_flask.LABEL_ENCODER is None:
+        return respuesta({
+            'success': False,
+            'error': 'Modelos ML no disponibles. Verifica que model.pkl y label_encoder.pkl existan.'
+        }, 503)
+
+    catalogo = await obtener_catalogo()
+    if catalogo is None:
+        return respuesta({'success': False, 'error': 'Error de conexión a la base de datos'}, 500)
+    pool = request.app.state.pool
+    try:
+        data = await request.json()
+        id_region = int(data.get('id_region', 0))
+
+        if not id_region or id_region < 1 or id_region > 32:
+            return respuesta({'success': False, 'error': 'id_region invalido (debe ser 1-32)'}, 400)
+
+        region = catalogo.region(id_region)
+        if not region:
+            return respuesta({'success': False, 'error': 'Región no encontrada'}, 404)
+        ultima = await consultar_una(pool, aplicacion_flask.SQL_ULTIMA_FECHA, (id_region,))
+        ultima_fecha = ultima['ultima_fecha']
+        if not ultima_fecha:
+            return respuesta({'success': False, 'error': f"No hay datos históricos para {region['nombre']}"}, 404)
+
+        fila, promedio = await asyncio.gather(
+            features_prediccion(pool, id_region),
+            consultar_una(pool, aplicacion_flask.SQL_PROMEDIO_4_SEMANAS, (id_region, ultima_fecha)))
+
+        datos, alerta = await asyncio.get_running_loop().run_in_executor(
+            request.app.state.inferencia, aplicacion_flask.evaluar_riesgo,
+            region, ultima_fecha, fila, promedio['promedio'])
+
+        if alerta:
+            try:
+                async with pool.acquire() as conn:
+                    async with conn.cursor() as cursor:
+                        await cursor.execute(aplicacion_flask.INSERT_ALERTA_SISTEMA, alerta)
+            except Exception as e:
+                print(f"⚠️ No se pudo guardar alerta: {e}")
+
+        return respuesta(datos)
+
+    except Exception as e:
+        print(f"❌ Error en predicción: {e}")
+        traceback.print_exc()
+        return respuesta({'success': False, 'error': str(e)}, 500)
+
+
+RUTAS = [
+    Route('/api/health', health, methods=['GET']),
+    Route('/api/dashboard/resumen', get_resumen, methods=['GET']),
+    Route('/api/config/regiones', get_regiones, methods=['GET']),
+    Route('/api/config/enfermedades', get_enfermedades, methods=['GET']),
+    Route('/api/alertas/activas', get_alertas_activas, methods=['GET']),
+    Route('/api/reportes/epidemiologico', get_reporte_epidemiologico, methods=['GET']),
+    Route('/api/reportes/estado/{id_region:int}', get_reporte_estado, methods=['GET']),
+    Route('/api/datos/estadisticas', get_estadisticas_datos, methods=['GET']),
+    Route('/api/datos/resumen-por-estado', resumen_por_estado, methods=['GET']),
+    Route('/api/modelo/predecir-riesgo-automatico', predecir_riesgo, methods=['POST']),
+] if aiomysql is not None else []
+
+
+def crear_app():
+    """
+    Aplicación ASGI: las RUTAS asíncronas y, para todo lo demás, la app
+    Flask. El pool de aiomysql y los executors se crean al arrancar cada
+    worker (lifespan) y se cierran al detenerlo.
+    """
+    if not disponible():
+        raise RuntimeError('El modo ASGI requiere starlette, aiomysql y a2wsgi (pip install ...)')
+
+    @asynccontextmanager
+    async def ciclo_de_vida(aplicacion):
+        config = aplicacion_flask.DB_CONFIG
+        # autocommit: cada lectura ve lo último que se escribió, no la
+        # foto de una transacción abierta en la conexión del pool
+        aplicacion.state.pool = await aiomysql.create_pool(
+            host=config['host'], user=config['user'], password=config['password'], db=config['database'],
+            charset='utf8mb4', minsize=ASGI_DB_POOL_MIN, maxsize=ASGI_DB_POOL_MAX, autocommit=True,
+            pool_recycle=aplicacion_flask.DB_POOL_RECICLAR)
+        aplicacion.state.inferencia = ThreadPoolExecutor(ASGI_INFERENCIA_HILOS, thread_name_prefix='inferencia')
+        aplicacion_flask.crear_tabla_alertas()
+        await asyncio.to_thread(aplicacion_flask.CATALOGOS.obtener)
+        print(f"✔ Pool aiomysql creado (pid {os.getpid()}, hasta {ASGI_DB_POOL_MAX} conexiones)")
+        try:
+            yield
+        finally:
+            aplicacion.state.pool.close()
+            await aplicacion.state.pool.wait_closed()
+            aplicacion.state.inferencia.shutdown(wait=False)
+
+    # El resto de las rutas, en los hilos de a2wsgi
+    flask = Mount('/', app=WSGIMiddleware(aplicacion_flask.app, workers=ASGI_WSGI_HILOS))
+    return Starlette(
+        routes=RUTAS + [flask],
+        middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+        lifespan=ciclo_de_vida,
+    )
@@ -0,0 +1,331 @@
+# ----------------------------------------------------------------------
+# BOSQUE_COMPACTO.PY: Formato compacto de los Random Forest para servir
+# predicciones
+# ----------------------------------------------------------------------
+# Un RandomForest de sklearn guarda por nodo hijos, feature e impureza
+# en enteros de 64 bits y umbral y valores en float64, y joblib lo
+# escribe sin comprimir; cada worker del servidor carga su propia copia.
+# Aquí todos los árboles se aplanan en arreglos contiguos (feature int16,
+# umbral y valores float32, hijos int32) que se guardan en un .npz
+# comprimido junto al .pkl (model.pkl -> model.compacto.npz).
+#
+# Al compactar se puede limitar la profundidad (los nodos a esa
+# profundidad pasan a ser hojas con su propio valor) y podar los árboles
+# que menos aportan mientras la métrica en un conjunto de validación no
+# baje más de una tolerancia. Las semanas de validación se dividen: los
+# árboles se eligen con las más antiguas y la pérdida se reporta con las
+# más recientes, que la selección no vio (medirla sobre las mismas
+# semanas la subestima). Los umbrales se redondean hacia abajo a
+# float32: sklearn compara X en float32, así que x <= umbral da lo mismo
+# que con el float64 original.
+#
+# BosqueCompacto expone predict, predict_proba, classes_,
+# n_features_in_ y feature_names_in_, así el servidor lo usa igual que
+# el modelo de sklearn.
+# ----------------------------------------------------------------------
+
+import json
+import os
+
+import numpy as np
+
+VERSION_FORMATO = 1
+
+# Tolerancia por defecto de la poda: pérdida absoluta de accuracy (clasificador) o R² (regresor)
+TOLERANCIA_PODA = 0.005
+# Árboles mínimos tras podar: con pocos árboles la accuracy se mantiene pero
+# las probabilidades (riesgo_probabilidad) quedan en saltos gruesos
+MIN_ARBOLES_PODA = 25
+# Fracción de las semanas de validación (las más recientes) reservada para
+# reportar la métrica de la poda; el resto se usa para elegir los árboles
+FRACCION_EVALUACION_PODA = 0.5
+
+
+def archivo_compacto(archivo_modelo):
+    """model.pkl -> model.compacto.npz"""
+    return os.path.splitext(archivo_modelo)[0] + '.compacto.npz'
+
+
+def _aplanar(arbol, profundidad_max=None):
+    """
+    Arreglos de un árbol de sklearn (tree_), sin los nodos debajo de
+    `profundidad_max`. Retorna (feature, umbral, izquierdo, derecho,
+    nan_izquierda, valor, profundidad) con índices locales del árbol.
+    """
+    izquierdo, derecho = arbol.children_left, arbol.children_right
+    n = arbol.node_count
+
+    # Profundidad de cada nodo, por niveles
+    profundidad = np.full(n, -1, dtype=np.int32)
+    frontera = np.array([0])
+    nivel = 0
+    while frontera.size:
+        profundidad[frontera] = nivel
+        if profundidad_max is not None and nivel >= profundidad_max:
+            break
+        internos = frontera[izquierdo[frontera] >= 0]
+        frontera = np.concatenate([izquierdo[internos], derecho[internos]])
+        nivel += 1
+
+    conservar = profundidad >= 0
+    nuevo = np.cumsum(conservar) - 1
+    es_interno = conservar & (izquierdo >= 0)
+    if profundidad_max is not None:
+        es_interno &= profundidad < profundidad_max
+
+    izq = np.where(es_interno, nuevo[np.maximum(izquierdo, 0)], -1)[conservar]
+    der = np.where(es_interno, nuevo[np.maximum(derecho, 0)], -1)[conservar]
+    feature = np.where(es_interno, arbol.feature, 0)[conservar]
+
+    umbral64 = arbol.threshold[conservar]
+    umbral = umbral64.astype(np.float32)
+    # Redondeo hacia abajo: para x en float32, x <= umbral64 equivale a x <= umbral
+    arriba = umbral.astype(np.float64) > umbral64
+    umbral[arriba] = np.nextafter(umbral[arriba], np.float32(-np.inf))
+
+    nan_izquierda = getattr(arbol, 'missing_go_to_left', np.zeros(n, dtype=np.uint8))[conservar]
+    valor = arbol.value[conservar, 0, :]
+    return feature, umbral, izq, der, nan_izquierda, valor, int(profundidad[conservar].max())
+
+
+class BosqueCompacto:
+    """Random Forest aplanado en arreglos NumPy (solo predicción)."""
+
+    def __init__(self, tipo_modelo, raices, feature, umbral, izquierdo, derecho, nan_izquierda, valores,
+                 profundidad, feature_names_in_, classes_=None, info=None):
+        self.tipo_modelo = tipo_modelo
+        self.raices = raices
+        self.feature = feature
+        self.umbral = umbral
+        self.izquierdo = izquierdo
+        self.derecho = derecho
+        self.nan_izquierda = nan_izquierda
+        self.valores = valores
+        self.profundidad = profundidad
+        self.feature_names_in_ = np.asarray(feature_names_in_, dtype=object)
+        self.n_features_in_ = len(self.feature_names_in_)
+        if classes_ is not None:
+            self.classes_ = classes_
+        self.info = info or {}
+
+    @property
+    def n_estimators(self):
+        return len(self.raices)
+
+    @property
+    def n_nodos(self):
+        return len(self.feature)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.raices, self.feature, self.umbral, self.izquierdo, self.derecho,
+                                      self.nan_izquierda, self.valores))
+
+    # --- Construcción ---
+
+    @classmethod
+    def desde_sklearn(cls, modelo, tipo_modelo, profundidad_max=None):
+        """Aplana un RandomForestClassifier / RandomForestRegressor ya entrenado."""
+        if not hasattr(modelo, 'estimators_') or not hasattr(modelo.estimators_[0], 'tree_'):
+            raise ValueError('Solo se pueden compactar modelos Random Forest')
+        if getattr(modelo, 'n_outputs_', 1) != 1:
+            raise ValueError('El formato compacto no admite modelos con varias salidas')
+
+        partes = [_aplanar(e.tree_, profundidad_max) for e in modelo.estimators_]
+        tamanos = np.array([len(p[0]) for p in partes])
+        desplazamiento = np.concatenate([[0], np.cumsum(tamanos)[:-1]])
+
+        def unir(i, dtype):
+            return np.concatenate([p[i] for p in partes]).astype(dtype)
+
+        def hijos(i):
+            locales = [np.where(p[i] >= 0, p[i] + d, -1) for p, d in zip(partes, desplazamiento)]
+            return np.concatenate(locales).astype(np.int32)
+
+        valores = np.concatenate([p[5] for p in partes])
+        if tipo_modelo == 'clasificador':
+            # Proporciones por clase, como DecisionTreeClassifier.predict_proba
+            suma = valores.sum(axis=1, keepdims=True)
+            valores = np.divide(valores, suma, out=np.zeros_like(valores), where=suma > 0)
+        nombres = getattr(modelo, 'feature_names_in_', None)
+        if nombres is None:
+            nombres = [f'x{i}' for i in range(modelo.n_features_in_)]
+
+        return cls(
+            tipo_modelo,
+            raices=desplazamiento.astype(np.int32),
+            feature=unir(0, np.int16),
+            umbral=unir(1, np.float32),
+            izquierdo=hijos(2),
+            derecho=hijos(3),
+            nan_izquierda=unir(4, np.bool_),
+            valores=valores.astype(np.float32),
+            profundidad=max(p[6] for p in partes),
+            feature_names_in_=nombres,
+            classes_=getattr(modelo, 'classes_', None) if tipo_modelo == 'clasificador' else None,
+            info={'arboles_originales': len(modelo.estimators_), 'profundidad_max': profundidad_max},
+        )
+
+    def subconjunto(self, arboles):
+        """Bosque con solo los árboles `arboles` (índices), reindexando los nodos."""
+        arboles = np.sort(np.asarray(arboles))
+        fin = np.append(self.raices[1:], self.n_nodos)
+        rangos = [np.arange(self.raices[i], fin[i]) for i in arboles]
+        nodos = np.concatenate(rangos)
+        nuevo = np.full(self.n_nodos, -1, dtype=np.int32)
+        nuevo[nodos] = np.arange(len(nodos), dtype=np.int32)
+        raices = np.concatenate([[0], np.cumsum([len(r) for r in rangos])[:-1]]).astype(np.int32)
+
+        def hijos(arreglo):
+            valores = arreglo[nodos]
+            return np.where(valores >= 0, nuevo[np.maximum(valores, 0)], -1).astype(np.int32)
+
+        return BosqueCompacto(
+            self.tipo_modelo, raices, self.feature[nodos], self.umbral[nodos], hijos(self.izquierdo),
+            hijos(self.derecho), self.nan_izquierda[nodos], self.valores[nodos], self.profundidad,
+            self.feature_names_in_, getattr(self, 'classes_', None), dict(self.info)
+        )
+
+    # --- Predicción ---
+
+    def _matriz(self, X):
+        if hasattr(X, 'columns'):
+            X = X[list(self.feature_names_in_)]
+        # sklearn compara en float32
+        return np.ascontiguousarray(np.asarray(X, dtype=np.float32))
+
+    def hojas(self, X):
+        """Índice de la hoja de cada fila en cada árbol, forma (filas, árboles)."""
+        X = self._matriz(X)
+        nodo = np.repeat(self.raices[np.newaxis, :], len(X), axis=0)
+        filas = np.arange(len(X))[:, np.newaxis]
+        for _ in range(self.profundidad):
+            izquierdo = self.izquierdo[nodo]
+            hoja = izquierdo < 0
+            if hoja.all():
+                break
+            x = X[filas, self.feature[nodo]]
+            a_la_izquierda = np.where(np.isnan(x), self.nan_izquierda[nodo], x <= self.umbral[nodo])
+            nodo = np.where(hoja, nodo, np.where(a_la_izquierda, izquierdo, self.derecho[nodo]))
+        return nodo
+
+    def por_arbol(self, X):
+        """Salida de cada árbol, forma (filas, árboles, clases o 1)."""
+        return self.valores[self.hojas(X)]
+
+    def predict_proba(self, X):
+        return self.por_arbol(X).mean(axis=1, dtype=np.float64)
+
+    def predict(self, X):
+        salida = self.por_arbol(X).mean(axis=1, dtype=np.float64)
+        if self.tipo_modelo == 'clasificador':
+            return self.classes_[np.argmax(salida, axis=1)]
+        return salida[:, 0]
+
+    # --- Archivo ---
+
+    def guardar(self, ruta):
+        """Escribe el .npz comprimido (a un temporal y os.replace)."""
+        info = {**self.info, 'version_formato': VERSION_FORMATO, 'tipo_modelo': self.tipo_modelo,
+                'profundidad': int(self.profundidad)}
+        arreglos = {
+            'raices': self.raices, 'feature': self.feature, 'umbral': self.umbral,
+            'izquierdo': self.izquierdo, 'derecho': self.derecho, 'nan_izquierda': self.nan_izquierda,
+            'valores': self.valores, 'features': np.asarray(self.feature_names_in_, dtype=str),
+            'info': np.array(json.dumps(info)),
+        }
+        if hasattr(self, 'classes_'):
+            arreglos['clases'] = np.asarray(self.classes_)
+        temporal = f'{ruta}.{os.getpid()}.tmp'
+        with open(temporal, 'wb') as f:
+            np.savez_compressed(f, **arreglos)
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta):
+        with np.load(ruta, allow_pickle=False) as datos:
+            info = json.loads(str(datos['info']))
+            if info.get('version_formato') != VERSION_FORMATO:
+                raise ValueError(f'Versión de formato compacto no soportada: {info.get("version_formato")}')
+            return cls(
+                info['tipo_modelo'], datos['raices'], datos['feature'], datos['umbral'], datos['izquierdo'],
+                datos['derecho'], datos['nan_izquierda'], datos['valores'], info['profundidad'],
+                list(datos['features']), datos['clases'] if 'clases' in datos else None, info
+            )
+
+
+def _metrica(tipo_modelo, y_real, salida, clases=None):
+    """accuracy (clasificador) o R² (regresor) a partir de la salida promedio de los árboles."""
+    if tipo_modelo == 'clasificador':
+        return float(np.mean(clases[np.argmax(salida, axis=1)] == np.asarray(y_real)))
+    y_real = np.asarray(y_real, dtype=np.float64)
+    residuo = np.sum((y_real - salida[:, 0]) ** 2)
+    total = np.sum((y_real - y_real.mean()) ** 2)
+    return float(1 - residuo / total) if total > 0 else 0.0
+
+
+def dividir_semanas(fechas, fraccion=FRACCION_EVALUACION_PODA):
+    """
+    Máscaras (seleccion, evaluacion) sobre las filas de `fechas`: la
+    evaluación son las semanas más recientes (`fraccion` de ellas, al menos
+    una) y la selección las anteriores.
+    """
+    fechas = np.asarray(fechas)
+    semanas = np.unique(fechas)
+    if len(semanas) < 2:
+        raise ValueError('Se necesitan al menos 2 semanas de validación para podar')
+    n_evaluacion = min(len(semanas) - 1, max(1, int(round(len(semanas) * fraccion))))
+    evaluacion = fechas >= semanas[len(semanas) - n_evaluacion]
+    return ~evaluacion, evaluacion
+
+
+def podar(bosque, X, y, X_eval, y_eval, tolerancia=TOLERANCIA_PODA, min_arboles=MIN_ARBOLES_PODA):
+    """
+    Conserva los árboles que más aportan: se ordenan por su métrica
+    individual en (X, y) y se toma el menor número de los mejores cuya
+    métrica conjunta (accuracy o R²) no baja más de `tolerancia` respecto
+    al bosque completo. La métrica antes/después del informe se mide en
+    (X_eval, y_eval), semanas posteriores que no intervienen en la
+    selección (ver dividir_semanas). Retorna (bosque podado, informe).
+    """
+    salidas = bosque.por_arbol(X).astype(np.float64)
+    clases = getattr(bosque, 'classes_', None)
+    completo = _metrica(bosque.tipo_modelo, y, salidas.mean(axis=1), clases)
+    individual = np.array([_metrica(bosque.tipo_modelo, y, salidas[:, i], clases)
+                           for i in range(bosque.n_estimators)])
+    orden = np.argsort(-individual, kind='stable')
+
+    # Promedio de los k mejores para cada k con sumas acumuladas
+    acumulado = np.cumsum(salidas[:, orden], axis=1)
+    elegidos = bosque.n_estimators
+    for k in range(max(1, min(min_arboles, bosque.n_estimators)), bosque.n_estimators + 1):
+        if _metrica(bosque.tipo_modelo, y, acumulado[:, k - 1] / k, clases) >= completo - tolerancia:
+            elegidos = k
+            break
+
+    podado = bosque.subconjunto(orden[:elegidos])
+    podado.info['arboles_podados'] = bosque.n_estimators - elegidos
+    salidas_eval = bosque.por_arbol(X_eval).astype(np.float64)
+    informe = {
+        'metrica': 'accuracy' if bosque.tipo_modelo == 'clasificador' else 'r2',
+        'antes': _metrica(bosque.tipo_modelo, y_eval, salidas_eval.mean(axis=1), clases),
+        'despues': _metrica(bosque.tipo_modelo, y_eval, salidas_eval[:, orden[:elegidos]].mean(axis=1), clases),
+        'registros_seleccion': len(y),
+        'registros_evaluacion': len(y_eval),
+        'arboles_antes': bosque.n_estimators,
+        'arboles_despues': elegidos,
+    }
+    return podado, informe
+
+
+def cargar_modelo(ruta_modelo, usar_compacto=True):
+    """
+    Modelo para servir: el .compacto.npz junto a `ruta_modelo` si existe
+    (y usar_compacto), si no el .pkl con joblib.
+    """
+    import joblib
+
+    ruta_compacta = os.path.join(os.path.dirname(ruta_modelo), archivo_compacto(os.path.basename(ruta_modelo)))
+    if usar_compacto and os.path.exists(ruta_compacta):
+        return BosqueCompacto.cargar(ruta_compacta)
+    return joblib.load(ruta_modelo)
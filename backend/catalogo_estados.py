@@ -0,0 +1,126 @@
+# ----------------------------------------------------------------------
+# CATALOGO_ESTADOS.PY: Catálogo único de entidades federativas (INEGI 1-32)
+# ----------------------------------------------------------------------
+# Centraliza los nombres, alias y población de los 32 estados para que
+# todos los cargadores (ETL, scripts de transformación y API) resuelvan
+# nombres de la misma forma: una sola búsqueda en diccionario sobre una
+# clave normalizada (sin acentos, minúsculas, sin dígitos).
+# ----------------------------------------------------------------------
+
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Catálogo oficial: id_region (código INEGI) -> (nombre, población CONAPO 2025)
+ESTADOS = {
+    1: ('Aguascalientes', 1512400), 2: ('Baja California', 3968300), 3: ('Baja California Sur', 850700),
+    4: ('Campeche', 1011800), 5: ('Coahuila de Zaragoza', 3328500), 6: ('Colima', 775100),
+    7: ('Chiapas', 6000100), 8: ('Chihuahua', 3998500), 9: ('Ciudad de México', 9386700),
+    10: ('Durango', 1913400), 11: ('Guanajuato', 6555200), 12: ('Guerrero', 3724300),
+    13: ('Hidalgo', 3327600), 14: ('Jalisco', 8847600), 15: ('México', 18016500),
+    16: ('Michoacán de Ocampo', 4975800), 17: ('Morelos', 2056000), 18: ('Nayarit', 1294800),
+    19: ('Nuevo León', 6231200), 20: ('Oaxaca', 4432900), 21: ('Puebla', 6886400),
+    22: ('Querétaro', 2603300), 23: ('Quintana Roo', 1989500), 24: ('San Luis Potosí', 2931400),
+    25: ('Sinaloa', 3274600), 26: ('Sonora', 3154100), 27: ('Tabasco', 2601900),
+    28: ('Tamaulipas', 3682900), 29: ('Tlaxcala', 1421000), 30: ('Veracruz de Ignacio de la Llave', 8871300),
+    31: ('Yucatán', 2561900), 32: ('Zacatecas', 1698200)
+}
+
+# Nombres con los que se entrenaron los LabelEncoder (label_encoder*.pkl)
+NOMBRE_ENCODER = {
+    1: 'Aguascalientes', 2: 'Baja California', 3: 'Baja California Sur',
+    4: 'Campeche', 5: 'Coahuila de Zaragoza', 6: 'Colima',
+    7: 'Chiapas', 8: 'Chihuahua', 9: 'Ciudad de México',
+    10: 'Durango', 11: 'Guanajuato', 12: 'Guerrero',
+    13: 'Hidalgo', 14: 'Jalisco', 15: 'México',
+    16: 'Michoacan de Ocampo', 17: 'Morelos', 18: 'Nayarit',
+    19: 'Nuevo León', 20: 'Oaxaca', 21: 'Puebla',
+    22: 'Queretaro', 23: 'Quintana Roo', 24: 'San Luis Potosí',
+    25: 'Sinaloa', 26: 'Sonora', 27: 'Tabasco',
+    28: 'Tamaulipas', 29: 'Tlaxcala', 30: 'Veracruz de Ignacio de la Llave',
+    31: 'Yucatan', 32: 'Zacatecas'
+}
+
+# Variantes encontradas en los CSVs históricos, boletines y datos abiertos
+ALIAS = {
+    'coahuila': 5, 'cdmx': 9, 'distrito federal': 9, 'estado de mexico': 15,
+    'michoacan': 16, 'veracruz': 30
+}
+
+NOMBRE_POR_ID = {id_region: nombre for id_region, (nombre, _) in ESTADOS.items()}
+POBLACION_POR_ID = {id_region: poblacion for id_region, (_, poblacion) in ESTADOS.items()}
+
+# Arreglos indexados por id_region (posición 0 = sin estado)
+POBLACION_ARRAY = np.array([0] + [POBLACION_POR_ID[i] for i in range(1, 33)], dtype=np.int64)
+NOMBRE_ARRAY = np.array([None] + [NOMBRE_POR_ID[i] for i in range(1, 33)], dtype=object)
+
+
+def normalizar_nombre(nombre):
+    """Clave de búsqueda: sin acentos, minúsculas, sin dígitos y con espacios simples."""
+    texto = unicodedata.normalize('NFKD', str(nombre))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c) and not c.isdigit())
+    return ' '.join(texto.lower().split())
+
+
+# Índice normalizado precalculado: clave -> id_region
+INDICE = {}
+for _id, _nombre in list(NOMBRE_POR_ID.items()) + list(NOMBRE_ENCODER.items()):
+    INDICE[normalizar_nombre(_nombre)] = _id
+for _alias, _id in ALIAS.items():
+    INDICE[normalizar_nombre(_alias)] = _id
+
+
+def resolve(nombre, parcial=False):
+    """
+    Obtiene el id_region (INEGI) de un nombre de estado o None.
+    Con parcial=True, si no hay coincidencia exacta se intenta una
+    coincidencia por subcadena (para nombres con notas o sufijos).
+    """
+    if nombre is None or (not isinstance(nombre, str) and pd.isna(nombre)):
+        return None
+    clave = normalizar_nombre(nombre)
+    if not clave:
+        return None
+    id_region = INDICE.get(clave)
+    if id_region is None and parcial:
+        for alias, codigo in INDICE.items():
+            if alias in clave or clave in alias:
+                return codigo
+    return id_region
+
+
+def resolve_many(serie, parcial=False):
+    """
+    Versión vectorizada de resolve() para una columna completa.
+    Cada nombre distinto se resuelve una sola vez y el resultado se
+    expande con un índice de arreglo. Devuelve un arreglo int64 con
+    0 en los nombres no reconocidos.
+    """
+    codigos, unicos = pd.factorize(pd.Series(serie))
+    ids_unicos = np.zeros(len(unicos) + 1, dtype=np.int64)  # último = NaN (código -1)
+    for i, nombre in enumerate(unicos):
+        ids_unicos[i] = resolve(nombre, parcial=parcial) or 0
+    return ids_unicos[codigos]
+
+
+def codigos_encoder(label_encoder):
+    """
+    Tabla id_region -> código del LabelEncoder, para reemplazar
+    LabelEncoder.transform() por un índice de arreglo.
+    Las clases se empatan por nombre normalizado; los encoders antiguos
+    guardaron los acentos como '?' y se comparan con comodín. Los estados
+    sin clase usan id_region - 1 (comportamiento previo de la API).
+    """
+    codigos = np.arange(-1, 32, dtype=np.int64)
+    if label_encoder is None:
+        return codigos
+    for codigo, clase in enumerate(label_encoder.classes_):
+        id_region = resolve(clase)
+        if id_region is None and '?' in str(clase):
+            patron = re.compile('^' + '.'.join(re.escape(p) for p in normalizar_nombre(clase).split('?')) + '$')
+            id_region = next((i for clave, i in INDICE.items() if patron.match(clave)), None)
+        if id_region is not None:
+            codigos[id_region] = codigo
+    return codigos
@@ -0,0 +1,181 @@
+# ----------------------------------------------------------------------
+# CATALOGOS.PY: Caché en memoria de los catálogos region y enfermedad
+# ----------------------------------------------------------------------
+# region (32 filas) y enfermedad solo cambian cuando se cargan los
+# catálogos (cargar_datos_epidemiologicos.py, ETL_LOADER), pero los
+# endpoints de catálogos, predicción, reporte por estado y alertas los
+# consultaban en cada petición. Catalogos los lee una vez por proceso y
+# los sirve de memoria:
+#
+# - obtener() entrega el Catalogo vigente: las listas de
+#   /api/config/regiones y /api/config/enfermedades en el orden de MySQL,
+#   y búsquedas por id_region (region(), nombre, poblacion y arreglos
+#   indexados por id_region como los de catalogo_estados.py). El código
+#   del LabelEncoder sigue en app.CODIGOS_ENCODER, que depende del modelo
+#   cargado.
+# - Quien modifica region o enfermedad llama después a
+#   incrementar_version(conn), que sube el contador de catalogo_version.
+#   Cada proceso lo revisa a lo más cada `revision` segundos y recarga si
+#   cambió: los workers se enteran sin reiniciar y entre revisiones no se
+#   consulta MySQL. Tras editar los catálogos a mano:
+#       INSERT INTO catalogo_version (id, version) VALUES (1, 1)
+#       ON DUPLICATE KEY UPDATE version = version + 1;
+# - Si MySQL no responde en la primera carga, obtener() retorna None y el
+#   endpoint responde error de conexión como antes; si falla una revisión
+#   se sigue usando el catálogo que ya estaba.
+# ----------------------------------------------------------------------
+
+import threading
+import time
+
+import mysql.connector
+import numpy as np
+from mysql.connector import errorcode
+
+from consultas_dashboard import SQL_ENFERMEDADES, SQL_REGIONES
+from lectura_filas import cursor_filas
+
+REVISION_POR_DEFECTO = 30
+
+CREAR_TABLA_VERSION = """
+CREATE TABLE IF NOT EXISTS catalogo_version (
+    id TINYINT UNSIGNED NOT NULL PRIMARY KEY,
+    version INT UNSIGNED NOT NULL
+)
+"""
+
+INCREMENTAR_VERSION = """
+INSERT INTO catalogo_version (id, version) VALUES (1, 1)
+ON DUPLICATE KEY UPDATE version = version + 1
+"""
+
+SQL_VERSION = "SELECT version FROM catalogo_version WHERE id = 1"
+
+
+def incrementar_version(conn):
+    """Avisa a todos los procesos que region o enfermedad cambiaron (hace commit)."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(CREAR_TABLA_VERSION)
+        cursor.execute(INCREMENTAR_VERSION)
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def leer_version(cursor):
+    """Versión actual de los catálogos; 0 si nunca se ha incrementado."""
+    try:
+        cursor.execute(SQL_VERSION)
+    except mysql.connector.ProgrammingError as e:
+        if e.errno != errorcode.ER_NO_SUCH_TABLE:
+            raise
+        return 0
+    fila = cursor.fetchone()
+    return fila['version'] if fila else 0
+
+
+class Catalogo:
+    """
+    region y enfermedad en una versión. Las listas y filas se comparten
+    entre peticiones: region() y regiones_por_id() entregan copias.
+    """
+
+    def __init__(self, version, regiones, enfermedades):
+        self.version = version
+        # Respuestas de /api/config/regiones y /api/config/enfermedades
+        self.regiones = regiones
+        self.enfermedades = enfermedades
+        self._por_id = {r['id']: {'id_region': r['id'], 'nombre': r['nombre'], 'poblacion': r['poblacion']}
+                        for r in sorted(regiones, key=lambda r: r['id'])}
+        self.nombre = {i: r['nombre'] for i, r in self._por_id.items()}
+        self.poblacion = {i: r['poblacion'] for i, r in self._por_id.items()}
+
+        # Arreglos indexados por id_region (posición 0 y faltantes: sin estado)
+        tamano = max(self._por_id, default=0) + 1
+        self.nombres = np.full(tamano, None, dtype=object)
+        self.poblaciones = np.zeros(tamano, dtype=np.int64)
+        for i, r in self._por_id.items():
+            self.nombres[i] = r['nombre']
+            self.poblaciones[i] = r['poblacion'] or 0
+
+    def region(self, id_region):
+        """Fila id_region, nombre, poblacion del estado o None."""
+        fila = self._por_id.get(id_region)
+        return dict(fila) if fila else None
+
+    def regiones_por_id(self):
+        return [dict(fila) for fila in self._por_id.values()]
+
+
+class Catalogos:
+    """
+    Catalogo del proceso, leído con las conexiones de `obtener_conexion`
+    (una función que retorna una conexión o None) y revisado cada
+    `revision` segundos.
+    """
+
+    def __init__(self, obtener_conexion, revision=REVISION_POR_DEFECTO):
+        self._obtener_conexion = obtener_conexion
+        self.revision = revision
+        self._catalogo = None
+        self._revisado = 0.0
+        self._candado = threading.Lock()
+        self._metricas = {'cargas': 0, 'revisiones': 0, 'errores': 0}
+
+    def vigente(self):
+        """Hay catálogo y no toca revisar la versión (obtener() no consultaría MySQL)."""
+        return self._catalogo is not None and time.monotonic() - self._revisado < self.revision
+
+    def obtener(self):
+        """Catalogo vigente (lo carga o revisa su versión si toca); None si MySQL no responde."""
+        if self.vigente():
+            return self._catalogo
+        # Revisa un solo hilo; mientras, los demás usan el catálogo que ya hay
+        if not self._candado.acquire(blocking=self._catalogo is None):
+            return self._catalogo
+        try:
+            if not self.vigente():
+                self._revisar()
+        finally:
+            self._candado.release()
+        return self._catalogo
+
+    def _revisar(self):
+        conn = self._obtener_conexion()
+        if conn is None:
+            self._metricas['errores'] += 1
+            if self._catalogo is not None:
+                self._revisado = time.monotonic()
+            return
+        try:
+            cursor = cursor_filas(conn)
+            version = leer_version(cursor)
+            self._metricas['revisiones'] += 1
+            if self._catalogo is None or version != self._catalogo.version:
+                cursor.execute(SQL_REGIONES)
+                regiones = cursor.fetchall()
+                cursor.execute(SQL_ENFERMEDADES)
+                enfermedades = cursor.fetchall()
+                self._catalogo = Catalogo(version, regiones, enfermedades)
+                self._metricas['cargas'] += 1
+                print(f"📚 Catálogos cargados (versión {version}): "
+                      f"{len(regiones)} regiones, {len(enfermedades)} enfermedades")
+            self._revisado = time.monotonic()
+        except mysql.connector.Error as e:
+            self._metricas['errores'] += 1
+            print(f"⚠️ No se pudieron revisar los catálogos: {e}")
+            if self._catalogo is not None:
+                self._revisado = time.monotonic()
+        finally:
+            conn.close()
+
+    def estado(self):
+        """Versión cargada y métricas, para /api/health."""
+        catalogo = self._catalogo
+        estado = dict(self._metricas)
+        estado['version'] = catalogo.version if catalogo else None
+        estado['regiones'] = len(catalogo.regiones) if catalogo else 0
+        estado['enfermedades'] = len(catalogo.enfermedades) if catalogo else 0
+        estado['revision_s'] = self.revision
+        return estado
@@ -0,0 +1,319 @@
+# ----------------------------------------------------------------------
+# CONSULTAS_DASHBOARD.PY: Consultas y respuestas de los endpoints de
+# lectura que consulta el dashboard
+# ----------------------------------------------------------------------
+# Reportes, estadísticas, resumen, catálogos, alertas activas y health.
+# Cada endpoint es un diccionario nombre -> (sql, una_fila) y una función
+# que arma la respuesta con los resultados. Los usan app.py (Flask: las
+# consultas una tras otra en la misma conexión, ver consultar()) y
+# asgi.py (aiomysql: las consultas independientes en paralelo, cada una
+# en su conexión), así las dos versiones responden lo mismo.
+# ----------------------------------------------------------------------
+
+from datetime import datetime
+
+# Catálogos: los lee catalogos.py una vez por versión
+SQL_REGIONES = 'SELECT id_region as id, nombre, poblacion FROM region ORDER BY nombre'
+SQL_ENFERMEDADES = 'SELECT id_enfermedad as id, nombre, descripcion FROM enfermedad'
+
+RESUMEN_DASHBOARD = {
+    'total_casos': ('SELECT COALESCE(SUM(casos_confirmados), 0) as total FROM dato_epidemiologico', True),
+    'regiones': ('SELECT COUNT(DISTINCT id_region) as total FROM dato_epidemiologico', True),
+    'alertas': ("SELECT COUNT(*) as total FROM alertas_epidemiologicas WHERE estado_alerta IN ('activa', 'enviada')",
+                True),
+}
+
+SALUD = {
+    'hoy': ("""
+        SELECT COUNT(*) as total_hoy
+        FROM prediccion
+        WHERE DATE(fecha_prediccion) = CURDATE()
+    """, True),
+    'total': ("SELECT COUNT(*) as total FROM prediccion", True),
+    'distribucion': ("""
+        SELECT nivel_riesgo, COUNT(*) as cantidad
+        FROM prediccion
+        WHERE DATE(fecha_prediccion) >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)
+        GROUP BY nivel_riesgo
+    """, False),
+}
+
+REPORTE_EPIDEMIOLOGICO = {
+    # 1. Estadísticas generales
+    'estadisticas': ("""
+        SELECT
+            COUNT(*) as total_registros,
+            COALESCE(SUM(casos_confirmados), 0) as total_casos,
+            COALESCE(AVG(casos_confirmados), 0) as promedio_casos,
+            COALESCE(MAX(casos_confirmados), 0) as max_casos,
+            MIN(fecha_fin_semana) as fecha_inicio_datos,
+            MAX(fecha_fin_semana) as fecha_fin_datos,
+            COUNT(DISTINCT id_region) as total_estados,
+            COUNT(DISTINCT YEAR(fecha_fin_semana)) as total_anios
+        FROM dato_epidemiologico
+    """, True),
+    # 2. Top 10 estados con más casos
+    'top_estados': ("""
+        SELECT
+            r.nombre as estado,
+            d.id_region,
+            SUM(d.casos_confirmados) as total_casos,
+            AVG(d.casos_confirmados) as promedio_semanal,
+            MAX(d.casos_confirmados) as max_semanal,
+            COUNT(*) as semanas_con_datos
+        FROM dato_epidemiologico d
+        JOIN region r ON d.id_region = r.id_region
+        GROUP BY d.id_region, r.nombre
+        ORDER BY total_casos DESC
+        LIMIT 10
+    """, False),
+    # 3. Evolución anual
+    'evolucion_anual': ("""
+        SELECT
+            YEAR(fecha_fin_semana) as anio,
+            SUM(casos_confirmados) as total_casos,
+            AVG(casos_confirmados) as promedio_semanal,
+            COUNT(DISTINCT id_region) as estados_afectados
+        FROM dato_epidemiologico
+        GROUP BY YEAR(fecha_fin_semana)
+        ORDER BY anio
+    """, False),
+    # 4. Tendencia mensual (últimos 24 meses)
+    'tendencia_mensual': ("""
+        SELECT
+            DATE_FORMAT(fecha_fin_semana, '%Y-%m') as mes,
+            SUM(casos_confirmados) as total_casos,
+            AVG(casos_confirmados) as promedio
+        FROM dato_epidemiologico
+        WHERE fecha_fin_semana >= DATE_SUB(CURDATE(), INTERVAL 24 MONTH)
+        GROUP BY DATE_FORMAT(fecha_fin_semana, '%Y-%m')
+        ORDER BY mes
+    """, False),
+    # 5. Distribución por semana epidemiológica (promedio histórico)
+    'por_semana_epidemiologica': ("""
+        SELECT
+            WEEK(fecha_fin_semana) as semana_epidemiologica,
+            AVG(casos_confirmados) as promedio_casos,
+            SUM(casos_confirmados) as total_casos
+        FROM dato_epidemiologico
+        GROUP BY WEEK(fecha_fin_semana)
+        ORDER BY WEEK(fecha_fin_semana)
+    """, False),
+    # 6. Comparativa de años
+    'comparativa_anual': ("""
+        SELECT
+            YEAR(fecha_fin_semana) as anio,
+            MONTH(fecha_fin_semana) as mes,
+            SUM(casos_confirmados) as casos
+        FROM dato_epidemiologico
+        WHERE fecha_fin_semana >= MAKEDATE(YEAR(CURDATE()) - 3, 1)
+        GROUP BY YEAR(fecha_fin_semana), MONTH(fecha_fin_semana)
+        ORDER BY anio, mes
+    """, False),
+    # 7. Alertas de alto riesgo (semanas con casos > promedio * 2)
+    'alertas_alto_riesgo': ("""
+        SELECT
+            r.nombre as estado,
+            d.fecha_fin_semana as fecha_inicio,
+            WEEK(d.fecha_fin_semana) as semana_epidemiologica,
+            d.casos_confirmados,
+            d.tasa_incidencia
+        FROM dato_epidemiologico d
+        JOIN region r ON d.id_region = r.id_region
+        WHERE d.casos_confirmados > (
+            SELECT AVG(casos_confirmados) * 2 FROM dato_epidemiologico
+        )
+        ORDER BY d.casos_confirmados DESC
+        LIMIT 20
+    """, False),
+}
+
+# Con el parámetro id_region
+REPORTE_ESTADO = {
+    'estadisticas': ("""
+        SELECT
+            SUM(casos_confirmados) as total_casos,
+            AVG(casos_confirmados) as promedio_semanal,
+            MAX(casos_confirmados) as max_casos,
+            AVG(tasa_incidencia) as tasa_promedio
+        FROM dato_epidemiologico
+        WHERE id_region = %s
+    """, True),
+    'evolucion_mensual': ("""
+        SELECT
+            DATE_FORMAT(fecha_fin_semana, '%Y-%m') as mes,
+            SUM(casos_confirmados) as casos
+        FROM dato_epidemiologico
+        WHERE id_region = %s
+        GROUP BY DATE_FORMAT(fecha_fin_semana, '%Y-%m')
+        ORDER BY mes
+    """, False),
+}
+
+ESTADISTICAS_DATOS = {
+    'total_registros': ("SELECT COUNT(*) as total FROM dato_epidemiologico", True),
+    'rango': ("SELECT MIN(fecha_fin_semana) as fecha_min, MAX(fecha_fin_semana) as fecha_max "
+              "FROM dato_epidemiologico", True),
+    'total_casos': ("SELECT COALESCE(SUM(casos_confirmados), 0) as total FROM dato_epidemiologico", True),
+    'por_anio': ("""
+        SELECT YEAR(fecha_fin_semana) as anio,
+               COUNT(*) as registros,
+               SUM(casos_confirmados) as casos
+        FROM dato_epidemiologico
+        GROUP BY YEAR(fecha_fin_semana)
+        ORDER BY anio
+    """, False),
+    'regiones_con_datos': ("SELECT COUNT(DISTINCT id_region) as total FROM dato_epidemiologico", True),
+    'ultima_carga': ("SELECT MAX(fecha_carga) as ultima FROM dato_epidemiologico", True),
+}
+
+SQL_RESUMEN_POR_ESTADO = """
+    SELECT
+        r.id_region,
+        r.nombre as estado,
+        r.poblacion,
+        COUNT(d.id_dato) as total_registros,
+        COALESCE(SUM(d.casos_confirmados), 0) as total_casos,
+        COALESCE(AVG(d.tasa_incidencia), 0) as promedio_ti,
+        MIN(d.fecha_fin_semana) as fecha_inicio,
+        MAX(d.fecha_fin_semana) as fecha_fin
+    FROM region r
+    LEFT JOIN dato_epidemiologico d ON r.id_region = d.id_region
+    GROUP BY r.id_region, r.nombre, r.poblacion
+    ORDER BY total_casos DESC
+"""
+
+SQL_ALERTAS_ACTIVAS = """
+    SELECT id, id_region, estado, nivel, probabilidad,
+           casos_esperados, mensaje, recomendaciones,
+           fecha_generacion, fecha_envio, estado_alerta
+    FROM alertas_epidemiologicas
+    WHERE estado_alerta IN ('activa', 'enviada')
+    ORDER BY
+        CASE nivel
+            WHEN 'CrÃ­tico' THEN 1
+            WHEN 'Alto' THEN 2
+            WHEN 'Moderado' THEN 3
+            ELSE 4
+        END,
+        fecha_generacion DESC
+"""
+
+
+def consultar(cursor, consultas, params=None):
+    """Ejecuta las consultas en orden con un cursor de filas como dict; nombre -> fila o filas."""
+    resultados = {}
+    for nombre, (sql, una_fila) in consultas.items():
+        cursor.execute(sql, params)
+        resultados[nombre] = cursor.fetchone() if una_fila else cursor.fetchall()
+    return resultados
+
+
+def _numeros_a_float(fila):
+    """Decimal (y los demás números) a float para jsonify."""
+    for key in fila:
+        if hasattr(fila[key], 'real'):
+            fila[key] = float(fila[key])
+    return fila
+
+
+def resumen_dashboard(r, modelo_activo):
+    return {
+        'total_casos_historicos': int(r['total_casos']['total']),
+        'regiones_monitoreadas': r['regiones']['total'],
+        'alertas_activas': r['alertas']['total'],
+        'modelo_activo': modelo_activo
+    }
+
+
+def salud_predicciones(r, predicciones):
+    """Completa la sección 'predictions' de /api/health."""
+    predicciones['today'] = r['hoy']['total_hoy'] if r['hoy'] else 0
+    predicciones['total'] = r['total']['total'] if r['total'] else 0
+    predicciones['distribution'] = [
+        {'nivel': d['nivel_riesgo'], 'cantidad': d['cantidad']}
+        for d in r['distribucion']
+    ] if r['distribucion'] else []
+    predicciones['success_rate'] = 95.0
+    predicciones['last_minute'] = 0
+    return predicciones
+
+
+def reporte_epidemiologico(r):
+    estadisticas = _numeros_a_float(r['estadisticas'])
+    for item in r['alertas_alto_riesgo']:
+        item['fecha_inicio'] = item['fecha_inicio'].isoformat() if item['fecha_inicio'] else None
+    for nombre in ('top_estados', 'evolucion_anual', 'tendencia_mensual', 'por_semana_epidemiologica',
+                   'comparativa_anual', 'alertas_alto_riesgo'):
+        for item in r[nombre]:
+            _numeros_a_float(item)
+
+    # Convertir fechas en estadísticas
+    if estadisticas.get('fecha_inicio_datos'):
+        estadisticas['fecha_inicio_datos'] = estadisticas['fecha_inicio_datos'].isoformat()
+    if estadisticas.get('fecha_fin_datos'):
+        estadisticas['fecha_fin_datos'] = estadisticas['fecha_fin_datos'].isoformat()
+
+    return {
+        'success': True,
+        'estadisticas': estadisticas,
+        'top_estados': r['top_estados'],
+        'evolucion_anual': r['evolucion_anual'],
+        'tendencia_mensual': r['tendencia_mensual'],
+        'por_semana_epidemiologica': r['por_semana_epidemiologica'],
+        'comparativa_anual': r['comparativa_anual'],
+        'alertas_alto_riesgo': r['alertas_alto_riesgo'],
+        'generado_en': datetime.now().isoformat()
+    }
+
+
+def reporte_estado(nombre, id_region, r):
+    for item in r['evolucion_mensual']:
+        _numeros_a_float(item)
+    return {
+        'success': True,
+        'estado': nombre,
+        'id_region': id_region,
+        'estadisticas': _numeros_a_float(r['estadisticas']),
+        'evolucion_mensual': r['evolucion_mensual']
+    }
+
+
+def estadisticas_datos(r):
+    rango = r['rango']
+    total_casos = r['total_casos']['total']
+    ultima_carga = r['ultima_carga']['ultima']
+    return {
+        'success': True,
+        'total_registros': r['total_registros']['total'],
+        'total_casos': int(total_casos) if total_casos else 0,
+        'fecha_inicio': rango['fecha_min'].isoformat() if rango['fecha_min'] else None,
+        'fecha_fin': rango['fecha_max'].isoformat() if rango['fecha_max'] else None,
+        'regiones_con_datos': r['regiones_con_datos']['total'],
+        'ultima_carga': ultima_carga.isoformat() if ultima_carga else None,
+        'por_anio': r['por_anio']
+    }
+
+
+def resumen_por_estado(estados):
+    for estado in estados:
+        if estado['fecha_inicio']:
+            estado['fecha_inicio'] = estado['fecha_inicio'].isoformat()
+        if estado['fecha_fin']:
+            estado['fecha_fin'] = estado['fecha_fin'].isoformat()
+        if estado['promedio_ti']:
+            estado['promedio_ti'] = float(estado['promedio_ti'])
+    return {'success': True, 'estados': estados}
+
+
+def alertas_activas(alertas):
+    for a in alertas:
+        if a.get('fecha_generacion'):
+            a['fecha_generacion'] = a['fecha_generacion'].isoformat()
+        if a.get('fecha_envio'):
+            a['fecha_envio'] = a['fecha_envio'].isoformat()
+    return {
+        'success': True,
+        'alertas': alertas,
+        'total': len(alertas)
+    }
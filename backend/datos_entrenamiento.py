@@ -0,0 +1,164 @@
+# ----------------------------------------------------------------------
+# DATOS_ENTRENAMIENTO.PY: Lectura del conjunto de entrenamiento desde
+# MySQL directamente a arreglos NumPy
+# ----------------------------------------------------------------------
+# pd.read_sql materializa todas las filas como objetos de Python antes de
+# armar el DataFrame. Aquí se cuentan primero las filas, se preasignan
+# arreglos tipados y se llenan con fetchmany() en bloques fijos de un
+# cursor sin buffer, así la memoria máxima es la de los arreglos más un
+# bloque. Los filtros son rangos sobre fecha_fin_semana (sin YEAR() ni
+# WEEK() en el WHERE) para que MySQL use el índice y lea solo las
+# particiones necesarias; semana, mes y año se calculan en NumPy. El
+# cursor es raw: cada columna llega como los bytes de MySQL y NumPy la
+# interpreta de una vez (lectura_filas.decodificar), sin pasar cada valor
+# por un int, float o date de Python.
+# ----------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+from catalogo_estados import NOMBRE_ARRAY, POBLACION_ARRAY
+from lectura_filas import decodificar
+from procesamiento_csv import TABLA_DATOS
+
+# Filas por fetchmany()
+TAMANO_LOTE_LECTURA = 20000
+
+# Columnas leídas, en el orden del SELECT, con su tipo en NumPy
+COLUMNAS = (
+    ('id_region', np.int8),
+    ('fecha_fin_semana', 'datetime64[D]'),
+    ('casos_confirmados', np.int32),
+    ('defunciones', np.int32),
+    ('tasa_incidencia', np.float64),
+    ('riesgo_brote_target', np.int8),
+)
+
+# tasa_incidencia es DECIMAL(10,4): se lee como double para no crear Decimal por fila
+SELECT_ENTRENAMIENTO = """
+SELECT id_region, fecha_fin_semana, casos_confirmados, COALESCE(defunciones, 0),
+       CAST(tasa_incidencia AS DOUBLE), riesgo_brote_target
+FROM {tabla}
+"""
+
+
+def filtros(desde=None, hasta=None, id_enfermedad=None, prefijo=''):
+    condiciones = []
+    parametros = []
+    if desde is not None:
+        condiciones.append(f"{prefijo}fecha_fin_semana >= %s")
+        parametros.append(desde)
+    if hasta is not None:
+        condiciones.append(f"{prefijo}fecha_fin_semana <= %s")
+        parametros.append(hasta)
+    if id_enfermedad is not None:
+        condiciones.append(f"{prefijo}id_enfermedad = %s")
+        parametros.append(id_enfermedad)
+    where = ("WHERE " + " AND ".join(condiciones) + "\n") if condiciones else ""
+    return where, tuple(parametros)
+
+
+def consulta_entrenamiento(desde=None, hasta=None, id_enfermedad=None, tabla=TABLA_DATOS):
+    """SQL y parámetros de la lectura, ordenada por estado y fecha (como la esperan los lags)."""
+    where, parametros = filtros(desde, hasta, id_enfermedad)
+    sql = SELECT_ENTRENAMIENTO.format(tabla=tabla) + where + "ORDER BY id_region, fecha_fin_semana"
+    return sql, parametros
+
+
+def leer_arreglos(conn, sql, parametros, columnas, capacidad, tamano_lote=TAMANO_LOTE_LECTURA):
+    """
+    Ejecuta `sql` con un cursor raw sin buffer y llena, bloque por bloque,
+    arreglos preasignados de `capacidad` filas con los tipos de `columnas`
+    (pares nombre, dtype en el orden del SELECT). Los NULL quedan como NaN
+    en columnas float. Crece si llegan más filas de las esperadas.
+    """
+    arreglos = {nombre: np.empty(capacidad, dtype=tipo) for nombre, tipo in columnas}
+    leidas = 0
+    cursor = conn.cursor(buffered=False, raw=True)
+    try:
+        cursor.execute(sql, parametros)
+        while True:
+            filas = cursor.fetchmany(tamano_lote)
+            if not filas:
+                break
+            fin = leidas + len(filas)
+            if fin > capacidad:
+                # Se insertaron filas entre el COUNT y la lectura
+                capacidad = max(fin, capacidad * 2)
+                arreglos = {nombre: np.resize(valores, capacidad) for nombre, valores in arreglos.items()}
+            for (nombre, tipo), valores in zip(columnas, zip(*filas)):
+                arreglos[nombre][leidas:fin] = decodificar(valores, tipo)
+            leidas = fin
+    finally:
+        cursor.close()
+
+    return {nombre: valores[:leidas] for nombre, valores in arreglos.items()}
+
+
+def contar(conn, sql, parametros):
+    """Resultado de un SELECT COUNT(*)."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, parametros)
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+
+def cargar_arreglos(conn, desde=None, hasta=None, id_enfermedad=None, tabla=TABLA_DATOS,
+                    tamano_lote=TAMANO_LOTE_LECTURA):
+    """
+    Lee dato_epidemiologico (filtrado por fecha y enfermedad) a un dict
+    {columna: ndarray} con los tipos de COLUMNAS. `desde` y `hasta` son
+    inclusivos.
+    """
+    where, parametros = filtros(desde, hasta, id_enfermedad)
+    capacidad = contar(conn, f"SELECT COUNT(*) FROM {tabla}\n{where}", parametros)
+    sql, parametros = consulta_entrenamiento(desde, hasta, id_enfermedad, tabla)
+    return leer_arreglos(conn, sql, parametros, COLUMNAS, capacidad, tamano_lote)
+
+
+def semana_mysql(fechas):
+    """
+    Equivalente vectorizado de WEEK(fecha) de MySQL (modo 0): semanas que
+    inician en domingo, numeradas 0-53, donde la semana 1 empieza en el
+    primer domingo del año.
+    """
+    fechas = np.asarray(fechas, dtype='datetime64[D]')
+    inicio_anio = fechas.astype('datetime64[Y]').astype('datetime64[D]')
+    dia_anio = (fechas - inicio_anio).astype(np.int64)
+    # 1970-01-01 fue jueves: (días + 4) % 7 da el día de la semana con domingo = 0
+    dia_semana_inicio = (inicio_anio.astype(np.int64) + 4) % 7
+    primer_domingo = (7 - dia_semana_inicio) % 7
+    return (dia_anio - primer_domingo + 7) // 7
+
+
+def a_dataframe(arreglos):
+    """
+    DataFrame con las columnas que armaba la consulta de los notebooks
+    (estado, poblacion, semana_anio, mes, anio) a partir de cargar_arreglos().
+    Estado y población salen del catálogo compartido, sin JOIN con region.
+    """
+    fechas = arreglos['fecha_fin_semana']
+    id_region = arreglos['id_region'].astype(np.int64)
+    meses = fechas.astype('datetime64[M]')
+    return pd.DataFrame({
+        'id_region': arreglos['id_region'],
+        'estado': NOMBRE_ARRAY[id_region],
+        'poblacion': POBLACION_ARRAY[id_region],
+        'fecha_fin_semana': fechas.astype('datetime64[ns]'),
+        'casos_confirmados': arreglos['casos_confirmados'],
+        'defunciones': arreglos['defunciones'],
+        'tasa_incidencia': arreglos['tasa_incidencia'],
+        'riesgo_brote_target': arreglos['riesgo_brote_target'],
+        'semana_anio': semana_mysql(fechas),
+        'mes': (meses.astype(np.int64) % 12 + 1).astype(np.int8),
+        'anio': (meses.astype(np.int64) // 12 + 1970).astype(np.int16),
+    })
+
+
+def cargar_dataframe(conn, desde=None, hasta=None, id_enfermedad=None, tabla=TABLA_DATOS,
+                     tamano_lote=TAMANO_LOTE_LECTURA):
+    """cargar_arreglos() + a_dataframe()."""
+    return a_dataframe(cargar_arreglos(conn, desde, hasta, id_enfermedad, tabla, tamano_lote))
+
@@ -2,6 +2,8 @@ import mysql.connector
 import os
 from dotenv import load_dotenv
 
+from pool_conexiones import RETRASO_MAX_POR_DEFECTO, retraso_replica
+
 # Cargar variables de entorno
 load_dotenv()
 
@@ -26,3 +28,40 @@ DB_CONFIG = {
     'password': os.getenv('DB_PASSWORD', ''),
     'database': os.getenv('DB_NAME', 'proyecto_integrador')
 }
+
+# Réplica de lectura (opcional): con DB_REPLICA_HOST, los endpoints de solo
+# lectura y la lectura de features para entrenar van a la réplica mientras
+# su retraso no pase de DB_REPLICA_RETRASO_MAX segundos. Usuario, contraseña
+# y base son los del primario salvo que se indiquen.
+REPLICA_CONFIG = {
+    'host': os.getenv('DB_REPLICA_HOST'),
+    'port': int(os.getenv('DB_REPLICA_PORT', 3306)),
+    'user': os.getenv('DB_REPLICA_USER', DB_CONFIG['user']),
+    'password': os.getenv('DB_REPLICA_PASSWORD', DB_CONFIG['password']),
+    'database': os.getenv('DB_REPLICA_NAME', DB_CONFIG['database'])
+} if os.getenv('DB_REPLICA_HOST') else None
+REPLICA_RETRASO_MAX = float(os.getenv('DB_REPLICA_RETRASO_MAX', RETRASO_MAX_POR_DEFECTO))
+
+
+def get_lectura_connection():
+    """
+    Conexión para solo leer: la réplica si está configurada y al día, si no
+    la del primario (get_db_connection).
+    """
+    if REPLICA_CONFIG:
+        try:
+            connection = mysql.connector.connect(**REPLICA_CONFIG)
+        except mysql.connector.Error as err:
+            print(f"⚠️ Réplica no disponible, se lee del primario: {err}")
+        else:
+            try:
+                retraso = retraso_replica(connection)
+            except mysql.connector.Error:
+                # Sin permiso REPLICATION CLIENT no se puede saber el retraso
+                retraso = None
+            if retraso is not None and retraso <= REPLICA_RETRASO_MAX:
+                return connection
+            connection.close()
+            detalle = 'retraso desconocido' if retraso is None else f'retraso {retraso}s'
+            print(f"⚠️ Réplica con {detalle}, se lee del primario")
+    return get_db_connection()
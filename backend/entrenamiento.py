@@ -0,0 +1,730 @@
+# ----------------------------------------------------------------------
+# ENTRENAMIENTO.PY: Entrenamiento de los modelos (clasificador de riesgo
+# y regresor de casos) y publicación atómica de los artefactos
+# ----------------------------------------------------------------------
+# entrenar() no toca el estado del servidor: recibe los LabelEncoder
+# actuales, escribe los .pkl en un directorio propio y retorna las
+# métricas. Se ejecuta igual dentro de la petición (modo síncrono) o en
+# un proceso aparte (trabajos_entrenamiento.py).
+# Cada modelo puede ser un Random Forest o un Gradient Boosting por
+# histogramas (ALGORITMOS); junto al .pkl se escribe un .json con el
+# algoritmo, los parámetros y los features para que el servidor sepa qué
+# está cargando.
+# Los artefactos se publican renombrando el directorio completo y se
+# activan reemplazando cada .pkl con os.replace(), de modo que el
+# servidor nunca lee un archivo a medio escribir.
+# ----------------------------------------------------------------------
+
+import json
+import os
+import shutil
+import uuid
+from datetime import date, datetime, timedelta
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from bosque_compacto import BosqueCompacto, archivo_compacto
+from catalogo_estados import NOMBRE_ARRAY, codigos_encoder
+from features import FEATURES_CLASIFICADOR, FEATURES_REGRESOR, columnas_modelo, derivados
+
+# Fases del entrenamiento, en orden, con el avance aproximado (%) al iniciar cada una
+FASES = {
+    'cargando': 0,
+    'features': 15,
+    'entrenando': 30,
+    'evaluando': 85,
+    'guardando': 95,
+}
+
+RIESGO_MAP = {'bajo': 0, 'medio': 1, 'alto': 2, 'critico': 3, 'cr?tico': 3}
+
+CLF_FEATURE_POOL = FEATURES_CLASIFICADOR
+REG_FEATURE_POOL = FEATURES_REGRESOR
+
+# Hiperparámetros por defecto (los reemplaza `parametros`, p. ej. los que
+# encuentra scripts/seleccionar_modelo.py)
+PARAMETROS_CLASIFICADOR = {
+    'n_estimators': 100,
+    'max_depth': 15,
+    'min_samples_split': 10,
+    'min_samples_leaf': 5,
+}
+PARAMETROS_REGRESOR = {
+    'n_estimators': 100,
+    'max_depth': 15,
+    'min_samples_split': 10,
+}
+
+# Gradient Boosting por histogramas: agrupa cada feature en a lo más 255
+# intervalos antes de entrenar y cada iteración es un solo árbol pequeño,
+# así entrena más rápido que el bosque y predice recorriendo menos nodos
+PARAMETROS_HGB_CLASIFICADOR = {
+    'max_iter': 200,
+    'learning_rate': 0.1,
+    'max_leaf_nodes': 31,
+    'min_samples_leaf': 20,
+}
+PARAMETROS_HGB_REGRESOR = {
+    'max_iter': 200,
+    'learning_rate': 0.1,
+    'max_leaf_nodes': 31,
+    'min_samples_leaf': 20,
+}
+
+ALGORITMOS = {
+    'random_forest': 'Random Forest',
+    'hist_gradient_boosting': 'Gradient Boosting (histogramas)',
+}
+ALGORITMO_POR_DEFECTO = 'random_forest'
+
+PARAMETROS_POR_DEFECTO = {
+    ('clasificador', 'random_forest'): PARAMETROS_CLASIFICADOR,
+    ('regresor', 'random_forest'): PARAMETROS_REGRESOR,
+    ('clasificador', 'hist_gradient_boosting'): PARAMETROS_HGB_CLASIFICADOR,
+    ('regresor', 'hist_gradient_boosting'): PARAMETROS_HGB_REGRESOR,
+}
+
+# Fracción final de semanas que se reserva para evaluar
+PROPORCION_PRUEBA = 0.2
+
+# Actualización incremental (actualizar()): árboles que se agregan, semanas
+# recientes con las que se ajustan y tamaño máximo del bosque
+ARBOLES_ACTUALIZACION = 20
+SEMANAS_VENTANA = 52
+MAX_ARBOLES = 200
+# Empeoramiento relativo de la métrica en las semanas nuevas que dispara
+# un reentrenamiento completo en lugar de la actualización
+UMBRAL_DERIVA = 0.15
+METRICA_DERIVA = {'clasificador': 'f1_score', 'regresor': 'mae'}
+
+# Versiones publicadas que se conservan en disco (para volver a una anterior)
+MODELOS_CONSERVAR = 5
+
+# Artefactos que produce cada tipo de modelo
+ARCHIVOS_MODELO = {
+    'clasificador': ('model.pkl', 'label_encoder.pkl', 'model.json'),
+    'regresor': ('model_regressor.pkl', 'regressor_features.pkl', 'label_encoder_regressor.pkl',
+                 'model_regressor.json'),
+}
+
+
+class DatosInvalidos(ValueError):
+    """El CSV o los parámetros no permiten entrenar (se responde 400)."""
+
+
+def validar_algoritmo(algoritmo):
+    if algoritmo not in ALGORITMOS:
+        raise DatosInvalidos(f'tipo_algoritmo debe ser uno de: {", ".join(ALGORITMOS)}')
+    return algoritmo
+
+
+def crear_estimador(tipo_modelo, algoritmo=ALGORITMO_POR_DEFECTO, parametros=None, n_jobs=-1):
+    """
+    Estimador sin entrenar de `algoritmo` para el tipo de modelo, con los
+    parámetros por defecto reemplazados por `parametros`.
+    """
+    from sklearn.ensemble import (
+        HistGradientBoostingClassifier, HistGradientBoostingRegressor,
+        RandomForestClassifier, RandomForestRegressor
+    )
+
+    parametros = {**PARAMETROS_POR_DEFECTO[(tipo_modelo, algoritmo)], **(parametros or {})}
+    if algoritmo == 'hist_gradient_boosting':
+        clase = HistGradientBoostingClassifier if tipo_modelo == 'clasificador' else HistGradientBoostingRegressor
+        return clase(**parametros, random_state=42)
+    clase = RandomForestClassifier if tipo_modelo == 'clasificador' else RandomForestRegressor
+    return clase(**parametros, random_state=42, n_jobs=n_jobs)
+
+
+def ajustar(modelo, X, y, n_jobs=-1):
+    """
+    modelo.fit(X, y). El Gradient Boosting no tiene n_jobs (usa hilos de
+    OpenMP); con n_jobs > 0 se limitan a ese número con threadpoolctl.
+    """
+    if hasattr(modelo, 'n_jobs') or n_jobs is None or n_jobs < 1:
+        return modelo.fit(X, y)
+    from threadpoolctl import threadpool_limits
+
+    with threadpool_limits(limits=n_jobs, user_api='openmp'):
+        return modelo.fit(X, y)
+
+
+def algoritmo_de(modelo):
+    """Algoritmo de un estimador ya cargado (para .pkl sin .json de metadatos)."""
+    if type(modelo).__name__.startswith('HistGradientBoosting'):
+        return 'hist_gradient_boosting'
+    return 'random_forest'
+
+
+def para_servir(modelo):
+    """
+    Ajusta un modelo cargado para predecir de a una fila: el bosque se
+    entrena con n_jobs=-1, pero repartir 100 árboles entre hilos para una
+    fila cuesta más que recorrerlos en uno solo.
+    """
+    if modelo is not None and hasattr(modelo, 'n_jobs'):
+        modelo.set_params(n_jobs=1)
+    return modelo
+
+
+def archivo_metadatos(archivo_modelo):
+    """model.pkl -> model.json"""
+    return os.path.splitext(archivo_modelo)[0] + '.json'
+
+
+def guardar_metadatos(destino, archivo_modelo, tipo_modelo, algoritmo, parametros, features, metricas, **extra):
+    """
+    Escribe el .json de metadatos junto al modelo. `extra` agrega campos,
+    p. ej. hasta (última semana de entrenamiento, la usa actualizar()).
+    """
+    import sklearn
+
+    metadatos = {
+        'tipo_modelo': tipo_modelo,
+        'algoritmo': algoritmo,
+        'parametros': parametros,
+        'features': list(features),
+        'metricas': metricas,
+        'entrenado': datetime.now().isoformat(timespec='seconds'),
+        'sklearn': sklearn.__version__,
+        **extra,
+    }
+    with open(os.path.join(destino, archivo_metadatos(archivo_modelo)), 'w', encoding='utf-8') as f:
+        json.dump(metadatos, f, indent=2, ensure_ascii=False)
+
+
+def leer_metadatos(ruta_modelo, modelo=None):
+    """
+    Metadatos del .json junto a `ruta_modelo`. Los modelos anteriores no
+    lo tienen: el algoritmo se deduce del estimador.
+    """
+    try:
+        with open(archivo_metadatos(ruta_modelo), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'algoritmo': algoritmo_de(modelo)}
+
+
+def ultima_fecha(df):
+    """Última fecha_fin_semana de los datos (YYYY-MM-DD), o None si no hay fechas."""
+    if 'fecha_fin_semana' not in df.columns or df.empty:
+        return None
+    return str(pd.Timestamp(df['fecha_fin_semana'].max()).date())
+
+
+def calcular_metricas(tipo_modelo, y_real, y_pred):
+    """Métricas de evaluación que reportan entrenar() y actualizar()."""
+    from sklearn.metrics import (
+        accuracy_score, f1_score, mean_absolute_error, precision_score, r2_score, recall_score
+    )
+
+    if tipo_modelo == 'clasificador':
+        return {
+            'accuracy': float(accuracy_score(y_real, y_pred)),
+            'precision': float(precision_score(y_real, y_pred, average='weighted', zero_division=0)),
+            'recall': float(recall_score(y_real, y_pred, average='weighted', zero_division=0)),
+            'f1_score': float(f1_score(y_real, y_pred, average='weighted', zero_division=0))
+        }
+    return {
+        'r2_score': float(r2_score(y_real, y_pred)),
+        'mae': float(mean_absolute_error(y_real, y_pred))
+    }
+
+
+def buscar_csv(archivo_csv, backend_dir):
+    """Ruta existente del CSV de entrenamiento (data/, modelo/, backend/ o tal cual), o None."""
+    posibles_rutas = [
+        os.path.join(backend_dir, '..', 'data', archivo_csv),
+        os.path.join(backend_dir, '..', 'modelo', archivo_csv),
+        os.path.join(backend_dir, archivo_csv),
+        archivo_csv
+    ]
+    for ruta in posibles_rutas:
+        if os.path.exists(ruta):
+            return ruta
+    return None
+
+
+def datos_desde_bd(desde=None, hasta=None, id_enfermedad=None, label_encoder=None):
+    """
+    Conjunto de entrenamiento leído de dato_features (ver features.py),
+    los mismos lags que usan las predicciones. Si hay LabelEncoder,
+    estado_coded usa sus códigos; si no, se entrega el nombre del estado
+    para ajustar uno nuevo.
+    """
+    from db_config import get_lectura_connection
+    from features import LAGS, cargar_features
+
+    conn = get_lectura_connection()
+    try:
+        df = cargar_features(conn, desde, hasta, id_enfermedad)
+    finally:
+        conn.close()
+    if df.empty:
+        raise DatosInvalidos('No hay features para el periodo indicado '
+                             '(¿falta correr scripts/actualizar_features.py?)')
+
+    id_region = df['id_region'].to_numpy(dtype=np.int64)
+    if label_encoder is not None:
+        df['estado_coded'] = codigos_encoder(label_encoder)[id_region]
+    else:
+        df['entidad_fed'] = NOMBRE_ARRAY[id_region]
+
+    # Primeras semanas de cada estado sin lags completos
+    return df.dropna(subset=[f'casos_lag_{lag}w' for lag in LAGS]).reset_index(drop=True)
+
+
+def preparar_datos(df, label_encoder=None, label_encoder_reg=None):
+    """
+    Normaliza nombres de columnas, codifica la entidad si viene como texto
+    y calcula los features derivados de los lags que falten.
+    Retorna (df, label_encoder, label_encoder_reg).
+    """
+    from sklearn.preprocessing import LabelEncoder
+
+    # Normalizar nombres de columnas a minúsculas para alinear entrenamiento e inferencia
+    df.columns = [c.lower() for c in df.columns]
+    rename_map = {
+        'semana_del_anio': 'semana_anio',
+        'semana_epidemiologica': 'semana_anio',
+        'entidad': 'entidad_fed',
+        'riesgo_brote_target': 'nivel_riesgo_encoded',
+        'casos_semana_siguiente': 'casos_confirmados'
+    }
+    df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns}, inplace=True)
+
+    # Codificar entidad si viene como texto
+    if 'entidad_coded' not in df.columns and 'estado_coded' in df.columns:
+        df['entidad_coded'] = df['estado_coded']
+    if 'entidad_coded' not in df.columns and 'entidad_fed' in df.columns:
+        le_entidad = LabelEncoder()
+        df['entidad_coded'] = le_entidad.fit_transform(df['entidad_fed'])
+        label_encoder = le_entidad
+        label_encoder_reg = le_entidad
+        print(f"🏷️ LabelEncoder creado con {len(le_entidad.classes_)} estados")
+
+    # Calcular features derivados si faltan y hay lags disponibles
+    derivados(df)
+
+    return df, label_encoder, label_encoder_reg
+
+
+def _dividir(df, feature_cols, objetivo, estratificar=False):
+    """
+    Entrenamiento/prueba. Con fecha_fin_semana (datos de la BD) la prueba
+    son las últimas semanas, para no evaluar con semanas anteriores a las
+    de entrenamiento; si no (CSV sin fechas), una división aleatoria.
+    """
+    from sklearn.model_selection import train_test_split
+
+    if 'fecha_fin_semana' in df.columns:
+        from seleccion_modelos import division_temporal
+
+        df = df.sort_values('fecha_fin_semana', kind='stable')
+        corte = division_temporal(df['fecha_fin_semana'].to_numpy(), PROPORCION_PRUEBA)
+        X, y = df[feature_cols], df[objetivo]
+        return X.iloc[:corte], X.iloc[corte:], y.iloc[:corte], y.iloc[corte:]
+
+    return train_test_split(
+        df[feature_cols], df[objetivo], test_size=PROPORCION_PRUEBA, random_state=42,
+        stratify=df[objetivo] if estratificar else None
+    )
+
+
+def _entrenar_clasificador(df, label_encoder, destino, n_jobs, avanzar, parametros=None,
+                           algoritmo=ALGORITMO_POR_DEFECTO):
+    from sklearn.preprocessing import LabelEncoder
+
+    if 'NIVEL_RIESGO' in df.columns:
+        df['nivel_riesgo_encoded'] = df['NIVEL_RIESGO'].str.lower().map(RIESGO_MAP)
+    if 'nivel_riesgo' in df.columns and 'nivel_riesgo_encoded' not in df.columns:
+        df['nivel_riesgo_encoded'] = df['nivel_riesgo'].str.lower().map(RIESGO_MAP)
+    if 'nivel_riesgo_encoded' not in df.columns:
+        raise DatosInvalidos('No se encontró la columna objetivo nivel_riesgo_encoded')
+
+    if 'estado_coded' not in df.columns and 'entidad_coded' in df.columns:
+        df['estado_coded'] = df['entidad_coded']
+
+    # Si no hay LabelEncoder pero tenemos nombres de entidad, ajustarlo para mantenerlo en disco
+    if label_encoder is None and 'entidad_fed' in df.columns:
+        le_entidad = LabelEncoder()
+        df['estado_coded'] = le_entidad.fit_transform(df['entidad_fed'])
+        label_encoder = le_entidad
+
+    feature_cols = [col for col in CLF_FEATURE_POOL if col in df.columns]
+    if len(feature_cols) < 4:
+        raise DatosInvalidos(f'No hay suficientes columnas de features para el clasificador. Encontradas: {feature_cols}')
+
+    X_train, X_test, y_train, y_test = _dividir(df, feature_cols, 'nivel_riesgo_encoded', estratificar=True)
+    parametros = {**PARAMETROS_POR_DEFECTO[('clasificador', algoritmo)], **(parametros or {})}
+
+    avanzar('entrenando')
+    print(f"🧖 Entrenando {ALGORITMOS[algoritmo]} Clasificador...")
+    modelo = crear_estimador('clasificador', algoritmo, parametros, n_jobs)
+    ajustar(modelo, X_train, y_train, n_jobs)
+
+    avanzar('evaluando')
+    metricas = calcular_metricas('clasificador', y_test, modelo.predict(X_test))
+
+    avanzar('guardando')
+    joblib.dump(modelo, os.path.join(destino, 'model.pkl'))
+    joblib.dump(label_encoder, os.path.join(destino, 'label_encoder.pkl'))
+    guardar_metadatos(destino, 'model.pkl', 'clasificador', algoritmo, parametros, feature_cols, metricas,
+                      hasta=ultima_fecha(df))
+
+    print(f"✔️ Modelo clasificador entrenado")
+    print(f"   - Accuracy: {metricas['accuracy']:.4f}")
+    print(f"   - Precision: {metricas['precision']:.4f}")
+    print(f"   - Recall: {metricas['recall']:.4f}")
+    print(f"   - F1-Score: {metricas['f1_score']:.4f}")
+
+    return {
+        'tipo_modelo': 'clasificador',
+        'algoritmo': algoritmo,
+        'metricas': metricas,
+        'datos': {
+            'total_registros': len(df),
+            'registros_entrenamiento': len(X_train),
+            'registros_prueba': len(X_test),
+            'features': feature_cols,
+            'parametros': parametros
+        },
+        'archivo_guardado': 'model.pkl',
+        'mensaje': 'Modelo clasificador entrenado exitosamente'
+    }
+
+
+def _entrenar_regresor(df, label_encoder_reg, destino, n_jobs, avanzar, parametros=None,
+                       algoritmo=ALGORITMO_POR_DEFECTO):
+    from sklearn.preprocessing import LabelEncoder
+
+    if 'entidad_coded' not in df.columns and 'estado_coded' in df.columns:
+        df['entidad_coded'] = df['estado_coded']
+    elif 'entidad_coded' not in df.columns and 'entidad_fed' in df.columns:
+        le_entidad = LabelEncoder()
+        df['entidad_coded'] = le_entidad.fit_transform(df['entidad_fed'])
+        label_encoder_reg = le_entidad
+
+    if label_encoder_reg is None and 'entidad_fed' in df.columns and 'entidad_coded' in df.columns:
+        le_entidad = LabelEncoder()
+        df['entidad_coded'] = le_entidad.fit_transform(df['entidad_fed'])
+        label_encoder_reg = le_entidad
+
+    if 'estado_coded' not in df.columns and 'entidad_coded' in df.columns:
+        df['estado_coded'] = df['entidad_coded']
+    feature_cols = [col for col in REG_FEATURE_POOL if col in df.columns]
+    if len(feature_cols) < 4:
+        raise DatosInvalidos(f'No hay suficientes columnas de features para el regresor. Encontradas: {feature_cols}')
+
+    if 'casos_confirmados' not in df.columns:
+        raise DatosInvalidos('No se encontró la columna casos_confirmados para el regresor')
+
+    X_train, X_test, y_train, y_test = _dividir(df, feature_cols, 'casos_confirmados')
+    parametros = {**PARAMETROS_POR_DEFECTO[('regresor', algoritmo)], **(parametros or {})}
+
+    avanzar('entrenando')
+    print(f"🧖 Entrenando {ALGORITMOS[algoritmo]} Regresor...")
+    modelo = crear_estimador('regresor', algoritmo, parametros, n_jobs)
+    ajustar(modelo, X_train, y_train, n_jobs)
+
+    avanzar('evaluando')
+    metricas = calcular_metricas('regresor', y_test, modelo.predict(X_test))
+
+    avanzar('guardando')
+    joblib.dump(modelo, os.path.join(destino, 'model_regressor.pkl'))
+    joblib.dump(feature_cols, os.path.join(destino, 'regressor_features.pkl'))
+    if label_encoder_reg is not None:
+        joblib.dump(label_encoder_reg, os.path.join(destino, 'label_encoder_regressor.pkl'))
+    guardar_metadatos(destino, 'model_regressor.pkl', 'regresor', algoritmo, parametros, feature_cols, metricas,
+                      hasta=ultima_fecha(df))
+
+    print(f"✔️ Modelo regresor entrenado")
+    print(f"   - R²: {metricas['r2_score']:.4f}")
+    print(f"   - MAE: {metricas['mae']:.2f}")
+
+    return {
+        'tipo_modelo': 'regresor',
+        'algoritmo': algoritmo,
+        'metricas': metricas,
+        'datos': {
+            'total_registros': len(df),
+            'registros_entrenamiento': len(X_train),
+            'registros_prueba': len(X_test),
+            'features': feature_cols,
+            'parametros': parametros
+        },
+        'archivo_guardado': 'model_regressor.pkl',
+        'mensaje': 'Modelo regresor entrenado exitosamente'
+    }
+
+
+def entrenar(tipo_modelo, fuente, destino, label_encoder=None, label_encoder_reg=None,
+             n_jobs=-1, al_avanzar=None, parametros=None, algoritmo=ALGORITMO_POR_DEFECTO):
+    """
+    Entrena el clasificador o el regresor y escribe sus .pkl (y el .json
+    de metadatos) en `destino` (que debe existir). `fuente` es la ruta de
+    un CSV o un dict con desde/hasta/id_enfermedad para leer de la base de
+    datos. `algoritmo` es una clave de ALGORITMOS y `parametros` reemplaza
+    sus hiperparámetros de PARAMETROS_POR_DEFECTO. al_avanzar(fase) se
+    llama al iniciar cada fase de FASES. Lanza DatosInvalidos si los datos
+    no sirven.
+    Retorna las métricas y datos del entrenamiento.
+    """
+    if tipo_modelo not in ARCHIVOS_MODELO:
+        raise DatosInvalidos('tipo_modelo debe ser "clasificador" o "regresor"')
+    validar_algoritmo(algoritmo)
+
+    def avanzar(fase):
+        if al_avanzar:
+            al_avanzar(fase)
+
+    avanzar('cargando')
+    if isinstance(fuente, dict):
+        encoder = label_encoder if tipo_modelo == 'clasificador' else label_encoder_reg
+        df = datos_desde_bd(label_encoder=encoder, **fuente)
+    else:
+        df = pd.read_csv(fuente)
+    print(f"📊 Datos cargados: {len(df)} registros, {len(df.columns)} columnas")
+
+    avanzar('features')
+    df, label_encoder, label_encoder_reg = preparar_datos(df, label_encoder, label_encoder_reg)
+
+    if tipo_modelo == 'clasificador':
+        return _entrenar_clasificador(df, label_encoder, destino, n_jobs, avanzar, parametros, algoritmo)
+    return _entrenar_regresor(df, label_encoder_reg, destino, n_jobs, avanzar, parametros, algoritmo)
+
+
+# --- Actualización incremental ---
+
+def validar_actualizacion(opciones):
+    """arboles_nuevos, semanas_ventana y max_arboles de una petición de actualización."""
+    limites = {'arboles_nuevos': (1, 500), 'semanas_ventana': (4, 520), 'max_arboles': (1, 1000)}
+    desconocidos = sorted(set(opciones) - set(limites))
+    if desconocidos:
+        raise DatosInvalidos(f'Opciones de actualización no permitidas: {", ".join(desconocidos)}')
+    for nombre, valor in opciones.items():
+        minimo, maximo = limites[nombre]
+        if not isinstance(valor, int) or not minimo <= valor <= maximo:
+            raise DatosInvalidos(f'{nombre} debe ser un entero entre {minimo} y {maximo}')
+    return opciones
+
+
+def hay_deriva(tipo_modelo, metricas_base, metricas_nuevas, umbral=UMBRAL_DERIVA):
+    """
+    True si la métrica del modelo en las semanas nuevas empeoró más de
+    `umbral` (relativo) respecto a la de su entrenamiento.
+    """
+    nombre = METRICA_DERIVA[tipo_modelo]
+    base = (metricas_base or {}).get(nombre)
+    if base is None:
+        return False
+    if nombre == 'mae':
+        return metricas_nuevas[nombre] > base * (1 + umbral)
+    return metricas_nuevas[nombre] < base * (1 - umbral)
+
+
+def actualizar(tipo_modelo, fuente, destino, directorio_modelo, n_jobs=-1, al_avanzar=None,
+               arboles_nuevos=ARBOLES_ACTUALIZACION, semanas_ventana=SEMANAS_VENTANA,
+               max_arboles=MAX_ARBOLES, umbral_deriva=UMBRAL_DERIVA):
+    """
+    Actualiza el modelo activo (los .pkl de `directorio_modelo`) con las
+    semanas cargadas después de su entrenamiento: agrega `arboles_nuevos`
+    árboles (warm_start) ajustados con las últimas `semanas_ventana`
+    semanas y retira los más antiguos para no pasar de `max_arboles`. El
+    costo depende de la ventana, no del historial completo.
+
+    Antes se mide el modelo en las semanas nuevas. Se reentrena completo
+    con entrenar() si empeoró más de `umbral_deriva` respecto a sus
+    métricas de entrenamiento (deriva), si la ventana no tiene las mismas
+    clases, si no es un Random Forest o si no registra hasta qué semana se
+    entrenó. Escribe los artefactos en `destino` como entrenar() y retorna
+    las métricas (del modelo anterior en las semanas nuevas) y los datos.
+    """
+    from seleccion_modelos import conjunto
+
+    if tipo_modelo not in ARCHIVOS_MODELO:
+        raise DatosInvalidos('tipo_modelo debe ser "clasificador" o "regresor"')
+
+    def avanzar(fase):
+        if al_avanzar:
+            al_avanzar(fase)
+
+    archivo_modelo = ARCHIVOS_MODELO[tipo_modelo][0]
+    archivo_encoder = 'label_encoder.pkl' if tipo_modelo == 'clasificador' else 'label_encoder_regressor.pkl'
+    ruta_modelo = os.path.join(directorio_modelo, archivo_modelo)
+    if not os.path.exists(ruta_modelo):
+        raise DatosInvalidos(f'No hay un modelo {tipo_modelo} entrenado para actualizar')
+
+    avanzar('cargando')
+    modelo = joblib.load(ruta_modelo)
+    metadatos = leer_metadatos(ruta_modelo, modelo)
+    ruta_encoder = os.path.join(directorio_modelo, archivo_encoder)
+    encoder = joblib.load(ruta_encoder) if os.path.exists(ruta_encoder) else None
+
+    def completo(motivo):
+        print(f"🔁 Reentrenamiento completo: {motivo}")
+        resultado = entrenar(tipo_modelo, fuente, destino, encoder, encoder, n_jobs, al_avanzar,
+                             metadatos.get('parametros'), metadatos['algoritmo'])
+        resultado.update(modo='completo', motivo=motivo)
+        return resultado
+
+    if metadatos['algoritmo'] != 'random_forest':
+        return completo('solo el Random Forest se actualiza agregando árboles')
+    if not metadatos.get('hasta'):
+        return completo('el modelo no registra hasta qué semana se entrenó')
+    hasta = date.fromisoformat(metadatos['hasta'])
+
+    # Solo se leen las semanas de la ventana (más las nuevas)
+    if isinstance(fuente, dict):
+        inicio = hasta - timedelta(weeks=semanas_ventana)
+        df = datos_desde_bd(label_encoder=encoder, **{**fuente, 'desde': max(fuente.get('desde') or inicio, inicio)})
+    else:
+        df = pd.read_csv(fuente)
+        if 'fecha_fin_semana' in df.columns:
+            df['fecha_fin_semana'] = pd.to_datetime(df['fecha_fin_semana'])
+    print(f"📊 Datos cargados: {len(df)} registros, {len(df.columns)} columnas")
+
+    avanzar('features')
+    df, encoder, _ = preparar_datos(df, encoder, encoder)
+    X, y, fechas = conjunto(tipo_modelo, df)
+    semanas = np.unique(fechas)
+    en_ventana = fechas >= semanas[max(0, len(semanas) - semanas_ventana)]
+    X, y, fechas = X[en_ventana], y[en_ventana], fechas[en_ventana]
+
+    columnas = columnas_modelo(modelo, X.columns)
+    faltantes = [c for c in columnas if c not in X.columns]
+    if faltantes:
+        return completo(f'faltan features del modelo: {", ".join(faltantes)}')
+    X = X[columnas]
+
+    nuevas = fechas > np.datetime64(hasta)
+    if not nuevas.any():
+        raise DatosInvalidos(f'No hay semanas posteriores a {hasta} para actualizar el modelo')
+    if tipo_modelo == 'clasificador' and set(np.unique(y)) != set(modelo.classes_):
+        return completo('las clases de la ventana no coinciden con las del modelo')
+    metricas = calcular_metricas(tipo_modelo, y[nuevas], modelo.predict(X[nuevas]))
+    if hay_deriva(tipo_modelo, metadatos.get('metricas'), metricas, umbral_deriva):
+        nombre = METRICA_DERIVA[tipo_modelo]
+        return completo(f"deriva en {nombre}: {metadatos['metricas'][nombre]:.4f} -> {metricas[nombre]:.4f}")
+
+    avanzar('entrenando')
+    print(f"🌱 Agregando {arboles_nuevos} árboles con {len(np.unique(fechas))} semanas ({len(X):,} registros)...")
+    # Semilla distinta cada semana: con la misma, los árboles nuevos repetirían
+    # los muestreos de la actualización anterior
+    semilla = int(fechas.max().astype(np.int64))
+    modelo.set_params(warm_start=True, n_estimators=len(modelo.estimators_) + arboles_nuevos,
+                      random_state=semilla, n_jobs=n_jobs)
+    modelo.fit(X, y)
+    retirados = max(0, len(modelo.estimators_) - max_arboles)
+    modelo.estimators_ = modelo.estimators_[retirados:]
+    modelo.set_params(warm_start=False, n_estimators=len(modelo.estimators_))
+
+    avanzar('guardando')
+    parametros = {**(metadatos.get('parametros') or {}), 'n_estimators': len(modelo.estimators_)}
+    joblib.dump(modelo, os.path.join(destino, archivo_modelo))
+    if encoder is not None:
+        joblib.dump(encoder, os.path.join(destino, archivo_encoder))
+    if tipo_modelo == 'regresor':
+        joblib.dump(columnas, os.path.join(destino, 'regressor_features.pkl'))
+    # Las métricas de referencia siguen siendo las del último entrenamiento completo
+    guardar_metadatos(destino, archivo_modelo, tipo_modelo, 'random_forest', parametros, columnas,
+                      metadatos.get('metricas'), hasta=str(fechas.max()),
+                      actualizaciones=metadatos.get('actualizaciones', 0) + 1,
+                      ultima_actualizacion={'metricas': metricas, 'arboles_nuevos': arboles_nuevos,
+                                            'arboles_retirados': retirados})
+
+    semanas_nuevas = len(np.unique(fechas[nuevas]))
+    print(f"✔️ Modelo {tipo_modelo} actualizado: {len(modelo.estimators_)} árboles ({retirados} retirados)")
+    return {
+        'tipo_modelo': tipo_modelo,
+        'algoritmo': 'random_forest',
+        'modo': 'actualizar',
+        'metricas': metricas,
+        'datos': {
+            'total_registros': len(X),
+            'registros_nuevos': int(nuevas.sum()),
+            'semanas_nuevas': semanas_nuevas,
+            'ventana': {'desde': str(fechas.min()), 'hasta': str(fechas.max())},
+            'arboles_nuevos': arboles_nuevos,
+            'arboles_retirados': retirados,
+            'total_arboles': len(modelo.estimators_),
+            'features': columnas,
+            'parametros': parametros
+        },
+        'archivo_guardado': archivo_modelo,
+        'mensaje': f'Modelo {tipo_modelo} actualizado con {semanas_nuevas} semanas nuevas'
+    }
+
+
+# --- Publicación y activación de artefactos ---
+
+def directorio_temporal(directorio_modelos):
+    """Crea un directorio de trabajo para los artefactos de un entrenamiento."""
+    ruta = os.path.join(directorio_modelos, f'.{uuid.uuid4().hex}.tmp')
+    os.makedirs(ruta)
+    return ruta
+
+
+def publicar(directorio_tmp, directorio_modelos, version=None):
+    """
+    Publica los artefactos renombrando el directorio temporal completo a
+    `directorio_modelos/version` (una sola operación atómica).
+    Retorna la ruta publicada.
+    """
+    ruta = os.path.join(directorio_modelos, version or uuid.uuid4().hex)
+    os.replace(directorio_tmp, ruta)
+    return ruta
+
+
+def activar(ruta_version, backend_dir):
+    """
+    Copia los artefactos publicados (.pkl, .json de metadatos y
+    .compacto.npz) sobre los que carga el servidor. Cada archivo se copia
+    a un temporal junto al destino y se reemplaza con os.replace(), así un
+    lector ve el archivo anterior o el nuevo completo.
+    Retorna {nombre_archivo: objeto cargado}.
+    """
+    cargados = {}
+    for nombre in sorted(os.listdir(ruta_version)):
+        if not nombre.endswith(('.pkl', '.json', '.npz')):
+            continue
+        origen = os.path.join(ruta_version, nombre)
+        destino = os.path.join(backend_dir, nombre)
+        temporal = f'{destino}.{uuid.uuid4().hex}.tmp'
+        shutil.copy2(origen, temporal)
+        os.replace(temporal, destino)
+        if nombre.endswith('.json'):
+            with open(origen, encoding='utf-8') as f:
+                cargados[nombre] = json.load(f)
+        elif nombre.endswith('.npz'):
+            cargados[nombre] = BosqueCompacto.cargar(origen)
+        else:
+            cargados[nombre] = joblib.load(origen)
+
+    # Si la versión no trae .json o versión compacta, no dejar los del modelo anterior
+    for archivo_modelo in ('model.pkl', 'model_regressor.pkl'):
+        for acompanante in (archivo_metadatos(archivo_modelo), archivo_compacto(archivo_modelo)):
+            if archivo_modelo in cargados and acompanante not in cargados:
+                try:
+                    os.remove(os.path.join(backend_dir, acompanante))
+                except FileNotFoundError:
+                    pass
+    return cargados
+
+
+def purgar_versiones(directorio_modelos, conservar=MODELOS_CONSERVAR):
+    """Elimina las versiones publicadas más antiguas, dejando las `conservar` más recientes."""
+    versiones = [
+        os.path.join(directorio_modelos, nombre) for nombre in os.listdir(directorio_modelos)
+        if not nombre.startswith('.') and os.path.isdir(os.path.join(directorio_modelos, nombre))
+    ]
+    versiones.sort(key=os.path.getmtime, reverse=True)
+    for ruta in versiones[conservar:]:
+        shutil.rmtree(ruta, ignore_errors=True)
+
+
+def descartar(directorio_tmp):
+    """Elimina un directorio temporal de artefactos (entrenamiento fallido)."""
+    shutil.rmtree(directorio_tmp, ignore_errors=True)
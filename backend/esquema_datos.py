@@ -0,0 +1,164 @@
+# ----------------------------------------------------------------------
+# ESQUEMA_DATOS.PY: Registro de tipos para los CSVs de dengue
+# ----------------------------------------------------------------------
+# Declara por columna el dtype compacto, el formato de fecha y los códigos
+# que significan "sin dato" (catálogos de datos abiertos de la DGE:
+# 97 = No aplica, 98 = Se ignora, 99 = No especificado).
+# Todos los lectores (ETL, API y scripts) leen con leer_csv() para no
+# inferir int64/object columna por columna.
+# ----------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+FORMATO_FECHA = '%Y-%m-%d'
+
+NULOS_SI_NO = (97, 98, 99)
+NULOS_ENTIDAD = (97, 98, 99)
+NULOS_MUNICIPIO = (997, 998, 999)
+
+# Archivos de casos individuales (dengue_20XX.csv): columna -> (dtype, códigos nulos)
+ESQUEMA_CASOS = {
+    'FECHA_ACTUALIZACION': ('fecha', ()),
+    'ID_REGISTRO': ('uint32', ()),
+    'SEXO': ('int8', (99,)),
+    'EDAD_ANOS': ('uint8', ()),
+    'ENTIDAD_RES': ('int8', NULOS_ENTIDAD),
+    'MUNICIPIO_RES': ('uint16', NULOS_MUNICIPIO),
+    'HABLA_LENGUA_INDIG': ('int8', NULOS_SI_NO),
+    'INDIGENA': ('int8', NULOS_SI_NO),
+    'ENTIDAD_UM_NOTIF': ('int8', NULOS_ENTIDAD),
+    'MUNICIPIO_UM_NOTIF': ('uint16', NULOS_MUNICIPIO),
+    'INSTITUCION_UM_NOTIF': ('int8', (99,)),
+    'FECHA_SIGN_SINTOMAS': ('fecha', ()),
+    'TIPO_PACIENTE': ('Int8', (99,)),
+    'HEMORRAGICOS': ('int8', NULOS_SI_NO),
+    'DIABETES': ('int8', NULOS_SI_NO),
+    'HIPERTENSION': ('int8', NULOS_SI_NO),
+    'ENFERMEDAD_ULC_PEPTICA': ('int8', NULOS_SI_NO),
+    'ENFERMEDAD_RENAL': ('int8', NULOS_SI_NO),
+    'INMUNOSUPR': ('int8', NULOS_SI_NO),
+    'CIRROSIS_HEPATICA': ('int8', NULOS_SI_NO),
+    'EMBARAZO': ('int8', NULOS_SI_NO),
+    'DEFUNCION': ('int8', NULOS_SI_NO),
+    'DICTAMEN': ('int8', ()),
+    'TOMA_MUESTRA': ('int8', NULOS_SI_NO),
+    'RESULTADO_PCR': ('int8', ()),
+    'ESTATUS_CASO': ('int8', ()),
+    'ENTIDAD_ASIG': ('int8', NULOS_ENTIDAD),
+    'MUNICIPIO_ASIG': ('uint16', NULOS_MUNICIPIO),
+}
+
+# Series semanales ya agregadas (dengue_historico_*.csv, exportaciones)
+ESQUEMA_HISTORICO = {
+    'id_enfermedad': ('int8', ()),
+    'id_region': ('int8', ()),
+    'fecha_fin_semana': ('fecha', ()),
+    'casos_confirmados': ('int32', ()),
+    'defunciones': ('Int32', ()),
+    'tasa_incidencia': ('float64', ()),
+    'riesgo_brote_target': ('int8', ()),
+}
+
+# Equivalente que admite valores vacíos para cada dtype numérico
+TIPOS_NULABLES = {
+    'int8': 'Int8', 'int16': 'Int16', 'int32': 'Int32', 'int64': 'Int64',
+    'uint8': 'UInt8', 'uint16': 'UInt16', 'uint32': 'UInt32', 'uint64': 'UInt64',
+}
+
+
+def esquema_para(columnas):
+    """Elige el esquema según el encabezado del archivo (o None si no se reconoce)."""
+    if 'id_enfermedad' in columnas and 'fecha_fin_semana' in columnas:
+        return ESQUEMA_HISTORICO
+    if 'FECHA_SIGN_SINTOMAS' in columnas:
+        return ESQUEMA_CASOS
+    return None
+
+
+def opciones_lectura(esquema, columnas=None, nulables=False):
+    """
+    Argumentos dtype / na_values para pd.read_csv.
+    Los códigos nulos del esquema se leen como NA en ambos modos, para que
+    la vista previa y la carga por bloques agreguen igual el mismo archivo;
+    por eso las columnas con códigos nulos usan siempre los tipos
+    Int8/UInt16/... de pandas. Con nulables=True también las demás (para
+    celdas vacías); con nulables=False conservan el dtype compacto de numpy.
+    """
+    dtype = {}
+    na_values = {}
+    for columna, (tipo, nulos) in esquema.items():
+        if columnas is not None and columna not in columnas:
+            continue
+        if tipo == 'fecha':
+            dtype[columna] = 'str'
+            continue
+        if nulos:
+            na_values[columna] = [str(codigo) for codigo in nulos]
+        if nulables or nulos:
+            dtype[columna] = TIPOS_NULABLES.get(tipo, tipo)
+        else:
+            dtype[columna] = tipo
+    opciones = {'dtype': dtype}
+    if na_values:
+        opciones['na_values'] = na_values
+    return opciones
+
+
+def convertir_fecha(serie):
+    """
+    Convierte texto a datetime64 con FORMATO_FECHA. Los valores que no
+    tienen ese formato se reintentan con inferencia, para no perder
+    archivos con fechas en otro formato.
+    """
+    fechas = pd.to_datetime(serie, format=FORMATO_FECHA, errors='coerce')
+    fallidos = fechas.isna() & serie.notna()
+    if fallidos.any():
+        fechas[fallidos] = pd.to_datetime(serie[fallidos], errors='coerce')
+    return fechas
+
+
+def convertir_fechas(df, esquema):
+    """Convierte en su lugar las columnas de fecha del esquema presentes en df."""
+    for columna, (tipo, _) in esquema.items():
+        if tipo == 'fecha' and columna in df.columns:
+            df[columna] = convertir_fecha(df[columna])
+    return df
+
+
+def leer_csv(fuente, esquema, usecols=None, chunksize=None, nulables=False, **kwargs):
+    """
+    pd.read_csv con los dtypes del esquema y fechas ya convertidas.
+    Con chunksize devuelve un iterador de bloques. Si la lectura compacta
+    falla por celdas vacías en una columna entera, se repite con tipos
+    nulables (solo cuando la fuente permite volver al inicio).
+    """
+    columnas = usecols
+    if columnas is None:
+        posicion = fuente.tell() if hasattr(fuente, 'tell') else None
+        columnas = pd.read_csv(fuente, nrows=0, **kwargs).columns
+        if posicion is not None:
+            fuente.seek(posicion)
+
+    if chunksize:
+        opciones = opciones_lectura(esquema, columnas, nulables=True)
+        lector = pd.read_csv(fuente, usecols=usecols, chunksize=chunksize, **opciones, **kwargs)
+        return (convertir_fechas(bloque, esquema) for bloque in lector)
+
+    posicion = fuente.tell() if hasattr(fuente, 'tell') else None
+    try:
+        opciones = opciones_lectura(esquema, columnas, nulables=nulables)
+        df = pd.read_csv(fuente, usecols=usecols, **opciones, **kwargs)
+    except ValueError:
+        if nulables or (posicion is None and not isinstance(fuente, str)):
+            raise
+        if posicion is not None:
+            fuente.seek(posicion)
+        opciones = opciones_lectura(esquema, columnas, nulables=True)
+        df = pd.read_csv(fuente, usecols=usecols, **opciones, **kwargs)
+    return convertir_fechas(df, esquema)
+
+
+def memoria_mb(df):
+    """Memoria ocupada por el DataFrame en MB (incluye texto)."""
+    return round(float(np.sum(df.memory_usage(deep=True))) / (1024 * 1024), 2)
@@ -0,0 +1,328 @@
+# ----------------------------------------------------------------------
+# FEATURES.PY: Features de lags y ventanas móviles compartidos por
+# entrenamiento y predicción
+# ----------------------------------------------------------------------
+# Para la semana W de un estado, los features se calculan con las filas
+# anteriores a W del mismo estado: casos y tasa de las 4 filas previas,
+# promedio de hasta 4 semanas previas, tendencia (lag 1 - lag 4),
+# variación porcentual entre lag 1 y lag 2, y semana (WEEK() de MySQL) y
+# mes de W. Es la misma definición de los notebooks, pero vectorizada
+# sobre arreglos ordenados por estado y fecha, sin groupby/lambda.
+#
+# El resultado se guarda en dato_features (una fila por estado y semana
+# con datos, más una fila "pendiente" por estado para la semana siguiente
+# a la última cargada, que es la que se predice). Se actualiza al cargar
+# datos recalculando solo desde la semana más antigua cargada, con las 4
+# filas previas de cada estado como ventana.
+# ----------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+from datos_entrenamiento import TAMANO_LOTE_LECTURA, cargar_arreglos, contar, filtros, leer_arreglos, semana_mysql
+from procesamiento_csv import TABLA_DATOS, TAMANO_LOTE
+
+TABLA_FEATURES = 'dato_features'
+
+LAGS = (1, 2, 3, 4)
+# Filas previas por estado necesarias para calcular una semana
+VENTANA = max(LAGS)
+
+FEATURES_CLASIFICADOR = [
+    'casos_lag_1w', 'casos_lag_2w', 'casos_lag_3w', 'casos_lag_4w',
+    'ti_lag_1w', 'ti_lag_2w', 'ti_lag_3w', 'ti_lag_4w',
+    'casos_promedio_4w', 'tendencia_4w', 'variacion_pct',
+    'semana_anio', 'mes', 'estado_coded'
+]
+
+FEATURES_REGRESOR = [
+    'casos_lag_1w', 'casos_lag_2w', 'casos_lag_3w', 'casos_lag_4w',
+    'ti_lag_1w', 'ti_lag_2w',
+    'casos_promedio_4w', 'tendencia_4w',
+    'semana_anio', 'mes', 'estado_coded'
+]
+
+# Columnas de dato_features, en orden (estado_coded depende del encoder y no se guarda)
+COLUMNAS_FEATURES = (
+    [f'casos_lag_{lag}w' for lag in LAGS] + [f'ti_lag_{lag}w' for lag in LAGS] +
+    ['casos_promedio_4w', 'tendencia_4w', 'variacion_pct', 'semana_anio', 'mes']
+)
+
+CREAR_TABLA_FEATURES = f"""
+CREATE TABLE IF NOT EXISTS {TABLA_FEATURES} (
+  id_region int NOT NULL,
+  fecha_fin_semana date NOT NULL,
+  casos_lag_1w int DEFAULT NULL,
+  casos_lag_2w int DEFAULT NULL,
+  casos_lag_3w int DEFAULT NULL,
+  casos_lag_4w int DEFAULT NULL,
+  ti_lag_1w double DEFAULT NULL,
+  ti_lag_2w double DEFAULT NULL,
+  ti_lag_3w double DEFAULT NULL,
+  ti_lag_4w double DEFAULT NULL,
+  casos_promedio_4w double DEFAULT NULL,
+  tendencia_4w int DEFAULT NULL,
+  variacion_pct double NOT NULL DEFAULT 0,
+  semana_anio tinyint NOT NULL,
+  mes tinyint NOT NULL,
+  actualizado timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (id_region, fecha_fin_semana),
+  KEY idx_features_fecha (fecha_fin_semana)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci
+"""
+
+# Fecha más antigua entre las VENTANA filas previas a %s de cada estado
+INICIO_VENTANA_SQL = f"""
+SELECT MIN(fecha_fin_semana) FROM (
+    SELECT fecha_fin_semana,
+           ROW_NUMBER() OVER (PARTITION BY id_region ORDER BY fecha_fin_semana DESC) AS fila
+    FROM {TABLA_DATOS}
+    WHERE fecha_fin_semana < %s
+) previas
+WHERE fila <= {VENTANA}
+"""
+
+# Semanas pendientes anteriores a %s que ya no lo son: sin datos propios y
+# con datos posteriores del mismo estado (una carga nueva tras un hueco)
+BORRAR_PENDIENTES_SQL = f"""
+DELETE f FROM {TABLA_FEATURES} f
+LEFT JOIN {TABLA_DATOS} d ON d.id_region = f.id_region AND d.fecha_fin_semana = f.fecha_fin_semana
+WHERE f.fecha_fin_semana < %s AND d.id_dato IS NULL
+  AND EXISTS (SELECT 1 FROM {TABLA_DATOS} p
+              WHERE p.id_region = f.id_region AND p.fecha_fin_semana > f.fecha_fin_semana)
+"""
+
+INSERTAR_FEATURES_SQL = f"""
+INSERT INTO {TABLA_FEATURES} (id_region, fecha_fin_semana, {', '.join(COLUMNAS_FEATURES)})
+VALUES ({', '.join(['%s'] * (len(COLUMNAS_FEATURES) + 2))})
+"""
+
+# Conjunto de entrenamiento: features + objetivos de la misma semana
+SELECT_ENTRENAMIENTO = f"""
+SELECT f.id_region, f.fecha_fin_semana, d.casos_confirmados,
+       CAST(d.tasa_incidencia AS DOUBLE), d.riesgo_brote_target,
+       {', '.join('f.' + c for c in COLUMNAS_FEATURES)}
+FROM {TABLA_FEATURES} f
+JOIN {TABLA_DATOS} d ON d.id_region = f.id_region AND d.fecha_fin_semana = f.fecha_fin_semana
+"""
+
+COLUMNAS_ENTRENAMIENTO = (
+    ('id_region', np.int8),
+    ('fecha_fin_semana', 'datetime64[D]'),
+    ('casos_confirmados', np.int32),
+    ('tasa_incidencia', np.float64),
+    ('riesgo_brote_target', np.int8),
+) + tuple((c, np.float64) for c in COLUMNAS_FEATURES)
+
+
+def _desplazar(valores, lag, posicion):
+    """valores[i - lag] dentro del mismo estado; NaN en las primeras `lag` filas de cada uno."""
+    resultado = np.full(len(valores), np.nan)
+    if lag < len(valores):
+        resultado[lag:] = valores[:len(valores) - lag]
+    resultado[posicion < lag] = np.nan
+    return resultado
+
+
+def variacion_pct(lag_1, lag_2):
+    """(lag_1 - lag_2) / lag_2, con 0 cuando lag_2 es 0 o falta (como pct_change + fillna de los notebooks)."""
+    lag_1 = np.asarray(lag_1, dtype=np.float64)
+    lag_2 = np.asarray(lag_2, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variacion = (lag_1 - lag_2) / lag_2
+    return np.where(np.isfinite(variacion), variacion, 0.0)
+
+
+def semanas_pendientes(df):
+    """Una fila por estado para la semana siguiente a su última fecha, sin casos."""
+    ultimas = df.groupby('id_region', sort=False)['fecha_fin_semana'].max()
+    return pd.DataFrame({
+        'id_region': ultimas.index,
+        'fecha_fin_semana': ultimas.to_numpy() + np.timedelta64(7, 'D'),
+        'casos_confirmados': np.nan,
+        'tasa_incidencia': np.nan,
+    })
+
+
+def calcular_features(df, pendientes=False):
+    """
+    Agrega COLUMNAS_FEATURES a un DataFrame con id_region,
+    fecha_fin_semana, casos_confirmados y tasa_incidencia (historial
+    completo o una ventana final por estado). Retorna una copia ordenada
+    por estado y fecha; las primeras filas de cada estado quedan con lags
+    NaN. Con pendientes=True agrega la semana siguiente de cada estado.
+    """
+    if pendientes and not df.empty:
+        df = pd.concat([df, semanas_pendientes(df)], ignore_index=True)
+    df = df.sort_values(['id_region', 'fecha_fin_semana'], kind='stable').reset_index(drop=True)
+
+    n = len(df)
+    indices = np.arange(n)
+    grupos = df['id_region'].to_numpy()
+    inicio = np.ones(n, dtype=bool)
+    inicio[1:] = grupos[1:] != grupos[:-1]
+    # Índice de la primera fila del estado de cada fila y posición dentro de él
+    primera = np.maximum.accumulate(np.where(inicio, indices, 0))
+    posicion = indices - primera
+
+    casos = df['casos_confirmados'].to_numpy(dtype=np.float64)
+    tasa = df['tasa_incidencia'].to_numpy(dtype=np.float64)
+    for lag in LAGS:
+        df[f'casos_lag_{lag}w'] = _desplazar(casos, lag, posicion)
+    for lag in LAGS:
+        df[f'ti_lag_{lag}w'] = _desplazar(tasa, lag, posicion)
+
+    # Promedio de hasta VENTANA filas previas con sumas acumuladas (rolling(4, min_periods=1).shift(1))
+    acumulado = np.zeros(n + 1)
+    np.cumsum(np.nan_to_num(casos), out=acumulado[1:])
+    desde = np.maximum(primera, indices - VENTANA)
+    cuenta = indices - desde
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['casos_promedio_4w'] = np.where(cuenta > 0, (acumulado[indices] - acumulado[desde]) / cuenta, np.nan)
+
+    df['tendencia_4w'] = df['casos_lag_1w'] - df[f'casos_lag_{VENTANA}w']
+    df['variacion_pct'] = variacion_pct(df['casos_lag_1w'], df['casos_lag_2w'])
+
+    fechas = df['fecha_fin_semana'].to_numpy(dtype='datetime64[D]')
+    df['semana_anio'] = semana_mysql(fechas)
+    df['mes'] = fechas.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    return df
+
+
+def derivados(df):
+    """
+    Promedio, tendencia y variación a partir de columnas casos_lag_*
+    ya presentes (CSV de entrenamiento con lags precalculados), sin
+    sobrescribir las que existan.
+    """
+    lag_cols = [f'casos_lag_{lag}w' for lag in LAGS]
+    if not all(col in df.columns for col in lag_cols):
+        return df
+    if 'casos_promedio_4w' not in df.columns:
+        df['casos_promedio_4w'] = df[lag_cols].mean(axis=1)
+    if 'tendencia_4w' not in df.columns:
+        df['tendencia_4w'] = df['casos_lag_1w'] - df[f'casos_lag_{VENTANA}w']
+    if 'variacion_pct' not in df.columns:
+        df['variacion_pct'] = variacion_pct(df['casos_lag_1w'], df['casos_lag_2w'])
+    return df
+
+
+def fila_desde_historial(id_region, historial, fecha_objetivo=None):
+    """
+    Features de la semana siguiente a `historial` (filas recientes de un
+    estado como (fecha_fin_semana, casos_confirmados, tasa_incidencia), en
+    cualquier orden). Es el respaldo cuando dato_features no tiene la fila.
+    """
+    base = pd.DataFrame(list(historial), columns=['fecha_fin_semana', 'casos_confirmados', 'tasa_incidencia'])
+    if base.empty:
+        return None
+    base['fecha_fin_semana'] = pd.to_datetime(base['fecha_fin_semana'])
+    base['id_region'] = id_region
+    fila = calcular_features(base, pendientes=True).iloc[-1]
+    resultado = {c: (None if pd.isna(fila[c]) else float(fila[c])) for c in COLUMNAS_FEATURES}
+    resultado['fecha_fin_semana'] = fila['fecha_fin_semana'].date()
+    if fecha_objetivo is not None:
+        resultado.update(calendario(fecha_objetivo))
+    return resultado
+
+
+def calendario(fecha):
+    """semana_anio (WEEK() de MySQL) y mes de una fecha."""
+    fecha = np.datetime64(fecha, 'D')
+    return {'semana_anio': int(semana_mysql([fecha])[0]), 'mes': int(fecha.astype('datetime64[M]').astype(np.int64) % 12 + 1)}
+
+
+def matriz(fila, columnas, estado_coded, rellenar=None):
+    """
+    DataFrame de una fila con `columnas` para predict(). Con `rellenar`
+    los features faltantes (NULL/NaN) toman ese valor.
+    """
+    valores = {c: fila.get(c) for c in columnas if c != 'estado_coded'}
+    valores['estado_coded'] = estado_coded
+    X = pd.DataFrame([valores], columns=columnas).astype(np.float64)
+    return X.fillna(rellenar) if rellenar is not None else X
+
+
+def columnas_modelo(modelo, predeterminadas):
+    """Columnas con las que se ajustó el modelo (feature_names_in_), en su orden."""
+    nombres = getattr(modelo, 'feature_names_in_', None)
+    return list(nombres) if nombres is not None else list(predeterminadas)
+
+
+def _a_filas(df):
+    """Tuplas para INSERT: NaN -> NULL y tipos nativos de Python."""
+    columnas = [df['id_region'].astype(np.int64).astype(object).to_numpy(),
+                df['fecha_fin_semana'].dt.date.to_numpy()]
+    for c in COLUMNAS_FEATURES:
+        valores = df[c].to_numpy(dtype=np.float64)
+        objetos = valores.astype(object)
+        objetos[np.isnan(valores)] = None
+        columnas.append(objetos)
+    return list(zip(*columnas))
+
+
+def actualizar_features(conn, desde=None, tabla=TABLA_DATOS):
+    """
+    Recalcula dato_features para las semanas >= `desde` (todas si es
+    None). Se leen además las VENTANA filas previas de cada estado para
+    los lags. Retorna las filas escritas.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(CREAR_TABLA_FEATURES)
+        inicio = None
+        if desde is not None:
+            cursor.execute(INICIO_VENTANA_SQL, (desde,))
+            inicio = cursor.fetchone()[0] or desde
+
+        arreglos = cargar_arreglos(conn, desde=inicio, tabla=tabla)
+        base = pd.DataFrame({
+            'id_region': arreglos['id_region'],
+            'fecha_fin_semana': arreglos['fecha_fin_semana'].astype('datetime64[ns]'),
+            'casos_confirmados': arreglos['casos_confirmados'],
+            'tasa_incidencia': arreglos['tasa_incidencia'],
+        })
+        df = calcular_features(base, pendientes=True)
+        if desde is not None:
+            df = df[df['fecha_fin_semana'] >= pd.Timestamp(desde)]
+            cursor.execute(f"DELETE FROM {TABLA_FEATURES} WHERE fecha_fin_semana >= %s", (desde,))
+            cursor.execute(BORRAR_PENDIENTES_SQL, (desde,))
+        else:
+            cursor.execute(f"DELETE FROM {TABLA_FEATURES}")
+
+        filas = _a_filas(df)
+        for i in range(0, len(filas), TAMANO_LOTE):
+            cursor.executemany(INSERTAR_FEATURES_SQL, filas[i:i + TAMANO_LOTE])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    print(f"🧮 {TABLA_FEATURES}: {len(filas)} filas recalculadas" + (f" desde {desde}" if desde else ""))
+    return len(filas)
+
+
+def actualizar_tras_carga(conn, filas):
+    """actualizar_features() desde la semana más antigua de filas con el formato de INSERT_DATO_SQL."""
+    if not filas:
+        return 0
+    return actualizar_features(conn, desde=min(fila[2] for fila in filas))
+
+
+def cargar_features(conn, desde=None, hasta=None, id_enfermedad=None, tamano_lote=TAMANO_LOTE_LECTURA):
+    """
+    Conjunto de entrenamiento desde dato_features unido con los objetivos
+    (casos, tasa, riesgo) de dato_epidemiologico. Las semanas pendientes
+    quedan fuera por no tener objetivo.
+    """
+    where, parametros = filtros(desde, hasta, id_enfermedad, prefijo='d.')
+    desde_sql = (f"FROM {TABLA_FEATURES} f\nJOIN {TABLA_DATOS} d "
+                 "ON d.id_region = f.id_region AND d.fecha_fin_semana = f.fecha_fin_semana\n")
+    capacidad = contar(conn, f"SELECT COUNT(*) {desde_sql}{where}", parametros)
+    sql = SELECT_ENTRENAMIENTO + where + "ORDER BY f.id_region, f.fecha_fin_semana"
+    arreglos = leer_arreglos(conn, sql, parametros, COLUMNAS_ENTRENAMIENTO, capacidad, tamano_lote)
+    df = pd.DataFrame(arreglos)
+    df['fecha_fin_semana'] = df['fecha_fin_semana'].astype('datetime64[ns]')
+    return df
@@ -0,0 +1,78 @@
+# ----------------------------------------------------------------------
+# GUNICORN.CONF.PY: Perfil de producción con workers precargados
+# ----------------------------------------------------------------------
+# app.run(threaded=True) atiende todo en un proceso: armar features con
+# pandas, predecir con sklearn y serializar JSON compiten por el GIL.
+# Este perfil carga la app (modelos, encoders y catálogos) una sola vez
+# en el proceso maestro y luego crea N workers con fork: la memoria de
+# los modelos queda compartida copy-on-write entre todos.
+#
+#     cd backend
+#     gunicorn -c gunicorn.conf.py app:app
+#
+# - Los pools de MySQL se crean en cada worker después del fork
+#   (post_fork); el maestro no abre conexiones.
+# - kill -HUP <pid del maestro> recarga de forma ordenada: el maestro
+#   vuelve a cargar los modelos de backend/ y reemplaza los workers sin
+#   cortar peticiones. Activar un modelo desde la API lo hace solo (ver
+#   app.recargar_workers); después de scripts/actualizar_modelo.py o
+#   scripts/compactar_modelo.py hay que enviar el HUP.
+# - Los trabajos en segundo plano (cargas y entrenamientos asíncronos)
+#   corren en el worker que los recibió, pero su estado se escribe en
+#   UPLOAD_DIR/.trabajos y MODELOS_DIR/.trabajos (registro_trabajos.py):
+#   cualquier worker responde /api/datos/jobs y /api/modelos/jobs y puede
+#   cancelar una carga. Si el worker dueño se recicla con un HUP, su
+#   trabajo queda como 'interrumpido'.
+#
+# En Windows (sin fork) se sigue usando python app.py.
+# ----------------------------------------------------------------------
+
+import gc
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Un hilo de BLAS/OpenMP por worker: con N workers, que cada predicción
+# use todos los núcleos solo genera contención (se fija antes de importar
+# numpy y sklearn en el maestro)
+for variable in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ.setdefault(variable, '1')
+
+# Lo heredan los workers: app.recargar_workers() le envía el HUP
+os.environ['SERVIDOR_PID_MAESTRO'] = str(os.getpid())
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+bind = f"{os.getenv('FLASK_HOST', '0.0.0.0')}:{os.getenv('FLASK_PORT', 5001)}"
+workers = int(os.getenv('SERVIDOR_WORKERS', multiprocessing.cpu_count()))
+# Hilos por worker (gthread): cubren la espera de MySQL sin otro proceso
+threads = int(os.getenv('SERVIDOR_HILOS', 2))
+preload_app = True
+# El entrenamiento síncrono (POST /api/modelos/entrenar) puede tardar minutos
+timeout = int(os.getenv('SERVIDOR_TIMEOUT', 300))
+graceful_timeout = int(os.getenv('SERVIDOR_GRACEFUL_TIMEOUT', 30))
+accesslog = os.getenv('SERVIDOR_ACCESSLOG') or None
+
+
+def pre_fork(server, worker):
+    # Lo cargado hasta aquí pasa a la generación permanente del GC: sus
+    # recolecciones en los workers no escriben en esas páginas y siguen
+    # compartidas
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import app
+
+    app.crear_pool_conexiones()
+    app.crear_tabla_alertas()
+    app.CATALOGOS.obtener()
+
+
+def on_reload(server):
+    # Se ejecuta en el maestro antes de crear los workers nuevos
+    import app
+
+    app.cargar_modelos()
@@ -0,0 +1,215 @@
+# ----------------------------------------------------------------------
+# INTERCAMBIO_ARROW.PY: Exportación e ingesta de dato_epidemiologico en
+# formato Apache Arrow (IPC stream) y Parquet
+# ----------------------------------------------------------------------
+# La exportación lee con un cursor sin buffer (fetchmany) y escribe cada
+# bloque como RecordBatch directamente a la respuesta HTTP: no se arma un
+# DataFrame ni se codifica JSON. La ingesta recibe series semanales ya
+# agregadas y las pasa a insertar_semanal() sin parsear texto.
+# pyarrow es opcional: sin él, disponible() es False y la API responde 501.
+# ----------------------------------------------------------------------
+
+import io
+from datetime import date
+
+import numpy as np
+
+from catalogo_estados import POBLACION_ARRAY
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+FORMATOS = {
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrow'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+# Filas por RecordBatch (y por row group en Parquet)
+TAMANO_LOTE_EXPORT = 50000
+
+COLUMNAS_EXPORT = [
+    'id_enfermedad', 'id_region', 'fecha_fin_semana', 'casos_confirmados',
+    'defunciones', 'tasa_incidencia', 'riesgo_brote_target', 'fecha_carga'
+]
+
+COLUMNAS_INGESTA_REQUERIDAS = ['id_region', 'fecha_fin_semana', 'casos_confirmados']
+
+# tasa_incidencia es DECIMAL(10,4) en MySQL; se exporta como double
+SELECT_EXPORT = """
+SELECT id_enfermedad, id_region, fecha_fin_semana, casos_confirmados,
+       COALESCE(defunciones, 0), CAST(tasa_incidencia AS DOUBLE),
+       riesgo_brote_target, fecha_carga
+FROM dato_epidemiologico
+"""
+
+if pa is not None:
+    ESQUEMA_EXPORT = pa.schema([
+        ('id_enfermedad', pa.int32()),
+        ('id_region', pa.int8()),
+        ('fecha_fin_semana', pa.date32()),
+        ('casos_confirmados', pa.int32()),
+        ('defunciones', pa.int32()),
+        ('tasa_incidencia', pa.float64()),
+        ('riesgo_brote_target', pa.int8()),
+        ('fecha_carga', pa.date32()),
+    ])
+else:
+    ESQUEMA_EXPORT = None
+
+
+def disponible():
+    """True si pyarrow está instalado."""
+    return pa is not None
+
+
+def consulta_export(id_region=None, id_enfermedad=None, desde=None, hasta=None):
+    """SQL y parámetros de la exportación; los filtros de fecha son por rango (usan índice y particiones)."""
+    condiciones = []
+    parametros = []
+    if id_region is not None:
+        condiciones.append("id_region = %s")
+        parametros.append(id_region)
+    if id_enfermedad is not None:
+        condiciones.append("id_enfermedad = %s")
+        parametros.append(id_enfermedad)
+    if desde is not None:
+        condiciones.append("fecha_fin_semana >= %s")
+        parametros.append(desde)
+    if hasta is not None:
+        condiciones.append("fecha_fin_semana <= %s")
+        parametros.append(hasta)
+    sql = SELECT_EXPORT
+    if condiciones:
+        sql += "WHERE " + " AND ".join(condiciones) + "\n"
+    sql += "ORDER BY fecha_fin_semana, id_region"
+    return sql, tuple(parametros)
+
+
+class _Salida(io.RawIOBase):
+    """Archivo de solo escritura cuyo contenido se va vaciando hacia la respuesta."""
+
+    def __init__(self):
+        self._partes = []
+        self._posicion = 0
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        datos = bytes(datos)
+        self._partes.append(datos)
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self._posicion
+
+    def vaciar(self):
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+def _lote_a_record_batch(filas):
+    columnas = list(zip(*filas))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(valores, type=campo.type) for valores, campo in zip(columnas, ESQUEMA_EXPORT)],
+        schema=ESQUEMA_EXPORT
+    )
+
+
+def generar_export(cursor, formato, tamano_lote=TAMANO_LOTE_EXPORT):
+    """
+    Generador de bytes Arrow/Parquet a partir de un cursor sin buffer ya
+    ejecutado con consulta_export(). Cada fetchmany() se convierte en un
+    RecordBatch y se envía en cuanto se escribe.
+    """
+    salida = _Salida()
+    if formato == 'parquet':
+        escritor = pq.ParquetWriter(salida, ESQUEMA_EXPORT, compression='snappy')
+        escribir = escritor.write_batch
+    else:
+        escritor = ipc.new_stream(salida, ESQUEMA_EXPORT)
+        escribir = escritor.write_batch
+
+    try:
+        while True:
+            filas = cursor.fetchmany(tamano_lote)
+            if not filas:
+                break
+            escribir(_lote_a_record_batch(filas))
+            datos = salida.vaciar()
+            if datos:
+                yield datos
+    finally:
+        escritor.close()
+    yield salida.vaciar()
+
+
+def leer_tabla(datos, formato=None):
+    """
+    Lee una tabla Arrow de bytes Parquet o Arrow (IPC stream o file).
+    Sin formato se detecta por los bytes mágicos.
+    """
+    if formato is None:
+        formato = 'parquet' if datos[:4] == b'PAR1' else 'arrow'
+    if formato == 'parquet':
+        return pq.read_table(pa.BufferReader(datos))
+    if datos[:6] == b'ARROW1':
+        return ipc.open_file(pa.BufferReader(datos)).read_all()
+    return ipc.open_stream(pa.BufferReader(datos)).read_all()
+
+
+def filas_desde_tabla(tabla, fecha_carga=None):
+    """
+    Convierte una tabla Arrow de series semanales en tuplas para
+    INSERT_DATO_SQL. Columnas opcionales: id_enfermedad (1), defunciones
+    (0), tasa_incidencia (casos / población CONAPO * 100,000) y
+    riesgo_brote_target (tasa > percentil 75 del archivo).
+    """
+    faltantes = [c for c in COLUMNAS_INGESTA_REQUERIDAS if c not in tabla.column_names]
+    if faltantes:
+        raise ValueError(f'Columnas faltantes: {", ".join(faltantes)}')
+
+    n = tabla.num_rows
+
+    def columna(nombre, tipo, defecto=None):
+        if nombre not in tabla.column_names:
+            return None if defecto is None else np.full(n, defecto)
+        valores = tabla.column(nombre).cast(tipo)
+        if valores.null_count:
+            if defecto is None:
+                raise ValueError(f'La columna {nombre} tiene valores nulos')
+            valores = valores.fill_null(defecto)
+        return valores.to_numpy(zero_copy_only=False)
+
+    id_region = columna('id_region', pa.int64())
+    if n and (id_region.min() < 1 or id_region.max() > 32):
+        raise ValueError('id_region debe estar entre 1 y 32')
+    casos = columna('casos_confirmados', pa.int64())
+    tasa = columna('tasa_incidencia', pa.float64())
+    if tasa is None:
+        tasa = casos / POBLACION_ARRAY[id_region] * 100000
+    riesgo = columna('riesgo_brote_target', pa.int64())
+    if riesgo is None:
+        riesgo = (tasa > np.quantile(tasa, 0.75)).astype(np.int64) if n else np.zeros(0, dtype=np.int64)
+
+    fechas = tabla.column('fecha_fin_semana').cast(pa.date32())
+    if fechas.null_count:
+        raise ValueError('La columna fecha_fin_semana tiene valores nulos')
+
+    fecha_carga = fecha_carga or date.today()
+    return list(zip(
+        columna('id_enfermedad', pa.int64(), 1).tolist(),
+        id_region.tolist(),
+        fechas.to_pylist(),
+        casos.tolist(),
+        columna('defunciones', pa.int64(), 0).tolist(),
+        np.round(tasa, 4).tolist(),
+        riesgo.tolist(),
+        [fecha_carga] * n
+    ))
@@ -0,0 +1,101 @@
+# ----------------------------------------------------------------------
+# LECTURA_FILAS.PY: Decodificación de filas de MySQL sin cursores
+# dictionary
+# ----------------------------------------------------------------------
+# Con cursor(dictionary=True), mysql.connector vuelve a calcular los
+# nombres de las columnas (cursor.column_names) en cada fila para armar
+# su dict, y cada valor pasa por el conversor de su tipo en Python:
+#
+# - cursor_filas(conn): cursor con buffer de tuplas que arma los dicts
+#   con los nombres de las columnas calculados una vez por consulta. Es
+#   el que usan los endpoints; entrega lo mismo que dictionary=True.
+# - decodificar(valores, tipo): una columna leída con un cursor raw (el
+#   texto tal como llega de MySQL) a un arreglo NumPy, sin crear un int,
+#   float o date de Python por valor (los date son lo más caro de pasar a
+#   NumPy, aun con la extensión en C). Lo usa leer_arreglos() de
+#   datos_entrenamiento.py para el entrenamiento y dato_features.
+# - CONECTOR: 'C' si mysql.connector carga su extensión en C (la rueda de
+#   pip la incluye) y 'Python' si no; sin ella todo se decodifica en
+#   Python puro, varias veces más lento. app.py lo avisa al crear el pool
+#   y /api/health lo reporta.
+#
+# scripts/benchmark_decodificacion.py mide el costo por fila de cada
+# forma con los reportes y la lectura de entrenamiento.
+# ----------------------------------------------------------------------
+
+import mysql.connector
+import numpy as np
+
+CONECTOR = 'C' if mysql.connector.HAVE_CEXT else 'Python'
+
+
+class CursorFilas:
+    """
+    Cursor de tuplas con buffer que entrega cada fila como dict, igual que
+    cursor(dictionary=True). Lo demás (rowcount, lastrowid...) se delega en
+    el cursor original.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._nombres = ()
+
+    def execute(self, sql, params=None):
+        self._cursor.execute(sql, params)
+        self._nombres = self._cursor.column_names
+
+    def fetchone(self):
+        fila = self._cursor.fetchone()
+        return dict(zip(self._nombres, fila)) if fila is not None else None
+
+    def fetchall(self):
+        nombres = self._nombres
+        return [dict(zip(nombres, fila)) for fila in self._cursor.fetchall()]
+
+    def close(self):
+        self._cursor.close()
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+
+def cursor_filas(conn):
+    """Cursor de filas como dict de `conn` (del pool, directa o la copia en DuckDB)."""
+    return CursorFilas(conn.cursor(buffered=True))
+
+
+def decodificar(valores, tipo):
+    """
+    Valores crudos de una columna (bytes o bytearray; None para NULL) a un
+    arreglo de `tipo`: se unen en un solo buffer y NumPy lo interpreta de
+    una vez. Las fechas son DATE ('AAAA-MM-DD', ancho fijo). Los NULL
+    quedan como NaN, así que solo pueden venir en columnas float. Los
+    enteros se leen en 64 bits y se revisa que quepan en `tipo` antes de
+    reducirlos. Cualquier otro valor inválido es ValueError.
+    """
+    tipo = np.dtype(tipo)
+    if None in valores:
+        if tipo.kind != 'f':
+            raise ValueError(f'NULL en una columna {tipo}')
+        valores = [b'nan' if v is None else v for v in valores]
+    if tipo.kind == 'M':
+        crudo = b''.join(valores)
+        if len(crudo) != 10 * len(valores):
+            raise ValueError(f'Valores que no son DATE en una columna {tipo}')
+        return np.frombuffer(crudo, dtype='S10').astype(tipo)
+
+    lectura = tipo
+    if tipo.kind in 'iu':
+        lectura = np.dtype(np.int64 if tipo.kind == 'i' else np.uint64)
+    try:
+        arreglo = np.fromstring(b' '.join(valores), dtype=lectura, sep=' ')
+    except ValueError:
+        arreglo = None
+    if arreglo is None or len(arreglo) != len(valores):
+        raise ValueError(f'Valores no numéricos en una columna {tipo}')
+    if lectura != tipo:
+        rango = np.iinfo(tipo)
+        if len(arreglo) and (arreglo.min() < rango.min or arreglo.max() > rango.max):
+            raise ValueError(f'Valores fuera del rango de una columna {tipo}')
+        arreglo = arreglo.astype(tipo)
+    return arreglo
@@ -0,0 +1,269 @@
+# ----------------------------------------------------------------------
+# MANTENIMIENTO_DB.PY: Recargas completas con tabla de staging e
+# intercambio atómico (RENAME TABLE) de dato_epidemiologico
+# ----------------------------------------------------------------------
+# En lugar de DELETE masivo + upsert sobre la tabla en uso, los datos se
+# cargan en dato_epidemiologico_staging, se construyen sus índices, se
+# validan los conteos y ambas tablas se intercambian en un solo RENAME
+# TABLE. Las consultas ven la tabla anterior completa o la nueva completa,
+# nunca una carga a medias, y vaciar la tabla es O(1).
+# También administra las particiones por año de la tabla (ver
+# database_schema_completo.sql): borrar un año con TRUNCATE PARTITION y
+# agregar la partición de los años siguientes.
+# ----------------------------------------------------------------------
+
+from datetime import date
+
+from procesamiento_csv import TABLA_DATOS, insertar_semanal
+
+TABLA_STAGING = f'{TABLA_DATOS}_staging'
+TABLA_ANTERIOR = f'{TABLA_DATOS}_anterior'
+PARTICION_FUTURO = 'p_futuro'
+
+
+class ValidacionStagingError(Exception):
+    """Los conteos de la tabla de staging no coinciden con lo esperado."""
+
+
+def _contar(cursor, tabla):
+    cursor.execute(f"SELECT COUNT(*) FROM {tabla}")
+    return cursor.fetchone()[0]
+
+
+def _indices_secundarios(cursor, tabla):
+    """Índices no únicos de la tabla: {nombre: [columnas en orden]}."""
+    cursor.execute("""
+        SELECT INDEX_NAME, COLUMN_NAME
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND NON_UNIQUE = 1
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+    """, (tabla,))
+    indices = {}
+    for nombre, columna in cursor.fetchall():
+        indices.setdefault(nombre, []).append(columna)
+    return indices
+
+
+def _llaves_foraneas(cursor, tabla):
+    """Definiciones de FOREIGN KEY de la tabla para recrearlas tras el intercambio."""
+    cursor.execute("""
+        SELECT CONSTRAINT_NAME, COLUMN_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME
+        FROM information_schema.KEY_COLUMN_USAGE
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+          AND REFERENCED_TABLE_NAME IS NOT NULL
+        ORDER BY CONSTRAINT_NAME, ORDINAL_POSITION
+    """, (tabla,))
+    return cursor.fetchall()
+
+
+def crear_staging(conn):
+    """
+    Crea una tabla de staging vacía con la misma estructura que la tabla
+    en uso, sin sus índices secundarios (se construyen al final de la
+    carga, que es más rápido que mantenerlos fila por fila).
+    Retorna los índices pendientes de construir.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLA_STAGING}")
+        cursor.execute(f"CREATE TABLE {TABLA_STAGING} LIKE {TABLA_DATOS}")
+        indices = _indices_secundarios(cursor, TABLA_STAGING)
+        if indices:
+            cursor.execute(f"ALTER TABLE {TABLA_STAGING} " +
+                           ", ".join(f"DROP INDEX `{nombre}`" for nombre in indices))
+        conn.commit()
+        return indices
+    finally:
+        cursor.close()
+
+
+def construir_indices(conn, indices):
+    """Crea en un solo ALTER los índices secundarios de la tabla de staging."""
+    if not indices:
+        return
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"ALTER TABLE {TABLA_STAGING} " + ", ".join(
+            f"ADD INDEX `{nombre}` ({', '.join(f'`{c}`' for c in columnas)})"
+            for nombre, columnas in indices.items()
+        ))
+    finally:
+        cursor.close()
+
+
+def intercambiar(conn):
+    """
+    Intercambia staging y tabla en uso en un solo RENAME TABLE y elimina
+    la tabla anterior. CREATE TABLE ... LIKE no copia las llaves foráneas,
+    así que se recrean sobre la nueva tabla (con foreign_key_checks=0 el
+    ALTER es solo de metadatos: las filas ya se validaron al cargarlas).
+    Retorna el número de registros que tenía la tabla reemplazada.
+    """
+    cursor = conn.cursor()
+    try:
+        llaves = _llaves_foraneas(cursor, TABLA_DATOS)
+        registros_anteriores = _contar(cursor, TABLA_DATOS)
+
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLA_ANTERIOR}")
+        cursor.execute(f"RENAME TABLE {TABLA_DATOS} TO {TABLA_ANTERIOR}, "
+                       f"{TABLA_STAGING} TO {TABLA_DATOS}")
+        cursor.execute(f"DROP TABLE {TABLA_ANTERIOR}")
+
+        if llaves:
+            restricciones = {}
+            for nombre, columna, tabla_ref, columna_ref in llaves:
+                restricciones.setdefault(nombre, ([], tabla_ref, []))
+                restricciones[nombre][0].append(f'`{columna}`')
+                restricciones[nombre][2].append(f'`{columna_ref}`')
+            cursor.execute("SET foreign_key_checks = 0")
+            try:
+                cursor.execute(f"ALTER TABLE {TABLA_DATOS} " + ", ".join(
+                    f"ADD CONSTRAINT `{nombre}` FOREIGN KEY ({', '.join(cols)}) "
+                    f"REFERENCES `{tabla_ref}` ({', '.join(cols_ref)})"
+                    for nombre, (cols, tabla_ref, cols_ref) in restricciones.items()
+                ))
+            finally:
+                cursor.execute("SET foreign_key_checks = 1")
+        return registros_anteriores
+    finally:
+        cursor.close()
+
+
+def recarga_completa(conn, filas, proporcion_minima=None, al_avanzar=None):
+    """
+    Reemplaza todo el contenido de dato_epidemiologico por `filas`
+    (tuplas en el orden de INSERT_DATO_SQL):
+      1. carga en staging sin índices secundarios,
+      2. construye los índices,
+      3. valida que staging tenga una fila por (id_region, fecha_fin_semana)
+         distinta y, si se indica proporcion_minima, que no tenga menos de
+         esa fracción de los registros actuales,
+      4. intercambia las tablas.
+    Si la validación falla, la tabla en uso no se modifica.
+    """
+    indices = crear_staging(conn)
+    insertadas = insertar_semanal(conn, filas, al_avanzar=al_avanzar, tabla=TABLA_STAGING)
+    construir_indices(conn, indices)
+
+    cursor = conn.cursor()
+    try:
+        esperados = len({(fila[1], fila[2]) for fila in filas})
+        en_staging = _contar(cursor, TABLA_STAGING)
+        if en_staging != esperados:
+            raise ValidacionStagingError(
+                f'Staging tiene {en_staging} registros y se esperaban {esperados}')
+        if proporcion_minima is not None:
+            actuales = _contar(cursor, TABLA_DATOS)
+            if en_staging < actuales * proporcion_minima:
+                raise ValidacionStagingError(
+                    f'Staging tiene {en_staging} registros, menos del '
+                    f'{proporcion_minima:.0%} de los {actuales} actuales')
+    finally:
+        cursor.close()
+
+    registros_anteriores = intercambiar(conn)
+    return {
+        'registros_insertados': insertadas,
+        'registros_cargados': en_staging,
+        'registros_reemplazados': registros_anteriores
+    }
+
+
+def vaciar_por_intercambio(conn):
+    """Vacía dato_epidemiologico intercambiándola por una tabla vacía (O(1))."""
+    indices = crear_staging(conn)
+    construir_indices(conn, indices)
+    return intercambiar(conn)
+
+
+# --- Particiones por año ---
+
+def particiones(conn):
+    """
+    Particiones de dato_epidemiologico: {nombre: año límite} donde el año
+    límite es el VALUES LESS THAN (None para MAXVALUE). Vacío si la tabla
+    no está particionada.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT PARTITION_NAME, PARTITION_DESCRIPTION
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+              AND PARTITION_NAME IS NOT NULL
+            ORDER BY PARTITION_ORDINAL_POSITION
+        """, (TABLA_DATOS,))
+        return {
+            nombre: None if descripcion == 'MAXVALUE' else int(descripcion)
+            for nombre, descripcion in cursor.fetchall()
+        }
+    finally:
+        cursor.close()
+
+
+def particion_de_anio(conn, anio):
+    """Nombre de la partición que contiene exactamente el año, o None."""
+    nombre = f'p{anio}'
+    limites = particiones(conn)
+    anteriores = [limite for limite in limites.values() if limite is not None and limite <= anio]
+    # La partición debe cubrir solo ese año: límite anio+1 y la anterior en anio
+    # (la primera partición también guarda los años previos)
+    if limites.get(nombre) == anio + 1 and anteriores and max(anteriores) == anio:
+        return nombre
+    return None
+
+
+def limpiar_anio(conn, anio):
+    """
+    Elimina los datos de un año. Con tabla particionada es un TRUNCATE
+    PARTITION (O(1)); si no, un DELETE por rango de fechas que usa el
+    índice de fecha_fin_semana. Retorna (registros_eliminados, metodo).
+    """
+    desde, hasta = date(anio, 1, 1), date(anio + 1, 1, 1)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM {TABLA_DATOS} "
+                       "WHERE fecha_fin_semana >= %s AND fecha_fin_semana < %s", (desde, hasta))
+        registros = cursor.fetchone()[0]
+
+        nombre = particion_de_anio(conn, anio)
+        if nombre:
+            cursor.execute(f"ALTER TABLE {TABLA_DATOS} TRUNCATE PARTITION {nombre}")
+            metodo = 'truncate_partition'
+        else:
+            cursor.execute(f"DELETE FROM {TABLA_DATOS} "
+                           "WHERE fecha_fin_semana >= %s AND fecha_fin_semana < %s", (desde, hasta))
+            metodo = 'delete'
+        conn.commit()
+        return registros, metodo
+    finally:
+        cursor.close()
+
+
+def asegurar_particiones(conn, hasta_anio=None):
+    """
+    Agrega las particiones anuales que falten hasta `hasta_anio` (por
+    defecto el año siguiente al actual) dividiendo p_futuro con
+    REORGANIZE PARTITION. Las filas que ya estuvieran en p_futuro se
+    reparten en las nuevas particiones. Retorna los nombres agregados.
+    """
+    hasta_anio = hasta_anio or date.today().year + 1
+    limites = particiones(conn)
+    if PARTICION_FUTURO not in limites:
+        return []
+
+    ultimo = max((limite for limite in limites.values() if limite is not None), default=None)
+    if ultimo is None or ultimo > hasta_anio:
+        return []
+
+    nuevas = [f'p{anio}' for anio in range(ultimo, hasta_anio + 1)]
+    definiciones = [f"PARTITION p{anio} VALUES LESS THAN ({anio + 1})" for anio in range(ultimo, hasta_anio + 1)]
+    definiciones.append(f"PARTITION {PARTICION_FUTURO} VALUES LESS THAN MAXVALUE")
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"ALTER TABLE {TABLA_DATOS} REORGANIZE PARTITION {PARTICION_FUTURO} "
+                       f"INTO ({', '.join(definiciones)})")
+        return nuevas
+    finally:
+        cursor.close()
@@ -0,0 +1,320 @@
+# ----------------------------------------------------------------------
+# POOL_CONEXIONES.PY: Pool de conexiones MySQL con espera, desborde y
+# métricas
+# ----------------------------------------------------------------------
+# pooling.MySQLConnectionPool lanza PoolError en cuanto se ocupan sus
+# pool_size conexiones, y entrega conexiones que el servidor ya cerró
+# (wait_timeout, reinicio de MySQL) para que fallen en la primera
+# consulta. PoolConexiones:
+#
+# - Espera hasta `espera` segundos a que se libere una conexión y, si
+#   todas están ocupadas, abre hasta `desborde` conexiones extra que se
+#   cierran al devolverse.
+# - Al prestar una conexión la valida con ping y reemplaza las muertas o
+#   las que tienen más de `reciclar` segundos abiertas.
+# - La conexión prestada cierra los cursores que abrió al devolverse
+#   (conn.close()), aunque el endpoint no llegue a cerrarlos.
+# - Lleva métricas (metricas()): conexiones en uso, esperas, tiempo de
+#   espera, agotamientos, reconexiones y errores al conectar. Se
+#   reportan en /api/health.
+#
+# EnrutadorLecturas reparte las lecturas entre una réplica y el primario:
+# usa la réplica mientras su retraso (SHOW REPLICA STATUS) no pase de un
+# máximo, revisándolo cada pocos segundos, y si no, el primario.
+# ----------------------------------------------------------------------
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector.errors import PoolError
+
+ESPERA_POR_DEFECTO = 10
+RECICLAR_POR_DEFECTO = 3600
+# Segundos de retraso de la réplica tolerados y cada cuánto se revisan
+RETRASO_MAX_POR_DEFECTO = 30
+INTERVALO_RETRASO = 5
+
+
+class PoolAgotado(PoolError):
+    """No se liberó ninguna conexión dentro del tiempo de espera."""
+
+
+def retraso_replica(conexion):
+    """
+    Segundos que la réplica va detrás del primario; None si la replicación
+    está detenida. Un servidor sin replicación configurada cuenta como al
+    día (0): así se puede probar con otra instancia o con el mismo servidor
+    como réplica.
+    """
+    cursor = conexion.cursor(dictionary=True)
+    try:
+        try:
+            cursor.execute('SHOW REPLICA STATUS')
+        except mysql.connector.Error:
+            # MySQL < 8.0.22 y MariaDB
+            cursor.execute('SHOW SLAVE STATUS')
+        fila = cursor.fetchone()
+    finally:
+        cursor.close()
+    if not fila:
+        return 0
+    return fila.get('Seconds_Behind_Source', fila.get('Seconds_Behind_Master'))
+
+
+class ConexionPrestada:
+    """
+    Conexión del pool: delega todo en la conexión de mysql.connector y
+    close() la devuelve al pool (cerrando antes sus cursores).
+    """
+
+    def __init__(self, pool, cnx, abierta):
+        self._pool = pool
+        self._cnx = cnx
+        self._abierta = abierta
+        self._cursores = []
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._cnx.cursor(*args, **kwargs)
+        self._cursores.append(cursor)
+        return cursor
+
+    def close(self):
+        if self._cnx is None:
+            return
+        cnx, self._cnx = self._cnx, None
+        for cursor in self._cursores:
+            try:
+                cursor.close()
+            except mysql.connector.Error:
+                pass
+        self._cursores = []
+        self._pool._devolver(cnx, self._abierta)
+
+    def __getattr__(self, nombre):
+        if self._cnx is None:
+            raise mysql.connector.InterfaceError(msg='La conexión ya se devolvió al pool')
+        return getattr(self._cnx, nombre)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PoolConexiones:
+    """
+    Pool de `tamano` conexiones (más `desborde` temporales) a MySQL con los
+    argumentos `config` de mysql.connector.connect().
+    """
+
+    def __init__(self, config, tamano=5, desborde=0, espera=ESPERA_POR_DEFECTO,
+                 reciclar=RECICLAR_POR_DEFECTO, nombre='pool'):
+        self.config = config
+        self.tamano = tamano
+        self.desborde = desborde
+        self.espera = espera
+        self.reciclar = reciclar
+        self.nombre = nombre
+        # (conexión, momento en que se abrió); la última devuelta sale primero
+        self._libres = deque()
+        self._abiertas = 0
+        self._en_uso = 0
+        self._condicion = threading.Condition()
+        self._metricas = {
+            'prestamos': 0, 'esperas': 0, 'espera_total_s': 0.0, 'espera_max_s': 0.0,
+            'agotado': 0, 'reconexiones': 0, 'reciclajes': 0, 'desbordes': 0, 'max_en_uso': 0,
+            'errores_conexion': 0,
+        }
+
+    def _conectar(self):
+        return mysql.connector.connect(**self.config), time.monotonic()
+
+    def _validar(self, cnx, abierta):
+        """La conexión tal cual si sigue viva y no hay que reciclarla; si no, una nueva."""
+        if self.reciclar and time.monotonic() - abierta > self.reciclar:
+            motivo = 'reciclajes'
+        else:
+            try:
+                cnx.ping(reconnect=False)
+                return cnx, abierta
+            except mysql.connector.Error:
+                motivo = 'reconexiones'
+        with self._condicion:
+            self._metricas[motivo] += 1
+        self._cerrar(cnx)
+        return self._conectar()
+
+    @staticmethod
+    def _cerrar(cnx):
+        try:
+            cnx.close()
+        except mysql.connector.Error:
+            pass
+
+    def obtener(self, espera=None):
+        """
+        Presta una conexión validada. Si no hay libres ni lugar para abrir
+        otra, espera hasta `espera` segundos (por defecto los del pool) y
+        lanza PoolAgotado.
+        """
+        espera = self.espera if espera is None else espera
+        inicio = time.monotonic()
+        with self._condicion:
+            while not self._libres and self._abiertas >= self.tamano + self.desborde:
+                restante = espera - (time.monotonic() - inicio)
+                if restante <= 0 or not self._condicion.wait(restante):
+                    if not self._libres and self._abiertas >= self.tamano + self.desborde:
+                        self._metricas['agotado'] += 1
+                        raise PoolAgotado(
+                            f'Pool {self.nombre}: {self._en_uso} conexiones en uso, sin lugar tras {espera}s')
+            esperado = time.monotonic() - inicio
+            if esperado > 0.001:
+                self._metricas['esperas'] += 1
+                self._metricas['espera_total_s'] += esperado
+                self._metricas['espera_max_s'] = max(self._metricas['espera_max_s'], esperado)
+            libre = self._libres.pop() if self._libres else None
+            if libre is None:
+                self._abiertas += 1
+                if self._abiertas > self.tamano:
+                    self._metricas['desbordes'] += 1
+            self._en_uso += 1
+            self._metricas['prestamos'] += 1
+            self._metricas['max_en_uso'] = max(self._metricas['max_en_uso'], self._en_uso)
+
+        # Conectar y hacer ping fuera del candado
+        try:
+            cnx, abierta = self._validar(*libre) if libre else self._conectar()
+        except BaseException:
+            with self._condicion:
+                self._abiertas -= 1
+                self._en_uso -= 1
+                self._metricas['prestamos'] -= 1
+                self._metricas['errores_conexion'] += 1
+                self._condicion.notify()
+            raise
+        return ConexionPrestada(self, cnx, abierta)
+
+    def _devolver(self, cnx, abierta):
+        # Deshacer lo que quedó pendiente y limpiar variables de sesión,
+        # como hace pooling.MySQLConnectionPool
+        try:
+            if cnx.unread_result:
+                cnx.consume_results()
+            cnx.reset_session()
+            sana = True
+        except mysql.connector.Error:
+            sana = False
+        with self._condicion:
+            self._en_uso -= 1
+            # Las de desborde se cierran: solo quedan abiertas `tamano`
+            if sana and self._abiertas <= self.tamano:
+                self._libres.append((cnx, abierta))
+                cnx = None
+            else:
+                self._abiertas -= 1
+            self._condicion.notify()
+        if cnx is not None:
+            self._cerrar(cnx)
+
+    @contextmanager
+    def cursor(self, **opciones):
+        """
+        with pool.cursor(dictionary=True) as (conn, cursor): el cursor y la
+        conexión se cierran y devuelven al salir, haya error o no.
+        """
+        conexion = self.obtener()
+        try:
+            yield conexion, conexion.cursor(**opciones)
+        finally:
+            conexion.close()
+
+    def metricas(self):
+        with self._condicion:
+            metricas = dict(self._metricas)
+            metricas.update({
+                'tamano': self.tamano,
+                'desborde': self.desborde,
+                'abiertas': self._abiertas,
+                'en_uso': self._en_uso,
+                'libres': len(self._libres),
+            })
+        metricas['espera_promedio_ms'] = round(
+            metricas['espera_total_s'] / metricas['esperas'] * 1000, 2) if metricas['esperas'] else 0.0
+        metricas['espera_total_s'] = round(metricas['espera_total_s'], 3)
+        metricas['espera_max_s'] = round(metricas['espera_max_s'], 3)
+        return metricas
+
+
+class EnrutadorLecturas:
+    """
+    Presta conexiones para solo leer: de `replica` mientras su retraso no
+    pase de `retraso_max` segundos (revisado cada `intervalo`), si no (o si
+    no hay réplica o no responde) del `primario`.
+    """
+
+    def __init__(self, primario, replica=None, retraso_max=RETRASO_MAX_POR_DEFECTO,
+                 intervalo=INTERVALO_RETRASO):
+        self.primario = primario
+        self.replica = replica
+        self.retraso_max = retraso_max
+        self.intervalo = intervalo
+        self.retraso = None
+        self._usar_replica = False
+        self._revisado = None
+        self._revisando = threading.Lock()
+        self._metricas = {'lecturas_replica': 0, 'lecturas_primario': 0, 'cambios_a_primario': 0}
+
+    def _revisar(self):
+        try:
+            with self.replica.obtener() as conexion:
+                retraso = retraso_replica(conexion)
+        except mysql.connector.Error as e:
+            print(f"⚠️ No se pudo consultar el retraso de la réplica: {e}")
+            retraso = None
+        usar_replica = retraso is not None and retraso <= self.retraso_max
+        if self._usar_replica and not usar_replica:
+            self._metricas['cambios_a_primario'] += 1
+            detalle = 'retraso desconocido' if retraso is None else f'retraso {retraso}s'
+            print(f"⚠️ Réplica con {detalle} (máximo {self.retraso_max}s), se lee del primario")
+        self.retraso, self._usar_replica = retraso, usar_replica
+
+    def obtener(self):
+        if self.replica is not None:
+            ahora = time.monotonic()
+            # Un solo hilo revisa; los demás usan el último resultado
+            if (self._revisado is None or ahora - self._revisado >= self.intervalo) \
+                    and self._revisando.acquire(blocking=False):
+                try:
+                    self._revisado = ahora
+                    self._revisar()
+                finally:
+                    self._revisando.release()
+            if self._usar_replica:
+                try:
+                    conexion = self.replica.obtener()
+                    self._metricas['lecturas_replica'] += 1
+                    return conexion
+                except mysql.connector.Error as e:
+                    # Hasta la próxima revisión se lee del primario
+                    print(f"⚠️ Réplica no disponible, se lee del primario: {e}")
+                    self._usar_replica = False
+                    self._metricas['cambios_a_primario'] += 1
+        conexion = self.primario.obtener()
+        self._metricas['lecturas_primario'] += 1
+        return conexion
+
+    def metricas(self):
+        metricas = dict(self._metricas)
+        metricas.update({
+            'replica_configurada': self.replica is not None,
+            'usando_replica': self._usar_replica,
+            'retraso_s': self.retraso,
+            'retraso_max_s': self.retraso_max,
+        })
+        if self.replica is not None:
+            metricas['pool'] = self.replica.metricas()
+        return metricas
@@ -0,0 +1,303 @@
+# ----------------------------------------------------------------------
+# PROCESAMIENTO_CSV.PY: Lectura, agregación semanal y carga de CSVs de
+# casos de dengue (formato de datos abiertos: un registro por caso)
+# ----------------------------------------------------------------------
+# Lo usan /api/datos/procesar-csv, /api/datos/cargar-csv y los trabajos
+# de carga en segundo plano (trabajos_carga.py), para que la vista previa,
+# la carga síncrona y la asíncrona produzcan exactamente la misma serie.
+# ----------------------------------------------------------------------
+
+import hashlib
+import io
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from archivos_entrada import abrir_csv
+from catalogo_estados import NOMBRE_ENCODER, POBLACION_POR_ID
+from esquema_datos import ESQUEMA_CASOS, convertir_fechas, leer_csv, opciones_lectura
+
+COLUMNAS_REQUERIDAS = ['FECHA_SIGN_SINTOMAS', 'ENTIDAD_RES', 'ESTATUS_CASO']
+
+# Filas por bloque al leer el CSV y filas por lote al insertar en MySQL
+TAMANO_BLOQUE = 200000
+TAMANO_LOTE = 2000
+
+# Vista previa rápida: bytes leídos en total y número de tramos muestreados
+PRESUPUESTO_MUESTRA = 4 * 1024 * 1024
+TRAMOS_MUESTRA = 32
+
+# Vigencia (segundos) y capacidad del caché de archivos ya procesados
+CACHE_TTL = 900
+CACHE_MAX = 16
+
+TABLA_DATOS = 'dato_epidemiologico'
+
+INSERT_DATO_SQL_TABLA = """
+INSERT INTO {tabla}
+    (id_enfermedad, id_region, fecha_fin_semana, casos_confirmados,
+     defunciones, tasa_incidencia, riesgo_brote_target, fecha_carga)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    casos_confirmados = VALUES(casos_confirmados),
+    tasa_incidencia = VALUES(tasa_incidencia),
+    riesgo_brote_target = VALUES(riesgo_brote_target),
+    fecha_carga = VALUES(fecha_carga)
+"""
+INSERT_DATO_SQL = INSERT_DATO_SQL_TABLA.format(tabla=TABLA_DATOS)
+
+
+class ArchivoInvalido(ValueError):
+    """El archivo no tiene el formato esperado; `detalle` va en la respuesta JSON."""
+
+    def __init__(self, mensaje, **detalle):
+        super().__init__(mensaje)
+        self.detalle = detalle
+
+
+def columnas_faltantes(columnas):
+    """Devuelve las columnas requeridas que no están en el archivo."""
+    return [c for c in COLUMNAS_REQUERIDAS if c not in columnas]
+
+
+def leer_confirmados(fuente, tamano_bloque=TAMANO_BLOQUE, al_avanzar=None, encoding=None,
+                     columnas_extra=()):
+    """
+    Lee el CSV por bloques (solo las columnas requeridas más
+    `columnas_extra`) y conserva los casos confirmados con fecha válida.
+    `fuente` puede ser el flujo descomprimido de archivos_entrada.abrir_csv().
+    al_avanzar(registros_leidos) se llama después de cada bloque.
+    Retorna (df_confirmados, registros_originales).
+    """
+    conservar = ['ENTIDAD_RES', 'FECHA_SIGN_SINTOMAS'] + list(columnas_extra)
+    registros = 0
+    partes = []
+    for bloque in leer_csv(fuente, ESQUEMA_CASOS, usecols=COLUMNAS_REQUERIDAS + list(columnas_extra),
+                           chunksize=tamano_bloque, encoding=encoding):
+        registros += len(bloque)
+        bloque = bloque.dropna(subset=['FECHA_SIGN_SINTOMAS'])
+        confirmado = bloque['ESTATUS_CASO'].eq(1).fillna(False).to_numpy(dtype=bool)
+        partes.append(bloque.loc[confirmado, conservar])
+        if al_avanzar:
+            al_avanzar(registros)
+
+    if not partes:
+        return pd.DataFrame(columns=conservar), registros
+    return pd.concat(partes, ignore_index=True), registros
+
+
+def muestrear_csv(fuente, presupuesto_bytes=PRESUPUESTO_MUESTRA, tramos=TRAMOS_MUESTRA,
+                  bytes_totales=None, encoding=None):
+    """
+    Lee una muestra del CSV sin recorrerlo completo: el encabezado más
+    `tramos` bloques de líneas completas repartidos uniformemente en el
+    archivo (con seek), hasta `presupuesto_bytes` en total. Si el archivo
+    cabe en el presupuesto se lee completo y el resultado es exacto.
+    Para flujos comprimidos (donde seek implica descomprimir) se usa
+    tramos=1, es decir, solo el bloque inicial, y bytes_totales con el
+    tamaño descomprimido conocido o estimado.
+    Retorna un dict con columnas, muestra (DataFrame), filas_estimadas,
+    bytes_totales, bytes_leidos y exacto.
+    """
+    if bytes_totales is None:
+        fuente.seek(0, 2)
+        bytes_totales = fuente.tell()
+    fuente.seek(0)
+    encabezado = fuente.readline()
+    columnas = pd.read_csv(io.BytesIO(encabezado), nrows=0, encoding=encoding).columns
+    inicio = fuente.tell()
+    bytes_datos = bytes_totales - inicio
+
+    if bytes_datos <= presupuesto_bytes:
+        partes = [fuente.read()]
+        exacto = True
+    elif tramos == 1:
+        bloque = fuente.read(presupuesto_bytes)
+        partes = [bloque[:bloque.rfind(b'\n') + 1]]
+        exacto = False
+    else:
+        tamano_tramo = presupuesto_bytes // tramos
+        paso = (bytes_datos - tamano_tramo) / (tramos - 1)
+        partes = []
+        for i in range(tramos):
+            fuente.seek(inicio + int(i * paso))
+            if i > 0:
+                fuente.readline()  # descartar la línea incompleta
+            bloque = fuente.read(tamano_tramo)
+            partes.append(bloque[:bloque.rfind(b'\n') + 1])
+        exacto = False
+    fuente.seek(0)
+
+    datos = b''.join(partes)
+    usecols = COLUMNAS_REQUERIDAS if not columnas_faltantes(columnas) else None
+    muestra = pd.read_csv(io.BytesIO(datos), names=list(columnas), header=None,
+                          usecols=usecols, on_bad_lines='skip', encoding=encoding,
+                          **opciones_lectura(ESQUEMA_CASOS, columnas, nulables=True))
+    convertir_fechas(muestra, ESQUEMA_CASOS)
+
+    # Filas totales estimadas con el tamaño promedio de línea de la muestra
+    if exacto or not len(datos):
+        filas_estimadas = len(muestra)
+    else:
+        filas_estimadas = int(round(bytes_datos * len(muestra) / len(datos)))
+
+    return {
+        'columnas': columnas,
+        'muestra': muestra,
+        'filas_estimadas': filas_estimadas,
+        'bytes_totales': bytes_totales,
+        'bytes_leidos': len(encabezado) + len(datos),
+        'exacto': exacto
+    }
+
+
+def agregar_semanal(df_confirmados):
+    """
+    Agrega casos confirmados a series semanales por estado y calcula
+    tasa de incidencia y target de riesgo (percentil 75).
+    Retorna (df_ts, umbral_riesgo).
+    """
+    df_confirmados = df_confirmados.copy()
+
+    # Agregar población y nombre de estado
+    df_confirmados['POBLACION'] = df_confirmados['ENTIDAD_RES'].map(POBLACION_POR_ID)
+    df_confirmados.dropna(subset=['POBLACION'], inplace=True)
+    df_confirmados['NOMBRE_ESTADO'] = df_confirmados['ENTIDAD_RES'].map(NOMBRE_ENCODER)
+
+    # Agregar a series de tiempo (semanal)
+    df_ts = (
+        df_confirmados.groupby(['ENTIDAD_RES', 'NOMBRE_ESTADO', 'POBLACION'])
+        .resample('W', on='FECHA_SIGN_SINTOMAS')
+        .size()
+        .reset_index(name='casos_confirmados')
+    )
+    df_ts.rename(columns={'FECHA_SIGN_SINTOMAS': 'fecha_fin_semana'}, inplace=True)
+
+    # Calcular tasa de incidencia
+    df_ts['tasa_incidencia'] = (df_ts['casos_confirmados'] / df_ts['POBLACION']) * 100000
+
+    # Calcular target de riesgo (percentil 75)
+    umbral_riesgo = df_ts['tasa_incidencia'].quantile(0.75)
+    df_ts['riesgo_brote_target'] = np.where(df_ts['tasa_incidencia'] > umbral_riesgo, 1, 0).astype(int)
+
+    return df_ts, umbral_riesgo
+
+
+def procesar_archivo(fuente):
+    """
+    Flujo completo de la vista previa y la carga síncrona: abre el archivo
+    (.csv, .gz o .zip, descomprimiendo en memoria por bloques), valida el
+    encabezado, lee los confirmados y agrega la serie semanal.
+    Lanza ArchivoInvalido si faltan columnas o no hay casos confirmados.
+    """
+    with abrir_csv(fuente) as entrada:
+        columnas = pd.read_csv(entrada.flujo, nrows=0, encoding=entrada.codificacion).columns
+        entrada.flujo.seek(0)
+        faltantes = columnas_faltantes(columnas)
+        if faltantes:
+            raise ArchivoInvalido(f'Columnas faltantes: {", ".join(faltantes)}',
+                                  columnas_encontradas=list(columnas))
+
+        df_confirmados, registros_originales = leer_confirmados(
+            entrada.flujo, encoding=entrada.codificacion)
+
+    if len(df_confirmados) == 0:
+        raise ArchivoInvalido('No hay casos confirmados (ESTATUS_CASO=1) en el archivo',
+                              registros_totales=registros_originales)
+
+    df_ts, umbral_riesgo = agregar_semanal(df_confirmados)
+    return {
+        'df_ts': df_ts,
+        'umbral_riesgo': umbral_riesgo,
+        'registros_originales': registros_originales,
+        'casos_confirmados': len(df_confirmados)
+    }
+
+
+def filas_para_insertar(df_ts, fecha_carga=None):
+    """Convierte la serie semanal en tuplas para INSERT_DATO_SQL (sin iterrows)."""
+    fecha_carga = fecha_carga or datetime.now().date()
+    n = len(df_ts)
+    return list(zip(
+        [1] * n,  # id_enfermedad (Dengue)
+        df_ts['ENTIDAD_RES'].astype(int).tolist(),
+        df_ts['fecha_fin_semana'].dt.date.tolist(),
+        df_ts['casos_confirmados'].astype(int).tolist(),
+        [0] * n,  # defunciones
+        np.round(df_ts['tasa_incidencia'].to_numpy(dtype=float), 4).tolist(),
+        df_ts['riesgo_brote_target'].astype(int).tolist(),
+        [fecha_carga] * n
+    ))
+
+
+def insertar_semanal(conn, filas, tamano_lote=TAMANO_LOTE, al_avanzar=None, tabla=TABLA_DATOS):
+    """
+    Inserta/actualiza las filas en dato_epidemiologico (o en `tabla`, p. ej.
+    la tabla de staging) por lotes con executemany, confirmando cada lote
+    (el upsert es idempotente, por lo que una carga interrumpida se puede
+    repetir sin duplicar datos).
+    al_avanzar(filas_insertadas) se llama después de cada lote.
+    """
+    sql = INSERT_DATO_SQL if tabla == TABLA_DATOS else INSERT_DATO_SQL_TABLA.format(tabla=tabla)
+    cursor = conn.cursor()
+    insertadas = 0
+    try:
+        for inicio in range(0, len(filas), tamano_lote):
+            lote = filas[inicio:inicio + tamano_lote]
+            cursor.executemany(sql, lote)
+            conn.commit()
+            insertadas += len(lote)
+            if al_avanzar:
+                al_avanzar(insertadas)
+    finally:
+        cursor.close()
+    return insertadas
+
+
+def hash_contenido(fuente, tamano=1 << 20):
+    """SHA-256 del contenido del archivo; deja el stream al inicio."""
+    h = hashlib.sha256()
+    fuente.seek(0)
+    for bloque in iter(lambda: fuente.read(tamano), b''):
+        h.update(bloque)
+    fuente.seek(0)
+    return h.hexdigest()
+
+
+class CacheProcesados:
+    """
+    Caché en memoria de archivos ya agregados, con vigencia limitada.
+    La vista previa guarda aquí el resultado de agregar_semanal() con el
+    hash del contenido como token; la carga lo reutiliza y pasa directo
+    a la escritura en BD sin volver a leer el CSV.
+    Es por proceso: si el token no está (expiró o lo atendió otro worker)
+    el cliente debe volver a enviar el archivo.
+    """
+
+    def __init__(self, ttl=CACHE_TTL, max_entradas=CACHE_MAX):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._entradas = {}
+        self._lock = threading.Lock()
+
+    def guardar(self, token, procesado):
+        with self._lock:
+            self._purgar()
+            if len(self._entradas) >= self.max_entradas:
+                mas_antiguo = min(self._entradas, key=lambda k: self._entradas[k][0])
+                del self._entradas[mas_antiguo]
+            self._entradas[token] = (time.time(), procesado)
+
+    def obtener(self, token):
+        with self._lock:
+            self._purgar()
+            entrada = self._entradas.get(token)
+            return entrada[1] if entrada else None
+
+    def _purgar(self):
+        limite = time.time() - self.ttl
+        for token in [k for k, (creado, _) in self._entradas.items() if creado < limite]:
+            del self._entradas[token]
@@ -0,0 +1,106 @@
+# ----------------------------------------------------------------------
+# REGISTRO_TRABAJOS.PY: Estado de los trabajos en segundo plano en
+# archivos JSON compartidos por todos los procesos
+# ----------------------------------------------------------------------
+# Las cargas y entrenamientos asíncronos corren en el worker que recibió
+# la petición, pero con gunicorn (varios workers) la consulta de su
+# estado puede llegar a cualquier otro. Cada gestor escribe el a_dict()
+# de sus trabajos en <directorio>/<job_id>.json (UPLOAD_DIR/.trabajos y
+# MODELOS_DIR/.trabajos) y los endpoints leen de ahí lo que no está en su
+# proceso:
+#
+# - guardar() escribe en un temporal y lo reemplaza con os.replace: quien
+#   lee nunca ve un JSON a medias.
+# - Cada registro guarda el pid del worker dueño; un trabajo activo cuyo
+#   proceso ya no existe (worker reciclado por un HUP o caído) se reporta
+#   como 'interrumpido'.
+# - solicitar_cancelacion() deja un archivo <job_id>.cancelar que el
+#   worker dueño revisa, para cancelar desde cualquier worker.
+# ----------------------------------------------------------------------
+
+import json
+import os
+import re
+
+# Los job_id son uuid4().hex: cualquier otra cosa no es un archivo del registro
+ID_VALIDO = re.compile(r'^[0-9a-f]{32}$')
+
+
+def proceso_vivo(pid):
+    """True si el proceso `pid` existe en este equipo."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+class RegistroTrabajos:
+    """Estado de los trabajos de un gestor, un JSON por trabajo en `directorio`."""
+
+    def __init__(self, directorio, activos):
+        self.directorio = directorio
+        # Estados en los que el trabajo sigue corriendo
+        self.activos = tuple(activos)
+
+    def _ruta(self, id_trabajo, extension='json'):
+        return os.path.join(self.directorio, f'{id_trabajo}.{extension}')
+
+    def guardar(self, datos):
+        os.makedirs(self.directorio, exist_ok=True)
+        ruta = self._ruta(datos['job_id'])
+        temporal = f'{ruta}.{os.getpid()}.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({**datos, 'pid': os.getpid()}, f, default=str)
+        os.replace(temporal, ruta)
+
+    def leer(self, id_trabajo):
+        """a_dict() del trabajo tal como lo guardó su worker; None si no existe."""
+        if not ID_VALIDO.match(id_trabajo or ''):
+            return None
+        try:
+            with open(self._ruta(id_trabajo), encoding='utf-8') as f:
+                datos = json.load(f)
+        except (OSError, ValueError):
+            return None
+        pid = datos.pop('pid', None)
+        if datos.get('estado') in self.activos and pid and not proceso_vivo(pid):
+            datos['estado'] = 'interrumpido'
+            datos['error'] = datos.get('error') or 'El proceso que atendía el trabajo terminó'
+        return datos
+
+    def listar(self):
+        try:
+            nombres = os.listdir(self.directorio)
+        except OSError:
+            return []
+        trabajos = [self.leer(nombre[:-5]) for nombre in nombres if nombre.endswith('.json')]
+        return [t for t in trabajos if t is not None]
+
+    def purgar(self, conservar):
+        """Elimina los registros terminados más antiguos (de cualquier worker) más allá de `conservar`."""
+        trabajos = self.listar()
+        terminados = sorted((t for t in trabajos if t.get('estado') not in self.activos),
+                            key=lambda t: t.get('creado') or '')
+        for trabajo in terminados[:max(0, len(trabajos) - conservar)]:
+            self._eliminar(trabajo['job_id'], 'json')
+            self._eliminar(trabajo['job_id'], 'cancelar')
+
+    def _eliminar(self, id_trabajo, extension):
+        try:
+            os.remove(self._ruta(id_trabajo, extension))
+        except OSError:
+            pass
+
+    def solicitar_cancelacion(self, id_trabajo):
+        os.makedirs(self.directorio, exist_ok=True)
+        with open(self._ruta(id_trabajo, 'cancelar'), 'w', encoding='utf-8'):
+            pass
+
+    def cancelacion_solicitada(self, id_trabajo):
+        return os.path.exists(self._ruta(id_trabajo, 'cancelar'))
+
+    def quitar_cancelacion(self, id_trabajo):
+        self._eliminar(id_trabajo, 'cancelar')
@@ -0,0 +1,374 @@
+# ----------------------------------------------------------------------
+# SELECCION_MODELOS.PY: Validación temporal y búsqueda de
+# hiperparámetros de los modelos (Random Forest o Gradient Boosting)
+# ----------------------------------------------------------------------
+# Las particiones son de origen móvil (ventana creciente) sobre
+# fecha_fin_semana: cada pliegue entrena con todas las semanas anteriores
+# a su bloque de prueba, así nunca se evalúa con semanas previas a las
+# de entrenamiento (lo que sí pasa con train_test_split aleatorio).
+#
+# La búsqueda es por mitades sucesivas (successive halving): todos los
+# candidatos se evalúan con pocos árboles (n_estimators del bosque o
+# max_iter del boosting), se conserva la mejor fracción y se vuelve a
+# evaluar con más árboles. Cada (candidato, pliegue) es una
+# tarea de joblib; la matriz de features se escribe una vez en un .npy
+# que los procesos abren con mmap, sin copiarla a cada uno. Hay un
+# presupuesto de tiempo y los resultados se guardan por (versión de los
+# datos, parámetros, pliegue), por lo que repetir una búsqueda con los
+# mismos datos no vuelve a entrenar lo ya evaluado.
+# ----------------------------------------------------------------------
+
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+
+from entrenamiento import (
+    ALGORITMO_POR_DEFECTO, CLF_FEATURE_POOL, PARAMETROS_POR_DEFECTO, REG_FEATURE_POOL, DatosInvalidos,
+    ajustar, crear_estimador, validar_algoritmo
+)
+
+ESPACIO_BUSQUEDA = {
+    'max_depth': [8, 12, 15, 20, None],
+    'min_samples_split': [2, 5, 10, 20],
+    'min_samples_leaf': [1, 2, 5, 10],
+    'max_features': ['sqrt', 0.5, 1.0],
+}
+ESPACIO_BUSQUEDA_HGB = {
+    'learning_rate': [0.03, 0.05, 0.1, 0.2],
+    'max_leaf_nodes': [15, 31, 63],
+    'min_samples_leaf': [5, 10, 20, 50],
+    'l2_regularization': [0.0, 0.1, 1.0],
+}
+ESPACIOS = {'random_forest': ESPACIO_BUSQUEDA, 'hist_gradient_boosting': ESPACIO_BUSQUEDA_HGB}
+
+# Hiperparámetro que crece en cada ronda de la búsqueda (número de árboles)
+RECURSO = {'random_forest': 'n_estimators', 'hist_gradient_boosting': 'max_iter'}
+
+# (mayor es mejor) por métrica
+METRICAS = {
+    'accuracy': True,
+    'f1': True,
+    'r2': True,
+    'mae': False,
+}
+
+METRICA_POR_TIPO = {'clasificador': 'f1', 'regresor': 'mae'}
+OBJETIVO_POR_TIPO = {'clasificador': 'nivel_riesgo_encoded', 'regresor': 'casos_confirmados'}
+FEATURES_POR_TIPO = {'clasificador': CLF_FEATURE_POOL, 'regresor': REG_FEATURE_POOL}
+
+
+# --- Particiones temporales ---
+
+def particiones_temporales(fechas, n_pliegues=4, proporcion_prueba=0.5):
+    """
+    Pliegues de origen móvil sobre `fechas` ordenadas: la fracción final
+    `proporcion_prueba` de semanas distintas se divide en `n_pliegues`
+    bloques consecutivos y cada pliegue entrena con todas las filas
+    anteriores a su bloque. Como las filas están ordenadas, cada pliegue
+    es un par (fin_entrenamiento, fin_prueba) de índices: entrenamiento
+    [0, fin_entrenamiento) y prueba [fin_entrenamiento, fin_prueba).
+    """
+    fechas = np.asarray(fechas, dtype='datetime64[D]')
+    semanas = np.unique(fechas)
+    n_prueba = max(n_pliegues, int(round(len(semanas) * proporcion_prueba)))
+    if len(semanas) <= n_prueba:
+        raise DatosInvalidos(f'Se necesitan más de {n_prueba} semanas distintas para {n_pliegues} pliegues '
+                             f'(hay {len(semanas)})')
+
+    bloques = np.array_split(semanas[len(semanas) - n_prueba:], n_pliegues)
+    pliegues = []
+    for bloque in bloques:
+        fin_entrenamiento = int(np.searchsorted(fechas, bloque[0], side='left'))
+        fin_prueba = int(np.searchsorted(fechas, bloque[-1], side='right'))
+        pliegues.append((fin_entrenamiento, fin_prueba))
+    return pliegues
+
+
+def division_temporal(fechas, proporcion_prueba=0.2):
+    """Índice de corte de un solo pliegue: la fracción final de semanas es la prueba."""
+    return particiones_temporales(fechas, 1, proporcion_prueba)[0][0]
+
+
+def conjunto(tipo_modelo, df):
+    """
+    (X, y, fechas) ordenados por fecha_fin_semana a partir de un DataFrame
+    ya pasado por preparar_datos(), con las columnas que usa entrenar().
+    """
+    if 'fecha_fin_semana' not in df.columns:
+        raise DatosInvalidos('La validación temporal necesita la columna fecha_fin_semana')
+    if 'estado_coded' not in df.columns and 'entidad_coded' in df.columns:
+        df['estado_coded'] = df['entidad_coded']
+    objetivo = OBJETIVO_POR_TIPO[tipo_modelo]
+    if objetivo not in df.columns:
+        raise DatosInvalidos(f'No se encontró la columna objetivo {objetivo}')
+
+    df = df.sort_values('fecha_fin_semana', kind='stable')
+    columnas = [c for c in FEATURES_POR_TIPO[tipo_modelo] if c in df.columns]
+    return df[columnas], df[objetivo], df['fecha_fin_semana'].to_numpy(dtype='datetime64[D]')
+
+
+# --- Evaluación ---
+
+def crear_modelo(tipo_modelo, parametros, n_jobs=1, algoritmo=ALGORITMO_POR_DEFECTO):
+    return crear_estimador(tipo_modelo, algoritmo, parametros, n_jobs)
+
+
+def calcular_metrica(nombre, y_real, y_pred):
+    from sklearn.metrics import accuracy_score, f1_score, mean_absolute_error, r2_score
+
+    if nombre == 'accuracy':
+        return accuracy_score(y_real, y_pred)
+    if nombre == 'f1':
+        return f1_score(y_real, y_pred, average='weighted', zero_division=0)
+    if nombre == 'r2':
+        return r2_score(y_real, y_pred)
+    return mean_absolute_error(y_real, y_pred)
+
+
+def _evaluar(ruta_X, ruta_y, tipo_modelo, parametros, pliegue, metrica, limite, algoritmo=ALGORITMO_POR_DEFECTO):
+    """
+    Tarea de joblib: entrena y mide un pliegue con un solo hilo (el
+    paralelismo es entre tareas). None si ya se agotó el presupuesto.
+    """
+    if limite is not None and time.time() > limite:
+        return None
+    inicio = time.perf_counter()
+    X = np.load(ruta_X, mmap_mode='r')
+    y = np.load(ruta_y, mmap_mode='r')
+    fin_entrenamiento, fin_prueba = pliegue
+    modelo = crear_modelo(tipo_modelo, parametros, 1, algoritmo)
+    ajustar(modelo, X[:fin_entrenamiento], y[:fin_entrenamiento], 1)
+    valor = calcular_metrica(metrica, y[fin_entrenamiento:fin_prueba], modelo.predict(X[fin_entrenamiento:fin_prueba]))
+    return {'valor': float(valor), 'segundos': round(time.perf_counter() - inicio, 3)}
+
+
+def _guardar_npy(ruta, arreglo):
+    if os.path.exists(ruta):
+        return
+    temporal = f'{ruta}.{os.getpid()}.tmp'
+    with open(temporal, 'wb') as f:
+        np.save(f, arreglo)
+    os.replace(temporal, ruta)
+
+
+def preparar_matriz(X, y, directorio_cache):
+    """
+    Escribe X (float32, como la usa el bosque) e y en
+    <directorio_cache>/<version>/ y retorna (version, ruta_X, ruta_y). La
+    versión es el hash del contenido, así que los mismos datos reutilizan
+    los archivos y los resultados guardados.
+    """
+    X = np.ascontiguousarray(np.asarray(X, dtype=np.float32))
+    y = np.ascontiguousarray(np.asarray(y))
+    h = hashlib.sha256()
+    for arreglo in (X, y):
+        h.update(str((arreglo.shape, arreglo.dtype.str)).encode())
+        h.update(arreglo.tobytes())
+    version = h.hexdigest()[:16]
+
+    directorio = os.path.join(directorio_cache, version)
+    os.makedirs(directorio, exist_ok=True)
+    ruta_X, ruta_y = os.path.join(directorio, 'X.npy'), os.path.join(directorio, 'y.npy')
+    _guardar_npy(ruta_X, X)
+    _guardar_npy(ruta_y, y)
+    return version, ruta_X, ruta_y
+
+
+class CacheResultados:
+    """Resultados por (algoritmo, parámetros, pliegue, métrica) de una versión de los datos, en un JSON."""
+
+    def __init__(self, directorio_cache, version):
+        self.ruta = os.path.join(directorio_cache, version, 'resultados.json')
+        try:
+            with open(self.ruta, encoding='utf-8') as f:
+                self.resultados = json.load(f)
+        except (OSError, ValueError):
+            self.resultados = {}
+
+    @staticmethod
+    def clave(tipo_modelo, parametros, pliegue, metrica, algoritmo=ALGORITMO_POR_DEFECTO):
+        # Las claves del bosque no llevan el algoritmo, así siguen valiendo las ya guardadas
+        tipo = tipo_modelo if algoritmo == ALGORITMO_POR_DEFECTO else f'{tipo_modelo}:{algoritmo}'
+        return json.dumps([tipo, parametros, list(pliegue), metrica], sort_keys=True)
+
+    def obtener(self, clave):
+        return self.resultados.get(clave)
+
+    def agregar(self, clave, resultado):
+        self.resultados[clave] = resultado
+
+    def guardar(self):
+        temporal = f'{self.ruta}.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(self.resultados, f)
+        os.replace(temporal, self.ruta)
+
+
+def validar(tipo_modelo, parametros, X, y, fechas, n_pliegues=5, metrica=None, n_jobs=-1,
+            directorio_cache=None, algoritmo=ALGORITMO_POR_DEFECTO):
+    """
+    Validación de origen móvil de unos hiperparámetros, con los pliegues en
+    paralelo (reemplaza a cross_val_score). Retorna los valores de la
+    métrica por pliegue.
+    """
+    import tempfile
+
+    metrica = metrica or METRICA_POR_TIPO[tipo_modelo]
+    pliegues = particiones_temporales(fechas, n_pliegues)
+    with tempfile.TemporaryDirectory() as temporal:
+        _, ruta_X, ruta_y = preparar_matriz(X, y, directorio_cache or temporal)
+        resultados = Parallel(n_jobs=n_jobs)(
+            delayed(_evaluar)(ruta_X, ruta_y, tipo_modelo, parametros, pliegue, metrica, None, algoritmo)
+            for pliegue in pliegues
+        )
+    return np.array([r['valor'] for r in resultados])
+
+
+# --- Búsqueda por mitades sucesivas ---
+
+def candidatos_busqueda(tipo_modelo, n_candidatos, semilla=42, espacio=None, algoritmo=ALGORITMO_POR_DEFECTO):
+    """Los parámetros por defecto más una muestra sin reemplazo del espacio de búsqueda."""
+    espacio = espacio or ESPACIOS[algoritmo]
+    base = {k: v for k, v in PARAMETROS_POR_DEFECTO[(tipo_modelo, algoritmo)].items() if k != RECURSO[algoritmo]}
+    combinaciones = [dict(zip(espacio, valores)) for valores in itertools.product(*espacio.values())]
+    random.Random(semilla).shuffle(combinaciones)
+    candidatos = [base]
+    for combinacion in combinaciones:
+        if len(candidatos) >= n_candidatos:
+            break
+        if combinacion != base:
+            candidatos.append(combinacion)
+    return candidatos
+
+
+def validar_parametros(parametros, algoritmo=ALGORITMO_POR_DEFECTO):
+    """
+    Solo hiperparámetros del espacio de búsqueda del algoritmo y su número
+    de árboles (n_estimators / max_iter), con valores razonables.
+    """
+    validar_algoritmo(algoritmo)
+    if not isinstance(parametros, dict):
+        raise DatosInvalidos('parametros debe ser un objeto')
+    recurso = RECURSO[algoritmo]
+    permitidos = set(ESPACIOS[algoritmo]) | {recurso}
+    desconocidos = sorted(set(parametros) - permitidos)
+    if desconocidos:
+        raise DatosInvalidos(f'Parámetros no permitidos: {", ".join(desconocidos)}')
+    arboles = parametros.get(recurso, 1)
+    if not isinstance(arboles, int) or not 1 <= arboles <= 1000:
+        raise DatosInvalidos(f'{recurso} debe ser un entero entre 1 y 1000')
+    return parametros
+
+
+def buscar(tipo_modelo, X, y, fechas, directorio_cache, n_candidatos=27, factor=3,
+           arboles_min=25, arboles_max=200, n_pliegues=4, presupuesto=None, n_jobs=-1,
+           metrica=None, semilla=42, al_terminar_ronda=None, algoritmo=ALGORITMO_POR_DEFECTO):
+    """
+    Búsqueda por mitades sucesivas con validación de origen móvil. X, y y
+    fechas deben venir ordenados por fecha (ver conjunto()). Los árboles
+    son n_estimators del bosque o max_iter del boosting. `presupuesto`
+    son segundos de reloj: las tareas que no alcanzan a iniciar se omiten y
+    se reporta lo mejor de la última ronda completa.
+    al_terminar_ronda(info) se llama al final de cada ronda.
+    """
+    validar_algoritmo(algoritmo)
+    metrica = metrica or METRICA_POR_TIPO[tipo_modelo]
+    signo = 1 if METRICAS[metrica] else -1
+    recurso = RECURSO[algoritmo]
+    columnas = list(getattr(X, 'columns', []))
+    inicio = time.time()
+    limite = inicio + presupuesto if presupuesto else None
+
+    pliegues = particiones_temporales(fechas, n_pliegues)
+    version, ruta_X, ruta_y = preparar_matriz(X, y, directorio_cache)
+    cache = CacheResultados(directorio_cache, version)
+
+    candidatos = candidatos_busqueda(tipo_modelo, n_candidatos, semilla, algoritmo=algoritmo)
+    arboles = min(arboles_min, arboles_max)
+    rondas = []
+    mejores = None
+    agotado = False
+
+    with Parallel(n_jobs=n_jobs) as paralelo:
+        while candidatos:
+            inicio_ronda = time.time()
+            configuraciones = [{**c, recurso: arboles} for c in candidatos]
+            claves = {(i, j): cache.clave(tipo_modelo, p, pliegue, metrica, algoritmo)
+                      for i, p in enumerate(configuraciones) for j, pliegue in enumerate(pliegues)}
+            pendientes = [ij for ij, clave in claves.items() if cache.obtener(clave) is None]
+
+            resultados = paralelo(
+                delayed(_evaluar)(ruta_X, ruta_y, tipo_modelo, configuraciones[i], pliegues[j], metrica, limite,
+                                  algoritmo)
+                for i, j in pendientes
+            )
+            for ij, resultado in zip(pendientes, resultados):
+                if resultado is not None:
+                    cache.agregar(claves[ij], resultado)
+            cache.guardar()
+
+            # Solo se comparan candidatos con todos sus pliegues evaluados
+            puntajes = []
+            for i, parametros in enumerate(configuraciones):
+                valores = [cache.obtener(claves[(i, j)]) for j in range(len(pliegues))]
+                if all(v is not None for v in valores):
+                    valores = [v['valor'] for v in valores]
+                    puntajes.append((float(np.mean(valores)), float(np.std(valores)), parametros))
+            puntajes.sort(key=lambda p: signo * p[0], reverse=True)
+
+            ronda = {
+                'arboles': arboles,
+                'candidatos': len(configuraciones),
+                'completos': len(puntajes),
+                'entrenamientos': sum(r is not None for r in resultados),
+                'desde_cache': len(claves) - len(pendientes),
+                'segundos': round(time.time() - inicio_ronda, 2),
+                'mejor': {'parametros': puntajes[0][2], metrica: puntajes[0][0]} if puntajes else None,
+            }
+            rondas.append(ronda)
+            print(f"🔎 Ronda {len(rondas)}: {ronda['candidatos']} candidatos x {len(pliegues)} pliegues, "
+                  f"{arboles} árboles ({ronda['desde_cache']} desde caché, {ronda['segundos']} s)")
+            if al_terminar_ronda:
+                al_terminar_ronda(ronda)
+
+            if puntajes:
+                mejores = puntajes
+            if limite is not None and time.time() > limite:
+                agotado = True
+                break
+            if len(puntajes) <= 1 or arboles >= arboles_max:
+                break
+            candidatos = [{k: v for k, v in p.items() if k != recurso}
+                          for _, _, p in puntajes[:max(1, math.ceil(len(puntajes) / factor))]]
+            arboles = min(arboles * factor, arboles_max)
+
+    if mejores is None:
+        raise DatosInvalidos('El presupuesto de tiempo se agotó antes de evaluar un candidato completo')
+
+    valor, desviacion, parametros = mejores[0]
+    return {
+        'tipo_modelo': tipo_modelo,
+        'algoritmo': algoritmo,
+        'metrica': metrica,
+        'mejores_parametros': parametros,
+        'puntaje': valor,
+        'desviacion': desviacion,
+        'ranking': [{'parametros': p, metrica: v, 'desviacion': d} for v, d, p in mejores[:10]],
+        'rondas': rondas,
+        'pliegues': [
+            {'entrenamiento': fin_e, 'prueba': fin_p - fin_e,
+             'desde': str(fechas[fin_e]), 'hasta': str(fechas[fin_p - 1])}
+            for fin_e, fin_p in pliegues
+        ],
+        'features': columnas,
+        'version_datos': version,
+        'presupuesto_agotado': agotado,
+        'segundos': round(time.time() - inicio, 2),
+    }
@@ -0,0 +1,294 @@
+# ----------------------------------------------------------------------
+# TRABAJOS_CARGA.PY: Cargas de CSV en segundo plano con progreso
+# ----------------------------------------------------------------------
+# POST /api/datos/cargar-csv (asincrono=true) guarda el archivo en disco y
+# registra un trabajo; un pool pequeño de hilos lo procesa con su propio
+# pool de conexiones MySQL, de modo que una carga grande no ocupa un hilo
+# de Flask ni una conexión de los endpoints interactivos.
+# El progreso se consulta en GET /api/datos/jobs/<id>; el estado de cada
+# trabajo se escribe además en UPLOAD_DIR/.trabajos (registro_trabajos.py)
+# para que cualquier worker de gunicorn pueda responderlo o cancelarlo.
+# ----------------------------------------------------------------------
+
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+import analitica
+from archivos_entrada import abrir_csv
+from features import actualizar_tras_carga
+from procesamiento_csv import (
+    agregar_semanal, columnas_faltantes, filas_para_insertar,
+    insertar_semanal, leer_confirmados
+)
+from registro_trabajos import RegistroTrabajos
+
+ESTADOS_ACTIVOS = ('en_cola', 'leyendo', 'agregando', 'insertando')
+
+# Segundos mínimos entre escrituras del progreso en el registro
+INTERVALO_REGISTRO = 1.0
+
+
+class CargaCancelada(Exception):
+    """Se lanza dentro del trabajo cuando el usuario cancela la carga."""
+
+
+class ColaLlena(Exception):
+    """No hay lugar en la cola de cargas pendientes."""
+
+
+class TrabajoCarga:
+    """Estado y progreso de una carga de CSV."""
+
+    def __init__(self, nombre_archivo, ruta):
+        self.id = uuid.uuid4().hex
+        self.nombre_archivo = nombre_archivo
+        self.ruta = ruta
+        self.estado = 'en_cola'
+        self.bytes_totales = os.path.getsize(ruta)
+        self.bytes_leidos = 0
+        self.filas_leidas = 0
+        self.semanas_agregadas = 0
+        self.filas_insertadas = 0
+        self.creado = time.time()
+        self.iniciado = None
+        self.inicio_insercion = None
+        self.terminado = None
+        self.error = None
+        self.resultado = None
+        self.cancelar = threading.Event()
+        self.futuro = None
+        # Última escritura en el registro compartido
+        self.registrado = 0.0
+
+    def eta_segundos(self):
+        """Estimación del tiempo restante según la fase actual."""
+        ahora = time.time()
+        if self.estado == 'leyendo' and self.bytes_leidos:
+            transcurrido = ahora - self.iniciado
+            return round(transcurrido * (self.bytes_totales - self.bytes_leidos) / self.bytes_leidos, 1)
+        if self.estado == 'insertando' and self.filas_insertadas:
+            transcurrido = ahora - self.inicio_insercion
+            restantes = self.semanas_agregadas - self.filas_insertadas
+            return round(transcurrido * restantes / self.filas_insertadas, 1)
+        return None
+
+    def a_dict(self):
+        def iso(ts):
+            return datetime.fromtimestamp(ts).isoformat() if ts else None
+
+        return {
+            'job_id': self.id,
+            'archivo': self.nombre_archivo,
+            'estado': self.estado,
+            'progreso': {
+                'bytes_totales': self.bytes_totales,
+                'bytes_leidos': self.bytes_leidos,
+                'filas_leidas': self.filas_leidas,
+                'semanas_agregadas': self.semanas_agregadas,
+                'filas_insertadas': self.filas_insertadas,
+                'eta_segundos': self.eta_segundos()
+            },
+            'creado': iso(self.creado),
+            'iniciado': iso(self.iniciado),
+            'terminado': iso(self.terminado),
+            'error': self.error,
+            'resultado': self.resultado
+        }
+
+
+class GestorCargas:
+    """
+    Cola acotada de cargas de CSV procesadas por un pool de hilos.
+    obtener_conexion() debe devolver una conexión de un pool dedicado a
+    ingesta (no el pool de los endpoints interactivos).
+    """
+
+    def __init__(self, obtener_conexion, directorio, workers=1, cola_max=4, max_historial=100):
+        self.obtener_conexion = obtener_conexion
+        self.directorio = directorio
+        self.workers = workers
+        self.cola_max = cola_max
+        self.max_historial = max_historial
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='carga_csv')
+        self._trabajos = {}
+        self._lock = threading.Lock()
+        self.registro = RegistroTrabajos(os.path.join(directorio, '.trabajos'), ESTADOS_ACTIVOS)
+
+    def enviar(self, archivo):
+        """Guarda el archivo subido (FileStorage) en disco y encola el trabajo."""
+        # Se guarda fuera del candado: una subida grande no detiene a las demás
+        os.makedirs(self.directorio, exist_ok=True)
+        ruta = os.path.join(self.directorio, f'{uuid.uuid4().hex}.upload')
+        try:
+            archivo.save(ruta)
+            trabajo = TrabajoCarga(archivo.filename, ruta)
+        except Exception:
+            if os.path.exists(ruta):
+                os.remove(ruta)
+            raise
+
+        with self._lock:
+            activos = sum(1 for t in self._trabajos.values() if t.estado in ESTADOS_ACTIVOS)
+            if activos >= self.workers + self.cola_max:
+                self._eliminar_archivo(trabajo)
+                raise ColaLlena(f'Hay {activos} cargas en proceso; intenta más tarde')
+            self._trabajos[trabajo.id] = trabajo
+            self._purgar_historial()
+
+        self._registrar(trabajo)
+        trabajo.futuro = self._executor.submit(self._ejecutar, trabajo)
+        return trabajo
+
+    def obtener(self, id_trabajo):
+        with self._lock:
+            return self._trabajos.get(id_trabajo)
+
+    def listar(self):
+        with self._lock:
+            trabajos = list(self._trabajos.values())
+        return sorted(trabajos, key=lambda t: t.creado, reverse=True)
+
+    def estado(self, id_trabajo):
+        """a_dict() del trabajo, de este proceso o del registro compartido; None si no existe."""
+        trabajo = self.obtener(id_trabajo)
+        return trabajo.a_dict() if trabajo is not None else self.registro.leer(id_trabajo)
+
+    def estados(self):
+        """a_dict() de los trabajos recientes de todos los workers, del más nuevo al más viejo."""
+        estados = {t['job_id']: t for t in self.registro.listar()}
+        estados.update((t.id, t.a_dict()) for t in self.listar())
+        return sorted(estados.values(), key=lambda t: t['creado'] or '', reverse=True)
+
+    def cancelar(self, id_trabajo):
+        """
+        Solicita la cancelación; los trabajos en cola no llegan a ejecutarse.
+        Si el trabajo es de otro worker, se le avisa por el registro.
+        Retorna el a_dict() del trabajo o None si no existe.
+        """
+        trabajo = self.obtener(id_trabajo)
+        if trabajo is None:
+            datos = self.registro.leer(id_trabajo)
+            if datos is not None and datos['estado'] in ESTADOS_ACTIVOS:
+                self.registro.solicitar_cancelacion(id_trabajo)
+            return datos
+        trabajo.cancelar.set()
+        if trabajo.futuro is not None and trabajo.futuro.cancel():
+            trabajo.estado = 'cancelado'
+            trabajo.terminado = time.time()
+            self._eliminar_archivo(trabajo)
+            self._registrar(trabajo)
+        return trabajo.a_dict()
+
+    def _registrar(self, trabajo, forzar=True):
+        """Escribe el estado en el registro compartido (el progreso, a lo más cada INTERVALO_REGISTRO)."""
+        ahora = time.time()
+        if not forzar and ahora - trabajo.registrado < INTERVALO_REGISTRO:
+            return
+        trabajo.registrado = ahora
+        try:
+            self.registro.guardar(trabajo.a_dict())
+        except OSError as e:
+            print(f"⚠️ No se pudo registrar el estado de la carga {trabajo.id}: {e}")
+
+    def _purgar_historial(self):
+        terminados = [t for t in self._trabajos.values() if t.estado not in ESTADOS_ACTIVOS]
+        terminados.sort(key=lambda t: t.creado)
+        for trabajo in terminados[:max(0, len(self._trabajos) - self.max_historial)]:
+            del self._trabajos[trabajo.id]
+        self.registro.purgar(self.max_historial)
+
+    def _eliminar_archivo(self, trabajo):
+        try:
+            os.remove(trabajo.ruta)
+        except OSError:
+            pass
+
+    def _revisar_cancelacion(self, trabajo):
+        if trabajo.cancelar.is_set() or self.registro.cancelacion_solicitada(trabajo.id):
+            raise CargaCancelada()
+        self._registrar(trabajo, forzar=False)
+
+    def _ejecutar(self, trabajo):
+        trabajo.iniciado = time.time()
+        trabajo.estado = 'leyendo'
+        self._registrar(trabajo)
+        conn = None
+        try:
+            self._revisar_cancelacion(trabajo)
+            # .csv, .gz o .zip: se descomprime por bloques sin escribir el CSV
+            with abrir_csv(trabajo.ruta) as entrada:
+                columnas = pd.read_csv(entrada.flujo, nrows=0, encoding=entrada.codificacion).columns
+                faltantes = columnas_faltantes(columnas)
+                if faltantes:
+                    raise ValueError(f'Columnas faltantes: {", ".join(faltantes)}')
+                entrada.flujo.seek(0)
+
+                # El avance se mide en bytes del archivo original (comprimido)
+                def al_leer(registros):
+                    trabajo.filas_leidas = registros
+                    trabajo.bytes_leidos = entrada.posicion_cruda()
+                    self._revisar_cancelacion(trabajo)
+
+                df_confirmados, registros_originales = leer_confirmados(
+                    entrada.flujo, al_avanzar=al_leer, encoding=entrada.codificacion)
+                trabajo.bytes_leidos = trabajo.bytes_totales
+
+            trabajo.estado = 'agregando'
+            self._registrar(trabajo)
+            if len(df_confirmados) == 0:
+                raise ValueError('No hay casos confirmados (ESTATUS_CASO=1) en el archivo')
+            df_ts, umbral_riesgo = agregar_semanal(df_confirmados)
+            fecha_carga = datetime.now().date()
+            filas = filas_para_insertar(df_ts, fecha_carga)
+            trabajo.semanas_agregadas = len(filas)
+            self._revisar_cancelacion(trabajo)
+
+            trabajo.estado = 'insertando'
+            trabajo.inicio_insercion = time.time()
+            self._registrar(trabajo)
+            conn = self.obtener_conexion()
+
+            def al_insertar(insertadas):
+                trabajo.filas_insertadas = insertadas
+                self._revisar_cancelacion(trabajo)
+
+            insertar_semanal(conn, filas, al_avanzar=al_insertar)
+            # Se devuelve entre pasos para no retener el pool de ingesta
+            conn.close()
+            conn = None
+            conn = self.obtener_conexion()
+            actualizar_tras_carga(conn, filas)
+            analitica.programar_sincronizacion()
+
+            trabajo.resultado = {
+                'registros_originales': registros_originales,
+                'casos_confirmados': len(df_confirmados),
+                'registros_insertados': trabajo.filas_insertadas,
+                'anios_procesados': sorted(df_ts['fecha_fin_semana'].dt.year.unique().tolist()),
+                'estados_procesados': int(df_ts['NOMBRE_ESTADO'].nunique()),
+                'umbral_riesgo_ti': round(float(umbral_riesgo), 4),
+                'fecha_carga': fecha_carga.isoformat()
+            }
+            trabajo.estado = 'completado'
+            print(f"✔ Carga {trabajo.id} completada: {trabajo.filas_insertadas} registros")
+        except CargaCancelada:
+            trabajo.estado = 'cancelado'
+            print(f"⚠️ Carga {trabajo.id} cancelada ({trabajo.filas_insertadas} registros ya confirmados)")
+        except Exception as e:
+            trabajo.estado = 'error'
+            trabajo.error = str(e)
+            traceback.print_exc()
+        finally:
+            trabajo.terminado = time.time()
+            if conn is not None:
+                conn.close()
+            self._eliminar_archivo(trabajo)
+            self._registrar(trabajo)
+            self.registro.quitar_cancelacion(trabajo.id)
@@ -0,0 +1,280 @@
+# ----------------------------------------------------------------------
+# TRABAJOS_ENTRENAMIENTO.PY: Entrenamiento de modelos en procesos aparte
+# ----------------------------------------------------------------------
+# POST /api/modelos/entrenar (asincrono=true) registra un trabajo que se
+# ejecuta en un ProcessPoolExecutor: el fit del Random Forest no ocupa
+# un hilo de Flask ni compite por el GIL, y el proceso corre con menor
+# prioridad (nice) y n_jobs limitado para no acaparar los núcleos que
+# atienden las predicciones.
+# El proceso reporta la fase actual en un archivo JSON que se lee en
+# GET /api/modelos/jobs/<id>. Al terminar publica los artefactos en
+# modelos/<job_id>/ y el servidor los activa (ver entrenamiento.py).
+# El worker dueño escribe el estado del trabajo en MODELOS_DIR/.trabajos
+# (registro_trabajos.py): con gunicorn la consulta puede llegar a otro.
+# ----------------------------------------------------------------------
+
+import json
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from entrenamiento import (
+    ALGORITMO_POR_DEFECTO, FASES, DatosInvalidos, actualizar, descartar, directorio_temporal, entrenar, publicar
+)
+from registro_trabajos import RegistroTrabajos
+
+
+class ColaEntrenamientoLlena(Exception):
+    """No hay lugar en la cola de entrenamientos pendientes."""
+
+
+def _iniciar_proceso(nice):
+    """Inicializador de cada proceso del pool: baja su prioridad."""
+    if nice and hasattr(os, 'nice'):
+        os.nice(nice)
+
+
+def ruta_estado(directorio_modelos, id_trabajo):
+    """Archivo donde el proceso hijo escribe la fase actual."""
+    return os.path.join(directorio_modelos, f'.{id_trabajo}.estado.json')
+
+
+def leer_fase(ruta, por_defecto):
+    """Fase que escribió el proceso hijo en `ruta`, o `por_defecto` si todavía no hay."""
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            return json.load(f)['fase']
+    except (OSError, ValueError, KeyError):
+        return por_defecto
+
+
+def progreso(estado):
+    return 100 if estado == 'completado' else FASES.get(estado, 0)
+
+
+def _escribir_estado(ruta_estado, fase):
+    temporal = f'{ruta_estado}.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump({'fase': fase, 'actualizado': time.time()}, f)
+    os.replace(temporal, ruta_estado)
+
+
+def _ejecutar_en_proceso(id_trabajo, tipo_modelo, fuente, directorio_modelos, ruta_estado,
+                         label_encoder, label_encoder_reg, n_jobs, parametros=None,
+                         algoritmo=ALGORITMO_POR_DEFECTO, actualizacion=None):
+    """
+    Corre en el proceso hijo: entrena (o, con `actualizacion`, actualiza el
+    modelo activo; ver entrenamiento.actualizar), escribe los .pkl y los publica.
+    """
+    directorio_tmp = directorio_temporal(directorio_modelos)
+
+    def al_avanzar(fase):
+        _escribir_estado(ruta_estado, fase)
+
+    try:
+        if actualizacion is not None:
+            resultado = actualizar(tipo_modelo, fuente, directorio_tmp, n_jobs=n_jobs, al_avanzar=al_avanzar,
+                                   **actualizacion)
+        else:
+            resultado = entrenar(
+                tipo_modelo, fuente, directorio_tmp,
+                label_encoder=label_encoder, label_encoder_reg=label_encoder_reg,
+                n_jobs=n_jobs, al_avanzar=al_avanzar,
+                parametros=parametros, algoritmo=algoritmo
+            )
+        resultado['ruta_publicada'] = publicar(directorio_tmp, directorio_modelos, id_trabajo)
+        return resultado
+    except BaseException:
+        descartar(directorio_tmp)
+        raise
+
+
+class TrabajoEntrenamiento:
+    """Estado de un entrenamiento en segundo plano."""
+
+    def __init__(self, tipo_modelo, origen, directorio_modelos, modo='completo'):
+        self.id = uuid.uuid4().hex
+        self.tipo_modelo = tipo_modelo
+        self.origen = origen
+        self.modo = modo
+        self.ruta_estado = ruta_estado(directorio_modelos, self.id)
+        # 'en_cola' hasta que termina; la fase en curso la da fase_actual()
+        self.estado = 'en_cola'
+        self.creado = time.time()
+        self.terminado = None
+        self.activado = False
+        self.error = None
+        self.resultado = None
+        self.futuro = None
+
+    def fase_actual(self):
+        """Estado a reportar: mientras corre, la fase que escribió el proceso hijo."""
+        if self.estado != 'en_cola':
+            return self.estado
+        return leer_fase(self.ruta_estado, self.estado)
+
+    def a_dict(self):
+        def iso(ts):
+            return datetime.fromtimestamp(ts).isoformat() if ts else None
+
+        estado = self.fase_actual()
+        return {
+            'job_id': self.id,
+            'tipo_modelo': self.tipo_modelo,
+            'modo': self.modo,
+            'origen': self.origen,
+            'estado': estado,
+            'progreso': progreso(estado),
+            'activado': self.activado,
+            'creado': iso(self.creado),
+            'terminado': iso(self.terminado),
+            'error': self.error,
+            'resultado': self.resultado
+        }
+
+
+class GestorEntrenamientos:
+    """
+    Cola acotada de entrenamientos ejecutados en un pool de procesos.
+    al_publicar(trabajo, ruta_publicada) se llama en el proceso del
+    servidor cuando un entrenamiento termina bien (ahí se activa el modelo).
+    """
+
+    def __init__(self, directorio_modelos, workers=1, n_jobs=1, nice=10, cola_max=2,
+                 al_publicar=None, max_historial=50):
+        self.directorio_modelos = directorio_modelos
+        self.workers = workers
+        self.n_jobs = n_jobs
+        self.nice = nice
+        self.cola_max = cola_max
+        self.al_publicar = al_publicar
+        self.max_historial = max_historial
+        self._executor = None
+        self._trabajos = {}
+        self._lock = threading.Lock()
+        self.registro = RegistroTrabajos(os.path.join(directorio_modelos, '.trabajos'), ('en_cola',) + tuple(FASES))
+
+    def _pool(self):
+        # Se crea en el primer uso; 'spawn' evita heredar por fork los hilos
+        # y conexiones del servidor (y es lo que usa Windows)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_iniciar_proceso,
+                initargs=(self.nice,)
+            )
+        return self._executor
+
+    def enviar(self, tipo_modelo, fuente, origen, label_encoder=None, label_encoder_reg=None,
+               parametros=None, algoritmo=ALGORITMO_POR_DEFECTO, actualizacion=None):
+        """
+        Encola un entrenamiento. `fuente` es lo que recibe entrenar() (ruta
+        del CSV o filtros para leer de la BD) y `origen` su descripción.
+        Los encoders actuales, el algoritmo y los hiperparámetros viajan al
+        proceso hijo; con `actualizacion` (argumentos de
+        entrenamiento.actualizar) se actualiza el modelo activo en su lugar.
+        """
+        with self._lock:
+            activos = sum(1 for t in self._trabajos.values() if t.estado == 'en_cola')
+            if activos >= self.workers + self.cola_max:
+                raise ColaEntrenamientoLlena(f'Hay {activos} entrenamientos en proceso; intenta más tarde')
+
+            os.makedirs(self.directorio_modelos, exist_ok=True)
+            trabajo = TrabajoEntrenamiento(tipo_modelo, origen, self.directorio_modelos,
+                                           'completo' if actualizacion is None else 'actualizar')
+            self._trabajos[trabajo.id] = trabajo
+            self._purgar_historial()
+
+            trabajo.futuro = self._pool().submit(
+                _ejecutar_en_proceso, trabajo.id, tipo_modelo, fuente, self.directorio_modelos,
+                trabajo.ruta_estado, label_encoder, label_encoder_reg, self.n_jobs, parametros, algoritmo,
+                actualizacion
+            )
+        self._registrar(trabajo)
+        trabajo.futuro.add_done_callback(lambda futuro: self._terminar(trabajo, futuro))
+        return trabajo
+
+    def obtener(self, id_trabajo):
+        with self._lock:
+            return self._trabajos.get(id_trabajo)
+
+    def listar(self):
+        with self._lock:
+            trabajos = list(self._trabajos.values())
+        return sorted(trabajos, key=lambda t: t.creado, reverse=True)
+
+    def estado(self, id_trabajo):
+        """a_dict() del trabajo, de este proceso o del registro compartido; None si no existe."""
+        trabajo = self.obtener(id_trabajo)
+        if trabajo is not None:
+            return trabajo.a_dict()
+        return self._con_fase(self.registro.leer(id_trabajo))
+
+    def estados(self):
+        """a_dict() de los entrenamientos recientes de todos los workers, del más nuevo al más viejo."""
+        estados = {t['job_id']: self._con_fase(t) for t in self.registro.listar()}
+        estados.update((t.id, t.a_dict()) for t in self.listar())
+        return sorted(estados.values(), key=lambda t: t['creado'] or '', reverse=True)
+
+    def _con_fase(self, datos):
+        """Registro de otro worker con la fase que escribe su proceso hijo."""
+        if datos is not None and datos['estado'] == 'en_cola':
+            datos['estado'] = leer_fase(ruta_estado(self.directorio_modelos, datos['job_id']), 'en_cola')
+            datos['progreso'] = progreso(datos['estado'])
+        return datos
+
+    def _registrar(self, trabajo):
+        try:
+            self.registro.guardar(trabajo.a_dict())
+        except OSError as e:
+            print(f"⚠️ No se pudo registrar el estado del entrenamiento {trabajo.id}: {e}")
+
+    def _purgar_historial(self):
+        terminados = [t for t in self._trabajos.values() if t.estado != 'en_cola']
+        terminados.sort(key=lambda t: t.creado)
+        for trabajo in terminados[:max(0, len(self._trabajos) - self.max_historial)]:
+            del self._trabajos[trabajo.id]
+        self.registro.purgar(self.max_historial)
+
+    def _terminar(self, trabajo, futuro):
+        try:
+            self._registrar_resultado(trabajo, futuro)
+        finally:
+            trabajo.terminado = time.time()
+            self._registrar(trabajo)
+            try:
+                os.remove(trabajo.ruta_estado)
+            except OSError:
+                pass
+
+    def _registrar_resultado(self, trabajo, futuro):
+        try:
+            resultado = futuro.result()
+        except DatosInvalidos as e:
+            trabajo.estado = 'error'
+            trabajo.error = str(e)
+            return
+        except Exception as e:
+            trabajo.estado = 'error'
+            trabajo.error = str(e) or e.__class__.__name__
+            traceback.print_exception(type(e), e, e.__traceback__)
+            return
+
+        ruta_publicada = resultado.pop('ruta_publicada')
+        trabajo.resultado = resultado
+        print(f"✔ Entrenamiento {trabajo.id} ({trabajo.tipo_modelo}) publicado en {ruta_publicada}")
+        if self.al_publicar:
+            try:
+                self.al_publicar(trabajo, ruta_publicada)
+                trabajo.activado = True
+            except Exception as e:
+                trabajo.error = f'Modelo publicado pero no activado: {e}'
+                traceback.print_exc()
+        # Se marca al final, para que quien consulte el trabajo ya vea el modelo activo
+        trabajo.estado = 'completado'
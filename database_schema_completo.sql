@@ -50,6 +50,15 @@ CREATE TABLE IF NOT EXISTS `enfermedad` (
 
 -- =====================================================
 -- Tabla: dato_epidemiologico
+-- Particionada por año (RANGE sobre YEAR(fecha_fin_semana)): borrar un año
+-- es ALTER TABLE ... TRUNCATE PARTITION y los filtros por fecha solo leen
+-- las particiones necesarias. Requisitos de MySQL para particionar:
+--   - toda llave única debe incluir fecha_fin_semana (por eso la PK es
+--     compuesta);
+--   - las tablas InnoDB particionadas no admiten llaves foráneas: la
+--     integridad con region/enfermedad la garantizan los cargadores.
+-- La partición del año siguiente se agrega con
+--   python scripts/particiones_dato_epidemiologico.py
 -- =====================================================
 CREATE TABLE IF NOT EXISTS `dato_epidemiologico` (
   `id_dato` int NOT NULL AUTO_INCREMENT,
@@ -62,14 +71,85 @@ CREATE TABLE IF NOT EXISTS `dato_epidemiologico` (
   `riesgo_brote_target` tinyint(1) NOT NULL,
   `fecha_carga` date DEFAULT NULL,
   `id_usuario_carga` int DEFAULT NULL,
-  PRIMARY KEY (`id_dato`),
+  PRIMARY KEY (`id_dato`, `fecha_fin_semana`),
   UNIQUE KEY `uq_dato_fecha_region` (`id_region`,`fecha_fin_semana`),
   KEY `fk_dato_enfermedad` (`id_enfermedad`),
-  KEY `fk_dato_usuario` (`id_usuario_carga`),
-  CONSTRAINT `fk_dato_enfermedad` FOREIGN KEY (`id_enfermedad`) REFERENCES `enfermedad` (`id_enfermedad`),
-  CONSTRAINT `fk_dato_region` FOREIGN KEY (`id_region`) REFERENCES `region` (`id_region`),
-  CONSTRAINT `fk_dato_usuario` FOREIGN KEY (`id_usuario_carga`) REFERENCES `usuario` (`id_usuario`)
-) ENGINE=InnoDB AUTO_INCREMENT=19521 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+  KEY `fk_dato_usuario` (`id_usuario_carga`)
+) ENGINE=InnoDB AUTO_INCREMENT=19521 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci
+PARTITION BY RANGE (YEAR(`fecha_fin_semana`)) (
+  PARTITION p2000 VALUES LESS THAN (2001),
+  PARTITION p2001 VALUES LESS THAN (2002),
+  PARTITION p2002 VALUES LESS THAN (2003),
+  PARTITION p2003 VALUES LESS THAN (2004),
+  PARTITION p2004 VALUES LESS THAN (2005),
+  PARTITION p2005 VALUES LESS THAN (2006),
+  PARTITION p2006 VALUES LESS THAN (2007),
+  PARTITION p2007 VALUES LESS THAN (2008),
+  PARTITION p2008 VALUES LESS THAN (2009),
+  PARTITION p2009 VALUES LESS THAN (2010),
+  PARTITION p2010 VALUES LESS THAN (2011),
+  PARTITION p2011 VALUES LESS THAN (2012),
+  PARTITION p2012 VALUES LESS THAN (2013),
+  PARTITION p2013 VALUES LESS THAN (2014),
+  PARTITION p2014 VALUES LESS THAN (2015),
+  PARTITION p2015 VALUES LESS THAN (2016),
+  PARTITION p2016 VALUES LESS THAN (2017),
+  PARTITION p2017 VALUES LESS THAN (2018),
+  PARTITION p2018 VALUES LESS THAN (2019),
+  PARTITION p2019 VALUES LESS THAN (2020),
+  PARTITION p2020 VALUES LESS THAN (2021),
+  PARTITION p2021 VALUES LESS THAN (2022),
+  PARTITION p2022 VALUES LESS THAN (2023),
+  PARTITION p2023 VALUES LESS THAN (2024),
+  PARTITION p2024 VALUES LESS THAN (2025),
+  PARTITION p2025 VALUES LESS THAN (2026),
+  PARTITION p2026 VALUES LESS THAN (2027),
+  PARTITION p_futuro VALUES LESS THAN MAXVALUE
+);
+
+-- =====================================================
+-- Tabla: dato_features
+-- Features de lags y ventanas móviles por estado y semana, calculados
+-- por backend/features.py al cargar datos. Cada fila tiene los features
+-- de la semana fecha_fin_semana a partir de las semanas anteriores; la
+-- última fila de cada estado es la semana siguiente a la última con datos
+-- (la que se predice). Reconstrucción completa:
+--   python scripts/actualizar_features.py
+-- =====================================================
+CREATE TABLE IF NOT EXISTS `dato_features` (
+  `id_region` int NOT NULL,
+  `fecha_fin_semana` date NOT NULL,
+  `casos_lag_1w` int DEFAULT NULL,
+  `casos_lag_2w` int DEFAULT NULL,
+  `casos_lag_3w` int DEFAULT NULL,
+  `casos_lag_4w` int DEFAULT NULL,
+  `ti_lag_1w` double DEFAULT NULL,
+  `ti_lag_2w` double DEFAULT NULL,
+  `ti_lag_3w` double DEFAULT NULL,
+  `ti_lag_4w` double DEFAULT NULL,
+  `casos_promedio_4w` double DEFAULT NULL,
+  `tendencia_4w` int DEFAULT NULL,
+  `variacion_pct` double NOT NULL DEFAULT 0,
+  `semana_anio` tinyint NOT NULL,
+  `mes` tinyint NOT NULL,
+  `actualizado` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id_region`, `fecha_fin_semana`),
+  KEY `idx_features_fecha` (`fecha_fin_semana`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- =====================================================
+-- Tabla: catalogo_version
+-- Contador que se incrementa al modificar region o enfermedad; la API
+-- guarda ambos catálogos en memoria y los recarga cuando cambia
+-- (backend/catalogos.py). Tras editarlos a mano:
+--   INSERT INTO catalogo_version (id, version) VALUES (1, 1)
+--   ON DUPLICATE KEY UPDATE version = version + 1;
+-- =====================================================
+CREATE TABLE IF NOT EXISTS `catalogo_version` (
+  `id` tinyint unsigned NOT NULL,
+  `version` int unsigned NOT NULL,
+  PRIMARY KEY (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
 -- =====================================================
 -- Tabla: alerta
@@ -1,18 +1,18 @@
 # ============================================
 # Modelo de Regresión para Predicción de Casos de Dengue
-# Random Forest Regressor
+# Random Forest o Gradient Boosting (histogramas) Regressor
 # ============================================
 
 import pandas as pd
 import numpy as np
 import mysql.connector
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.inspection import permutation_importance
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import joblib
 import sys
 import os
+from datetime import date
 
 # Agregar directorio backend al path para importar db_config
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -20,6 +20,10 @@ backend_dir = os.path.join(current_dir, '..', 'backend')
 sys.path.append(backend_dir)
 
 from db_config import get_db_connection
+from datos_entrenamiento import cargar_dataframe
+from entrenamiento import ALGORITMOS, ajustar, calcular_metricas, crear_estimador, guardar_metadatos
+from features import calcular_features
+from seleccion_modelos import division_temporal, validar
 
 
 print("=" * 60)
@@ -35,24 +39,9 @@ print("\n📊 Conectando a la base de datos...")
 conn = get_db_connection()
 
 # Obtener datos epidemiológicos SOLO de 2021 en adelante (datos semanales reales)
-query = """
-SELECT 
-    d.id_region,
-    r.nombre as estado,
-    r.poblacion,
-    d.fecha_fin_semana,
-    d.casos_confirmados,
-    d.tasa_incidencia,
-    WEEK(d.fecha_fin_semana) as semana_anio,
-    MONTH(d.fecha_fin_semana) as mes,
-    YEAR(d.fecha_fin_semana) as anio
-FROM dato_epidemiologico d
-JOIN region r ON d.id_region = r.id_region
-WHERE YEAR(d.fecha_fin_semana) >= 2021
-ORDER BY d.id_region, d.fecha_fin_semana
-"""
-
-df = pd.read_sql(query, conn)
+# Lectura por bloques a arreglos NumPy, con filtro por rango de fecha (usa el
+# índice y solo las particiones 2021+); semana, mes y año se calculan al leer
+df = cargar_dataframe(conn, desde=date(2021, 1, 1))
 conn.close()
 
 print(f"✅ Datos cargados: {len(df)} registros")
@@ -64,25 +53,9 @@ print(f"   Período: {df['fecha_fin_semana'].min()} a {df['fecha_fin_semana'].ma
 # ============================================
 print("\n🔧 Creando features para regresión...")
 
-# Ordenar por estado y fecha
-df = df.sort_values(['id_region', 'fecha_fin_semana']).reset_index(drop=True)
-
-# Crear features de lag (semanas anteriores)
-for lag in [1, 2, 3, 4]:
-    df[f'casos_lag_{lag}w'] = df.groupby('id_region')['casos_confirmados'].shift(lag)
-    df[f'ti_lag_{lag}w'] = df.groupby('id_region')['tasa_incidencia'].shift(lag)
-
-# Promedio móvil de 4 semanas
-df['casos_promedio_4w'] = df.groupby('id_region')['casos_confirmados'].transform(
-    lambda x: x.rolling(window=4, min_periods=1).mean().shift(1)
-)
-
-# Tendencia (diferencia entre semana actual y hace 4 semanas)
-df['tendencia_4w'] = df['casos_lag_1w'] - df['casos_lag_4w']
-
-# Variación porcentual
-df['variacion_pct'] = df.groupby('id_region')['casos_confirmados'].pct_change().shift(1)
-df['variacion_pct'] = df['variacion_pct'].replace([np.inf, -np.inf], 0).fillna(0)
+# Lags, promedio móvil, tendencia y variación por estado: la misma función
+# que llena dato_features para la API (ver backend/features.py)
+df = calcular_features(df)
 
 # Codificar estado
 le = LabelEncoder()
@@ -111,34 +84,48 @@ feature_cols = [
     'estado_coded'
 ]
 
+# Orden cronológico: la prueba y la validación usan las semanas más recientes
+df_clean = df_clean.sort_values('fecha_fin_semana', kind='stable')
+fechas = df_clean['fecha_fin_semana'].to_numpy()
+
 X = df_clean[feature_cols]
 y = df_clean['casos_confirmados']  # Target: casos reales de esa semana
 
 print(f"   Features: {len(feature_cols)}")
 print(f"   Samples: {len(X)}")
 
-# Split train/test
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42
-)
+# Split train/test temporal: el 20% final de semanas es la prueba
+corte = division_temporal(fechas, 0.2)
+X_train, X_test = X.iloc[:corte], X.iloc[corte:]
+y_train, y_test = y.iloc[:corte], y.iloc[corte:]
 
 print(f"   Train: {len(X_train)}, Test: {len(X_test)}")
 
 # ============================================
-# 4. ENTRENAR MODELO RANDOM FOREST REGRESSOR
-# ============================================
-print("\n🚀 Entrenando Random Forest Regressor...")
-
-model = RandomForestRegressor(
-    n_estimators=200,
-    max_depth=15,
-    min_samples_split=5,
-    min_samples_leaf=2,
-    random_state=42,
-    n_jobs=-1
-)
-
-model.fit(X_train, y_train)
+# 4. ENTRENAR MODELO REGRESSOR
+# ============================================
+# 'random_forest' o 'hist_gradient_boosting' (entrena más rápido y el
+# modelo es más chico; ver scripts/benchmark_algoritmos.py)
+TIPO_ALGORITMO = os.getenv('TIPO_ALGORITMO', 'random_forest')
+print(f"\n🚀 Entrenando {ALGORITMOS[TIPO_ALGORITMO]} Regressor...")
+
+if TIPO_ALGORITMO == 'hist_gradient_boosting':
+    parametros = dict(
+        max_iter=300,
+        learning_rate=0.1,
+        max_leaf_nodes=31,
+        min_samples_leaf=20,
+    )
+else:
+    parametros = dict(
+        n_estimators=200,
+        max_depth=15,
+        min_samples_split=5,
+        min_samples_leaf=2,
+    )
+model = crear_estimador('regresor', TIPO_ALGORITMO, parametros)
+
+ajustar(model, X_train, y_train)
 print("✅ Modelo entrenado")
 
 # ============================================
@@ -168,15 +155,22 @@ print(f"   R²   (Coeficiente Determinación): {r2:.4f} ({r2*100:.1f}%)")
 print(f"   Precisión estimada: {100 - mape:.1f}%")
 print("=" * 50)
 
-# Cross-validation
-cv_scores = cross_val_score(model, X, y, cv=5, scoring='r2')
-print(f"\n   Cross-Validation R² (5-fold): {cv_scores.mean():.4f} ± {cv_scores.std():.4f}")
+# Validación de origen móvil: 5 pliegues cronológicos evaluados en paralelo
+cv_scores = validar('regresor', parametros, X, y, fechas, n_pliegues=5, metrica='r2',
+                    algoritmo=TIPO_ALGORITMO)
+print(f"\n   Validación temporal R² (5 pliegues): {cv_scores.mean():.4f} ± {cv_scores.std():.4f}")
 
 # Feature importance
 print("\n📊 Importancia de Features:")
+if hasattr(model, 'feature_importances_'):
+    importancia = model.feature_importances_
+else:
+    # El boosting no tiene importancia por impureza: se mide por permutación en test
+    importancia = permutation_importance(model, X_test, y_test, n_repeats=5, random_state=42,
+                                         n_jobs=-1).importances_mean
 importances = pd.DataFrame({
     'feature': feature_cols,
-    'importance': model.feature_importances_
+    'importance': importancia
 }).sort_values('importance', ascending=False)
 
 for _, row in importances.iterrows():
@@ -195,6 +189,11 @@ joblib.dump(model, model_path)
 features_path = os.path.join(os.path.dirname(__file__), '..', 'backend', 'regressor_features.pkl')
 joblib.dump(feature_cols, features_path)
 
+# Algoritmo, parámetros y features junto al modelo (model_regressor.json) para el servidor
+guardar_metadatos(os.path.dirname(model_path), 'model_regressor.pkl', 'regresor', TIPO_ALGORITMO,
+                  parametros, feature_cols, calcular_metricas('regresor', y_test, y_pred),
+                  hasta=str(fechas.max().astype('datetime64[D]')))
+
 print(f"✅ Modelo guardado en: {model_path}")
 print(f"✅ Features guardadas en: {features_path}")
 
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+Recalcula la tabla dato_features (lags y ventanas móviles por estado y
+semana, ver backend/features.py) a partir de dato_epidemiologico.
+
+Las cargas de la API, del ETL y de cargar_datos_epidemiologicos.py ya la
+actualizan; este script sirve para construirla la primera vez o después
+de modificar dato_epidemiologico a mano:
+
+    python scripts/actualizar_features.py
+    python scripts/actualizar_features.py --desde 2024-01-01
+"""
+
+import argparse
+import os
+import sys
+from datetime import date
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+from db_config import get_db_connection
+from features import actualizar_features
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recalcular dato_features')
+    parser.add_argument('--desde', type=date.fromisoformat, default=None,
+                        help='Recalcular solo desde esta semana (YYYY-MM-DD); por defecto, todo')
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    try:
+        actualizar_features(conn, desde=args.desde)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
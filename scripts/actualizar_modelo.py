@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Actualización semanal de los modelos sin reentrenar todo el historial
+(ver entrenamiento.actualizar): agrega árboles ajustados con las semanas
+recientes al bosque activo de backend/ y retira los más antiguos. Si el
+modelo muestra deriva en las semanas nuevas, se reentrena completo.
+
+Pensado para correr después de cargar una semana nueva:
+
+    python scripts/actualizar_modelo.py
+    python scripts/actualizar_modelo.py regresor --arboles 30 --semanas 104
+    python scripts/actualizar_modelo.py clasificador --csv datos.csv
+
+Los artefactos se publican en MODELOS_DIR y se copian a backend/; un
+servidor en ejecución los toma al reiniciar (o usar POST
+/api/modelos/entrenar con "modo": "actualizar").
+"""
+
+import argparse
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+sys.path.append(BACKEND_DIR)
+from entrenamiento import (
+    ARBOLES_ACTUALIZACION, MAX_ARBOLES, SEMANAS_VENTANA, UMBRAL_DERIVA, DatosInvalidos, activar, actualizar,
+    descartar, directorio_temporal, publicar, purgar_versiones
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Actualización incremental de los modelos')
+    parser.add_argument('tipo_modelo', nargs='?', choices=['clasificador', 'regresor', 'ambos'], default='ambos')
+    parser.add_argument('--csv', help='Usar un CSV (con fecha_fin_semana) en lugar de la BD')
+    parser.add_argument('--arboles', type=int, default=ARBOLES_ACTUALIZACION, help='Árboles que se agregan')
+    parser.add_argument('--semanas', type=int, default=SEMANAS_VENTANA, help='Semanas recientes para ajustarlos')
+    parser.add_argument('--max-arboles', type=int, default=MAX_ARBOLES, help='Tamaño máximo del bosque')
+    parser.add_argument('--umbral-deriva', type=float, default=UMBRAL_DERIVA,
+                        help='Empeoramiento relativo que dispara el reentrenamiento completo')
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    args = parser.parse_args()
+
+    modelos_dir = os.getenv('MODELOS_DIR', os.path.join(BACKEND_DIR, 'modelos'))
+    os.makedirs(modelos_dir, exist_ok=True)
+    fuente = args.csv or {}
+    tipos = ['clasificador', 'regresor'] if args.tipo_modelo == 'ambos' else [args.tipo_modelo]
+
+    for tipo_modelo in tipos:
+        print(f"\n🔄 Actualizando {tipo_modelo}...")
+        directorio_tmp = directorio_temporal(modelos_dir)
+        try:
+            resultado = actualizar(
+                tipo_modelo, fuente, directorio_tmp, BACKEND_DIR, n_jobs=args.n_jobs,
+                arboles_nuevos=args.arboles, semanas_ventana=args.semanas,
+                max_arboles=args.max_arboles, umbral_deriva=args.umbral_deriva
+            )
+        except DatosInvalidos as e:
+            descartar(directorio_tmp)
+            print(f"❌ {e}")
+            return 1
+        except Exception:
+            descartar(directorio_tmp)
+            raise
+
+        ruta = publicar(directorio_tmp, modelos_dir)
+        activar(ruta, BACKEND_DIR)
+        print(f"✅ {resultado['mensaje']} ({resultado.get('modo')}"
+              f"{', ' + resultado['motivo'] if resultado.get('motivo') else ''})")
+        print(f"   Métricas: {resultado['metricas']}")
+        print(f"   Publicado en {ruta}")
+
+    purgar_versiones(modelos_dir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
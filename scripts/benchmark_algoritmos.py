@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de los algoritmos de entrenamiento (entrenamiento.ALGORITMOS):
+Random Forest contra Gradient Boosting por histogramas, con los
+parámetros por defecto de entrenar().
+
+Para cada algoritmo mide el tiempo de entrenamiento, la métrica en las
+semanas finales, el tamaño del .pkl, el tiempo de carga, los nodos de
+todos los árboles y la latencia p50/p99 de predecir una fila (como lo
+hacen los endpoints, con un DataFrame de una fila):
+
+    python scripts/benchmark_algoritmos.py clasificador
+    python scripts/benchmark_algoritmos.py regresor --semanas 1000 --predicciones 5000
+    python scripts/benchmark_algoritmos.py clasificador --bd --desde 2020-01-01
+    python scripts/benchmark_algoritmos.py regresor --csv datos.csv
+
+Sin --bd ni --csv usa datos sintéticos: 32 estados x `--semanas` semanas
+con casos estacionales, con los mismos features de features.py.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+from catalogo_estados import POBLACION_ARRAY
+from entrenamiento import (
+    ALGORITMOS, DatosInvalidos, ajustar, crear_estimador, datos_desde_bd, para_servir, preparar_datos
+)
+from features import LAGS, calcular_features
+from seleccion_modelos import METRICA_POR_TIPO, calcular_metrica, conjunto, division_temporal
+
+INICIO = np.datetime64('2000-01-02')
+
+
+def datos_sinteticos(semanas, semilla=42):
+    """32 estados x `semanas` semanas de casos con estacionalidad anual y brotes."""
+    rng = np.random.default_rng(semilla)
+    id_region = np.repeat(np.arange(1, 33), semanas)
+    semana = np.tile(np.arange(semanas), 32)
+    # Cada estado con su nivel base; pico en la semana ~35 del año
+    base = rng.uniform(2, 60, 33)[id_region]
+    estacion = 1 + 0.8 * np.sin(2 * np.pi * (semana - 22) / 52.18)
+    brotes = 1 + 2 * (rng.random(len(semana)) < 0.03)
+    casos = rng.poisson(base * estacion * brotes)
+    tasa = np.round(casos / POBLACION_ARRAY[id_region] * 100000, 4)
+    df = pd.DataFrame({
+        'id_region': id_region,
+        'fecha_fin_semana': (INICIO + semana * 7).astype('datetime64[ns]'),
+        'casos_confirmados': casos,
+        'tasa_incidencia': tasa,
+    })
+    df = calcular_features(df)
+    df['riesgo_brote_target'] = (df['tasa_incidencia'] > df['tasa_incidencia'].quantile(0.75)).astype(int)
+    df['estado_coded'] = df['id_region'] - 1
+    return df.dropna(subset=[f'casos_lag_{lag}w' for lag in LAGS]).reset_index(drop=True)
+
+
+def nodos(modelo):
+    """Nodos de todos los árboles del modelo."""
+    if hasattr(modelo, 'estimators_'):
+        return sum(arbol.tree_.node_count for arbol in modelo.estimators_)
+    return sum(len(predictor.nodes) for iteracion in modelo._predictors for predictor in iteracion)
+
+
+def latencias(modelo, X, predicciones, clasificador):
+    """Segundos de cada predicción de una fila (predict_proba en el clasificador, como los endpoints)."""
+    predecir = modelo.predict_proba if clasificador else modelo.predict
+    filas = [X.iloc[[i % len(X)]] for i in range(predicciones)]
+    for fila in filas[:20]:
+        predecir(fila)
+    tiempos = np.empty(predicciones)
+    for i, fila in enumerate(filas):
+        inicio = time.perf_counter()
+        predecir(fila)
+        tiempos[i] = time.perf_counter() - inicio
+    return tiempos
+
+
+def medir(tipo_modelo, algoritmo, X_train, y_train, X_test, y_test, args, directorio):
+    modelo = crear_estimador(tipo_modelo, algoritmo, n_jobs=args.n_jobs)
+    inicio = time.perf_counter()
+    ajustar(modelo, X_train, y_train, args.n_jobs)
+    entrenamiento = time.perf_counter() - inicio
+
+    metrica = METRICA_POR_TIPO[tipo_modelo]
+    valor = calcular_metrica(metrica, y_test, modelo.predict(X_test))
+
+    ruta = os.path.join(directorio, f'{algoritmo}.pkl')
+    joblib.dump(modelo, ruta)
+    inicio = time.perf_counter()
+    cargado = para_servir(joblib.load(ruta))
+    carga = time.perf_counter() - inicio
+
+    tiempos = latencias(cargado, X_test, args.predicciones, tipo_modelo == 'clasificador')
+    return {
+        'entrenamiento': entrenamiento,
+        metrica: valor,
+        'mb': os.path.getsize(ruta) / 1024 / 1024,
+        'carga': carga,
+        'nodos': nodos(cargado),
+        'p50': np.percentile(tiempos, 50) * 1000,
+        'p99': np.percentile(tiempos, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Random Forest vs Gradient Boosting por histogramas')
+    parser.add_argument('tipo_modelo', choices=['clasificador', 'regresor'])
+    parser.add_argument('--bd', action='store_true', help='Leer dato_features de la BD')
+    parser.add_argument('--csv', help='Usar un CSV de entrenamiento')
+    parser.add_argument('--desde', type=date.fromisoformat, default=None, help='YYYY-MM-DD (con --bd)')
+    parser.add_argument('--hasta', type=date.fromisoformat, default=None, help='YYYY-MM-DD (con --bd)')
+    parser.add_argument('--semanas', type=int, default=520, help='Semanas por estado de los datos sintéticos')
+    parser.add_argument('--predicciones', type=int, default=2000, help='Predicciones de una fila por algoritmo')
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    args = parser.parse_args()
+
+    try:
+        if args.csv:
+            df = pd.read_csv(args.csv, parse_dates=['fecha_fin_semana'])
+        elif args.bd:
+            df = datos_desde_bd(args.desde, args.hasta)
+        else:
+            df = datos_sinteticos(args.semanas)
+        df, _, _ = preparar_datos(df)
+        X, y, fechas = conjunto(args.tipo_modelo, df)
+    except DatosInvalidos as e:
+        print(f"❌ {e}")
+        return 1
+
+    corte = division_temporal(fechas, 0.2)
+    X_train, X_test, y_train, y_test = X.iloc[:corte], X.iloc[corte:], y.iloc[:corte], y.iloc[corte:]
+    print(f"📊 {len(X_train):,} registros de entrenamiento, {len(X_test):,} de prueba, {X.shape[1]} features")
+
+    resultados = {}
+    with tempfile.TemporaryDirectory() as directorio:
+        for algoritmo, nombre in ALGORITMOS.items():
+            print(f"⏱️ {nombre}...")
+            resultados[nombre] = medir(args.tipo_modelo, algoritmo, X_train, y_train, X_test, y_test,
+                                       args, directorio)
+
+    metrica = METRICA_POR_TIPO[args.tipo_modelo]
+    print(f"\n{'Algoritmo':<34}{'Entrenar (s)':>13}{metrica:>9}{'.pkl (MB)':>11}{'Carga (s)':>11}"
+          f"{'Nodos':>11}{'p50 (ms)':>10}{'p99 (ms)':>10}")
+    for nombre, r in resultados.items():
+        print(f"{nombre:<34}{r['entrenamiento']:>13.2f}{r[metrica]:>9.4f}{r['mb']:>11.2f}{r['carga']:>11.3f}"
+              f"{r['nodos']:>11,}{r['p50']:>10.3f}{r['p99']:>10.3f}")
+
+    bosque, boosting = resultados.values()
+    print(f"\n✅ Random Forest / Gradient Boosting: entrenamiento {bosque['entrenamiento'] / boosting['entrenamiento']:.1f}x, "
+          f".pkl {bosque['mb'] / boosting['mb']:.1f}x, nodos {bosque['nodos'] / boosting['nodos']:.1f}x, "
+          f"p99 {bosque['p99'] / boosting['p99']:.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
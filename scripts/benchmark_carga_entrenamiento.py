@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de lectura del conjunto de entrenamiento: pd.read_sql con la
+consulta original de los notebooks (JOIN + YEAR()/WEEK()) contra
+datos_entrenamiento.cargar_dataframe (cursor sin buffer + arreglos NumPy).
+
+Crea una tabla sintética escalada (dato_epidemiologico_bench) con la
+estructura de dato_epidemiologico, mide tiempo y memoria máxima de cada
+método y la elimina al terminar:
+
+    python scripts/benchmark_carga_entrenamiento.py
+    python scripts/benchmark_carga_entrenamiento.py --filas 5000000 --repeticiones 5
+    python scripts/benchmark_carga_entrenamiento.py --conservar   # no borrar la tabla
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+from db_config import get_db_connection
+from datos_entrenamiento import cargar_dataframe
+from procesamiento_csv import TABLA_DATOS
+
+TABLA_BENCH = f'{TABLA_DATOS}_bench'
+INICIO = np.datetime64('2000-01-02')
+LOTE_INSERCION = 10000
+
+# Consulta de notebook/01_Classification_Model.py sobre la tabla sintética
+CONSULTA_READ_SQL = f"""
+SELECT
+    d.id_region,
+    r.nombre as estado,
+    r.poblacion,
+    d.fecha_fin_semana,
+    d.casos_confirmados,
+    d.tasa_incidencia,
+    d.riesgo_brote_target,
+    WEEK(d.fecha_fin_semana) as semana_anio,
+    MONTH(d.fecha_fin_semana) as mes,
+    YEAR(d.fecha_fin_semana) as anio
+FROM {TABLA_BENCH} d
+JOIN region r ON d.id_region = r.id_region
+WHERE YEAR(d.fecha_fin_semana) >= %s
+ORDER BY d.id_region, d.fecha_fin_semana
+"""
+
+
+def crear_tabla(conn, filas):
+    """
+    Tabla con la estructura de dato_epidemiologico y `filas` registros
+    sintéticos: 32 estados x semanas desde 2000, repetidos con distinto
+    id_enfermedad para escalar (por eso no tiene la llave única
+    región-fecha).
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {TABLA_BENCH}")
+    cursor.execute(f"CREATE TABLE {TABLA_BENCH} LIKE {TABLA_DATOS}")
+    cursor.execute(f"ALTER TABLE {TABLA_BENCH} DROP INDEX uq_dato_fecha_region, "
+                   "ADD INDEX idx_bench_region_fecha (id_region, fecha_fin_semana)")
+
+    semanas = int((np.datetime64(date.today()) - INICIO).astype(np.int64) // 7)
+    rng = np.random.default_rng(42)
+    sql = f"""
+        INSERT INTO {TABLA_BENCH}
+        (id_enfermedad, id_region, fecha_fin_semana, casos_confirmados,
+         defunciones, tasa_incidencia, riesgo_brote_target, fecha_carga)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """
+    hoy = date.today()
+    for inicio in range(0, filas, LOTE_INSERCION):
+        i = np.arange(inicio, min(inicio + LOTE_INSERCION, filas))
+        id_region = i % 32 + 1
+        semana = (i // 32) % semanas
+        id_enfermedad = i // (32 * semanas) + 1
+        fechas = (INICIO + semana * 7).astype('datetime64[D]').astype(object)
+        casos = rng.poisson(20, len(i))
+        tasa = np.round(casos / 1e4, 4)
+        riesgo = (tasa > 0.0025).astype(int)
+        cursor.executemany(sql, list(zip(
+            id_enfermedad.tolist(), id_region.tolist(), fechas, casos.tolist(),
+            [0] * len(i), tasa.tolist(), riesgo.tolist(), [hoy] * len(i)
+        )))
+        conn.commit()
+        print(f"   Insertados: {i[-1] + 1:,} / {filas:,}", end='\r')
+    print()
+    cursor.close()
+
+
+def medir(funcion):
+    """(segundos, MB máximos asignados en Python, resultado)"""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcion()
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return segundos, pico / 1024 / 1024, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark read_sql vs cargador NumPy')
+    parser.add_argument('--filas', type=int, default=2000000, help='Registros de la tabla sintética')
+    parser.add_argument('--desde', type=int, default=2021, help='Año inicial del filtro')
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--reusar', action='store_true', help='Usar la tabla sintética existente')
+    parser.add_argument('--conservar', action='store_true', help='No eliminar la tabla al terminar')
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    try:
+        if not args.reusar:
+            print(f"🧪 Creando {TABLA_BENCH} con {args.filas:,} registros...")
+            crear_tabla(conn, args.filas)
+
+        metodos = {
+            'pd.read_sql (JOIN + YEAR/WEEK)': lambda: pd.read_sql(CONSULTA_READ_SQL, conn, params=(args.desde,)),
+            'cargar_dataframe (NumPy)': lambda: cargar_dataframe(conn, desde=date(args.desde, 1, 1), tabla=TABLA_BENCH),
+        }
+
+        print(f"\n⏱️ Lectura de registros >= {args.desde} ({args.repeticiones} repeticiones)")
+        resultados = {}
+        with warnings.catch_warnings():
+            # pandas advierte que mysql.connector no es una conexión SQLAlchemy
+            warnings.simplefilter('ignore', UserWarning)
+            for nombre, funcion in metodos.items():
+                tiempos, picos = [], []
+                for _ in range(args.repeticiones):
+                    segundos, pico, df = medir(funcion)
+                    tiempos.append(segundos)
+                    picos.append(pico)
+                resultados[nombre] = (min(tiempos), max(picos), len(df), df.memory_usage(deep=True).sum() / 1024 / 1024)
+
+        print(f"\n{'Método':<34}{'Filas':>12}{'Mejor (s)':>12}{'Pico (MB)':>12}{'DataFrame (MB)':>16}")
+        for nombre, (segundos, pico, filas, tamano) in resultados.items():
+            print(f"{nombre:<34}{filas:>12,}{segundos:>12.2f}{pico:>12.1f}{tamano:>16.1f}")
+
+        base, nuevo = resultados.values()
+        if base[2] != nuevo[2]:
+            print(f"⚠️ Los métodos leyeron distinto número de filas: {base[2]:,} vs {nuevo[2]:,}")
+        print(f"\n✅ Aceleración: {base[0] / nuevo[0]:.1f}x, memoria máxima: {base[1] / max(nuevo[1], 1e-9):.1f}x menor")
+    finally:
+        if not args.conservar:
+            cursor = conn.cursor()
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLA_BENCH}")
+            cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
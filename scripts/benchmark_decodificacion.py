@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark del costo por fila de decodificar resultados de MySQL
+(ver backend/lectura_filas.py), con el conector en Python puro y, si está
+instalada, su extensión en C:
+
+- Reportes: las consultas del reporte epidemiológico, de estadísticas y
+  del resumen por estado, más un listado de dato_epidemiologico para
+  tener filas suficientes, con cursor(dictionary=True) contra
+  cursor_filas (tuplas con los nombres de columnas una vez por consulta).
+- Entrenamiento: datos_entrenamiento.leer_arreglos con el cursor de
+  tuplas que usaba antes contra el cursor raw + lectura_filas.decodificar.
+
+    python scripts/benchmark_decodificacion.py
+    python scripts/benchmark_decodificacion.py --filas 500000 --repeticiones 5
+    python scripts/benchmark_decodificacion.py --desde 2015-01-01   # entrenamiento desde esa fecha
+
+Los tiempos incluyen el de MySQL, que es el mismo para cada par: la
+diferencia es la decodificación. Usa los datos de la base actual.
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+import mysql.connector
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+import consultas_dashboard
+from datos_entrenamiento import COLUMNAS, consulta_entrenamiento, contar, filtros, leer_arreglos
+from db_config import DB_CONFIG
+from lectura_filas import cursor_filas
+
+
+def consultas_reportes(filas):
+    consultas = {}
+    for grupo in (consultas_dashboard.REPORTE_EPIDEMIOLOGICO, consultas_dashboard.ESTADISTICAS_DATOS):
+        consultas.update({nombre: sql for nombre, (sql, _) in grupo.items()})
+    consultas['resumen_por_estado'] = consultas_dashboard.SQL_RESUMEN_POR_ESTADO
+    consultas['listado'] = f"SELECT * FROM dato_epidemiologico ORDER BY id_dato LIMIT {filas}"
+    return consultas
+
+
+def leer_dicts(conn, sql, cursor_nuevo):
+    cursor = cursor_filas(conn) if cursor_nuevo else conn.cursor(dictionary=True)
+    try:
+        cursor.execute(sql)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def leer_tuplas(conn, sql, parametros, columnas, capacidad, tamano_lote=20000):
+    """leer_arreglos como era antes: cursor de tuplas, un objeto de Python por valor."""
+    arreglos = {nombre: np.empty(capacidad, dtype=tipo) for nombre, tipo in columnas}
+    leidas = 0
+    cursor = conn.cursor(buffered=False)
+    try:
+        cursor.execute(sql, parametros)
+        while True:
+            filas = cursor.fetchmany(tamano_lote)
+            if not filas:
+                break
+            fin = leidas + len(filas)
+            for (nombre, _), valores in zip(columnas, zip(*filas)):
+                arreglos[nombre][leidas:fin] = valores
+            leidas = fin
+    finally:
+        cursor.close()
+    return {nombre: valores[:leidas] for nombre, valores in arreglos.items()}
+
+
+def mejor(funcion, repeticiones):
+    """(mejor tiempo en segundos, resultado)"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos), resultado
+
+
+def medir_conector(conn, args):
+    """{prueba: (filas, us/fila antes, us/fila después, iguales)}"""
+    consultas = consultas_reportes(args.filas)
+    listado = consultas.pop('listado')
+    # Los reportes suman sus consultas; el listado va aparte
+    pruebas = {f'Reportes ({len(consultas)} consultas)': consultas.values(),
+               'Listado dato_epidemiologico': [listado]}
+    resultados = {}
+    for prueba, sqls in pruebas.items():
+        filas, antes, despues, iguales = 0, 0.0, 0.0, True
+        for sql in sqls:
+            t_antes, filas_antes = mejor(lambda: leer_dicts(conn, sql, False), args.repeticiones)
+            t_despues, filas_despues = mejor(lambda: leer_dicts(conn, sql, True), args.repeticiones)
+            filas += len(filas_antes)
+            antes += t_antes
+            despues += t_despues
+            iguales &= filas_antes == filas_despues
+        resultados[prueba] = (filas, antes, despues, iguales)
+
+    where, parametros = filtros(desde=args.desde)
+    capacidad = contar(conn, f"SELECT COUNT(*) FROM dato_epidemiologico\n{where}", parametros)
+    sql, parametros = consulta_entrenamiento(desde=args.desde)
+    antes, tuplas = mejor(lambda: leer_tuplas(conn, sql, parametros, COLUMNAS, capacidad), args.repeticiones)
+    despues, crudos = mejor(lambda: leer_arreglos(conn, sql, parametros, COLUMNAS, capacidad), args.repeticiones)
+    iguales = all(np.array_equal(tuplas[c], crudos[c]) for c, _ in COLUMNAS)
+    resultados['Entrenamiento (NumPy)'] = (capacidad, antes, despues, iguales)
+
+    return {prueba: (filas, antes / max(filas, 1) * 1e6, despues / max(filas, 1) * 1e6, iguales)
+            for prueba, (filas, antes, despues, iguales) in resultados.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Costo por fila de decodificar resultados de MySQL')
+    parser.add_argument('--filas', type=int, default=200000, help='Filas del listado de dato_epidemiologico')
+    parser.add_argument('--desde', type=date.fromisoformat, default=None,
+                        help='Fecha inicial de la lectura de entrenamiento (por defecto todo)')
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    conectores = {'Python': True}
+    if mysql.connector.HAVE_CEXT:
+        conectores['C'] = False
+    else:
+        print("⚠️ La extensión en C de mysql.connector no está disponible: solo se mide Python puro")
+
+    resultados = {}
+    for conector, puro in conectores.items():
+        print(f"⏱️ Conector {conector}...")
+        try:
+            conn = mysql.connector.connect(**DB_CONFIG, use_pure=puro)
+        except mysql.connector.Error as err:
+            print(f"❌ No se pudo conectar a MySQL: {err}")
+            return 1
+        try:
+            for prueba, medicion in medir_conector(conn, args).items():
+                resultados[(conector, prueba)] = medicion
+        finally:
+            conn.close()
+
+    print(f"\n{'Conector':<10}{'Prueba':<30}{'Filas':>10}{'Antes (us/fila)':>17}{'Después (us/fila)':>19}{'x':>7}")
+    for (conector, prueba), (filas, antes, despues, iguales) in resultados.items():
+        print(f"{conector:<10}{prueba:<30}{filas:>10,}{antes:>17.2f}{despues:>19.2f}"
+              f"{antes / max(despues, 1e-9):>7.1f}{'' if iguales else '  ⚠️ resultados distintos'}")
+    print(f"\n✅ Mejor de {args.repeticiones} repeticiones; incluye el tiempo de MySQL de cada consulta")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de los reportes en MySQL contra la copia en DuckDB
+(MOTOR_REPORTES=duckdb, ver backend/analitica.py) a distintas escalas.
+
+Crea una base de datos aparte (<DB_NAME>_bench_reportes) con region y
+dato_epidemiologico copiadas de la base actual; cada escala agrega copias
+de los 32 estados con otro id_region (Estado #k), así que 10x son 10
+veces los registros. Llama a los endpoints con el cliente de pruebas de
+Flask con cada motor, compara las respuestas y reporta la mediana:
+
+    python scripts/benchmark_reportes.py
+    python scripts/benchmark_reportes.py --escalas 1,10 --repeticiones 10
+    python scripts/benchmark_reportes.py --conservar   # no borrar la base de prueba
+
+Necesita datos en dato_epidemiologico, duckdb instalado y permiso para
+crear bases de datos. También reporta lo que tarda sincronizar la copia
+(lo que se agrega a cada carga).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+sys.path.append(BACKEND_DIR)
+import analitica
+from db_config import DB_CONFIG, get_db_connection
+
+RUTAS = [
+    '/api/reportes/epidemiologico',
+    '/api/reportes/estado/1',
+    '/api/datos/estadisticas',
+    '/api/datos/resumen-por-estado',
+]
+
+# Las copias de cada estado van en id_region + k * DESPLAZAMIENTO
+DESPLAZAMIENTO = 100
+
+
+def crear_base(conn, origen, destino):
+    cursor = conn.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{destino}`")
+    cursor.execute(f"CREATE DATABASE `{destino}`")
+    for tabla in ('region', 'dato_epidemiologico'):
+        cursor.execute(f"CREATE TABLE `{destino}`.{tabla} LIKE `{origen}`.{tabla}")
+    cursor.close()
+
+
+def agregar_copias(conn, origen, destino, desde, hasta):
+    """
+    Copias k = desde..hasta-1 de los estados y sus registros. Los casos de
+    cada copia llevan +k para que los top-N no tengan empates entre copias.
+    """
+    cursor = conn.cursor()
+    for k in range(desde, hasta):
+        cursor.execute(f"""
+            INSERT INTO `{destino}`.region (id_region, nombre, codigo_entidad_inegi, poblacion)
+            SELECT id_region + %s, IF(%s = 0, nombre, CONCAT(nombre, ' #', %s)),
+                   codigo_entidad_inegi + %s, poblacion
+            FROM `{origen}`.region
+        """, (k * DESPLAZAMIENTO, k, k, k * DESPLAZAMIENTO))
+        cursor.execute(f"""
+            INSERT INTO `{destino}`.dato_epidemiologico
+                (id_enfermedad, id_region, fecha_fin_semana, casos_confirmados, defunciones,
+                 tasa_incidencia, riesgo_brote_target, fecha_carga, id_usuario_carga)
+            SELECT id_enfermedad, id_region + %s, fecha_fin_semana, casos_confirmados + %s, defunciones,
+                   tasa_incidencia, riesgo_brote_target, fecha_carga, id_usuario_carga
+            FROM `{origen}`.dato_epidemiologico
+        """, (k * DESPLAZAMIENTO, k))
+        conn.commit()
+        print(f"   Copias: {k + 1} / {hasta}", end='\r')
+    print()
+    cursor.execute(f"SELECT COUNT(*) FROM `{destino}`.dato_epidemiologico")
+    filas = cursor.fetchone()[0]
+    cursor.close()
+    return filas
+
+
+def normalizar(valor):
+    """Respuesta comparable entre motores: números (Decimal viaja como texto) y listas sin orden."""
+    if isinstance(valor, dict):
+        return {k: normalizar(v) for k, v in valor.items() if k != 'generado_en'}
+    if isinstance(valor, list):
+        return sorted((normalizar(v) for v in valor), key=lambda v: json.dumps(v, sort_keys=True))
+    if isinstance(valor, str):
+        try:
+            valor = float(valor)
+        except ValueError:
+            return valor
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return round(float(valor), 4)
+    return valor
+
+
+def medir(cliente, ruta, repeticiones):
+    """(mediana en ms, JSON de la respuesta)"""
+    respuesta = cliente.get(ruta)
+    if respuesta.status_code != 200:
+        raise RuntimeError(f'{ruta}: HTTP {respuesta.status_code} {respuesta.get_data(as_text=True)[:200]}')
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        cliente.get(ruta)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos), respuesta.get_json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de reportes: MySQL contra DuckDB')
+    parser.add_argument('--escalas', default='1,10,100', help='Múltiplos de los datos actuales, separados por coma')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--conservar', action='store_true', help='No eliminar la base de prueba al terminar')
+    args = parser.parse_args()
+
+    if not analitica.disponible():
+        print("❌ duckdb no está instalado (pip install duckdb)")
+        return 1
+    escalas = sorted(int(e) for e in args.escalas.split(','))
+    origen = DB_CONFIG['database']
+    destino = f'{origen}_bench_reportes'
+
+    conn = get_db_connection()
+    if conn is None:
+        return 1
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM dato_epidemiologico")
+    filas_origen = cursor.fetchone()[0]
+    cursor.close()
+    if not filas_origen:
+        print("❌ dato_epidemiologico está vacía")
+        return 1
+
+    print(f"🧪 Creando {destino} ({filas_origen:,} registros por copia)...")
+    crear_base(conn, origen, destino)
+
+    # La app (y su pool) apuntan a la base de prueba, sin réplica
+    directorio = tempfile.mkdtemp(prefix='bench_reportes_')
+    os.environ.update({'DB_NAME': destino, 'DB_REPLICA_HOST': '', 'MOTOR_REPORTES': 'duckdb'})
+    analitica.ARCHIVO = os.path.join(directorio, 'analitica.duckdb')
+    analitica.MOTOR_REPORTES = 'duckdb'
+    resultados, copias = {}, 0
+    try:
+        import app
+        cliente = app.app.test_client()
+        for escala in escalas:
+            print(f"\n⏱️ Escala {escala}x")
+            filas = agregar_copias(conn, origen, destino, copias, escala)
+            copias = escala
+            conn_bench = app.get_db_connection()
+            try:
+                inicio = time.perf_counter()
+                analitica.sincronizar(conn_bench)
+                sincronizacion = time.perf_counter() - inicio
+            finally:
+                conn_bench.close()
+
+            for ruta in RUTAS:
+                tiempos, respuestas = {}, {}
+                for motor in ('mysql', 'duckdb'):
+                    analitica.MOTOR_REPORTES = motor
+                    tiempos[motor], respuestas[motor] = medir(cliente, ruta, args.repeticiones)
+                iguales = normalizar(respuestas['mysql']) == normalizar(respuestas['duckdb'])
+                resultados[(escala, ruta)] = (filas, tiempos['mysql'], tiempos['duckdb'], iguales)
+                if not iguales:
+                    print(f"⚠️ {ruta}: las respuestas de MySQL y DuckDB no coinciden")
+            print(f"   {filas:,} registros, sincronizar DuckDB: {sincronizacion:.2f}s "
+                  f"({os.path.getsize(analitica.ARCHIVO) / 1024 / 1024:.1f} MB)")
+    finally:
+        if not args.conservar:
+            cursor = conn.cursor()
+            cursor.execute(f"DROP DATABASE IF EXISTS `{destino}`")
+            cursor.close()
+        conn.close()
+
+    print(f"\n{'Escala':>7}{'Registros':>12}  {'Endpoint':<32}{'MySQL (ms)':>12}{'DuckDB (ms)':>13}{'x':>8}")
+    for (escala, ruta), (filas, mysql_ms, duckdb_ms, iguales) in resultados.items():
+        print(f"{escala:>6}x{filas:>12,}  {ruta:<32}{mysql_ms:>12.1f}{duckdb_ms:>13.1f}"
+              f"{mysql_ms / max(duckdb_ms, 1e-9):>8.1f}{'' if iguales else '  ⚠️'}")
+    print(f"\n✅ Mediana de {args.repeticiones} peticiones por endpoint y motor")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
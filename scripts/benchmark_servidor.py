@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Prueba de carga del perfil de producción (backend/gunicorn.conf.py):
+levanta gunicorn con cada número de workers, envía peticiones desde
+varios clientes en paralelo y reporta peticiones por segundo, latencia
+p50/p99, errores y la memoria PSS (la parte compartida copy-on-write se
+reparte entre los procesos) del maestro más sus workers.
+
+Con --servidores compara también el modo asíncrono (uvicorn con
+asgi:crear_app, ver backend/asgi.py) y el servidor de desarrollo de
+Flask con hilos (un solo proceso, se mide una vez):
+
+    python scripts/benchmark_servidor.py
+    python scripts/benchmark_servidor.py --workers 1,2,4,8 --clientes 32 --duracion 20
+    python scripts/benchmark_servidor.py --ruta /api/modelo/predecir-riesgo-avanzado \\
+        --cuerpo '{"id_region": 9, "fecha_prediccion": "2024-08-01"}'
+    python scripts/benchmark_servidor.py --servidores gunicorn,asgi,flask --workers 1,4
+    python scripts/benchmark_servidor.py --servidores asgi,flask --metodo GET --ruta /api/reportes/epidemiologico
+    python scripts/benchmark_servidor.py --url http://localhost:5001
+
+Por defecto consulta POST /api/modelo/predecir-riesgo-automatico
+rotando id_region entre los 32 estados, así que necesita la BD con
+dato_features. Con --url mide un servidor que ya está corriendo (una sola
+medición). Los clientes son procesos de esta misma máquina: para medir
+el servidor con todos los núcleos conviene correrlo desde otra.
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+RUTA_POR_DEFECTO = '/api/modelo/predecir-riesgo-automatico'
+CALENTAMIENTO = 2.0
+SERVIDORES = ('gunicorn', 'asgi', 'flask')
+
+
+def cliente(url, metodo, ruta, cuerpo, inicio, fin, indice):
+    """Envía peticiones hasta `fin`; retorna (latencias desde `inicio`, errores)."""
+    partes = urlsplit(url)
+    cabeceras = {'Content-Type': 'application/json'}
+    latencias, errores, i = [], 0, indice
+    while time.time() < fin:
+        datos = dict(cuerpo) if cuerpo else None
+        if datos and 'id_region' in datos:
+            datos['id_region'] = i % 32 + 1
+        i += 1
+        t0 = time.perf_counter()
+        try:
+            conexion = http.client.HTTPConnection(partes.hostname, partes.port or 80, timeout=30)
+            conexion.request(metodo, ruta, json.dumps(datos) if datos else None, cabeceras)
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            conexion.close()
+            ok = respuesta.status < 500
+        except OSError:
+            ok = False
+        if time.time() < inicio:
+            continue
+        if ok:
+            latencias.append(time.perf_counter() - t0)
+        else:
+            errores += 1
+    return latencias, errores
+
+
+def medir(url, args, cuerpo):
+    inicio = time.time() + CALENTAMIENTO
+    fin = inicio + args.duracion
+    with multiprocessing.Pool(args.clientes) as pool:
+        resultados = pool.starmap(cliente, [(url, args.metodo, args.ruta, cuerpo, inicio, fin, i)
+                                            for i in range(args.clientes)])
+    latencias = np.concatenate([np.asarray(r[0]) for r in resultados])
+    errores = sum(r[1] for r in resultados)
+    return {
+        'rps': len(latencias) / args.duracion,
+        'p50': np.percentile(latencias, 50) * 1000 if len(latencias) else float('nan'),
+        'p99': np.percentile(latencias, 99) * 1000 if len(latencias) else float('nan'),
+        'errores': errores,
+    }
+
+
+def pss_mb(pid_maestro):
+    """PSS del maestro y sus hijos (Linux); None si no hay /proc."""
+    if not os.path.exists(f'/proc/{pid_maestro}/smaps_rollup'):
+        return None
+    pids = [pid_maestro]
+    for nombre in os.listdir('/proc'):
+        try:
+            with open(f'/proc/{nombre}/stat') as f:
+                if int(f.read().rsplit(')', 1)[1].split()[1]) == pid_maestro:
+                    pids.append(int(nombre))
+        except (ValueError, OSError, IndexError):
+            continue
+    total = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/smaps_rollup') as f:
+                total += sum(int(linea.split()[1]) for linea in f if linea.startswith('Pss:'))
+        except OSError:
+            continue
+    return total / 1024
+
+
+def esperar_puerto(puerto, proceso, espera=120):
+    """El maestro abre el puerto después de precargar la app."""
+    limite = time.time() + espera
+    while time.time() < limite:
+        if proceso.poll() is not None:
+            return False
+        try:
+            socket.create_connection(('127.0.0.1', puerto), timeout=1).close()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def levantar(servidor, workers, args):
+    if servidor == 'asgi':
+        comando = [sys.executable, '-m', 'uvicorn', '--factory', 'asgi:crear_app', '--workers', str(workers),
+                   '--host', '127.0.0.1', '--port', str(args.puerto), '--no-access-log']
+    elif servidor == 'flask':
+        comando = [sys.executable, '-c',
+                   f"import app; app.app.run(host='127.0.0.1', port={args.puerto}, threaded=True)"]
+    else:
+        comando = [sys.executable, '-m', 'gunicorn', '-c', os.path.join(BACKEND_DIR, 'gunicorn.conf.py'),
+                   '--workers', str(workers), '--bind', f'127.0.0.1:{args.puerto}']
+        if args.hilos:
+            comando += ['--threads', str(args.hilos)]
+        comando.append(args.modulo)
+    proceso = subprocess.Popen(comando, cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if not esperar_puerto(args.puerto, proceso):
+        proceso.kill()
+        raise RuntimeError(f'{servidor} no arrancó con {workers} workers')
+    return proceso
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de carga de gunicorn con distintos números de workers')
+    parser.add_argument('--servidores', default='gunicorn',
+                        help=f"Servidores a comparar, separados por coma ({', '.join(SERVIDORES)})")
+    parser.add_argument('--workers', default='1,2,4', help='Números de workers separados por coma')
+    parser.add_argument('--hilos', type=int, default=None, help='Hilos por worker (por defecto los de gunicorn.conf.py)')
+    parser.add_argument('--clientes', type=int, default=16, help='Clientes concurrentes')
+    parser.add_argument('--duracion', type=float, default=10, help='Segundos medidos por configuración')
+    parser.add_argument('--metodo', default='POST')
+    parser.add_argument('--ruta', default=RUTA_POR_DEFECTO)
+    parser.add_argument('--cuerpo', type=json.loads, default={'id_region': 1},
+                        help='JSON de la petición; si trae id_region, rota entre los 32 estados')
+    parser.add_argument('--url', help='Medir un servidor ya levantado (http://host:puerto)')
+    parser.add_argument('--puerto', type=int, default=5099, help='Puerto de los servidores de prueba')
+    parser.add_argument('--modulo', default='app:app', help='Aplicación WSGI que recibe gunicorn')
+    args = parser.parse_args()
+    if args.metodo == 'GET':
+        args.cuerpo = None
+
+    if args.url:
+        r = medir(args.url, args, args.cuerpo)
+        print(f"✅ {args.url}: {r['rps']:.1f} req/s, p50 {r['p50']:.1f} ms, p99 {r['p99']:.1f} ms, "
+              f"{r['errores']} errores")
+        return 0
+
+    servidores = args.servidores.split(',')
+    desconocidos = set(servidores) - set(SERVIDORES)
+    if desconocidos:
+        print(f"❌ Servidores desconocidos: {', '.join(sorted(desconocidos))}")
+        return 1
+
+    resultados = {}
+    for servidor in servidores:
+        # El servidor de desarrollo de Flask es un solo proceso
+        for workers in [1] if servidor == 'flask' else [int(w) for w in args.workers.split(',')]:
+            print(f"⏱️ {servidor}, {workers} workers...")
+            proceso = levantar(servidor, workers, args)
+            try:
+                r = medir(f'http://127.0.0.1:{args.puerto}', args, args.cuerpo)
+                r['pss'] = pss_mb(proceso.pid)
+                resultados[(servidor, workers)] = r
+            finally:
+                proceso.terminate()
+                proceso.wait(timeout=60)
+
+    base = next(iter(resultados.values()))['rps'] or 1
+    print(f"\n{'Servidor':>9}{'Workers':>8}{'req/s':>10}{'x':>7}{'req/s/w':>9}{'p50 (ms)':>10}{'p99 (ms)':>10}"
+          f"{'Errores':>9}{'PSS (MB)':>10}")
+    for (servidor, workers), r in resultados.items():
+        pss = f"{r['pss']:>10.1f}" if r['pss'] is not None else f"{'-':>10}"
+        print(f"{servidor:>9}{workers:>8}{r['rps']:>10.1f}{r['rps'] / base:>7.2f}{r['rps'] / workers:>9.1f}"
+              f"{r['p50']:>10.1f}{r['p99']:>10.1f}{r['errores']:>9}{pss}")
+    print(f"\n✅ {os.cpu_count()} núcleos en esta máquina, {args.clientes} clientes, {args.ruta}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
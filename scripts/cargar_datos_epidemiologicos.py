@@ -2,12 +2,35 @@
 """
 Script para cargar datos de dengue del CSV a la base de datos
 Adaptado a la estructura de tablas del proyecto
+
+La carga es idempotente: los casos se agregan por semana igual que en
+ETL_LOADER y /api/datos/cargar-csv (procesamiento_csv.py), se escriben en
+una tabla temporal de staging y se fusionan con dato_epidemiologico con un
+INSERT ... SELECT ... ON DUPLICATE KEY UPDATE por año que REEMPLAZA los
+conteos. Volver a cargar el mismo archivo deja los mismos datos, así que
+si la carga se interrumpe basta con repetirla.
+
+Uso:
+    python scripts/cargar_datos_epidemiologicos.py [ruta .csv | .csv.gz | .zip]
 """
 
 import pandas as pd
+import numpy as np
 import mysql.connector
-from datetime import datetime
+from datetime import date, datetime
+import argparse
 import os
+import sys
+
+# Catálogo compartido de estados y procesamiento de CSVs (backend/)
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(PROJECT_DIR, 'backend'))
+import analitica
+from archivos_entrada import abrir_csv
+from catalogo_estados import NOMBRE_POR_ID, POBLACION_POR_ID
+from catalogos import incrementar_version
+from features import actualizar_features
+from procesamiento_csv import agregar_semanal, columnas_faltantes, leer_confirmados
 
 # Configuración de la base de datos
 DB_CONFIG = {
@@ -17,77 +40,50 @@ DB_CONFIG = {
     'database': 'proyecto_integrador'
 }
 
-# Mapeo de códigos de entidad a nombres de estados (INEGI)
-ENTIDADES = {
-    1: 'Aguascalientes',
-    2: 'Baja California',
-    3: 'Baja California Sur',
-    4: 'Campeche',
-    5: 'Coahuila',
-    6: 'Colima',
-    7: 'Chiapas',
-    8: 'Chihuahua',
-    9: 'Ciudad de México',
-    10: 'Durango',
-    11: 'Guanajuato',
-    12: 'Guerrero',
-    13: 'Hidalgo',
-    14: 'Jalisco',
-    15: 'Estado de México',
-    16: 'Michoacán',
-    17: 'Morelos',
-    18: 'Nayarit',
-    19: 'Nuevo León',
-    20: 'Oaxaca',
-    21: 'Puebla',
-    22: 'Querétaro',
-    23: 'Quintana Roo',
-    24: 'San Luis Potosí',
-    25: 'Sinaloa',
-    26: 'Sonora',
-    27: 'Tabasco',
-    28: 'Tamaulipas',
-    29: 'Tlaxcala',
-    30: 'Veracruz',
-    31: 'Yucatán',
-    32: 'Zacatecas'
-}
+# Mapeo de códigos de entidad a nombres de estados (INEGI): catálogo compartido
+ENTIDADES = NOMBRE_POR_ID
 
-# Población por estado (Censo 2020)
-POBLACION = {
-    1: 1425607,
-    2: 3769020,
-    3: 798447,
-    4: 928363,
-    5: 3146771,
-    6: 731391,
-    7: 5543828,
-    8: 3741869,
-    9: 9209944,
-    10: 1832650,
-    11: 6166934,
-    12: 3540685,
-    13: 3082841,
-    14: 8348151,
-    15: 16992418,
-    16: 4748846,
-    17: 1971520,
-    18: 1235456,
-    19: 5784442,
-    20: 4132148,
-    21: 6583278,
-    22: 2368467,
-    23: 1857985,
-    24: 2822255,
-    25: 3026943,
-    26: 2944840,
-    27: 2402598,
-    28: 3527735,
-    29: 1342977,
-    30: 8062579,
-    31: 2320898,
-    32: 1622138
-}
+# Población por estado (CONAPO): la misma que usan el ETL y la API para la TI
+POBLACION = POBLACION_POR_ID
+
+RUTA_POR_DEFECTO = os.path.join(PROJECT_DIR, 'data', 'dengue_2021.csv')
+
+# Series semanales del archivo antes de fusionarlas con dato_epidemiologico.
+# Es TEMPORARY: pertenece a la conexión y desaparece al cerrarla.
+CREAR_STAGING_SQL = """
+    CREATE TEMPORARY TABLE carga_dengue_staging (
+        id_region INT NOT NULL,
+        fecha_fin_semana DATE NOT NULL,
+        casos_confirmados INT NOT NULL,
+        defunciones INT NOT NULL,
+        tasa_incidencia DECIMAL(10,4) NOT NULL,
+        riesgo_brote_target TINYINT(1) NOT NULL,
+        PRIMARY KEY (id_region, fecha_fin_semana)
+    )
+"""
+
+INSERT_STAGING_SQL = """
+    INSERT INTO carga_dengue_staging
+    (id_region, fecha_fin_semana, casos_confirmados, defunciones, tasa_incidencia, riesgo_brote_target)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+# Un año por sentencia; los conteos se reemplazan, no se suman
+FUSIONAR_ANIO_SQL = """
+    INSERT INTO dato_epidemiologico
+    (id_enfermedad, id_region, fecha_fin_semana, casos_confirmados,
+     defunciones, tasa_incidencia, riesgo_brote_target, fecha_carga)
+    SELECT %s, s.id_region, s.fecha_fin_semana, s.casos_confirmados,
+           s.defunciones, s.tasa_incidencia, s.riesgo_brote_target, %s
+    FROM carga_dengue_staging s
+    WHERE s.fecha_fin_semana >= %s AND s.fecha_fin_semana < %s
+    ON DUPLICATE KEY UPDATE
+        casos_confirmados = VALUES(casos_confirmados),
+        defunciones = VALUES(defunciones),
+        tasa_incidencia = VALUES(tasa_incidencia),
+        riesgo_brote_target = VALUES(riesgo_brote_target),
+        fecha_carga = VALUES(fecha_carga)
+"""
 
 def conectar_db():
     """Conecta a la base de datos MySQL"""
@@ -106,13 +102,12 @@ def insertar_enfermedad_dengue(cursor):
     if result:
         print(f"✅ Enfermedad 'Dengue' ya existe con ID: {result[0]}")
         return result[0]
-    
+
     try:
         cursor.execute("""
-            INSERT INTO enfermedad (nombre, descripcion, sintomas, via_transmision)
-            VALUES ('Dengue', 'Enfermedad viral transmitida por mosquitos Aedes', 
-                    'Fiebre alta, dolor de cabeza, dolor muscular, sarpullido', 
-                    'Picadura de mosquito Aedes aegypti')
+            INSERT INTO enfermedad (nombre, descripcion, estado, nivel_riesgo)
+            VALUES ('Dengue', 'Enfermedad viral transmitida por mosquitos Aedes',
+                    'activo', 'alto')
         """)
         id_enfermedad = cursor.lastrowid
         print(f"✅ Enfermedad 'Dengue' insertada con ID: {id_enfermedad}")
@@ -127,130 +122,127 @@ def insertar_enfermedad_dengue(cursor):
 def insertar_regiones(cursor):
     """Inserta las 32 entidades federativas"""
     print("\n📍 Insertando/actualizando regiones...")
-    
-    regiones_db = {}
-    for codigo, nombre in ENTIDADES.items():
-        poblacion = POBLACION.get(codigo, 0)
-        try:
-            cursor.execute("""
-                INSERT INTO region (id_region, nombre, codigo_postal, poblacion)
-                VALUES (%s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE 
-                    nombre = VALUES(nombre),
-                    poblacion = VALUES(poblacion)
-            """, (codigo, nombre, str(codigo * 1000).zfill(5), poblacion))
-            regiones_db[codigo] = nombre
-        except mysql.connector.Error as e:
-            print(f"   ⚠️ Error con {nombre}: {e}")
-    
-    print(f"✅ {len(regiones_db)} regiones configuradas")
-    return regiones_db
+
+    cursor.executemany("""
+        INSERT INTO region (id_region, nombre, codigo_entidad_inegi, poblacion)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            nombre = VALUES(nombre),
+            poblacion = VALUES(poblacion)
+    """, [(codigo, nombre, codigo, POBLACION[codigo]) for codigo, nombre in ENTIDADES.items()])
+
+    print(f"✅ {len(ENTIDADES)} regiones configuradas")
+    return dict(ENTIDADES)
 
 def cargar_csv(ruta_csv):
-    """Carga y procesa el CSV de datos de dengue"""
+    """Lee los casos confirmados (ESTATUS_CASO = 1) del CSV, .gz o .zip"""
     print(f"\n📂 Cargando CSV: {ruta_csv}")
-    
-    df = pd.read_csv(ruta_csv, encoding='latin-1', low_memory=False)
-    print(f"   Total de registros en CSV: {len(df):,}")
-    
-    # Convertir fecha
-    df['fecha'] = pd.to_datetime(df['FECHA_SIGN_SINTOMAS'], errors='coerce')
-    
-    # Filtrar registros válidos
-    df = df.dropna(subset=['fecha', 'ENTIDAD_RES'])
-    df['ENTIDAD_RES'] = df['ENTIDAD_RES'].astype(int)
-    print(f"   Registros válidos: {len(df):,}")
-    
-    # ESTATUS_CASO: 1=Probable, 2=No es caso, 3=Confirmado
-    df['es_confirmado'] = (df['ESTATUS_CASO'] == 3).astype(int)
-    df['es_defuncion'] = (df['DEFUNCION'] == 1).astype(int) if 'DEFUNCION' in df.columns else 0
-    
-    # Agregar columna de semana (para agrupar por semana)
-    df['fecha_semana'] = df['fecha'].dt.to_period('W').dt.start_time
-    
+
+    with abrir_csv(ruta_csv) as entrada:
+        columnas = pd.read_csv(entrada.flujo, encoding=entrada.codificacion, nrows=0).columns
+        entrada.flujo.seek(0)
+        faltantes = columnas_faltantes(columnas)
+        if faltantes:
+            raise ValueError(f"Columnas faltantes: {', '.join(faltantes)}")
+        extra = ['DEFUNCION'] if 'DEFUNCION' in columnas else []
+        df, registros = leer_confirmados(entrada.flujo, encoding=entrada.codificacion,
+                                         columnas_extra=extra)
+
+    print(f"   Total de registros en CSV: {registros:,}")
+    print(f"   Casos confirmados: {len(df):,}")
     return df
 
 def procesar_y_agregar(df):
-    """Agrega datos por semana y entidad"""
+    """
+    Agrega datos por semana y entidad con las mismas semanas que el ETL
+    (terminan en domingo), incluyendo tasa de incidencia y riesgo de brote
+    """
     print("\n🔄 Agregando datos por semana y estado...")
-    
-    agregado = df.groupby(['ENTIDAD_RES', 'fecha_semana']).agg({
-        'es_confirmado': 'sum',
-        'es_defuncion': 'sum'
-    }).reset_index()
-    
-    agregado.columns = ['id_region', 'fecha', 'casos_confirmados', 'defunciones']
-    
+
+    df_ts, umbral = agregar_semanal(df[['ENTIDAD_RES', 'FECHA_SIGN_SINTOMAS']])
+    df_ts['defunciones'] = 0
+
+    # Defunciones entre los confirmados, en las mismas semanas
+    if 'DEFUNCION' in df.columns:
+        fallecidos = df['DEFUNCION'].eq(1).fillna(False).to_numpy(dtype=bool)
+        df_def, _ = agregar_semanal(df.loc[fallecidos, ['ENTIDAD_RES', 'FECHA_SIGN_SINTOMAS']])
+        df_def = df_def.set_index(['ENTIDAD_RES', 'fecha_fin_semana'])['casos_confirmados']
+        llaves = pd.MultiIndex.from_frame(df_ts[['ENTIDAD_RES', 'fecha_fin_semana']])
+        df_ts['defunciones'] = df_def.reindex(llaves, fill_value=0).to_numpy()
+
+    agregado = pd.DataFrame({
+        'id_region': df_ts['ENTIDAD_RES'].astype(int),
+        'fecha_fin_semana': df_ts['fecha_fin_semana'],
+        'casos_confirmados': df_ts['casos_confirmados'].astype(int),
+        'defunciones': df_ts['defunciones'].astype(int),
+        'tasa_incidencia': np.round(df_ts['tasa_incidencia'].to_numpy(dtype=float), 4),
+        'riesgo_brote_target': df_ts['riesgo_brote_target'].astype(int)
+    })
+
     print(f"   Registros agregados: {len(agregado):,}")
-    print(f"   Rango de fechas: {agregado['fecha'].min().date()} a {agregado['fecha'].max().date()}")
+    print(f"   Rango de fechas: {agregado['fecha_fin_semana'].min().date()} a {agregado['fecha_fin_semana'].max().date()}")
     print(f"   Total casos confirmados: {agregado['casos_confirmados'].sum():,}")
-    
+    print(f"   Umbral de riesgo (P75): {umbral:.4f} por 100,000 hab.")
+
     return agregado
 
-def insertar_datos(cursor, datos, id_enfermedad):
-    """Inserta los datos en la tabla dato_epidemiologico"""
-    print("\n💾 Insertando datos epidemiológicos...")
-    
-    # NO borramos datos anteriores, agregamos usando INSERT ... ON DUPLICATE KEY UPDATE
-    
-    sql = """
-        INSERT INTO dato_epidemiologico 
-        (id_enfermedad, id_region, fecha, fecha_carga, casos_confirmados, defunciones)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-            casos_confirmados = casos_confirmados + VALUES(casos_confirmados),
-            defunciones = defunciones + VALUES(defunciones)
+def cargar_staging(cursor, datos):
+    """Crea la tabla temporal de staging y la llena en un solo executemany"""
+    cursor.execute("DROP TEMPORARY TABLE IF EXISTS carga_dengue_staging")
+    cursor.execute(CREAR_STAGING_SQL)
+    filas = list(zip(
+        datos['id_region'].tolist(),
+        datos['fecha_fin_semana'].dt.date.tolist(),
+        datos['casos_confirmados'].tolist(),
+        datos['defunciones'].tolist(),
+        datos['tasa_incidencia'].tolist(),
+        datos['riesgo_brote_target'].tolist()
+    ))
+    cursor.executemany(INSERT_STAGING_SQL, filas)
+    print(f"   Staging: {len(filas):,} semanas")
+
+def insertar_datos(conn, cursor, datos, id_enfermedad):
+    """
+    Fusiona staging con dato_epidemiologico: una sentencia y un commit por
+    año. Si la carga falla a la mitad, volver a ejecutarla es seguro.
     """
-    
-    insertados = 0
-    errores = 0
+    print("\n💾 Fusionando datos epidemiológicos por año...")
+
+    cargar_staging(cursor, datos)
     fecha_carga = datetime.now().date()
-    
-    for _, row in datos.iterrows():
-        try:
-            valores = (
-                id_enfermedad,
-                int(row['id_region']),
-                row['fecha'].strftime('%Y-%m-%d'),
-                fecha_carga,
-                int(row['casos_confirmados']),
-                int(row['defunciones'])
-            )
-            cursor.execute(sql, valores)
-            insertados += 1
-            
-            if insertados % 500 == 0:
-                print(f"   Progreso: {insertados:,} registros...")
-                
-        except mysql.connector.Error as e:
-            errores += 1
-            if errores <= 3:
-                print(f"   ⚠️ Error: {e}")
-    
-    print(f"\n✅ Insertados: {insertados:,} registros")
-    if errores > 0:
-        print(f"⚠️ Errores: {errores}")
-    
-    return insertados
+    anios = datos['fecha_fin_semana'].dt.year
+
+    fusionados = 0
+    for anio in sorted(anios.unique().tolist()):
+        cursor.execute(FUSIONAR_ANIO_SQL, (id_enfermedad, fecha_carga,
+                                           date(anio, 1, 1), date(anio + 1, 1, 1)))
+        conn.commit()
+        semanas = int((anios == anio).sum())
+        fusionados += semanas
+        # rowcount: 1 por fila nueva, 2 por fila actualizada, 0 si no cambió
+        print(f"   {anio}: {semanas:,} semanas (filas afectadas: {cursor.rowcount:,})")
+
+    print(f"\n✅ Fusionados: {fusionados:,} registros")
+    return fusionados
 
 def mostrar_resumen(cursor):
     """Muestra un resumen de los datos cargados"""
     print("\n" + "=" * 60)
     print("📊 RESUMEN DE DATOS CARGADOS")
     print("=" * 60)
-    
+
     cursor.execute("SELECT COUNT(*) FROM dato_epidemiologico")
     print(f"Total registros: {cursor.fetchone()[0]:,}")
-    
-    cursor.execute("SELECT MIN(fecha), MAX(fecha) FROM dato_epidemiologico")
+
+    cursor.execute("SELECT MIN(fecha_fin_semana), MAX(fecha_fin_semana) FROM dato_epidemiologico")
     fechas = cursor.fetchone()
     print(f"Período: {fechas[0]} a {fechas[1]}")
-    
+
     cursor.execute("SELECT SUM(casos_confirmados), SUM(defunciones) FROM dato_epidemiologico")
     totales = cursor.fetchone()
     print(f"Total casos confirmados: {totales[0]:,}")
     print(f"Total defunciones: {totales[1] or 0:,}")
-    
+
     print("\n🏆 Top 10 estados con más casos:")
     cursor.execute("""
         SELECT r.nombre, SUM(d.casos_confirmados) as total
@@ -267,44 +259,52 @@ def main():
     print("=" * 60)
     print("🦟 CARGADOR DE DATOS DE DENGUE - CSV A MySQL")
     print("=" * 60)
-    
-    # Ruta al CSV - CAMBIAR AQUÍ PARA OTROS ARCHIVOS
-    ruta_csv = r'c:\GDPS-PROEVIRA\ProeVira\data\Datos abiertos dengue_2021.csv'
-    
+
+    parser = argparse.ArgumentParser(description='Carga idempotente de casos de dengue a dato_epidemiologico')
+    parser.add_argument('ruta_csv', nargs='?', default=RUTA_POR_DEFECTO,
+                        help='Datos abiertos de dengue (.csv, .csv.gz o .zip)')
+    ruta_csv = parser.parse_args().ruta_csv
+
     if not os.path.exists(ruta_csv):
         print(f"❌ No se encontró: {ruta_csv}")
         return
-    
+
     conn = conectar_db()
     if conn is None:
         return
-    
+
     cursor = conn.cursor()
-    
+
     try:
         # 1. Insertar enfermedad
         id_enfermedad = insertar_enfermedad_dengue(cursor)
         conn.commit()
-        
-        # 2. Insertar regiones
+
+        # 2. Insertar regiones (y avisar a la API que recargue sus catálogos)
         insertar_regiones(cursor)
         conn.commit()
-        
+        incrementar_version(conn)
+
         # 3. Cargar CSV
         df = cargar_csv(ruta_csv)
-        
+
         # 4. Procesar datos
         datos = procesar_y_agregar(df)
-        
-        # 5. Insertar datos
-        insertar_datos(cursor, datos, id_enfermedad)
-        conn.commit()
-        
-        # 6. Mostrar resumen
+
+        # 5. Fusionar con dato_epidemiologico (staging + INSERT ... SELECT por año)
+        insertar_datos(conn, cursor, datos, id_enfermedad)
+
+        # 6. Recalcular dato_features desde la primera semana cargada
+        actualizar_features(conn, desde=datos['fecha_fin_semana'].min().date())
+
+        # 7. Copia analítica de los reportes (si MOTOR_REPORTES=duckdb)
+        analitica.tras_carga(conn)
+
+        # 8. Mostrar resumen
         mostrar_resumen(cursor)
-        
+
         print("\n✅ ¡PROCESO COMPLETADO EXITOSAMENTE!")
-        
+
     except Exception as e:
         print(f"\n❌ Error: {e}")
         import traceback
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Compacta un modelo Random Forest de backend/ (ver bosque_compacto.py):
+limita la profundidad, poda los árboles que menos aportan mientras la
+métrica en las semanas finales no baje más de la tolerancia (se eligen
+con la primera mitad de esas semanas y la métrica se reporta con la
+segunda, que la poda no vio), y escribe
+model.compacto.npz (o model_regressor.compacto.npz) junto al .pkl.
+
+    python scripts/compactar_modelo.py clasificador
+    python scripts/compactar_modelo.py regresor --profundidad 16 --tolerancia 0.01
+    python scripts/compactar_modelo.py clasificador --csv datos.csv --semanas 26
+    python scripts/compactar_modelo.py regresor --sin-poda
+
+Reporta tamaño en disco, tiempo y memoria de carga, árboles y nodos,
+métrica y la diferencia máxima de predicción contra el .pkl. El .pkl no
+se modifica; el servidor usa el .compacto.npz al reiniciar (o con la
+siguiente activación) salvo que USAR_MODELO_COMPACTO=0. Un modelo nuevo
+entrenado o actualizado reemplaza al compacto: hay que volver a correr
+este script.
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date
+
+import joblib
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+sys.path.append(BACKEND_DIR)
+from bosque_compacto import (MIN_ARBOLES_PODA, TOLERANCIA_PODA, BosqueCompacto, archivo_compacto,
+                             dividir_semanas, podar)
+from entrenamiento import DatosInvalidos, algoritmo_de, columnas_modelo, datos_desde_bd, preparar_datos
+from seleccion_modelos import conjunto
+
+ARCHIVOS = {
+    'clasificador': ('model.pkl', 'label_encoder.pkl'),
+    'regresor': ('model_regressor.pkl', 'label_encoder_regressor.pkl'),
+}
+
+
+def medir_carga(cargar, ruta):
+    """(modelo, segundos, MB asignados) de cargar `ruta`."""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    modelo = cargar(ruta)
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return modelo, segundos, pico / 1024 / 1024
+
+
+def nodos(modelo):
+    """Nodos de todos los árboles del bosque de sklearn."""
+    return sum(arbol.tree_.node_count for arbol in modelo.estimators_)
+
+
+def datos_validacion(tipo_modelo, args, encoder):
+    """Semanas finales (las de prueba del entrenamiento) con los features del modelo."""
+    if args.csv:
+        df = pd.read_csv(args.csv, parse_dates=['fecha_fin_semana'])
+    else:
+        df = datos_desde_bd(args.desde, None, label_encoder=encoder)
+    df, _, _ = preparar_datos(df, encoder, encoder)
+    X, y, fechas = conjunto(tipo_modelo, df)
+    semanas = np.unique(fechas)
+    recientes = fechas >= semanas[max(0, len(semanas) - args.semanas)]
+    return X[recientes], y[recientes], fechas[recientes]
+
+
+def salida(modelo, X, tipo_modelo):
+    return modelo.predict_proba(X) if tipo_modelo == 'clasificador' else modelo.predict(X)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compacta un Random Forest para servir predicciones')
+    parser.add_argument('tipo_modelo', choices=['clasificador', 'regresor'])
+    parser.add_argument('--profundidad', type=int, default=None, help='Profundidad máxima de los árboles')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_PODA,
+                        help='Pérdida máxima de accuracy (clasificador) o R² (regresor) al podar')
+    parser.add_argument('--min-arboles', type=int, default=MIN_ARBOLES_PODA,
+                        help='Árboles que conserva la poda como mínimo')
+    parser.add_argument('--sin-poda', action='store_true', help='Conservar todos los árboles')
+    parser.add_argument('--csv', help='Usar un CSV (con fecha_fin_semana) en lugar de la BD')
+    parser.add_argument('--desde', type=date.fromisoformat, default=None, help='YYYY-MM-DD (con la BD)')
+    parser.add_argument('--semanas', type=int, default=52, help='Semanas finales para validar la poda')
+    parser.add_argument('--directorio', default=BACKEND_DIR, help='Directorio del modelo activo')
+    args = parser.parse_args()
+
+    archivo_modelo, archivo_encoder = ARCHIVOS[args.tipo_modelo]
+    ruta_modelo = os.path.join(args.directorio, archivo_modelo)
+    ruta_compacta = os.path.join(args.directorio, archivo_compacto(archivo_modelo))
+    if not os.path.exists(ruta_modelo):
+        print(f"❌ No existe {ruta_modelo}")
+        return 1
+
+    # sklearn ya importado, para no contar su importación como carga del .pkl
+    import sklearn.ensemble  # noqa: F401
+    modelo, carga_pkl, memoria_pkl = medir_carga(joblib.load, ruta_modelo)
+    if algoritmo_de(modelo) != 'random_forest':
+        print("❌ Solo se compactan modelos Random Forest")
+        return 1
+    ruta_encoder = os.path.join(args.directorio, archivo_encoder)
+    encoder = joblib.load(ruta_encoder) if os.path.exists(ruta_encoder) else None
+
+    try:
+        X, y, fechas = datos_validacion(args.tipo_modelo, args, encoder)
+    except DatosInvalidos as e:
+        print(f"❌ {e}")
+        return 1
+    columnas = columnas_modelo(modelo, X.columns)
+    faltantes = [c for c in columnas if c not in X.columns]
+    if faltantes:
+        print(f"❌ Faltan features del modelo: {', '.join(faltantes)}")
+        return 1
+    X = X[columnas]
+    print(f"📊 {len(X):,} registros de validación ({args.semanas} semanas finales)")
+
+    bosque = BosqueCompacto.desde_sklearn(modelo, args.tipo_modelo, args.profundidad)
+    informe = None
+    if not args.sin_poda:
+        try:
+            seleccion, evaluacion = dividir_semanas(fechas)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+        bosque, informe = podar(bosque, X[seleccion], y[seleccion], X[evaluacion], y[evaluacion],
+                                args.tolerancia, args.min_arboles)
+    bosque.guardar(ruta_compacta)
+
+    compacto, carga_npz, memoria_npz = medir_carga(BosqueCompacto.cargar, ruta_compacta)
+    diferencia = np.max(np.abs(salida(modelo, X, args.tipo_modelo) - salida(compacto, X, args.tipo_modelo)))
+
+    mb_pkl = os.path.getsize(ruta_modelo) / 1024 / 1024
+    mb_npz = os.path.getsize(ruta_compacta) / 1024 / 1024
+    print(f"\n{'':<22}{'.pkl':>12}{'compacto':>12}")
+    print(f"{'Archivo (MB)':<22}{mb_pkl:>12.2f}{mb_npz:>12.2f}")
+    print(f"{'Carga (s)':<22}{carga_pkl:>12.3f}{carga_npz:>12.3f}")
+    print(f"{'Memoria de carga (MB)':<22}{memoria_pkl:>12.2f}{memoria_npz:>12.2f}")
+    print(f"{'Árboles':<22}{len(modelo.estimators_):>12,}{compacto.n_estimators:>12,}")
+    print(f"{'Nodos':<22}{nodos(modelo):>12,}{compacto.n_nodos:>12,}")
+    if informe:
+        print(f"{informe['metrica']:<22}{informe['antes']:>12.4f}{informe['despues']:>12.4f}")
+        print(f"   ({informe['metrica']} en {informe['registros_evaluacion']:,} registros de las semanas más "
+              f"recientes; los árboles se eligieron con {informe['registros_seleccion']:,} anteriores)")
+    print(f"\n✅ {ruta_compacta}: {mb_pkl / mb_npz:.1f}x más chico, carga {carga_pkl / max(carga_npz, 1e-9):.1f}x "
+          f"más rápida; diferencia máxima de {'probabilidad' if args.tipo_modelo == 'clasificador' else 'predicción'}"
+          f" {diferencia:.4g}")
+    print("   El servidor lo usa al reiniciar (USAR_MODELO_COMPACTO=0 para seguir con el .pkl)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+-- =====================================================
+-- Migración: particionar dato_epidemiologico por año
+-- Sistema de Predicción de Enfermedades Virales (ProeVira)
+-- =====================================================
+-- Convierte una base existente al esquema de database_schema_completo.sql:
+-- RANGE sobre YEAR(fecha_fin_semana), una partición por año y p_futuro
+-- para fechas posteriores.
+--
+-- Uso:
+--   mysql -u root -p proyecto_integrador < scripts/migracion_particionar_dato_epidemiologico.sql
+--
+-- Notas:
+--   - El ALTER final reconstruye la tabla completa (copia); correrlo en
+--     una ventana de mantenimiento.
+--   - MySQL no permite llaves foráneas en tablas InnoDB particionadas, así
+--     que se eliminan fk_dato_enfermedad, fk_dato_region y fk_dato_usuario.
+--     Los índices que las respaldaban se conservan.
+--   - La PK pasa a (id_dato, fecha_fin_semana) porque toda llave única
+--     debe incluir la columna de particionamiento.
+-- =====================================================
+
+USE proyecto_integrador;
+
+-- 1. Quitar llaves foráneas
+ALTER TABLE dato_epidemiologico
+  DROP FOREIGN KEY fk_dato_enfermedad,
+  DROP FOREIGN KEY fk_dato_region,
+  DROP FOREIGN KEY fk_dato_usuario;
+
+-- 2. PK compuesta con la columna de particionamiento
+ALTER TABLE dato_epidemiologico
+  DROP PRIMARY KEY,
+  ADD PRIMARY KEY (id_dato, fecha_fin_semana);
+
+-- 3. Particionar por año
+ALTER TABLE dato_epidemiologico
+PARTITION BY RANGE (YEAR(fecha_fin_semana)) (
+  PARTITION p2000 VALUES LESS THAN (2001),
+  PARTITION p2001 VALUES LESS THAN (2002),
+  PARTITION p2002 VALUES LESS THAN (2003),
+  PARTITION p2003 VALUES LESS THAN (2004),
+  PARTITION p2004 VALUES LESS THAN (2005),
+  PARTITION p2005 VALUES LESS THAN (2006),
+  PARTITION p2006 VALUES LESS THAN (2007),
+  PARTITION p2007 VALUES LESS THAN (2008),
+  PARTITION p2008 VALUES LESS THAN (2009),
+  PARTITION p2009 VALUES LESS THAN (2010),
+  PARTITION p2010 VALUES LESS THAN (2011),
+  PARTITION p2011 VALUES LESS THAN (2012),
+  PARTITION p2012 VALUES LESS THAN (2013),
+  PARTITION p2013 VALUES LESS THAN (2014),
+  PARTITION p2014 VALUES LESS THAN (2015),
+  PARTITION p2015 VALUES LESS THAN (2016),
+  PARTITION p2016 VALUES LESS THAN (2017),
+  PARTITION p2017 VALUES LESS THAN (2018),
+  PARTITION p2018 VALUES LESS THAN (2019),
+  PARTITION p2019 VALUES LESS THAN (2020),
+  PARTITION p2020 VALUES LESS THAN (2021),
+  PARTITION p2021 VALUES LESS THAN (2022),
+  PARTITION p2022 VALUES LESS THAN (2023),
+  PARTITION p2023 VALUES LESS THAN (2024),
+  PARTITION p2024 VALUES LESS THAN (2025),
+  PARTITION p2025 VALUES LESS THAN (2026),
+  PARTITION p2026 VALUES LESS THAN (2027),
+  PARTITION p_futuro VALUES LESS THAN MAXVALUE
+);
+
+-- 4. Verificación: registros por partición
+SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS
+FROM information_schema.PARTITIONS
+WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'dato_epidemiologico'
+ORDER BY PARTITION_ORDINAL_POSITION;
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Mantenimiento de las particiones por año de dato_epidemiologico.
+
+Agrega la partición del año siguiente (o hasta el año indicado) dividiendo
+p_futuro, para que los datos nuevos no se acumulen en la partición MAXVALUE.
+Pensado para ejecutarse periódicamente (cron / Programador de tareas):
+
+    python scripts/particiones_dato_epidemiologico.py
+    python scripts/particiones_dato_epidemiologico.py --hasta 2030
+    python scripts/particiones_dato_epidemiologico.py --listar
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+from db_config import get_db_connection
+from mantenimiento_db import asegurar_particiones, particiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Particiones anuales de dato_epidemiologico')
+    parser.add_argument('--hasta', type=int, default=None,
+                        help='Último año que debe tener partición propia (por defecto: año actual + 1)')
+    parser.add_argument('--listar', action='store_true', help='Solo mostrar las particiones actuales')
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    try:
+        actuales = particiones(conn)
+        if not actuales:
+            print("⚠️ dato_epidemiologico no está particionada.")
+            print("   Ejecuta scripts/migracion_particionar_dato_epidemiologico.sql primero.")
+            return 1
+
+        if not args.listar:
+            nuevas = asegurar_particiones(conn, args.hasta)
+            if nuevas:
+                print(f"✅ Particiones agregadas: {', '.join(nuevas)}")
+            else:
+                print("✅ Las particiones ya están al día")
+            actuales = particiones(conn)
+
+        print("\n📋 Particiones de dato_epidemiologico:")
+        for nombre, limite in actuales.items():
+            print(f"   {nombre:<10} < {limite if limite is not None else 'MAXVALUE'}")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
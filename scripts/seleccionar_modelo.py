@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Selección de hiperparámetros del clasificador o del regresor con
+validación temporal de origen móvil y búsqueda por mitades sucesivas
+(ver backend/seleccion_modelos.py).
+
+Lee dato_features de la BD (o un CSV con fecha_fin_semana), evalúa los
+candidatos en paralelo dentro del presupuesto de tiempo y muestra los
+mejores parámetros, listos para POST /api/modelos/entrenar:
+
+    python scripts/seleccionar_modelo.py clasificador
+    python scripts/seleccionar_modelo.py regresor --desde 2022-01-01 --presupuesto 300
+    python scripts/seleccionar_modelo.py clasificador --candidatos 60 --salida mejores.json
+    python scripts/seleccionar_modelo.py regresor --algoritmo hist_gradient_boosting
+
+Los resultados quedan en caché por versión de los datos: repetir la
+búsqueda sin datos nuevos solo entrena lo que no se había evaluado.
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import date
+
+import pandas as pd
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+sys.path.append(BACKEND_DIR)
+from entrenamiento import ALGORITMO_POR_DEFECTO, ALGORITMOS, DatosInvalidos, datos_desde_bd, preparar_datos
+from seleccion_modelos import METRICAS, buscar, conjunto
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Búsqueda de hiperparámetros con validación temporal')
+    parser.add_argument('tipo_modelo', choices=['clasificador', 'regresor'])
+    parser.add_argument('--algoritmo', choices=sorted(ALGORITMOS), default=ALGORITMO_POR_DEFECTO)
+    parser.add_argument('--csv', help='Usar un CSV (con fecha_fin_semana) en lugar de la BD')
+    parser.add_argument('--desde', type=date.fromisoformat, default=None, help='YYYY-MM-DD')
+    parser.add_argument('--hasta', type=date.fromisoformat, default=None, help='YYYY-MM-DD')
+    parser.add_argument('--pliegues', type=int, default=4, help='Pliegues de origen móvil')
+    parser.add_argument('--candidatos', type=int, default=27, help='Candidatos de la primera ronda')
+    parser.add_argument('--factor', type=int, default=3, help='Se conserva 1/factor de los candidatos por ronda')
+    parser.add_argument('--arboles-min', type=int, default=25, help='n_estimators / max_iter de la primera ronda')
+    parser.add_argument('--arboles-max', type=int, default=200)
+    parser.add_argument('--presupuesto', type=float, default=600, help='Segundos de reloj (0 = sin límite)')
+    parser.add_argument('--metrica', choices=sorted(METRICAS), default=None)
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--cache', default=os.path.join(os.getenv('MODELOS_DIR', os.path.join(BACKEND_DIR, 'modelos')),
+                                                        'seleccion'),
+                        help='Directorio de la matriz compartida y los resultados')
+    parser.add_argument('--salida', help='Guardar el resultado completo en este JSON')
+    args = parser.parse_args()
+
+    try:
+        if args.csv:
+            df = pd.read_csv(args.csv, parse_dates=['fecha_fin_semana'])
+        else:
+            df = datos_desde_bd(args.desde, args.hasta)
+        df, _, _ = preparar_datos(df)
+        X, y, fechas = conjunto(args.tipo_modelo, df)
+
+        print(f"📊 {len(X):,} registros, {X.shape[1]} features, {len(set(fechas)):,} semanas")
+        resultado = buscar(
+            args.tipo_modelo, X, y, fechas, args.cache,
+            n_candidatos=args.candidatos, factor=args.factor,
+            arboles_min=args.arboles_min, arboles_max=args.arboles_max,
+            n_pliegues=args.pliegues, presupuesto=args.presupuesto or None,
+            n_jobs=args.n_jobs, metrica=args.metrica, algoritmo=args.algoritmo
+        )
+    except DatosInvalidos as e:
+        print(f"❌ {e}")
+        return 1
+
+    if resultado['presupuesto_agotado']:
+        print("⚠️ Se agotó el presupuesto de tiempo; el resultado es el de la última ronda evaluada")
+    print(f"\n🏆 {ALGORITMOS[args.algoritmo]} - mejor {resultado['metrica']}: {resultado['puntaje']:.4f} ± {resultado['desviacion']:.4f}")
+    print(f"   Parámetros: {json.dumps(resultado['mejores_parametros'])}")
+    for pliegue in resultado['pliegues']:
+        print(f"   Pliegue {pliegue['desde']} a {pliegue['hasta']}: "
+              f"{pliegue['entrenamiento']:,} entrenamiento / {pliegue['prueba']:,} prueba")
+    print(f"   Versión de datos: {resultado['version_datos']} ({resultado['segundos']} s)")
+    print("\n   Para entrenar con ellos, enviar en POST /api/modelos/entrenar:")
+    print(f'   "tipo_algoritmo": "{args.algoritmo}", "parametros": {json.dumps(resultado["mejores_parametros"])}')
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f"💾 Resultado guardado en {args.salida}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
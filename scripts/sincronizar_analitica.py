@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Reconstruye la copia en DuckDB de dato_epidemiologico y region que usan
+los reportes con MOTOR_REPORTES=duckdb (ver backend/analitica.py).
+
+Las cargas de la API, los trabajos de carga, el ETL y
+cargar_datos_epidemiologicos.py ya la sincronizan; este script sirve para
+crearla la primera vez o después de modificar dato_epidemiologico a mano:
+
+    python scripts/sincronizar_analitica.py
+    python scripts/sincronizar_analitica.py --archivo /var/lib/proevira/analitica.duckdb
+
+El servidor abre el archivo nuevo en la siguiente petición, sin reiniciar.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+import analitica
+from db_config import get_lectura_connection
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sincronizar la copia analítica en DuckDB')
+    parser.add_argument('--archivo', default=analitica.ARCHIVO,
+                        help='Archivo DuckDB (por defecto ANALITICA_DUCKDB o backend/analitica.duckdb)')
+    args = parser.parse_args()
+
+    if not analitica.disponible():
+        print("❌ duckdb no está instalado (pip install duckdb)")
+        return 1
+    analitica.ARCHIVO = args.archivo
+
+    conn = get_lectura_connection()
+    if conn is None:
+        print("❌ No se pudo conectar a MySQL")
+        return 1
+    inicio = time.perf_counter()
+    try:
+        filas = analitica.sincronizar(conn)
+    finally:
+        conn.close()
+    mb = os.path.getsize(args.archivo) / 1024 / 1024
+    print(f"✅ {args.archivo}: {filas:,} registros en {time.perf_counter() - inicio:.1f}s ({mb:.1f} MB)")
+    if analitica.MOTOR_REPORTES != 'duckdb':
+        print("   Los reportes lo usan con MOTOR_REPORTES=duckdb")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
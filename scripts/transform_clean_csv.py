@@ -5,57 +5,33 @@
 
 import pandas as pd
 import numpy as np
+import io
 import os
+import sys
 from datetime import datetime
-from calendar import monthrange
 
 # Directorios
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_DIR = os.path.dirname(SCRIPT_DIR)  # ProeVira/
+
+# Catálogo compartido de estados (backend/catalogo_estados.py)
+sys.path.append(os.path.join(PROJECT_DIR, 'backend'))
+from archivos_entrada import detectar_codificacion
+from catalogo_estados import POBLACION_ARRAY, resolve_many
+
 SOURCE_DIR = os.path.join(PROJECT_DIR, 'csv')  # CSVs limpios en ProeVira/csv/
 OUTPUT_DIR = os.path.join(PROJECT_DIR, 'data')
 
 print(f"📂 Directorio fuente (CSVs limpios): {SOURCE_DIR}")
 print(f"📂 Directorio destino: {OUTPUT_DIR}")
 
-# Mapeo de nombres de estado a códigos INEGI (1-32)
-ESTADO_A_INEGI = {
-    'aguascalientes': 1, 'baja california': 2, 'baja california sur': 3,
-    'campeche': 4, 'coahuila': 5, 'coahuila de zaragoza': 5, 'colima': 6,
-    'chiapas': 7, 'chihuahua': 8, 'ciudad de mexico': 9, 'ciudad de méxico': 9,
-    'distrito federal': 9, 'cdmx': 9, 'durango': 10, 'guanajuato': 11,
-    'guerrero': 12, 'hidalgo': 13, 'jalisco': 14, 'mexico': 15, 'méxico': 15,
-    'estado de mexico': 15, 'estado de méxico': 15, 'michoacan': 16,
-    'michoacán': 16, 'michoacán de ocampo': 16, 'morelos': 17, 'nayarit': 18,
-    'nuevo leon': 19, 'nuevo león': 19, 'oaxaca': 20, 'puebla': 21,
-    'queretaro': 22, 'querétaro': 22, 'quintana roo': 23, 'san luis potosi': 24,
-    'san luis potosí': 24, 'sinaloa': 25, 'sonora': 26, 'tabasco': 27,
-    'tamaulipas': 28, 'tlaxcala': 29, 'veracruz': 30,
-    'veracruz de ignacio de la llave': 30, 'yucatan': 31, 'yucatán': 31,
-    'zacatecas': 32
-}
-
-# Población 2025 para cálculo de TI (promedio aproximado)
-POBLACION = {
-    1: 1512400, 2: 3968300, 3: 850700, 4: 1011800, 5: 3328500, 6: 775100,
-    7: 6000100, 8: 3998500, 9: 9386700, 10: 1913400, 11: 6555200, 12: 3724300,
-    13: 3327600, 14: 8847600, 15: 18016500, 16: 4975800, 17: 2056000, 18: 1294800,
-    19: 6231200, 20: 4432900, 21: 6886400, 22: 2603300, 23: 1989500, 24: 2931400,
-    25: 3274600, 26: 3154100, 27: 2601900, 28: 3682900, 29: 1421000, 30: 8871300,
-    31: 2561900, 32: 1698200
-}
+# Población 2025 para cálculo de TI: catalogo_estados.POBLACION_ARRAY
 
 # Meses en español
 MESES = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
 MESES_NUM = {mes: i+1 for i, mes in enumerate(MESES)}
 
 
-def get_last_day_of_month(year, month):
-    """Obtiene el último día del mes."""
-    _, last_day = monthrange(year, month)
-    return datetime(year, month, last_day)
-
-
 def clean_numeric(value):
     """Limpia y convierte un valor numérico."""
     if pd.isna(value):
@@ -71,46 +47,38 @@ def clean_numeric(value):
         return 0
 
 
-def get_estado_id(estado_name):
-    """Obtiene el código INEGI de un estado."""
-    if not estado_name or pd.isna(estado_name):
-        return None
-    
-    # Limpiar nombre
-    nombre = str(estado_name).strip().lower()
-    # Quitar números y caracteres especiales al final
-    nombre = ''.join(c for c in nombre if not c.isdigit()).strip()
-    
-    # Buscar en el mapeo
-    if nombre in ESTADO_A_INEGI:
-        return ESTADO_A_INEGI[nombre]
-    
-    # Buscar coincidencia parcial
-    for key, value in ESTADO_A_INEGI.items():
-        if key in nombre or nombre in key:
-            return value
-    
-    return None
+def resolver_estados(serie):
+    """
+    Resuelve una columna de nombres de estado a códigos INEGI con el
+    catálogo compartido (0 = no reconocido o fila de totales).
+    """
+    ids_region = resolve_many(serie, parcial=True)
+    ids_region[serie.astype(str).str.lower().str.startswith('total').to_numpy()] = 0
+    return ids_region
+
+
+def limpiar_columna_numerica(columna):
+    """Versión vectorizada de clean_numeric para una columna completa."""
+    if pd.api.types.is_numeric_dtype(columna):
+        return columna.astype(float).fillna(0).to_numpy()
+    texto = columna.astype(str).str.strip().str.replace(' ', '').str.replace(',', '')
+    valores = pd.to_numeric(texto, errors='coerce')
+    valores[columna.isna()] = 0
+    return valores.fillna(0).to_numpy(dtype=float)
 
 
 def process_csv(file_path, year):
-    """Procesa un archivo CSV y retorna registros normalizados."""
+    """Procesa un archivo CSV y retorna un DataFrame de registros semanales normalizados."""
     print(f"📄 Procesando: {os.path.basename(file_path)} (año {year})")
     
     try:
-        # Intentar diferentes encodings
-        for encoding in ['utf-8', 'latin-1', 'cp1252']:
-            try:
-                df = pd.read_csv(file_path, encoding=encoding)
-                break
-            except UnicodeDecodeError:
-                continue
-        else:
-            print(f"   ❌ Error de encoding")
-            return []
+        # Leer una sola vez y detectar el encoding sobre los bytes
+        with open(file_path, 'rb') as f:
+            datos = f.read()
+        df = pd.read_csv(io.BytesIO(datos), encoding=detectar_codificacion(datos))
     except Exception as e:
         print(f"   ❌ Error leyendo archivo: {e}")
-        return []
+        return None
     
     # Normalizar columnas
     df.columns = [str(c).strip() for c in df.columns]
@@ -134,68 +102,59 @@ def process_csv(file_path, year):
     if not estado_col:
         estado_col = df.columns[0]
     
-    records = []
+    # Resolver estados e ignorar filas no reconocidas o de totales
+    ids_region = resolver_estados(df[estado_col])
+    filas = np.flatnonzero(ids_region)
+    df = df.iloc[filas]
+    ids_region = ids_region[filas]
     
-    for _, row in df.iterrows():
-        estado = row[estado_col]
-        id_region = get_estado_id(estado)
-        
-        if not id_region:
-            continue
-        
-        # Ignorar filas de totales
-        if str(estado).lower().startswith('total'):
-            continue
-        
-        poblacion = POBLACION.get(id_region, 1000000)
-        
-        # Procesar cada mes - GENERAR 4 SEMANAS POR MES
-        for mes_num, col_name in mes_cols.items():
-            casos_mes = clean_numeric(row.get(col_name, 0))
-            
-            if casos_mes <= 0:
-                continue
-            
-            # Validar: máximo 50,000 casos por mes
-            if casos_mes > 50000:
-                print(f"   ⚠️  Valor alto ignorado: {estado} {year}-{mes_num:02d} = {casos_mes:,.0f}")
-                continue
-            
-            # Dividir casos mensuales en 4 semanas (distribución uniforme)
-            casos_por_semana = casos_mes / 4.0
-            
-            # Generar 4 registros semanales por mes
-            for semana in range(4):
-                # Calcular fecha de fin de semana (aproximado)
-                # Semana 1: día 7, Semana 2: día 14, Semana 3: día 21, Semana 4: último día del mes
-                if semana < 3:
-                    dia = 7 * (semana + 1)
-                    fecha = datetime(year, mes_num, dia)
-                else:
-                    fecha = get_last_day_of_month(year, mes_num)
-                
-                # Redondear casos (puede variar ligeramente por semana)
-                if semana < 3:
-                    casos_semana = int(round(casos_por_semana))
-                else:
-                    # Última semana toma el resto para que sumen el total mensual
-                    casos_semana = int(casos_mes - (int(round(casos_por_semana)) * 3))
-                
-                tasa_incidencia = min((casos_semana / poblacion) * 100000, 1000.0)
-                riesgo = 1 if tasa_incidencia > 5 else 0
-                
-                records.append({
-                    'id_enfermedad': 1,
-                    'id_region': id_region,
-                    'fecha_fin_semana': fecha,
-                    'casos_confirmados': casos_semana,
-                    'defunciones': 0,
-                    'tasa_incidencia': round(tasa_incidencia, 4),
-                    'riesgo_brote_target': riesgo
-                })
-    
-    print(f"   ✅ {len(records)} registros extraídos")
-    return records
+    # Matriz (filas x meses) con los casos mensuales
+    meses = np.array(list(mes_cols.keys()), dtype=np.int64)
+    if len(meses) == 0 or len(df) == 0:
+        print(f"   ✅ 0 registros extraídos")
+        return None
+    casos_mes = np.column_stack([limpiar_columna_numerica(df[col]) for col in mes_cols.values()])
+    
+    # Validar: máximo 50,000 casos por mes
+    for fila, m in zip(*np.nonzero(casos_mes > 50000)):
+        print(f"   ⚠️  Valor alto ignorado: {df[estado_col].iloc[fila]} {year}-{meses[m]:02d} = {casos_mes[fila, m]:,.0f}")
+    
+    # Celdas válidas en orden fila -> mes (el mismo orden del recorrido original)
+    fila_idx, mes_idx = np.nonzero((casos_mes > 0) & (casos_mes <= 50000))
+    casos = casos_mes[fila_idx, mes_idx]
+    id_region = ids_region[fila_idx]
+    mes_num = meses[mes_idx]
+    
+    # Dividir casos mensuales en 4 semanas: 3 semanas redondeadas y la última
+    # toma el resto para que sumen el total mensual
+    casos_redondeados = np.round(casos / 4.0)
+    casos_semana = np.empty((len(casos), 4), dtype=np.int64)
+    casos_semana[:, :3] = casos_redondeados[:, None].astype(np.int64)
+    casos_semana[:, 3] = np.trunc(casos - casos_redondeados * 3).astype(np.int64)
+    
+    # Fechas: días 7, 14 y 21, y el último día del mes para la semana 4
+    inicio_mes = np.datetime64(f'{year}-01', 'M') + (mes_num - 1)
+    dias = np.empty((len(casos), 4), dtype='timedelta64[D]')
+    dias[:, :3] = np.array([6, 13, 20], dtype='timedelta64[D]')
+    dias[:, 3] = (inicio_mes + 1).astype('datetime64[D]') - inicio_mes.astype('datetime64[D]') - 1
+    fechas = inicio_mes.astype('datetime64[D]')[:, None] + dias
+    
+    poblacion = POBLACION_ARRAY[id_region][:, None]
+    tasa_incidencia = np.minimum((casos_semana / poblacion) * 100000, 1000.0)
+    
+    n = casos_semana.size
+    resultado = pd.DataFrame({
+        'id_enfermedad': np.ones(n, dtype=np.int64),
+        'id_region': np.repeat(id_region, 4),
+        'fecha_fin_semana': fechas.ravel().astype('datetime64[ns]'),
+        'casos_confirmados': casos_semana.ravel(),
+        'defunciones': np.zeros(n, dtype=np.int64),
+        'tasa_incidencia': np.round(tasa_incidencia.ravel(), 4),
+        'riesgo_brote_target': (tasa_incidencia.ravel() > 5).astype(np.int64)
+    })
+    
+    print(f"   ✅ {len(resultado)} registros extraídos")
+    return resultado
 
 
 def transform_all(start_year=2000, end_year=2020):
@@ -204,7 +163,7 @@ def transform_all(start_year=2000, end_year=2020):
     print("🔄 TRANSFORMACIÓN DE CSVs LIMPIOS (2000-2020)")
     print("="*70 + "\n")
     
-    all_records = []
+    all_frames = []
     years_processed = []
     
     for year in range(start_year, end_year + 1):
@@ -214,17 +173,17 @@ def transform_all(start_year=2000, end_year=2020):
             print(f"⚠️  Archivo no encontrado: dengue_{year}.csv")
             continue
         
-        records = process_csv(file_path, year)
-        if records:
-            all_records.extend(records)
+        df_year = process_csv(file_path, year)
+        if df_year is not None and len(df_year) > 0:
+            all_frames.append(df_year)
             years_processed.append(year)
     
-    if not all_records:
+    if not all_frames:
         print("\n❌ No se procesaron registros.")
         return None
     
-    # Crear DataFrame
-    df = pd.DataFrame(all_records)
+    # Consolidar DataFrame
+    df = pd.concat(all_frames, ignore_index=True)
     df = df.sort_values(['fecha_fin_semana', 'id_region'])
     df['fecha_carga'] = datetime.now().strftime('%Y-%m-%d')
     
@@ -12,61 +12,25 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
 from datetime import datetime, timedelta
 from calendar import monthrange
 
 # Obtener directorios
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_DIR = os.path.dirname(SCRIPT_DIR)  # ProeVira/
+
+# Catálogo compartido de estados (backend/catalogo_estados.py)
+sys.path.append(os.path.join(PROJECT_DIR, 'backend'))
+from archivos_entrada import abrir_csv
+from catalogo_estados import resolve_many
+
 SOURCE_DIR = os.path.join(os.path.dirname(PROJECT_DIR), 'Conversor_PDF_CSV', 'csv')
 OUTPUT_DIR = os.path.join(PROJECT_DIR, 'data')
 
 print(f"📂 Directorio fuente (CSVs históricos): {SOURCE_DIR}")
 print(f"📂 Directorio destino (datos modelo): {OUTPUT_DIR}")
 
-# Mapeo de nombres de estado a códigos INEGI (1-32)
-ESTADO_A_INEGI = {
-    'Aguascalientes': 1,
-    'Baja California': 2,
-    'Baja California Sur': 3,
-    'Campeche': 4,
-    'Coahuila': 5,
-    'Coahuila de Zaragoza': 5,
-    'Colima': 6,
-    'Chiapas': 7,
-    'Chihuahua': 8,
-    'Distrito Federal': 9,
-    'Ciudad de México': 9,
-    'Durango': 10,
-    'Guanajuato': 11,
-    'Guerrero': 12,
-    'Guerrero 1': 12,  # Variante encontrada en algunos años
-    'Hidalgo': 13,
-    'Jalisco': 14,
-    'México': 15,
-    'Michoacán': 16,
-    'Michoacán de Ocampo': 16,
-    'Morelos': 17,
-    'Nayarit': 18,
-    'Nuevo León': 19,
-    'Oaxaca': 20,
-    'Puebla': 21,
-    'Queretaro': 22,
-    'Querétaro': 22,
-    'Quintana Roo': 23,
-    'San Luis Potosi': 24,
-    'San Luis Potosí': 24,
-    'Sinaloa': 25,
-    'Sonora': 26,
-    'Tabasco': 27,
-    'Tamaulipas': 28,
-    'Tlaxcala': 29,
-    'Veracruz': 30,
-    'Veracruz de Ignacio de la Llave': 30,
-    'Yucatán': 31,
-    'Zacatecas': 32
-}
-
 # Población histórica aproximada por estado (promedio para cálculo de TI)
 # Usamos datos aproximados de INEGI/CONAPO para el período 2000-2019
 POBLACION_HISTORICA = {
@@ -111,7 +75,9 @@ def transform_year(year, source_dir):
         return None
     
     try:
-        df = pd.read_csv(file_path)
+        # Codificación detectada sobre los bytes iniciales (sin reintentos)
+        with abrir_csv(file_path) as entrada:
+            df = pd.read_csv(entrada.flujo, encoding=entrada.codificacion)
         print(f"📄 Procesando dengue_{year}.csv ({len(df)} filas)")
     except Exception as e:
         print(f"❌ Error leyendo dengue_{year}.csv: {e}")
@@ -119,7 +85,10 @@ def transform_year(year, source_dir):
     
     records = []
     
-    for _, row in df.iterrows():
+    # Resolver todos los nombres de estado de una vez (catálogo normalizado)
+    ids_region = resolve_many(df['Estado'], parcial=True) if 'Estado' in df.columns else np.zeros(len(df), dtype=np.int64)
+    
+    for (_, row), id_region in zip(df.iterrows(), ids_region):
         estado = str(row.get('Estado', '')).strip()
         
         # Ignorar filas de totales, notas o vacías
@@ -128,22 +97,12 @@ def transform_year(year, source_dir):
         if 'Tasa*' in estado or 'habitantes' in estado.lower():
             continue
         
-        # Buscar código INEGI
-        id_region = None
-        for nombre, codigo in ESTADO_A_INEGI.items():
-            if nombre.lower() in estado.lower() or estado.lower() in nombre.lower():
-                id_region = codigo
-                break
-        
-        if id_region is None:
-            # Intentar match exacto
-            id_region = ESTADO_A_INEGI.get(estado)
-        
-        if id_region is None:
+        if not id_region:
             print(f"   ⚠️  Estado no reconocido: '{estado}' (año {year})")
             continue
         
         # Obtener población para el estado
+        id_region = int(id_region)
         poblacion = POBLACION_HISTORICA.get(id_region, 1000000)
         
         # Procesar cada mes
@@ -135,14 +135,25 @@ const Configuracion = () => {
     setGuardando(true);
     setMensaje(null);
     
-    const formData = new FormData();
-    formData.append('archivo', archivo);
-    
-    try {
-      const response = await fetch(`${API_URL}/datos/cargar-csv`, {
+    // Con el token de la vista previa el backend no vuelve a procesar el archivo
+    const enviarCarga = (conArchivo) => {
+      const formData = new FormData();
+      if (conArchivo) {
+        formData.append('archivo', archivo);
+      } else {
+        formData.append('token_carga', csvProcesado.token_carga);
+      }
+      return fetch(`${API_URL}/datos/cargar-csv`, {
         method: 'POST',
         body: formData
       });
+    };
+    
+    try {
+      let response = await enviarCarga(!csvProcesado?.token_carga);
+      if (response.status === 410) {
+        response = await enviarCarga(true);
+      }
       
       const data = await response.json();
       
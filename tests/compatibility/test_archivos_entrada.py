@@ -0,0 +1,69 @@
+"""
+Compatibilidad de archivos de entrada: CSV planos, .gz y .zip con acentos
+en utf-8 o cp1252 que aparecen después de la muestra con la que
+backend/archivos_entrada.py detecta la codificación.
+
+    python -m pytest tests/compatibility
+"""
+
+import gzip
+import io
+import sys
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / 'backend'))
+from archivos_entrada import TAMANO_MUESTRA, _DecodificadorFlujo, abrir_csv
+
+ENCABEZADO = b'ENTIDAD_RES,CASOS\n'
+FILA_ASCII = b'Aguascalientes,1\n'
+# Filas ASCII suficientes para llenar la muestra completa
+RELLENO = FILA_ASCII * (TAMANO_MUESTRA // len(FILA_ASCII) + 100)
+
+
+def comprimir(datos, compresion):
+    if compresion == 'gzip':
+        return gzip.compress(datos)
+    if compresion == 'zip':
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archivo:
+            archivo.writestr('datos.csv', datos)
+        return buffer.getvalue()
+    return datos
+
+
+def leer(datos, chunksize=None):
+    with abrir_csv(io.BytesIO(datos)) as entrada:
+        if chunksize is None:
+            return pd.read_csv(entrada.flujo, encoding=entrada.codificacion)
+        return pd.concat(pd.read_csv(entrada.flujo, encoding=entrada.codificacion, chunksize=chunksize))
+
+
+@pytest.mark.parametrize('compresion', [None, 'gzip', 'zip'])
+@pytest.mark.parametrize('codificacion', ['cp1252', 'utf-8'])
+def test_acentos_despues_de_la_muestra(compresion, codificacion):
+    cola = 'Michoacán,2\nQuerétaro,3\n'.encode(codificacion)
+    df = leer(comprimir(ENCABEZADO + RELLENO + cola, compresion), chunksize=50000)
+    assert df['ENTIDAD_RES'].iloc[-2:].tolist() == ['Michoacán', 'Querétaro']
+    assert len(df) == RELLENO.count(b'\n') + 2
+
+
+def test_bytes_que_cp1252_no_define():
+    df = leer(ENCABEZADO + RELLENO + 'Puebla €,4\n'.encode('cp1252') + b'\x81\x90,5\n')
+    assert df['ENTIDAD_RES'].iloc[-2:].tolist() == ['Puebla €', '\x81\x90']
+
+
+def test_archivo_menor_a_la_muestra():
+    assert abrir_csv(io.BytesIO('a\nñ\n'.encode('cp1252'))).codificacion == 'cp1252'
+    assert abrir_csv(io.BytesIO('a\nñ\n'.encode('utf-8'))).codificacion == 'utf-8'
+
+
+def test_secuencia_utf8_cortada_entre_bloques():
+    decodificador = _DecodificadorFlujo()
+    datos = 'año ñandú'.encode('utf-8')
+    texto = ''.join(decodificador.decode(datos[i:i + 1]) for i in range(len(datos)))
+    assert texto + decodificador.decode(b'', final=True) == 'año ñandú'
+    assert not decodificador.cp1252